@@ -0,0 +1,83 @@
+"""
+Helpers shared by the benchmarks
+
+Importing this module puts the source checkout on sys.path, so the
+benchmarks run against it without installing tflink.
+"""
+
+import argparse
+import multiprocessing
+import sys
+from pathlib import Path
+from typing import Any, Dict, Sequence, Tuple
+
+# Allow running from a source checkout
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from tests.fake_server import FakeServer  # noqa: E402
+
+
+def argument_parser(doc: str) -> argparse.ArgumentParser:
+    """Argument parser described by the summary line of a benchmark's docstring"""
+    return argparse.ArgumentParser(description=doc.splitlines()[1])
+
+
+def _serve(conn, settings: Dict[str, Any]) -> None:
+    """
+    Run a discarding stand-in server until the parent closes the pipe
+
+    Each message from the parent is a sequence of counter names; the reply
+    holds their values, and the counters are reset to 0.
+    """
+    with FakeServer(store=False) as server:
+        for name, value in settings.items():
+            setattr(server, name, value)
+        conn.send(server.url)
+        try:
+            while True:
+                names = conn.recv()
+                conn.send(tuple(getattr(server, name) for name in names))
+                for name in names:
+                    setattr(server, name, 0)
+        except EOFError:
+            pass
+
+
+class ServerProcess:
+    """
+    Discarding stand-in server running in a child process
+
+    The server gets its own interpreter, so its request handling does not
+    compete with the client being measured for this process's GIL.
+
+    Args:
+        **settings: FakeServer attributes to set, e.g. delay or bandwidth_limit
+
+    Example:
+        with ServerProcess(delay=0.1) as server:
+            client = TFLinkClient(base_url=server.url)
+    """
+
+    def __init__(self, **settings: Any):
+        self.settings = settings
+        self.url = ''
+        self._conn = None
+        self._process = None
+
+    def __enter__(self) -> 'ServerProcess':
+        self._conn, child = multiprocessing.Pipe()
+        self._process = multiprocessing.Process(
+            target=_serve, args=(child, self.settings), daemon=True
+        )
+        self._process.start()
+        self.url = self._conn.recv()
+        return self
+
+    def take(self, names: Sequence[str]) -> Tuple[Any, ...]:
+        """Return the server's counters called names and reset them to 0"""
+        self._conn.send(tuple(names))
+        return self._conn.recv()
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self._conn.close()
+        self._process.join(timeout=5)
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Benchmark: fixed max_workers against adaptive concurrency on a capped link
+
+The local stand-in server runs in a separate process, shares a simulated
+bandwidth cap between all upload bodies it reads, takes --delay seconds to
+answer each upload (server-side work that overlaps between uploads) and
+answers 429 once more than --max-concurrent uploads are in progress. Too few
+workers leave the link idle during that delay, too many only queue on the
+link and trip the 429s. Each fixed worker count and the adaptive controller
+upload the same batch; MB/s counts successful uploads only. The adaptive
+run also prints how its limit moved.
+
+Usage:
+    python benchmarks/bench_adaptive.py
+    python benchmarks/bench_adaptive.py --files 400 --size-kb 256 --link-mb 8 --delay 0.1
+"""
+
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+# Puts the source checkout on sys.path for the tflink imports below
+from _common import ServerProcess, argument_parser
+from tflink import AdaptiveConcurrency, TFLinkClient, UploadEngine
+
+
+def run(url: str, paths, workers: int, adaptive: bool):
+    """Upload paths; return (seconds, failed uploads, limits sampled over time)"""
+    client = TFLinkClient(base_url=url, pool_size=workers)
+    concurrency = AdaptiveConcurrency(max_limit=workers) if adaptive else None
+    limits = []
+    with UploadEngine(client, max_workers=workers, max_queue=len(paths),
+                      concurrency=concurrency) as engine:
+        done = threading.Event()
+
+        def sample() -> None:
+            while not done.wait(0.25):
+                limits.append(engine.stats()['limit'])
+
+        sampler = threading.Thread(target=sample, daemon=True)
+        sampler.start()
+        started = time.monotonic()
+        futures = [engine.submit(path) for path in paths]
+        failed = sum(1 for f in futures if f.exception() is not None)
+        elapsed = time.monotonic() - started
+        done.set()
+        sampler.join()
+    client.close()
+    return elapsed, failed, limits
+
+
+def main() -> None:
+    parser = argument_parser(__doc__)
+    parser.add_argument('--files', type=int, default=300)
+    parser.add_argument('--size-kb', type=int, default=256)
+    parser.add_argument('--link-mb', type=float, default=8.0, help="simulated link, MB/s")
+    parser.add_argument('--delay', type=float, default=0.1, help="server time per upload, s")
+    parser.add_argument('--max-concurrent', type=int, default=12)
+    parser.add_argument('--workers', default='1,2,4,8,16,32')
+    args = parser.parse_args()
+
+    link = ServerProcess(bandwidth_limit=args.link_mb * 1024 * 1024, delay=args.delay,
+                         max_concurrent=args.max_concurrent)
+    with link as server:
+        url = server.url
+        with tempfile.TemporaryDirectory() as tmp:
+            block = os.urandom(args.size_kb * 1024)
+            paths = []
+            for i in range(args.files):
+                path = Path(tmp) / f'file{i:05d}.bin'
+                path.write_bytes(block)
+                paths.append(path)
+
+            print(f"{args.files} x {args.size_kb} KB over a {args.link_mb} MB/s link, "
+                  f"{args.delay * 1000:.0f} ms server time, 429 above "
+                  f"{args.max_concurrent} concurrent uploads")
+            print(f"{'workers':<16}  {'MB/s':>6}  {'failed':>6}  {'429s':>5}  {'peak':>4}")
+            ceiling = max(int(w) for w in args.workers.split(','))
+            runs = [(int(w), False) for w in args.workers.split(',')] + [(ceiling, True)]
+            for workers, adaptive in runs:
+                elapsed, failed, limits = run(url, paths, workers, adaptive)
+                rejected, peak = server.take(('rejected_429', 'peak_concurrent'))
+                name = f"adaptive (<={workers})" if adaptive else str(workers)
+                goodput = (args.files - failed) * args.size_kb / 1024 / elapsed
+                print(f"{name:<16}  {goodput:>6.2f}  {failed:>6}  {rejected:>5}  {peak:>4}")
+                if adaptive:
+                    print(f"limit every 0.25s: {limits}")
+
+
+if __name__ == '__main__':
+    main()
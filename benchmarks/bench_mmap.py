@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Benchmark: memory and CPU of memory-mapped uploads against buffered reads
+
+Uploads one file from several threads at once (as when it goes to several
+accounts) to the local stand-in server, which runs in a separate process and
+discards the data. While the uploads run, /proc/self/status is sampled for
+the peak anonymous (heap) and file-backed resident memory of the client;
+CPU time is reported per GB sent. Buffered reads allocate a chunk-sized
+buffer per read in every upload; memory_map=True sends slices of a shared
+mapping of the file. Linux only.
+
+Usage:
+    python benchmarks/bench_mmap.py --size-mb 256 --uploads 4
+    python benchmarks/bench_mmap.py --size-mb 256 --uploads 4 --chunk-mb 4
+"""
+
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+# Puts the source checkout on sys.path for the tflink imports below
+from _common import ServerProcess, argument_parser
+from tflink import TFLinkClient
+
+
+def resident_kb() -> dict:
+    """Current RssAnon and RssFile of this process in kB"""
+    values = {}
+    with open('/proc/self/status') as f:
+        for line in f:
+            if line.startswith(('RssAnon:', 'RssFile:')):
+                name, value = line.split(':')
+                values[name] = int(value.split()[0])
+    return values
+
+
+class PeakSampler(threading.Thread):
+    """Record the peak of resident_kb() above a baseline until stopped"""
+
+    def __init__(self, interval: float = 0.005):
+        super().__init__(daemon=True)
+        self.interval = interval
+        self.baseline = resident_kb()
+        self.peak = {name: 0 for name in self.baseline}
+        self.done = threading.Event()
+
+    def run(self) -> None:
+        while not self.done.wait(self.interval):
+            for name, value in resident_kb().items():
+                self.peak[name] = max(self.peak[name], value - self.baseline[name])
+
+
+def measure(url: str, path: Path, size: int, uploads: int, chunk_size: int, memory_map: bool):
+    """Return (MB/s, user s/GB, system s/GB, peak RssAnon MB, peak RssFile MB)"""
+    with TFLinkClient(base_url=url, memory_map=memory_map, chunk_size=chunk_size,
+                      pool_size=uploads, max_file_size=size + 1) as client:
+        client.upload(path)  # connect and warm the page cache
+        with ThreadPoolExecutor(uploads) as pool:
+            sampler = PeakSampler()
+            sampler.start()
+            wall = time.monotonic()
+            before = os.times()
+            list(pool.map(lambda _: client.upload(path), range(uploads)))
+            after = os.times()
+            wall = time.monotonic() - wall
+            sampler.done.set()
+            sampler.join()
+    gb = size * uploads / 1024 ** 3
+    return (
+        size * uploads / wall / 1024 / 1024,
+        (after.user - before.user) / gb,
+        (after.system - before.system) / gb,
+        sampler.peak['RssAnon'] / 1024,
+        sampler.peak['RssFile'] / 1024,
+    )
+
+
+def main() -> None:
+    parser = argument_parser(__doc__)
+    parser.add_argument('--size-mb', type=int, default=256)
+    parser.add_argument('--uploads', type=int, default=4, help="concurrent uploads of the file")
+    parser.add_argument('--chunk-mb', type=float, default=0.25)
+    args = parser.parse_args()
+
+    size = args.size_mb * 1024 * 1024
+    chunk_size = int(args.chunk_mb * 1024 * 1024)
+    with ServerProcess() as server:
+        url = server.url
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / 'payload.bin'
+            with open(path, 'wb') as f:
+                block = os.urandom(1024 * 1024)
+                for _ in range(args.size_mb):
+                    f.write(block)
+
+            print(f"{args.uploads} concurrent uploads of {args.size_mb} MB, "
+                  f"{chunk_size // 1024} KB chunks")
+            print(f"{'mode':<9}  {'MB/s':>8}  {'user s/GB':>9}  {'sys s/GB':>8}  "
+                  f"{'anon MB':>8}  {'file MB':>8}")
+            for memory_map in (False, True):
+                rate, user, system, anon, mapped = measure(
+                    url, path, size, args.uploads, chunk_size, memory_map)
+                name = 'mmap' if memory_map else 'buffered'
+                print(f"{name:<9}  {rate:>8.1f}  {user:>9.3f}  {system:>8.3f}  "
+                      f"{anon:>8.1f}  {mapped:>8.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Benchmark: page cache footprint of uploads in each page_cache mode
+
+Writes a test file, evicts it from the page cache, uploads it to the local
+stand-in server (which discards the data) and then counts how much of the
+file is still resident, using mincore(2) on a mapping of the file. With
+"keep" the whole file stays cached and competes with other data; "drop" and
+"direct" should leave (almost) nothing behind. Linux only.
+
+Usage:
+    python benchmarks/bench_page_cache.py --size-mb 256
+    python benchmarks/bench_page_cache.py --size-mb 256 --dir /var/lib/archives
+"""
+
+import ctypes
+import ctypes.util
+import mmap
+import os
+import tempfile
+import time
+from pathlib import Path
+
+# Puts the source checkout on sys.path for the tflink imports below
+from _common import FakeServer, argument_parser
+from tflink import TFLinkClient
+
+_libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+_libc.mmap.restype = ctypes.c_void_p
+_libc.mmap.argtypes = [ctypes.c_void_p, ctypes.c_size_t, ctypes.c_int, ctypes.c_int,
+                       ctypes.c_int, ctypes.c_long]
+_libc.munmap.argtypes = [ctypes.c_void_p, ctypes.c_size_t]
+_libc.mincore.argtypes = [ctypes.c_void_p, ctypes.c_size_t, ctypes.c_void_p]
+
+
+def resident_bytes(path: Path) -> int:
+    """Bytes of path currently in the page cache (mapping does not fault pages in)"""
+    size = path.stat().st_size
+    pages = (size + mmap.PAGESIZE - 1) // mmap.PAGESIZE
+    with open(path, 'rb') as f:
+        address = _libc.mmap(None, size, mmap.PROT_READ, mmap.MAP_SHARED, f.fileno(), 0)
+    if address in (None, ctypes.c_void_p(-1).value):
+        raise OSError(ctypes.get_errno(), "mmap failed")
+    try:
+        vec = (ctypes.c_ubyte * pages)()
+        if _libc.mincore(address, size, vec) != 0:
+            raise OSError(ctypes.get_errno(), "mincore failed")
+        return sum(v & 1 for v in vec) * mmap.PAGESIZE
+    finally:
+        _libc.munmap(address, size)
+
+
+def evict(path: Path) -> None:
+    with open(path, 'rb') as f:
+        os.fsync(f.fileno())
+        os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_DONTNEED)
+
+
+def main() -> None:
+    parser = argument_parser(__doc__)
+    parser.add_argument('--size-mb', type=int, default=128)
+    parser.add_argument('--dir', help="directory for the test file (default: temp dir)")
+    parser.add_argument('--modes', default='keep,drop,direct')
+    args = parser.parse_args()
+
+    size = args.size_mb * 1024 * 1024
+    with tempfile.TemporaryDirectory(dir=args.dir) as tmp, FakeServer(store=False) as server:
+        path = Path(tmp) / 'archive.bin'
+        with open(path, 'wb') as f:
+            block = os.urandom(1024 * 1024)
+            for _ in range(args.size_mb):
+                f.write(block)
+
+        print(f"{args.size_mb} MB file in {tmp}")
+        print(f"{'mode':<8}  {'seconds':>8}  {'cached after upload':>20}")
+        for mode in args.modes.split(','):
+            evict(path)
+            before = resident_bytes(path)
+            with TFLinkClient(base_url=server.url, page_cache=mode,
+                              max_file_size=size + 1) as client:
+                started = time.monotonic()
+                client.upload(path)
+                elapsed = time.monotonic() - started
+            cached = resident_bytes(path) - before
+            print(f"{mode:<8}  {elapsed:>8.2f}  {cached / 1024 / 1024:>14.1f} MB "
+                  f"({100 * cached / size:.0f}%)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Benchmark: aggregate upload throughput vs. number of worker processes
+
+Starts several local stand-in servers sharing one port (SO_REUSEPORT), so the
+server side is not the bottleneck, then uploads the same set of files with a
+single-process thread pool and with ProcessUploadExecutor at increasing
+process counts.
+
+Usage:
+    python benchmarks/bench_process_executor.py --files 64 --size-mb 8 --processes 1 2 4
+"""
+
+import multiprocessing
+import socket
+import tempfile
+import time
+from pathlib import Path
+
+# Puts the source checkout on sys.path for the tflink imports below
+from _common import FakeServer, argument_parser
+from tflink import ProcessUploadExecutor, TFLinkClient
+
+
+def _serve(port: int, ready) -> None:
+    """Run one stand-in server process until terminated"""
+    server = FakeServer(store=False, port=port, reuse_port=True).start()
+    ready.set()
+    server._thread.join()
+
+
+def start_servers(count: int):
+    """Start count server processes on a shared port; returns (url, processes)"""
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        port = sock.getsockname()[1]
+
+    ctx = multiprocessing.get_context('spawn')
+    processes = []
+    for _ in range(count):
+        ready = ctx.Event()
+        proc = ctx.Process(target=_serve, args=(port, ready), daemon=True)
+        proc.start()
+        ready.wait(10)
+        processes.append(proc)
+    return f"http://127.0.0.1:{port}", processes
+
+
+def report(label: str, total_bytes: int, elapsed: float, results) -> None:
+    failed = sum(1 for r in results if not r.ok)
+    rate = total_bytes / elapsed / 1024 / 1024
+    print(f"{label:<28} {elapsed:8.2f}s {rate:10.1f} MB/s  failed={failed}")
+
+
+def main() -> None:
+    parser = argument_parser(__doc__)
+    parser.add_argument('--files', type=int, default=64)
+    parser.add_argument('--size-mb', type=float, default=8)
+    parser.add_argument('--threads', type=int, default=4, help="uploads per process")
+    parser.add_argument('--processes', type=int, nargs='+', default=[1, 2, 4])
+    parser.add_argument('--server-processes', type=int, default=4)
+    args = parser.parse_args()
+
+    url, servers = start_servers(args.server_processes)
+    size = int(args.size_mb * 1024 * 1024)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = []
+        block = bytes(range(256)) * 4096
+        for i in range(args.files):
+            path = Path(tmp) / f'bench{i}.bin'
+            with open(path, 'wb') as f:
+                for _ in range(size // len(block)):
+                    f.write(block)
+                f.write(block[:size % len(block)])
+            paths.append(path)
+        total = size * args.files
+
+        print(f"{args.files} files x {args.size_mb} MB, {args.threads} uploads per process, "
+              f"{args.server_processes} server processes")
+
+        client = TFLinkClient(base_url=url)
+        started = time.monotonic()
+        results = client.upload_batch(paths, max_workers=args.threads)
+        report("threads only (1 process)", total, time.monotonic() - started, results)
+
+        for count in args.processes:
+            with ProcessUploadExecutor(processes=count, threads_per_process=args.threads,
+                                       chunk_size=max(1, args.files // (count * 4)),
+                                       base_url=url) as executor:
+                # Warm the workers up so process start-up is not measured
+                executor.upload_batch(paths[:count])
+                started = time.monotonic()
+                results = executor.upload_batch(paths)
+                report(f"{count} processes", total, time.monotonic() - started, results)
+
+    for proc in servers:
+        proc.terminate()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Benchmark: read-ahead double buffering with a slow disk and a slow network
+
+Streams a MultipartBody from a file whose reads take --disk-latency ms per
+chunk (an NFS round trip or a disk seek) into a sink that drains it at
+--net-rate MB/s, once per read-ahead depth. Without read-ahead every chunk
+costs disk time plus network time; with it the two overlap and the total
+approaches whichever of the two is slower.
+
+Usage:
+    python benchmarks/bench_readahead.py --size-mb 32 --disk-latency 4 --net-rate 100
+"""
+
+import io
+import time
+
+# Puts the source checkout on sys.path for the tflink imports below
+from _common import argument_parser
+from tflink.streaming import MultipartBody
+
+
+class SlowDisk(io.BytesIO):
+    """In-memory file that sleeps before every read, like a high-latency disk"""
+
+    def __init__(self, data: bytes, latency: float):
+        super().__init__(data)
+        self.latency = latency
+
+    def read(self, size: int = -1) -> bytes:
+        time.sleep(self.latency)
+        return super().read(size)
+
+    def readinto(self, buffer) -> int:
+        time.sleep(self.latency)
+        return super().readinto(buffer)
+
+
+def run(data: bytes, depth: int, chunk_size: int, disk_latency: float, net_rate: float) -> float:
+    """Return seconds to stream the whole body through the simulated network"""
+    body = MultipartBody(
+        SlowDisk(data, disk_latency), 'bench.bin', len(data),
+        chunk_size=chunk_size, read_ahead=depth,
+    )
+    started = time.monotonic()
+    for chunk in body:
+        time.sleep(len(chunk) / net_rate)
+    return time.monotonic() - started
+
+
+def main() -> None:
+    parser = argument_parser(__doc__)
+    parser.add_argument('--size-mb', type=int, default=32)
+    parser.add_argument('--chunk-kb', type=int, default=256)
+    parser.add_argument('--disk-latency', type=float, default=4.0, help="ms per read")
+    parser.add_argument('--net-rate', type=float, default=100.0, help="MB/s")
+    parser.add_argument('--depths', default='0,1,2,4,8')
+    args = parser.parse_args()
+
+    data = b'\0' * (args.size_mb * 1024 * 1024)
+    chunk_size = args.chunk_kb * 1024
+    disk_latency = args.disk_latency / 1000
+    net_rate = args.net_rate * 1024 * 1024
+    chunks = len(data) // chunk_size
+
+    print(f"{args.size_mb} MB in {args.chunk_kb} KB chunks; disk {args.disk_latency} ms/read, "
+          f"network {args.net_rate} MB/s")
+    print(f"ideal serial {chunks * (disk_latency + chunk_size / net_rate):.2f}s, "
+          f"ideal overlapped {chunks * max(disk_latency, chunk_size / net_rate):.2f}s")
+    print(f"{'depth':>5}  {'seconds':>8}  {'MB/s':>7}")
+    for depth in (int(d) for d in args.depths.split(',')):
+        elapsed = run(data, depth, chunk_size, disk_latency, net_rate)
+        print(f"{depth:>5}  {elapsed:>8.2f}  {args.size_mb / elapsed:>7.1f}")
+
+
+if __name__ == '__main__':
+    main()
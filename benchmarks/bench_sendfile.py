@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Benchmark: throughput and client CPU per GB with and without sendfile
+
+Uploads a file repeatedly to the local stand-in server, which runs in a
+separate process and discards the data, so the CPU time measured here is the
+client's alone (user and kernel time are reported separately; over loopback
+the kernel also pays for delivering the data to the server). With
+sendfile=True the file data goes from the page cache to the socket inside
+the kernel; without it every chunk is read into a Python buffer and written
+out again. sendfile() is called once per chunk, so larger chunks mean fewer
+system calls.
+
+Usage:
+    python benchmarks/bench_sendfile.py --size-mb 256 --rounds 5
+    python benchmarks/bench_sendfile.py --size-mb 256 --chunk-mb 4
+    python benchmarks/bench_sendfile.py --url http://mirror.local:8080 --size-mb 1024
+"""
+
+import contextlib
+import os
+import tempfile
+import time
+from pathlib import Path
+
+# Puts the source checkout on sys.path for the tflink imports below
+from _common import ServerProcess, argument_parser
+from tflink import TFLinkClient
+
+
+def measure(url: str, path: Path, size: int, rounds: int, sendfile: bool, chunk_size: int):
+    """Return (MB/s, user CPU s/GB, system CPU s/GB) over rounds uploads"""
+    with TFLinkClient(base_url=url, sendfile=sendfile, chunk_size=chunk_size,
+                      max_file_size=size + 1) as client:
+        client.upload(path)  # connect and warm the page cache
+        wall = time.monotonic()
+        before = os.times()
+        for _ in range(rounds):
+            client.upload(path)
+        after = os.times()
+        wall = time.monotonic() - wall
+    gb = size * rounds / 1024 ** 3
+    return (
+        size * rounds / wall / 1024 / 1024,
+        (after.user - before.user) / gb,
+        (after.system - before.system) / gb,
+    )
+
+
+def main() -> None:
+    parser = argument_parser(__doc__)
+    parser.add_argument('--url', help="plain-HTTP endpoint to measure (default: local stand-in server)")
+    parser.add_argument('--size-mb', type=int, default=256)
+    parser.add_argument('--rounds', type=int, default=5)
+    parser.add_argument('--chunk-mb', type=float, default=0.25)
+    args = parser.parse_args()
+
+    size = args.size_mb * 1024 * 1024
+    chunk_size = int(args.chunk_mb * 1024 * 1024)
+    with contextlib.ExitStack() as stack:
+        url = args.url or stack.enter_context(ServerProcess()).url
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / 'payload.bin'
+            with open(path, 'wb') as f:
+                block = os.urandom(1024 * 1024)
+                for _ in range(args.size_mb):
+                    f.write(block)
+
+            print(f"{args.rounds} x {args.size_mb} MB to {url}")
+            print(f"{'mode':<9}  {'MB/s':>8}  {'user s/GB':>9}  {'sys s/GB':>8}")
+            for sendfile in (False, True):
+                rate, user, system = measure(url, path, size, args.rounds, sendfile, chunk_size)
+                name = 'sendfile' if sendfile else 'buffered'
+                print(f"{name:<9}  {rate:>8.1f}  {user:>9.3f}  {system:>8.3f}")
+
+
+if __name__ == '__main__':
+    main()
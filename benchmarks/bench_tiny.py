@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Benchmark: requests per second per core for tiny files, streamed vs fast path
+
+The local stand-in server runs in a separate process, so the CPU time
+measured here is the client's alone. Each file size is uploaded --requests
+times over one keep-alive connection, once streamed through requests as
+larger files are (tiny_file_size=0) and once through the tiny-file fast
+path. "req/s/core" is requests divided by the client process's CPU time;
+"sends" is sendall() calls per request.
+
+Usage:
+    python benchmarks/bench_tiny.py
+    python benchmarks/bench_tiny.py --requests 5000 --sizes 128,1024,16384
+"""
+
+import os
+import socket
+import tempfile
+import time
+
+# Puts the source checkout on sys.path for the tflink imports below
+from _common import ServerProcess, argument_parser
+from tflink import TFLinkClient
+
+
+class SendCounter:
+    """Count sendall() calls made by this process"""
+
+    def __init__(self):
+        self.calls = 0
+        self._original = socket.socket.sendall
+
+    def __enter__(self) -> 'SendCounter':
+        original = self._original
+
+        def sendall(sock, data, *args):
+            self.calls += 1
+            return original(sock, data, *args)
+
+        socket.socket.sendall = sendall
+        return self
+
+    def __exit__(self, *exc) -> None:
+        socket.socket.sendall = self._original
+
+
+def run(url: str, path: str, requests: int, tiny_file_size: int):
+    """Upload path repeatedly; return (req/s per core, req/s, sends per request)"""
+    with TFLinkClient(base_url=url, tiny_file_size=tiny_file_size) as client:
+        for _ in range(min(200, requests)):
+            client.upload(path)
+        with SendCounter() as sends:
+            cpu = time.process_time()
+            wall = time.perf_counter()
+            for _ in range(requests):
+                client.upload(path)
+            cpu = time.process_time() - cpu
+            wall = time.perf_counter() - wall
+    return requests / cpu, requests / wall, sends.calls / requests
+
+
+def main() -> None:
+    parser = argument_parser(__doc__)
+    parser.add_argument('--requests', type=int, default=3000)
+    parser.add_argument('--sizes', default='128,1024,4096,16384', help="file sizes in bytes")
+    args = parser.parse_args()
+
+    with ServerProcess() as server:
+        url = server.url
+        with tempfile.TemporaryDirectory() as tmp:
+            print(f"{args.requests} uploads per run over one keep-alive connection")
+            print(f"{'size':>6}  {'path':<9}  {'req/s/core':>10}  {'req/s':>7}  {'sends':>5}")
+            for size in (int(s) for s in args.sizes.split(',')):
+                path = os.path.join(tmp, f'{size}.bin')
+                with open(path, 'wb') as f:
+                    f.write(os.urandom(size))
+                baseline = None
+                for name, threshold in (('streamed', 0), ('fast path', size)):
+                    per_core, per_second, sends = run(url, path, args.requests, threshold)
+                    speedup = f"  x{per_core / baseline:.2f}" if baseline else ""
+                    baseline = baseline or per_core
+                    print(f"{size:>6}  {name:<9}  {per_core:>10.0f}  {per_second:>7.0f}  "
+                          f"{sends:>5.1f}{speedup}")
+
+
+if __name__ == '__main__':
+    main()
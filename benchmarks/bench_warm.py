@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Benchmark: time-to-first-link with and without connection pre-warming
+
+Each round creates a fresh client (and, for the cached runs, a fresh DNS
+cache), then uploads a burst of small files concurrently and reports how long
+it took until the first and the last download link came back. Warming happens
+at construction time, before the clock starts, the way a service would warm up
+at start-up before work arrives.
+
+Against the local stand-in server, connection setup is a loopback TCP
+handshake, so the gap is small; pass --url to measure a real endpoint, where
+DNS and TLS dominate the first request.
+
+Usage:
+    python benchmarks/bench_warm.py --rounds 20 --burst 8
+    python benchmarks/bench_warm.py --url https://tmpfile.link --rounds 5
+"""
+
+import statistics
+import tempfile
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from pathlib import Path
+
+# Puts the source checkout on sys.path for the tflink imports below
+from _common import FakeServer, argument_parser
+from tflink import DNSCache, TFLinkClient
+
+
+def run_round(url: str, paths, warm: bool, dns_cache: bool):
+    """Return (first_link, last_link) seconds for one burst on a fresh client"""
+    client = TFLinkClient(
+        base_url=url,
+        pool_size=len(paths),
+        dns_cache=DNSCache() if dns_cache else None,
+        warm_connections=len(paths) if warm else 0,
+    )
+    try:
+        with ThreadPoolExecutor(max_workers=len(paths)) as pool:
+            started = time.monotonic()
+            futures = [pool.submit(client.upload, str(path)) for path in paths]
+            wait(futures, return_when=FIRST_COMPLETED)
+            first = time.monotonic() - started
+            for future in futures:
+                future.result()
+            last = time.monotonic() - started
+    finally:
+        client.close()
+    return first, last
+
+
+def main() -> None:
+    parser = argument_parser(__doc__)
+    parser.add_argument('--url', help="endpoint to measure (default: local stand-in server)")
+    parser.add_argument('--rounds', type=int, default=20)
+    parser.add_argument('--burst', type=int, default=8, help="files uploaded concurrently")
+    parser.add_argument('--size-kb', type=int, default=16)
+    args = parser.parse_args()
+
+    server = None
+    url = args.url
+    if url is None:
+        server = FakeServer(store=False).start()
+        # Use a host name so the DNS cache has something to do
+        url = server.url.replace('127.0.0.1', 'localhost')
+
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = []
+        for i in range(args.burst):
+            path = Path(tmp) / f'warm{i}.bin'
+            path.write_bytes(b'x' * (args.size_kb * 1024))
+            paths.append(path)
+
+        print(f"{args.rounds} rounds of {args.burst} x {args.size_kb} KB uploads to {url}")
+        print(f"{'configuration':<24} {'first link p50':>15} {'last link p50':>15}")
+        for label, warm, dns_cache in (
+            ("cold", False, False),
+            ("dns cache", False, True),
+            ("warmed", True, False),
+            ("warmed + dns cache", True, True),
+        ):
+            samples = [run_round(url, paths, warm, dns_cache) for _ in range(args.rounds)]
+            first = statistics.median(s[0] for s in samples) * 1000
+            last = statistics.median(s[1] for s in samples) * 1000
+            print(f"{label:<24} {first:13.2f}ms {last:13.2f}ms")
+
+    if server is not None:
+        server.stop()
+
+
+if __name__ == '__main__':
+    main()
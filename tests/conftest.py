@@ -44,3 +44,12 @@ def auth_mock_response_data():
         "type": "text/plain",
         "uploadedTo": "user: test_user"
     }
+
+
+@pytest.fixture
+def fake_server():
+    """Running local stand-in for the upload API"""
+    from tests.fake_server import FakeServer
+
+    with FakeServer() as server:
+        yield server
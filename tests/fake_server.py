@@ -0,0 +1,310 @@
+"""
+Local stand-in for the tmpfile.link upload API
+
+Used by the tests and the benchmarks to exercise the real network path without
+touching the public service.
+"""
+
+import hashlib
+import json
+import re
+import socket
+import ssl
+import sys
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Set, Tuple
+from urllib.parse import quote, unquote
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """Request handler implementing /api/upload and download links"""
+
+    protocol_version = 'HTTP/1.1'
+    # Response headers and body are written separately; without TCP_NODELAY the
+    # body waits for the client's delayed ACK of the headers (~40ms)
+    disable_nagle_algorithm = True
+    server: '_Server'
+
+    def log_message(self, format, *args) -> None:
+        """Keep test output quiet"""
+
+    def setup(self) -> None:
+        if isinstance(self.request, ssl.SSLSocket):
+            # Handshake here rather than in accept() so clients can connect
+            # in parallel
+            self.request.do_handshake()
+            fake = self.server.fake
+            fake.tls_handshakes += 1
+            if self.request.session_reused:
+                fake.tls_resumed += 1
+        super().setup()
+
+    def _send_json(self, status: int, payload: dict) -> None:
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self) -> None:
+        fake = self.server.fake
+        with fake._link_lock:
+            fake.requests += 1
+            fake._in_progress += 1
+            fake.peak_concurrent = max(fake.peak_concurrent, fake._in_progress)
+            overloaded = fake.max_concurrent is not None and fake._in_progress > fake.max_concurrent
+        try:
+            self._upload(fake, overloaded)
+        finally:
+            with fake._link_lock:
+                fake._in_progress -= 1
+
+    def _pace(self, fake: 'FakeServer', nbytes: int) -> None:
+        """Sleep until the shared simulated link has carried nbytes more"""
+        with fake._link_lock:
+            now = time.monotonic()
+            fake._link_free_at = max(fake._link_free_at, now) + nbytes / fake.bandwidth_limit
+            wait = fake._link_free_at - now
+        time.sleep(wait)
+
+    def _upload(self, fake: 'FakeServer', overloaded: bool) -> None:
+        length = int(self.headers.get('Content-Length', 0))
+
+        match = re.search(r'boundary=([^;]+)', self.headers.get('Content-Type', ''))
+        if self.path != '/api/upload' or match is None:
+            self.rfile.read(length)
+            self._send_json(400, {'error': 'Bad request'})
+            return
+
+        # Read the part headers, then stream the payload through a hash
+        head = b''
+        while b'\r\n\r\n' not in head:
+            chunk = self.rfile.read(1)
+            if not chunk:
+                return
+            head += chunk
+        filename = unquote(re.search(rb'filename="([^"]*)"', head).group(1).decode('utf-8'))
+        epilogue = b'\r\n--' + match.group(1).encode('ascii') + b'--\r\n'
+        size = length - len(head) - len(epilogue)
+
+        digest = hashlib.sha256()
+        stored = [] if fake.store else None
+        remaining = size
+        started = time.monotonic()
+        while remaining > 0:
+            if fake.stall_after is not None and size - remaining >= fake.stall_after:
+                # Stop reading so the client's socket buffers fill up
+                fake._stopped.wait()
+                return
+            if fake.bandwidth_limit:
+                chunk = self.rfile.read(min(remaining, 64 * 1024))
+                self._pace(fake, len(chunk))
+            else:
+                chunk = self.rfile.read(min(remaining, 1024 * 1024))
+            if not chunk:
+                return
+            digest.update(chunk)
+            if stored is not None:
+                stored.append(chunk)
+            remaining -= len(chunk)
+        self.rfile.read(len(epilogue))
+        fake.last_upload_duration = time.monotonic() - started
+
+        delay = fake.delays.pop(0) if fake.delays else fake.delay
+        if delay:
+            time.sleep(delay)
+        if overloaded:
+            with fake._link_lock:
+                fake.rejected_429 += 1
+            self._send_json(429, {'error': 'Too many concurrent uploads'})
+            return
+        user_id = self.headers.get('X-User-Id')
+        if user_id in fake.rejected_users:
+            self._send_json(401, {'error': 'Invalid credentials'})
+            return
+        if fake.status != 200:
+            self._send_json(fake.status, {'error': 'Injected failure'})
+            return
+
+        file_id = uuid.uuid4().hex
+        prefix = f"users/{user_id}" if user_id else "public"
+        path = f"{prefix}/2025-01-01/{file_id}/{filename}"
+        fake.files[path] = b''.join(stored) if stored is not None else b''
+        fake.digests[path] = digest.hexdigest()
+        fake.uploads += 1
+
+        self._send_json(200, {
+            'fileName': filename,
+            'downloadLink': f"{fake.url}/d/{path}",
+            'downloadLinkEncoded': f"{fake.url}/d/{quote(path, safe='')}",
+            'size': size,
+            'type': 'application/octet-stream',
+            'uploadedTo': f"user: {user_id}" if user_id else 'public',
+        })
+
+    def _download(self, include_body: bool) -> None:
+        path = unquote(self.path[len('/d/'):]) if self.path.startswith('/d/') else None
+        data = self.server.fake.files.get(path) if path else None
+        if data is None:
+            self.send_response(404)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/octet-stream')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        if include_body:
+            self.wfile.write(data)
+
+    def do_GET(self) -> None:
+        self._download(include_body=True)
+
+    def do_HEAD(self) -> None:
+        if not self.server.fake.allow_head:
+            self.send_response(405)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        self._download(include_body=False)
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    reuse_port = False
+    fake: 'FakeServer'
+
+    def get_request(self):
+        request, address = super().get_request()
+        self.fake.connections += 1
+        if self.fake.tls_context is not None:
+            request = self.fake.tls_context.wrap_socket(
+                request, server_side=True, do_handshake_on_connect=False
+            )
+        return request, address
+
+    def handle_error(self, request, client_address) -> None:
+        # Failed TLS handshakes and clients aborting uploads are expected in
+        # some tests
+        if not isinstance(sys.exc_info()[1], (ssl.SSLError, ConnectionError)):
+            super().handle_error(request, client_address)
+
+    def server_bind(self) -> None:
+        if self.reuse_port:
+            self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+        super().server_bind()
+
+
+class FakeServer:
+    """
+    Threaded HTTP server that accepts uploads like tmpfile.link
+
+    Args:
+        store: Keep uploaded bytes so download links can serve them (default: True)
+        port: Port to listen on (default: any free port)
+        reuse_port: Set SO_REUSEPORT so several server processes can share one
+            port and the kernel spreads connections between them (Linux)
+        tls: (certfile, keyfile) to serve HTTPS instead of plain HTTP
+
+    Attributes:
+        url: Base URL to pass to TFLinkClient
+        files: Mapping of stored path to uploaded bytes
+        digests: Mapping of stored path to sha256 hex digest of the upload
+        status: HTTP status returned after reading an upload (default: 200)
+        delay: Seconds to wait before answering an upload (default: 0)
+        delays: Per-upload delays used in arrival order before ``delay`` applies
+        stall_after: Stop reading an upload body after this many bytes, until
+            the server is stopped (default: read everything)
+        allow_head: Answer HEAD on download links; 405 when False (default: True)
+        bandwidth_limit: Bytes per second shared by all upload bodies being
+            read, like a congested link (default: unlimited)
+        max_concurrent: Uploads answered with 429 once more than this many
+            are in progress (default: no limit)
+        rejected_429: Uploads rejected because of max_concurrent
+        peak_concurrent: Most uploads seen in progress at once
+        rejected_users: User IDs answered with 401
+        tls_context: Server SSLContext when serving HTTPS; replace it to drop
+            every issued session ticket
+        tls_handshakes: Completed TLS handshakes
+        tls_resumed: Handshakes that resumed an earlier session
+
+    Example:
+        with FakeServer() as server:
+            client = TFLinkClient(base_url=server.url)
+    """
+
+    def __init__(
+        self,
+        store: bool = True,
+        port: int = 0,
+        reuse_port: bool = False,
+        tls: Optional[Tuple[str, str]] = None
+    ):
+        self.store = store
+        self.files: Dict[str, bytes] = {}
+        self.digests: Dict[str, str] = {}
+        self.status = 200
+        self.delay = 0.0
+        self.delays: List[float] = []
+        self.stall_after: Optional[int] = None
+        self._stopped = threading.Event()
+        self.allow_head = True
+        self.bandwidth_limit: Optional[float] = None
+        self.max_concurrent: Optional[int] = None
+        self.rejected_429 = 0
+        self.peak_concurrent = 0
+        self._in_progress = 0
+        self._link_free_at = 0.0
+        self._link_lock = threading.Lock()
+        self.rejected_users: Set[str] = set()
+        self.requests = 0
+        self.connections = 0
+        self.tls_context: Optional[ssl.SSLContext] = None
+        self.tls_handshakes = 0
+        self.tls_resumed = 0
+        if tls is not None:
+            self.tls_context = self.new_tls_context(*tls)
+        self.uploads = 0
+        self.last_upload_duration: Optional[float] = None
+
+        self._httpd = _Server(('127.0.0.1', port), _Handler, bind_and_activate=False)
+        self._httpd.reuse_port = reuse_port
+        try:
+            self._httpd.server_bind()
+            self._httpd.server_activate()
+        except OSError:
+            self._httpd.server_close()
+            raise
+        self._httpd.fake = self
+        self.port = self._httpd.server_address[1]
+        scheme = 'https' if tls is not None else 'http'
+        self.url = f"{scheme}://127.0.0.1:{self.port}"
+        self._thread = threading.Thread(
+            target=self._httpd.serve_forever, kwargs={'poll_interval': 0.05}, daemon=True
+        )
+
+    @staticmethod
+    def new_tls_context(certfile: str, keyfile: str) -> ssl.SSLContext:
+        """Server context with its own session ticket keys"""
+        context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        context.load_cert_chain(certfile, keyfile)
+        return context
+
+    def start(self) -> 'FakeServer':
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stopped.set()
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self) -> 'FakeServer':
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.stop()
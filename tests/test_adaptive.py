@@ -0,0 +1,172 @@
+"""
+Tests for tflink.adaptive
+"""
+
+import threading
+
+import pytest
+from unittest.mock import Mock
+
+from tflink import AdaptiveConcurrency, TFLinkClient, UploadEngine, UploadResult
+from tflink.exceptions import (
+    AuthenticationError,
+    CircuitOpenError,
+    FileNotFoundError,
+    RateLimitError,
+    ServerError,
+    UploadTimeoutError,
+)
+
+SIZE = 1024 * 1024
+
+
+class SimulatedLink:
+    """Clock and latency model: uploads slow down once limit exceeds knee"""
+
+    def __init__(self, knee, base=0.001):
+        self.knee = knee
+        self.base = base
+        self.now = 0.0
+
+    def clock(self):
+        return self.now
+
+    def run(self, controller, rounds):
+        """Feed rounds of concurrent uploads; return the limits after each"""
+        limits = []
+        for _ in range(rounds):
+            limit = controller.limit
+            latency = self.base * max(1.0, limit / self.knee) * (SIZE + controller.request_cost)
+            self.now += latency
+            for _ in range(limit):
+                controller.record(latency, SIZE)
+            limits.append(controller.limit)
+        return limits
+
+
+class TestAdaptiveConcurrency:
+    """Tests for the Vegas/AIMD concurrency controller"""
+
+    def test_slow_start_doubles(self):
+        """Test that the limit doubles per round while latency stays flat"""
+        link = SimulatedLink(knee=1000)
+        controller = AdaptiveConcurrency(initial_limit=2, max_limit=64, clock=link.clock)
+        assert link.run(controller, 4) == [4, 8, 16, 32]
+
+    def test_settles_near_the_knee(self):
+        """Test that queueing latency stops growth close to the saturation point"""
+        link = SimulatedLink(knee=10)
+        controller = AdaptiveConcurrency(max_limit=256, clock=link.clock)
+        limits = link.run(controller, 200)
+        settled = limits[50:]
+        usual = max(set(settled), key=settled.count)
+        assert 10 <= usual <= 10 + controller.beta + 1
+        assert max(settled) <= 10 + controller.beta + 1
+        assert controller.decreases >= 1
+
+    def test_probe_remeasures_baseline(self):
+        """Test that the baseline follows a path that became slower"""
+        link = SimulatedLink(knee=10)
+        controller = AdaptiveConcurrency(max_limit=256, probe_every=10, clock=link.clock)
+        link.run(controller, 50)
+        link.base *= 4
+        limits = link.run(controller, 100)
+        assert controller.probes >= 5
+        usual = max(set(limits[50:]), key=limits[50:].count)
+        assert 10 <= usual <= 10 + controller.beta + 1
+
+    def test_overload_cuts_once_per_round(self):
+        """Test multiplicative decrease on 429s, not repeated for one burst"""
+        controller = AdaptiveConcurrency(initial_limit=16)
+        for _ in range(5):
+            controller.record(1.0, SIZE, RateLimitError("429"))
+        assert controller.limit == 8
+        assert controller.overloads == 5
+
+        # The round ends after 8 uploads; the next overload cuts again
+        for _ in range(4):
+            controller.record(1.0, SIZE, ServerError("503"))
+        assert controller.limit == 4
+
+    @pytest.mark.parametrize('error', [
+        FileNotFoundError("gone"), AuthenticationError("denied"), CircuitOpenError("open"),
+    ])
+    def test_errors_unrelated_to_load_ignored(self, error):
+        """Test that errors saying nothing about load leave the limit alone"""
+        controller = AdaptiveConcurrency(initial_limit=4)
+        for _ in range(10):
+            controller.record(1.0, SIZE, error)
+        assert controller.limit == 4
+        assert controller.overloads == 0
+
+    def test_timeouts_are_overload(self):
+        """Test that timeouts count as overload"""
+        assert AdaptiveConcurrency.is_overload(UploadTimeoutError("slow"))
+
+    def test_bounds(self):
+        """Test that the limit stays within min_limit and max_limit"""
+        link = SimulatedLink(knee=1000)
+        controller = AdaptiveConcurrency(min_limit=2, max_limit=6, initial_limit=4,
+                                         clock=link.clock)
+        link.run(controller, 10)
+        assert controller.limit == 6
+        for _ in range(20):
+            controller.record(1.0, SIZE, RateLimitError("429"))
+        assert controller.limit == 2
+
+    def test_invalid_bounds(self):
+        """Test that inconsistent limits are rejected"""
+        with pytest.raises(ValueError):
+            AdaptiveConcurrency(min_limit=5, max_limit=2)
+
+
+class TestAdaptiveEngine:
+    """Tests for UploadEngine with a concurrency controller"""
+
+    def test_in_flight_bounded_by_limit(self, mock_response_data):
+        """Test that the engine runs no more uploads than the current limit"""
+        lock = threading.Lock()
+        running = [0, 0]
+
+        def upload(path, filename=None):
+            with lock:
+                running[0] += 1
+                running[1] = max(running[1], running[0])
+            threading.Event().wait(0.01)
+            with lock:
+                running[0] -= 1
+            return UploadResult.from_json(mock_response_data)
+
+        client = Mock()
+        client.upload.side_effect = upload
+        controller = AdaptiveConcurrency(initial_limit=2, max_limit=2)
+        with UploadEngine(client, max_workers=8, max_queue=50, concurrency=controller) as engine:
+            futures = [engine.submit(f'/tmp/{i}.txt') for i in range(30)]
+            assert all(f.result(timeout=10) for f in futures)
+            stats = engine.stats()
+        assert running[1] == 2
+        assert stats['limit'] == 2
+        assert stats['concurrency']['rounds'] >= 10
+
+    def test_rate_limit_error(self, fake_server, tmp_path):
+        """Test that 429 answers raise RateLimitError"""
+        path = tmp_path / 'a.txt'
+        path.write_text('hello')
+        fake_server.status = 429
+        with pytest.raises(RateLimitError):
+            TFLinkClient(base_url=fake_server.url).upload(path)
+
+    def test_batch_against_capped_server(self, fake_server, tmp_path):
+        """Test an adaptive batch against a bandwidth-capped, 429-ing server"""
+        fake_server.bandwidth_limit = 4 * 1024 * 1024
+        fake_server.max_concurrent = 6
+        paths = []
+        for i in range(24):
+            path = tmp_path / f'file{i}.bin'
+            path.write_bytes(b'x' * 64 * 1024)
+            paths.append(path)
+        client = TFLinkClient(base_url=fake_server.url)
+        results = client.upload_batch(paths, max_workers=16, concurrency=True)
+        failed = [r for r in results if not r.ok]
+        assert all(isinstance(r.error, RateLimitError) for r in failed)
+        assert len(failed) < len(paths) // 2
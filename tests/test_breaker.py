@@ -0,0 +1,206 @@
+"""
+Tests for tflink.breaker
+"""
+
+import threading
+
+import pytest
+
+from tflink import (
+    AuthenticationError,
+    CircuitBreaker,
+    CircuitOpenError,
+    NetworkError,
+    ServerError,
+    TFLinkClient,
+    UploadError,
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def small_file(tmp_path):
+    path = tmp_path / 'small.txt'
+    path.write_bytes(b'x' * 100)
+    return str(path)
+
+
+def fail(breaker, error=None):
+    probe = breaker.acquire()
+    breaker.release(probe, error or NetworkError("down"))
+
+
+def succeed(breaker, elapsed=0.0):
+    probe = breaker.acquire()
+    breaker.release(probe, None, elapsed)
+
+
+class TestCircuitBreaker:
+    """Tests for state transitions of the breaker"""
+
+    def test_opens_at_failure_rate(self, clock):
+        """Test that the breaker opens once enough calls failed"""
+        breaker = CircuitBreaker(failure_rate=0.5, min_calls=4, clock=clock)
+        succeed(breaker)
+        fail(breaker)
+        succeed(breaker)
+        assert breaker.state == 'closed'
+        fail(breaker)
+        assert breaker.state == 'open'
+
+        with pytest.raises(CircuitOpenError):
+            breaker.acquire()
+        stats = breaker.stats()
+        assert stats['rejected'] == 1
+        assert stats['opened'] == 1
+        assert stats['retry_after'] == pytest.approx(30.0)
+
+    def test_min_calls_before_opening(self, clock):
+        """Test that a few failures on little traffic keep the breaker closed"""
+        breaker = CircuitBreaker(min_calls=5, clock=clock)
+        for _ in range(4):
+            fail(breaker)
+        assert breaker.state == 'closed'
+
+    def test_old_outcomes_leave_window(self, clock):
+        """Test that failures older than the window are forgotten"""
+        breaker = CircuitBreaker(min_calls=3, window=10, clock=clock)
+        fail(breaker)
+        fail(breaker)
+        clock.now += 11
+        succeed(breaker)
+        succeed(breaker)
+        fail(breaker)
+        assert breaker.state == 'closed'
+        assert breaker.stats()['failures'] == 1
+
+    def test_client_errors_not_counted(self, clock):
+        """Test that 4xx and authentication errors do not open the breaker"""
+        breaker = CircuitBreaker(min_calls=2, clock=clock)
+        for _ in range(5):
+            fail(breaker, UploadError("Bad request"))
+            fail(breaker, AuthenticationError("Denied"))
+        assert breaker.state == 'closed'
+        assert breaker.stats()['calls'] == 0
+
+    def test_slow_calls_open(self, clock):
+        """Test that the latency threshold opens the breaker"""
+        breaker = CircuitBreaker(
+            min_calls=3, slow_call_duration=1.0, slow_call_rate=0.6, clock=clock
+        )
+        succeed(breaker, elapsed=0.1)
+        succeed(breaker, elapsed=2.0)
+        assert breaker.state == 'closed'
+        succeed(breaker, elapsed=3.0)
+        assert breaker.state == 'open'
+
+    def test_slow_threshold_scales_with_size(self, clock):
+        """Test that large uploads are judged per MB"""
+        breaker = CircuitBreaker(min_calls=1, slow_call_duration=1.0, clock=clock)
+        probe = breaker.acquire()
+        breaker.release(probe, None, elapsed=5.0, size=10 * 1024 * 1024)
+        assert breaker.state == 'closed'
+
+    def test_half_open_probe_closes(self, clock):
+        """Test that a successful trial upload closes the breaker"""
+        breaker = CircuitBreaker(min_calls=1, open_duration=5, clock=clock)
+        fail(breaker)
+        clock.now += 5
+        assert breaker.state == 'half_open'
+
+        probe = breaker.acquire()
+        assert probe
+        with pytest.raises(CircuitOpenError):
+            breaker.acquire()
+        breaker.release(probe)
+        assert breaker.state == 'closed'
+
+    def test_half_open_probe_failure_reopens(self, clock):
+        """Test that a failed trial upload opens the breaker again"""
+        breaker = CircuitBreaker(min_calls=1, open_duration=5, clock=clock)
+        fail(breaker)
+        clock.now += 5
+        fail(breaker, ServerError("Server error: 503"))
+        assert breaker.state == 'open'
+        assert breaker.stats()['opened'] == 2
+
+    def test_half_open_neutral_error_frees_slot(self, clock):
+        """Test that a trial ending in a client error lets another trial run"""
+        breaker = CircuitBreaker(min_calls=1, open_duration=5, clock=clock)
+        fail(breaker)
+        clock.now += 5
+        probe = breaker.acquire()
+        breaker.release(probe, UploadError("Bad request"))
+        assert breaker.acquire()
+
+    def test_shared_across_threads(self, clock):
+        """Test that outcomes recorded by many threads add up"""
+        breaker = CircuitBreaker(min_calls=1000, clock=clock)
+
+        def work():
+            for _ in range(100):
+                succeed(breaker)
+
+        threads = [threading.Thread(target=work) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert breaker.stats()['calls'] == 800
+
+    def test_invalid_rate(self):
+        """Test that rates outside (0, 1] are rejected"""
+        with pytest.raises(ValueError):
+            CircuitBreaker(failure_rate=0)
+
+
+class TestClientBreaker:
+    """Tests for the breaker in TFLinkClient against the local stand-in server"""
+
+    def test_outage_fails_fast(self, fake_server, small_file):
+        """Test that uploads stop reaching the server once the breaker opens"""
+        fake_server.status = 503
+        breaker = CircuitBreaker(min_calls=3, open_duration=60)
+        with TFLinkClient(base_url=fake_server.url, circuit_breaker=breaker) as client:
+            for _ in range(3):
+                with pytest.raises(ServerError):
+                    client.upload(small_file)
+            with pytest.raises(CircuitOpenError):
+                client.upload(small_file)
+
+        assert fake_server.requests == 3
+        assert breaker.stats()['rejected'] == 1
+
+    def test_recovers_after_open_duration(self, fake_server, small_file):
+        """Test that a trial upload closes the breaker once the server is back"""
+        fake_server.status = 503
+        breaker = CircuitBreaker(min_calls=1, open_duration=0.1)
+        with TFLinkClient(base_url=fake_server.url, circuit_breaker=breaker) as client:
+            with pytest.raises(ServerError):
+                client.upload(small_file)
+            assert breaker.state == 'open'
+
+            fake_server.status = 200
+            threading.Event().wait(0.15)
+            result = client.upload(small_file)
+
+        assert result.size == 100
+        assert breaker.state == 'closed'
+
+    def test_default_breaker(self):
+        """Test that circuit_breaker=True creates a default breaker"""
+        client = TFLinkClient(circuit_breaker=True)
+        assert isinstance(client.circuit_breaker, CircuitBreaker)
+        assert TFLinkClient().circuit_breaker is None
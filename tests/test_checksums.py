@@ -0,0 +1,110 @@
+"""
+Tests for tflink.checksums and inline upload checksums
+"""
+
+import hashlib
+
+import pytest
+from unittest.mock import patch
+
+from tflink import TFLinkClient, UploadJournal
+from tflink.checksums import Checksummer, available_algorithms, validate_algorithms
+from tflink.exceptions import ChecksumMismatchError
+
+
+@pytest.fixture
+def data_file(tmp_path):
+    """A file larger than one streaming chunk"""
+    path = tmp_path / 'data.bin'
+    path.write_bytes(bytes(range(256)) * 5000)
+    return path
+
+
+class TestChecksummer:
+    """Tests for the checksum helpers"""
+
+    def test_multiple_digests(self):
+        """Test that every configured digest is computed over all chunks"""
+        summer = Checksummer(['sha256', 'blake2b'])
+        summer.update(b'hello ')
+        summer.update(memoryview(b'world'))
+        digests = summer.hexdigests()
+        assert digests['sha256'] == hashlib.sha256(b'hello world').hexdigest()
+        assert digests['blake2b'] == hashlib.blake2b(b'hello world').hexdigest()
+
+    def test_unknown_algorithm(self):
+        """Test that unknown algorithms raise ValueError"""
+        with pytest.raises(ValueError):
+            validate_algorithms(['crc99'])
+        with pytest.raises(ValueError):
+            TFLinkClient(checksums=['crc99'])
+
+    def test_xxhash_requires_package(self):
+        """Test that xxhash algorithms explain the missing optional dependency"""
+        with patch('tflink.checksums.xxhash', None):
+            assert 'xxh64' not in available_algorithms()
+            with pytest.raises(ValueError, match="xxhash"):
+                validate_algorithms(['xxh64'])
+
+
+class TestUploadChecksums:
+    """Tests for checksums computed during upload"""
+
+    def test_checksums_attached_to_result(self, data_file, fake_server):
+        """Test that digests match the bytes the server received"""
+        client = TFLinkClient(base_url=fake_server.url, checksums=['sha256', 'blake2b'])
+        result = client.upload(data_file)
+
+        data = data_file.read_bytes()
+        assert result.checksums['sha256'] == hashlib.sha256(data).hexdigest()
+        assert result.checksums['blake2b'] == hashlib.blake2b(data).hexdigest()
+        assert result.checksums['sha256'] in fake_server.digests.values()
+
+    def test_per_upload_override(self, data_file, fake_server):
+        """Test that upload(checksums=...) overrides the client setting"""
+        client = TFLinkClient(base_url=fake_server.url)
+        assert client.upload(data_file).checksums == {}
+        result = client.upload(data_file, checksums=['sha1'])
+        assert list(result.checksums) == ['sha1']
+
+    def test_file_is_read_once(self, data_file, fake_server):
+        """Test that hashing does not add a second pass over the file"""
+        client = TFLinkClient(base_url=fake_server.url, checksums=['sha256'])
+        real_open = open
+        handles = []
+
+        def tracking_open(*args, **kwargs):
+            handle = real_open(*args, **kwargs)
+            handles.append(handle)
+            return handle
+
+        with patch('builtins.open', side_effect=tracking_open):
+            client.upload(data_file)
+        assert len(handles) == 1
+
+    def test_verify_download(self, data_file, fake_server):
+        """Test that verification passes for intact and fails for altered files"""
+        client = TFLinkClient(base_url=fake_server.url, checksums=['sha256'])
+        result = client.upload(data_file)
+        client.verify_download(result)
+
+        path = result.download_link.split('/d/', 1)[1]
+        fake_server.files[path] = b'X' + fake_server.files[path][1:]
+        with pytest.raises(ChecksumMismatchError):
+            client.verify_download(result)
+
+    def test_verify_without_checksums(self, data_file, fake_server):
+        """Test that verification requires recorded checksums"""
+        client = TFLinkClient(base_url=fake_server.url)
+        with pytest.raises(ValueError):
+            client.verify_download(client.upload(data_file))
+
+    def test_checksums_stored_in_journal(self, data_file, fake_server, tmp_path):
+        """Test that journaled results keep their checksums"""
+        client = TFLinkClient(base_url=fake_server.url, checksums=['sha256'])
+        journal_path = tmp_path / 'batch.journal'
+        results = client.upload_batch([data_file], journal=journal_path)
+
+        with UploadJournal(journal_path) as journal:
+            restored = journal.get_result(data_file)
+        assert restored.checksums == results[0].result.checksums
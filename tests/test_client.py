@@ -2,6 +2,8 @@
 Tests for tflink.client
 """
 
+import stat
+
 import pytest
 from unittest.mock import Mock, patch, mock_open
 from pathlib import Path
@@ -56,7 +58,7 @@ class TestTFLinkClientInit:
 class TestTFLinkClientUpload:
     """Tests for upload functionality"""
 
-    @patch('tflink.client.requests.post')
+    @patch('tflink.client.requests.Session.post')
     @patch('tflink.client.Path.exists')
     @patch('tflink.client.Path.is_file')
     @patch('tflink.client.Path.stat')
@@ -70,6 +72,7 @@ class TestTFLinkClientUpload:
 
         # Mock file size (1MB - within limit)
         mock_stat_result = Mock()
+        mock_stat_result.st_mode = stat.S_IFREG | 0o644
         mock_stat_result.st_size = 1024 * 1024
         mock_stat.return_value = mock_stat_result
 
@@ -92,7 +95,7 @@ class TestTFLinkClientUpload:
         assert 'X-User-Id' not in call_kwargs['headers']
         assert 'X-Auth-Token' not in call_kwargs['headers']
 
-    @patch('tflink.client.requests.post')
+    @patch('tflink.client.requests.Session.post')
     @patch('tflink.client.Path.exists')
     @patch('tflink.client.Path.is_file')
     @patch('tflink.client.Path.stat')
@@ -106,6 +109,7 @@ class TestTFLinkClientUpload:
 
         # Mock file size (1MB - within limit)
         mock_stat_result = Mock()
+        mock_stat_result.st_mode = stat.S_IFREG | 0o644
         mock_stat_result.st_size = 1024 * 1024
         mock_stat.return_value = mock_stat_result
 
@@ -157,6 +161,7 @@ class TestTFLinkClientUpload:
 
         # Mock file size: 150MB (exceeds 100MB limit)
         mock_stat_result = Mock()
+        mock_stat_result.st_mode = stat.S_IFREG | 0o644
         mock_stat_result.st_size = 150 * 1024 * 1024
         mock_stat.return_value = mock_stat_result
 
@@ -168,7 +173,7 @@ class TestTFLinkClientUpload:
         assert "150.00MB" in str(exc_info.value)
         assert "100MB" in str(exc_info.value)
 
-    @patch('tflink.client.requests.post')
+    @patch('tflink.client.requests.Session.post')
     @patch('tflink.client.Path.exists')
     @patch('tflink.client.Path.is_file')
     @patch('tflink.client.Path.stat')
@@ -182,6 +187,7 @@ class TestTFLinkClientUpload:
 
         # Mock file size: 50MB (within 100MB limit)
         mock_stat_result = Mock()
+        mock_stat_result.st_mode = stat.S_IFREG | 0o644
         mock_stat_result.st_size = 50 * 1024 * 1024
         mock_stat.return_value = mock_stat_result
 
@@ -208,6 +214,7 @@ class TestTFLinkClientUpload:
 
         # Mock file size: 50MB
         mock_stat_result = Mock()
+        mock_stat_result.st_mode = stat.S_IFREG | 0o644
         mock_stat_result.st_size = 50 * 1024 * 1024
         mock_stat.return_value = mock_stat_result
 
@@ -232,7 +239,7 @@ class TestTFLinkClientUpload:
         client = TFLinkClient(max_file_size=custom_size)
         assert client.max_file_size == custom_size
 
-    @patch('tflink.client.requests.post')
+    @patch('tflink.client.requests.Session.post')
     @patch('tflink.client.Path.exists')
     @patch('tflink.client.Path.is_file')
     @patch('tflink.client.Path.stat')
@@ -244,6 +251,7 @@ class TestTFLinkClientUpload:
 
         # Mock file size
         mock_stat_result = Mock()
+        mock_stat_result.st_mode = stat.S_IFREG | 0o644
         mock_stat_result.st_size = 1024 * 1024
         mock_stat.return_value = mock_stat_result
 
@@ -257,7 +265,7 @@ class TestTFLinkClientUpload:
         with pytest.raises(AuthenticationError):
             client.upload('/tmp/test.txt')
 
-    @patch('tflink.client.requests.post')
+    @patch('tflink.client.requests.Session.post')
     @patch('tflink.client.Path.exists')
     @patch('tflink.client.Path.is_file')
     @patch('tflink.client.Path.stat')
@@ -269,6 +277,7 @@ class TestTFLinkClientUpload:
 
         # Mock file size (1MB - within client limit)
         mock_stat_result = Mock()
+        mock_stat_result.st_mode = stat.S_IFREG | 0o644
         mock_stat_result.st_size = 1024 * 1024
         mock_stat.return_value = mock_stat_result
 
@@ -283,7 +292,7 @@ class TestTFLinkClientUpload:
             client.upload('/tmp/large_file.bin')
         assert "too large" in str(exc_info.value).lower()
 
-    @patch('tflink.client.requests.post')
+    @patch('tflink.client.requests.Session.post')
     @patch('tflink.client.Path.exists')
     @patch('tflink.client.Path.is_file')
     @patch('tflink.client.Path.stat')
@@ -295,6 +304,7 @@ class TestTFLinkClientUpload:
 
         # Mock file size
         mock_stat_result = Mock()
+        mock_stat_result.st_mode = stat.S_IFREG | 0o644
         mock_stat_result.st_size = 1024 * 1024
         mock_stat.return_value = mock_stat_result
 
@@ -309,7 +319,7 @@ class TestTFLinkClientUpload:
             client.upload('/tmp/test.txt')
         assert "server error" in str(exc_info.value).lower()
 
-    @patch('tflink.client.requests.post')
+    @patch('tflink.client.requests.Session.post')
     @patch('tflink.client.Path.exists')
     @patch('tflink.client.Path.is_file')
     @patch('tflink.client.Path.stat')
@@ -321,6 +331,7 @@ class TestTFLinkClientUpload:
 
         # Mock file size
         mock_stat_result = Mock()
+        mock_stat_result.st_mode = stat.S_IFREG | 0o644
         mock_stat_result.st_size = 1024 * 1024
         mock_stat.return_value = mock_stat_result
 
@@ -332,7 +343,7 @@ class TestTFLinkClientUpload:
             client.upload('/tmp/test.txt')
         assert "timeout" in str(exc_info.value).lower()
 
-    @patch('tflink.client.requests.post')
+    @patch('tflink.client.requests.Session.post')
     @patch('tflink.client.Path.exists')
     @patch('tflink.client.Path.is_file')
     @patch('tflink.client.Path.stat')
@@ -344,6 +355,7 @@ class TestTFLinkClientUpload:
 
         # Mock file size
         mock_stat_result = Mock()
+        mock_stat_result.st_mode = stat.S_IFREG | 0o644
         mock_stat_result.st_size = 1024 * 1024
         mock_stat.return_value = mock_stat_result
 
@@ -355,7 +367,7 @@ class TestTFLinkClientUpload:
             client.upload('/tmp/test.txt')
         assert "connection error" in str(exc_info.value).lower()
 
-    @patch('tflink.client.requests.post')
+    @patch('tflink.client.requests.Session.post')
     @patch('tflink.client.Path.exists')
     @patch('tflink.client.Path.is_file')
     @patch('tflink.client.Path.stat')
@@ -367,6 +379,7 @@ class TestTFLinkClientUpload:
 
         # Mock file size
         mock_stat_result = Mock()
+        mock_stat_result.st_mode = stat.S_IFREG | 0o644
         mock_stat_result.st_size = 1024 * 1024
         mock_stat.return_value = mock_stat_result
 
@@ -409,3 +422,33 @@ class TestTFLinkClientHelpers:
         client = TFLinkClient(user_id="test_user", auth_token="test_token")
         repr_str = repr(client)
         assert "authenticated" in repr_str
+
+
+class TestTFLinkClientLocalServer:
+    """Tests against the local stand-in server"""
+
+    def test_upload_streams_file_contents(self, tmp_path, fake_server):
+        """Test that the streamed multipart body carries the exact file bytes"""
+        data = bytes(range(256)) * 4096
+        path = tmp_path / 'data.bin'
+        path.write_bytes(data)
+
+        client = TFLinkClient(base_url=fake_server.url)
+        result = client.upload(path)
+
+        assert result.size == len(data)
+        assert result.file_name == 'data.bin'
+        assert fake_server.files[result.download_link.split('/d/', 1)[1]] == data
+
+    def test_upload_custom_filename_is_sent(self, temp_file, fake_server):
+        """Test that a custom filename with quotes survives the multipart encoding"""
+        client = TFLinkClient(base_url=fake_server.url)
+        result = client.upload(temp_file, filename='my "report".txt')
+        assert result.file_name == 'my "report".txt'
+
+    def test_upload_empty_file(self, tmp_path, fake_server):
+        """Test that a zero-byte file uploads"""
+        path = tmp_path / 'empty.txt'
+        path.write_bytes(b'')
+        result = TFLinkClient(base_url=fake_server.url).upload(path)
+        assert result.size == 0
@@ -0,0 +1,118 @@
+"""
+Tests for sharing one TFLinkClient across threads and forked processes
+"""
+
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from tflink import Credential, CredentialPool, TFLinkClient
+
+
+@pytest.fixture
+def small_file(tmp_path):
+    path = tmp_path / 'small.txt'
+    path.write_bytes(b'x' * 1000)
+    return str(path)
+
+
+def _wait_child(pid: int) -> int:
+    _, status = os.waitpid(pid, 0)
+    return os.waitstatus_to_exitcode(status) if hasattr(os, 'waitstatus_to_exitcode') else status >> 8
+
+
+class TestThreads:
+    """Tests for concurrent uploads through one client"""
+
+    def test_many_threads_share_client(self, fake_server, small_file):
+        """Test that 16 threads uploading at once all get their own result"""
+        with TFLinkClient(base_url=fake_server.url, pool_size=4) as client:
+            with ThreadPoolExecutor(max_workers=16) as executor:
+                results = list(executor.map(
+                    lambda i: client.upload(small_file, filename=f'file-{i}.txt'), range(160)
+                ))
+
+        assert fake_server.requests == 160
+        assert sorted(r.file_name for r in results) == sorted(f'file-{i}.txt' for i in range(160))
+        assert len({r.download_link for r in results}) == 160
+
+
+@pytest.mark.skipif(not hasattr(os, 'fork'), reason="needs os.fork()")
+@pytest.mark.filterwarnings('ignore::DeprecationWarning')
+class TestFork:
+    """Tests for clients inherited by forked worker processes"""
+
+    def test_forked_children_use_own_connections(self, fake_server, small_file):
+        """Test that children forked mid-upload work and leave the parent's pool alone"""
+        client = TFLinkClient(base_url=fake_server.url, pool_size=4)
+        client.upload(small_file)
+        parent_adapter = client._adapter
+
+        stop = threading.Event()
+        errors = []
+
+        def keep_uploading():
+            while not stop.is_set():
+                try:
+                    client.upload(small_file)
+                except Exception as e:  # pragma: no cover - reported below
+                    errors.append(e)
+
+        threads = [threading.Thread(target=keep_uploading) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+
+        children = []
+        try:
+            for _ in range(4):
+                pid = os.fork()
+                if pid == 0:
+                    code = 1
+                    try:
+                        if client._adapter is not parent_adapter:
+                            for _ in range(5):
+                                client.upload(small_file)
+                            code = 0
+                    finally:
+                        os._exit(code)
+                children.append(pid)
+        finally:
+            codes = [_wait_child(pid) for pid in children]
+            stop.set()
+            for thread in threads:
+                thread.join()
+
+        assert codes == [0, 0, 0, 0]
+        assert errors == []
+        assert fake_server.requests >= 1 + 4 * 5
+        assert client._adapter is parent_adapter
+        # The parent's pooled connections survived the children
+        assert client.upload(small_file).size == 1000
+        client.close()
+
+    def test_pid_change_rebuilds_state(self, fake_server, small_file):
+        """Test that a client noticing a new PID replaces its pool and threads"""
+        with TFLinkClient(base_url=fake_server.url, stall_timeout=30) as client:
+            client.upload(small_file)
+            adapter, watchdog = client._adapter, client._watchdog
+
+            client._pid = -1
+            client.upload(small_file)
+
+            assert client._pid == os.getpid()
+            assert client._adapter is not adapter
+            assert client._watchdog is not watchdog
+
+    def test_fork_replaces_credential_locks(self):
+        """Test that a child does not inherit credential bucket locks held in the parent"""
+        cred = Credential('u1', 't1', rate_limit=10, bandwidth_limit=1024)
+        client = TFLinkClient(credentials=CredentialPool([cred]))
+        with cred.requests._lock, cred.bandwidth._lock:
+            pid = os.fork()
+            if pid == 0:
+                locked = cred.requests._lock.locked() or cred.bandwidth._lock.locked()
+                os._exit(1 if locked else 0)
+        assert _wait_child(pid) == 0
+        client.close()
@@ -0,0 +1,110 @@
+"""
+Tests for tflink.connections
+"""
+
+import gc
+import weakref
+from unittest.mock import patch
+
+from tflink import DNSCache, TFLinkClient
+
+
+class TestDNSCache:
+    """Tests for the in-process DNS cache"""
+
+    def test_hit_after_miss(self):
+        """Test that a second lookup is served from the cache"""
+        cache = DNSCache()
+        with patch.object(cache, '_lookup', return_value=(['10.0.0.1'], 60)) as lookup:
+            assert cache.resolve('example.test') == ['10.0.0.1']
+            assert cache.resolve('example.test') == ['10.0.0.1']
+        assert lookup.call_count == 1
+        assert cache.stats() == {'hits': 1, 'misses': 1, 'entries': 1}
+
+    def test_entry_expires_after_ttl(self):
+        """Test that the record TTL bounds the lifetime of an entry"""
+        cache = DNSCache(min_ttl=0)
+        with patch.object(cache, '_lookup', return_value=(['10.0.0.1'], 0)) as lookup:
+            cache.resolve('example.test')
+            cache.resolve('example.test')
+        assert lookup.call_count == 2
+
+    def test_ttl_clamped(self):
+        """Test that max_ttl caps long record TTLs"""
+        cache = DNSCache(max_ttl=0)
+        with patch.object(cache, '_lookup', return_value=(['10.0.0.1'], 86400)) as lookup:
+            cache.resolve('example.test')
+            cache.resolve('example.test')
+        assert lookup.call_count == 2
+
+    def test_invalidate(self):
+        """Test that invalidate forces a fresh lookup"""
+        cache = DNSCache()
+        with patch.object(cache, '_lookup', return_value=(['10.0.0.1'], 60)) as lookup:
+            cache.resolve('example.test')
+            cache.invalidate('example.test')
+            cache.resolve('example.test')
+        assert lookup.call_count == 2
+
+    def test_ip_literal_not_cached(self):
+        """Test that IP addresses bypass resolution"""
+        cache = DNSCache()
+        assert cache.resolve('127.0.0.1') == ['127.0.0.1']
+        assert cache.stats()['entries'] == 0
+
+
+class TestWarming:
+    """Tests for connection pre-warming against the local stand-in server"""
+
+    def test_warm_opens_connections(self, fake_server, tmp_path):
+        """Test that warmed connections are reused by later uploads"""
+        client = TFLinkClient(base_url=fake_server.url, pool_size=4, warm_connections=3)
+        try:
+            assert fake_server.connections == 3
+
+            file_path = tmp_path / 'a.txt'
+            file_path.write_bytes(b'x' * 100)
+            client.upload(str(file_path))
+            assert fake_server.connections == 3
+        finally:
+            client.close()
+
+    def test_warm_capped_by_pool_size(self, fake_server):
+        """Test that warming never opens more connections than the pool keeps"""
+        with TFLinkClient(base_url=fake_server.url, pool_size=2) as client:
+            assert client.warm(5) == 2
+
+    def test_warm_unreachable_endpoint(self):
+        """Test that warming a dead endpoint is not an error"""
+        with TFLinkClient(base_url='http://127.0.0.1:9', connect_timeout=0.5) as client:
+            assert client.warm(2) == 0
+
+    def test_uploads_use_dns_cache(self, fake_server, tmp_path):
+        """Test that connections resolve host names through the DNS cache"""
+        cache = DNSCache()
+        url = fake_server.url.replace('127.0.0.1', 'localhost')
+        file_path = tmp_path / 'a.txt'
+        file_path.write_bytes(b'x' * 100)
+
+        with patch.object(cache, '_lookup', return_value=(['127.0.0.1'], 60)) as lookup:
+            with TFLinkClient(base_url=url, dns_cache=cache, warm_connections=2) as client:
+                result = client.upload(str(file_path))
+
+        assert result.size == 100
+        assert lookup.call_count == 1
+        assert cache.stats()['hits'] == 1
+
+    def test_connection_classes_freed_with_client(self, fake_server, tmp_path):
+        """Test that a client's connection subclass and caches are not kept alive"""
+        file_path = tmp_path / 'a.txt'
+        file_path.write_bytes(b'x' * 100)
+        refs = []
+        for _ in range(3):
+            cache = DNSCache()
+            with TFLinkClient(base_url=fake_server.url, dns_cache=cache) as client:
+                client.upload(str(file_path))
+                pool = client._adapter.pool_for(client._session, fake_server.url)
+                refs.append((weakref.ref(pool.ConnectionCls), weakref.ref(cache)))
+            del client, cache, pool
+        gc.collect()
+        assert all(cls() is None and cache() is None for cls, cache in refs)
@@ -0,0 +1,143 @@
+"""
+Tests for tflink.credentials
+"""
+
+import time
+from collections import Counter
+
+import pytest
+
+from tflink import Credential, CredentialPool, TFLinkClient
+from tflink.exceptions import AuthenticationError, UploadError
+
+
+@pytest.fixture
+def three_accounts():
+    return [('user1', 'token1'), ('user2', 'token2'), ('user3', 'token3')]
+
+
+class TestCredentialPool:
+    """Tests for identity selection and health tracking"""
+
+    def test_round_robin(self, three_accounts):
+        """Test that round robin rotates through every identity"""
+        pool = CredentialPool(three_accounts)
+        chosen = []
+        for _ in range(6):
+            cred = pool.acquire()
+            chosen.append(cred.user_id)
+            pool.release(cred)
+        assert chosen == ['user1', 'user2', 'user3'] * 2
+
+    def test_least_loaded(self, three_accounts):
+        """Test that least loaded avoids busy identities"""
+        pool = CredentialPool(three_accounts, policy='least_loaded')
+        first = pool.acquire()
+        second = pool.acquire()
+        third = pool.acquire()
+        assert len({first.user_id, second.user_id, third.user_id}) == 3
+        pool.release(second)
+        assert pool.acquire() is second
+
+    def test_hash_policy_is_sticky(self, three_accounts):
+        """Test that the same key always maps to the same identity"""
+        pool = CredentialPool(three_accounts, policy='hash')
+        owners = {key: pool.acquire(key).user_id for key in ('a', 'b', 'c', 'd', 'e')}
+        for key, owner in owners.items():
+            assert pool.acquire(key).user_id == owner
+
+    def test_hash_policy_moves_only_disabled_keys(self, three_accounts):
+        """Test that disabling an identity only reassigns its own keys"""
+        pool = CredentialPool(three_accounts, policy='hash')
+        keys = [f'key{i}' for i in range(50)]
+        before = {key: pool.acquire(key).user_id for key in keys}
+
+        victim = pool.credentials[0]
+        pool.release(victim, AuthenticationError("Authentication failed."))
+        after = {key: pool.acquire(key).user_id for key in keys}
+
+        for key in keys:
+            if before[key] != 'user1':
+                assert after[key] == before[key]
+            else:
+                assert after[key] != 'user1'
+
+    def test_auth_failure_disables_identity(self, three_accounts):
+        """Test that 401/403 errors take an identity out of rotation"""
+        pool = CredentialPool(three_accounts, auth_failure_threshold=2)
+        cred = pool.credentials[1]
+        pool.release(cred, AuthenticationError("Access forbidden."))
+        assert cred.healthy
+        pool.release(cred, AuthenticationError("Access forbidden."))
+        assert not cred.healthy
+        assert pool.healthy_count() == 2
+
+        pool.enable('user2')
+        assert pool.healthy_count() == 3
+
+    def test_other_errors_keep_identity(self, three_accounts):
+        """Test that non-auth failures do not disable an identity"""
+        pool = CredentialPool(three_accounts)
+        cred = pool.acquire()
+        pool.release(cred, UploadError("Server error (500). Please try again later."))
+        assert cred.healthy
+        assert pool.stats()[0]['failures'] == 1
+
+    def test_reinstate_after(self, three_accounts):
+        """Test that a disabled identity returns after its cool-down"""
+        pool = CredentialPool(three_accounts, reinstate_after=0.05)
+        pool.release(pool.credentials[0], AuthenticationError("Authentication failed."))
+        assert pool.healthy_count() == 2
+        time.sleep(0.06)
+        assert pool.healthy_count() == 3
+
+    def test_rate_limit_per_identity(self):
+        """Test that an identity's uploads-per-second limit is enforced"""
+        pool = CredentialPool([Credential('user1', 'token1', rate_limit=20)])
+        started = time.monotonic()
+        for _ in range(3):
+            pool.release(pool.acquire())
+        assert time.monotonic() - started >= 0.09
+
+    def test_invalid_configuration(self, three_accounts):
+        """Test that bad pool settings raise ValueError"""
+        with pytest.raises(ValueError):
+            CredentialPool([])
+        with pytest.raises(ValueError):
+            CredentialPool(three_accounts, policy='random')
+        with pytest.raises(ValueError):
+            CredentialPool([('user1', 'a'), ('user1', 'b')])
+
+
+class TestClientWithCredentialPool:
+    """Tests for TFLinkClient uploads through a credential pool"""
+
+    def test_uploads_spread_over_accounts(self, temp_file, fake_server, three_accounts):
+        """Test that uploads use every identity in the pool"""
+        client = TFLinkClient(base_url=fake_server.url, credentials=three_accounts)
+        assert client.is_authenticated()
+        uploaded_to = Counter(client.upload(temp_file).uploaded_to for _ in range(6))
+        assert uploaded_to == {'user: user1': 2, 'user: user2': 2, 'user: user3': 2}
+
+    def test_rejected_identity_fails_over(self, temp_file, fake_server, three_accounts):
+        """Test that a 401 moves the upload to another identity and disables the first"""
+        fake_server.rejected_users.add('user1')
+        client = TFLinkClient(base_url=fake_server.url, credentials=three_accounts)
+
+        result = client.upload(temp_file)
+        assert result.uploaded_to != 'user: user1'
+        assert client.credentials.healthy_count() == 2
+
+    def test_all_identities_rejected(self, temp_file, fake_server, three_accounts):
+        """Test that the auth error surfaces once every identity is disabled"""
+        fake_server.rejected_users.update({'user1', 'user2', 'user3'})
+        client = TFLinkClient(base_url=fake_server.url, credentials=three_accounts)
+        with pytest.raises(AuthenticationError):
+            client.upload(temp_file)
+        with pytest.raises(AuthenticationError):
+            client.upload(temp_file)
+
+    def test_credentials_exclusive_with_user_id(self, three_accounts):
+        """Test that a pool cannot be combined with a single identity"""
+        with pytest.raises(ValueError):
+            TFLinkClient(user_id='u', auth_token='t', credentials=three_accounts)
@@ -0,0 +1,142 @@
+"""
+Tests for tflink.endpoints
+"""
+
+import socket
+import time
+
+import pytest
+
+from tflink import EndpointPool, TFLinkClient, UploadTimeoutError
+from tflink.exceptions import NetworkError, ServerError
+from tests.fake_server import FakeServer
+
+
+@pytest.fixture
+def dead_url():
+    """URL of a local port nothing listens on"""
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        port = sock.getsockname()[1]
+    return f"http://127.0.0.1:{port}"
+
+
+@pytest.fixture
+def second_server():
+    with FakeServer() as server:
+        yield server
+
+
+class TestEndpointPool:
+    """Tests for endpoint ranking, ejection and probing"""
+
+    def test_unmeasured_endpoints_first(self):
+        """Test that every endpoint is tried before ranking by latency"""
+        pool = EndpointPool(['http://a', 'http://b'])
+        first = pool.choose()
+        pool.record_success(first, 0.5)
+        assert pool.choose().base_url == 'http://b'
+
+    def test_lowest_latency_wins(self):
+        """Test that the faster endpoint is preferred"""
+        pool = EndpointPool(['http://slow', 'http://fast'])
+        slow, fast = pool.endpoints
+        pool.record_success(pool.choose(), 0.9)
+        pool.record_success(pool.choose(), 0.1)
+        assert pool.choose() is fast
+
+    def test_large_uploads_are_normalised(self):
+        """Test that latency of big files is measured per MB"""
+        pool = EndpointPool(['http://a', 'http://b'])
+        pool.record_success(pool.choose(), 2.0, size=10 * 1024 * 1024)
+        assert pool.endpoints[0].latency == pytest.approx(0.2)
+
+    def test_ejection_and_probe(self):
+        """Test that failing endpoints are ejected and later probed once"""
+        pool = EndpointPool(['http://bad', 'http://good'], eject_after=2, eject_duration=0.05)
+        bad, good = pool.endpoints
+
+        for _ in range(2):
+            bad.in_flight += 1
+            pool.record_failure(bad)
+        assert pool.stats()[0]['ejected']
+        assert pool.choose() is good
+
+        time.sleep(0.06)
+        assert pool.choose() is bad  # the probe
+        assert pool.choose() is good  # only one probe at a time
+        pool.record_success(bad, 0.05)
+        assert bad.ejected_until is None
+
+    def test_failed_probe_ejects_again(self):
+        """Test that a failing probe ejects the endpoint immediately"""
+        pool = EndpointPool(['http://bad', 'http://good'], eject_after=1, eject_duration=0.01)
+        bad = pool.choose()
+        pool.record_failure(bad)
+        time.sleep(0.02)
+        assert pool.choose() is bad
+        pool.record_failure(bad)
+        assert pool.stats()[0]['ejected']
+        assert bad.ejections == 2
+
+    def test_all_ejected_uses_soonest(self):
+        """Test that an all-ejected pool still returns an endpoint"""
+        pool = EndpointPool(['http://a', 'http://b'], eject_after=1, eject_duration=60)
+        for endpoint in list(pool.endpoints):
+            endpoint.in_flight += 1
+            pool.record_failure(endpoint)
+        assert pool.choose() is pool.endpoints[0]
+
+
+class TestClientFailover:
+    """Tests for uploads routed over several endpoints"""
+
+    def test_connection_error_fails_over(self, temp_file, fake_server, dead_url):
+        """Test that a refused connection moves the upload to the next endpoint"""
+        client = TFLinkClient(base_url=[dead_url, fake_server.url])
+        assert client.base_url == dead_url
+        assert client.connect_timeout == TFLinkClient.DEFAULT_FAILOVER_CONNECT_TIMEOUT
+
+        result = client.upload(temp_file)
+        assert result.download_link.startswith(fake_server.url)
+        stats = {s['base_url']: s for s in client.endpoints.stats()}
+        assert stats[dead_url]['error_rate'] > 0
+
+    def test_server_error_fails_over(self, temp_file, fake_server, second_server):
+        """Test that a 5xx from one endpoint moves the upload to another"""
+        fake_server.status = 503
+        client = TFLinkClient(base_url=[fake_server.url, second_server.url])
+        for _ in range(3):
+            assert client.upload(temp_file).download_link.startswith(second_server.url)
+        assert client.endpoints.stats()[0]['ejected']
+
+    def test_all_endpoints_failing_raises(self, temp_file, fake_server, dead_url):
+        """Test that the last error is raised when every endpoint fails"""
+        fake_server.status = 500
+        client = TFLinkClient(base_url=[dead_url, fake_server.url])
+        with pytest.raises((NetworkError, ServerError)):
+            client.upload(temp_file)
+
+    def test_deadline_covers_every_endpoint(self, tmp_path, fake_server, second_server):
+        """Test that failover shares one deadline and a timed-out upload ejects nothing"""
+        path = tmp_path / 'slow.bin'
+        path.write_bytes(b'x' * 4 * 1024 * 1024)
+        client = TFLinkClient(
+            base_url=[fake_server.url, second_server.url], connect_timeout=0.5,
+            read_timeout=0.5, min_throughput=16 * 1024 * 1024,
+            bandwidth_limit=2 * 1024 * 1024,
+        )
+        with client:
+            started = time.monotonic()
+            with pytest.raises(UploadTimeoutError, match='deadline'):
+                client.upload(str(path))
+            assert time.monotonic() - started < 1.9
+            for stats in client.endpoints.stats():
+                assert stats['error_rate'] == 0
+                assert stats['in_flight'] == 0
+
+    def test_single_endpoint_keeps_plain_timeout(self):
+        """Test that one base_url keeps the single timeout behaviour"""
+        client = TFLinkClient(base_url="https://custom.example.com")
+        assert client.endpoints is None
+        assert client.connect_timeout is None
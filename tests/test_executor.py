@@ -0,0 +1,88 @@
+"""
+Tests for tflink.executor
+"""
+
+import threading
+import time
+
+import pytest
+
+from tflink import CancelToken, ProcessUploadExecutor, UploadJournal
+from tflink.exceptions import FileNotFoundError, UploadCancelledError
+
+
+@pytest.fixture(scope='module')
+def module_server():
+    """Local stand-in server shared by the (slow to start) process pools"""
+    from tests.fake_server import FakeServer
+
+    with FakeServer() as server:
+        yield server
+
+
+def test_upload_batch_across_processes(tmp_path, module_server):
+    """Test that files are uploaded by worker processes in input order"""
+    paths = []
+    for i in range(5):
+        path = tmp_path / f'file{i}.txt'
+        path.write_bytes(b'x' * (i + 1) * 1000)
+        paths.append(path)
+
+    with ProcessUploadExecutor(processes=2, threads_per_process=2, chunk_size=2,
+                               base_url=module_server.url) as executor:
+        results = executor.upload_batch(paths)
+
+    assert [r.result.file_name for r in results] == [p.name for p in paths]
+    assert [r.result.size for r in results] == [(i + 1) * 1000 for i in range(5)]
+
+
+def test_errors_and_journal(tmp_path, module_server):
+    """Test that worker errors come back per file and are journaled"""
+    good = tmp_path / 'good.txt'
+    good.write_text('hello')
+    missing = tmp_path / 'missing.txt'
+    journal_path = tmp_path / 'batch.journal'
+
+    with ProcessUploadExecutor(processes=1, base_url=module_server.url) as executor:
+        results = executor.upload_batch([good, missing], journal=journal_path)
+        assert results[0].ok
+        assert isinstance(results[1].error, FileNotFoundError)
+
+        uploads_before = module_server.uploads
+        rerun = executor.upload_batch([good], journal=journal_path)
+        assert rerun[0].skipped
+        assert module_server.uploads == uploads_before
+
+    with UploadJournal(journal_path) as journal:
+        assert journal.is_completed(good)
+        assert not journal.is_completed(missing)
+
+
+def test_cancel_batch(tmp_path, module_server):
+    """Test that cancelling stops running uploads and drops the queued chunks"""
+    paths = []
+    for i in range(6):
+        path = tmp_path / f'file{i}.txt'
+        path.write_text(f'content {i}')
+        paths.append(path)
+    token = CancelToken()
+
+    def cancel_once_sending(requests_before):
+        while module_server.requests == requests_before:
+            time.sleep(0.01)
+        token.cancel("Backfill stopped")
+
+    with ProcessUploadExecutor(processes=1, threads_per_process=1, chunk_size=1,
+                               base_url=module_server.url) as executor:
+        executor.upload_batch(paths[:1])  # workers started
+        module_server.delay = 5
+        try:
+            threading.Thread(target=cancel_once_sending, args=(module_server.requests,),
+                             daemon=True).start()
+            started = time.monotonic()
+            results = executor.upload_batch(paths, cancel=token)
+        finally:
+            module_server.delay = 0
+    assert time.monotonic() - started < 3
+    assert all(isinstance(r.error, UploadCancelledError) for r in results)
+    assert 'Backfill stopped' in str(results[-1].error)
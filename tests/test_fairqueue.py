@@ -0,0 +1,118 @@
+"""
+Tests for tflink.fairqueue
+"""
+
+import pytest
+
+from tflink.fairqueue import FairQueue
+
+INF = float('inf')
+
+
+def drain(fq, now=0.0):
+    order = []
+    while len(fq):
+        order.append(fq.pop(now)[2])
+    return order
+
+
+class TestFairQueue:
+    """Tests for weighted fair queuing across tenants"""
+
+    def test_backlogged_tenants_alternate(self):
+        """Test that a large backlog does not delay another tenant's files"""
+        fq = FairQueue(request_cost=0)
+        for i in range(100):
+            fq.push('bulk', 1, INF, 1000, f'bulk{i}')
+        fq.push('user', 1, INF, 1000, 'user0')
+        fq.push('user', 1, INF, 1000, 'user1')
+        order = drain(fq)
+        assert order.index('user1') <= 4
+
+    def test_weights_set_shares(self):
+        """Test that a tenant with twice the weight gets twice the starts"""
+        fq = FairQueue({'gold': 2.0}, request_cost=0)
+        for i in range(30):
+            fq.push('gold', 1, INF, 100, 'gold')
+            fq.push('basic', 1, INF, 100, 'basic')
+        first = [fq.pop(0.0)[2] for _ in range(30)]
+        assert first.count('gold') == 20
+
+    def test_cost_is_bytes(self):
+        """Test that large files use up a tenant's share faster"""
+        fq = FairQueue(request_cost=0)
+        for _ in range(20):
+            fq.push('big', 1, INF, 10000, 'big')
+            fq.push('small', 1, INF, 1000, 'small')
+        first = [fq.pop(0.0)[2] for _ in range(11)]
+        assert first.count('big') == 1
+
+    def test_idle_tenant_gets_no_credit(self):
+        """Test that a tenant returning from idle cannot starve the others"""
+        fq = FairQueue(request_cost=0)
+        for _ in range(50):
+            fq.push('busy', 1, INF, 100, 'busy')
+        for _ in range(40):
+            fq.pop(0.0)
+        for _ in range(10):
+            fq.push('idle', 1, INF, 100, 'idle')
+        first = [fq.pop(0.0)[2] for _ in range(6)]
+        assert first.count('busy') == 3
+
+    def test_priority_before_fairness(self):
+        """Test that a higher priority class is served first regardless of share"""
+        fq = FairQueue(request_cost=0)
+        for _ in range(5):
+            fq.push('a', 0, INF, 100, 'a-high')
+        fq.push('b', 1, INF, 100, 'b-normal')
+        assert drain(fq) == ['a-high'] * 5 + ['b-normal']
+
+    def test_deadline_order_within_tenant(self):
+        """Test that a tenant's own entries run earliest deadline first"""
+        fq = FairQueue()
+        fq.push('a', 1, INF, 0, 'none')
+        fq.push('a', 1, 20.0, 0, 'late')
+        fq.push('a', 1, 10.0, 0, 'soon')
+        assert drain(fq) == ['soon', 'late', 'none']
+
+    def test_expired_entries_not_charged(self):
+        """Test that dropped uploads do not use up the tenant's share"""
+        fq = FairQueue(request_cost=0)
+        for _ in range(5):
+            fq.push('a', 1, 1.0, 1000, 'a-expired')
+        for _ in range(5):
+            fq.push('a', 1, INF, 100, 'a')
+            fq.push('b', 1, INF, 100, 'b')
+        order = [item for item in drain(fq, now=2.0) if item != 'a-expired']
+        assert order[:4].count('a') == 2
+
+    def test_many_tenants_round_robin(self):
+        """Test that thousands of tenants are each served once per round"""
+        fq = FairQueue()
+        for tenant in range(5000):
+            for _ in range(3):
+                fq.push(tenant, 1, INF, 0, tenant)
+        assert sorted(fq.pop(0.0)[0] for _ in range(5000)) == list(range(5000))
+        assert len(fq) == 10000
+
+    def test_idle_tenants_forgotten(self):
+        """Test that drained tenants are dropped once the virtual time passes them"""
+        fq = FairQueue(request_cost=0)
+        for i in range(2000):
+            fq.push('bulk', 1, INF, 100, 'bulk')
+        for i in range(1000):
+            fq.push(f'once{i}', 1, INF, 100, i)
+        for _ in range(1500):
+            fq.pop(0.0)
+        assert list(fq._tenants) == ['bulk']
+
+        drain(fq)
+        assert not fq._tenants
+        fq.push('late', 1, INF, 100, 'late')
+        fq.push('bulk', 1, INF, 100, 'bulk')
+        assert drain(fq) == ['late', 'bulk']
+
+    def test_invalid_weight(self):
+        """Test that weights must be positive"""
+        with pytest.raises(ValueError):
+            FairQueue({'a': 0})
@@ -0,0 +1,205 @@
+"""
+Tests for tflink.fileio
+"""
+
+import errno
+import hashlib
+import mmap
+import os
+
+import pytest
+
+from tflink import TFLinkClient
+from tflink import fileio
+from tflink.exceptions import UploadError
+from tflink.fileio import (
+    DirectFile, DropBehindFile, MappedFile, open_upload_file, read_small_file,
+)
+
+
+@pytest.fixture
+def data_file(tmp_path):
+    path = tmp_path / 'archive.bin'
+    data = os.urandom(3 * 4096 + 123)
+    path.write_bytes(data)
+    return path, data
+
+
+def read_all(f, chunk=1000):
+    chunks = []
+    while True:
+        chunk_data = f.read(chunk)
+        if not chunk_data:
+            return b''.join(chunks)
+        chunks.append(chunk_data)
+
+
+class TestOpenUploadFile:
+    """Tests for the page cache modes"""
+
+    @pytest.mark.parametrize('mode', ['keep', 'drop', 'direct'])
+    def test_modes_read_same_bytes(self, data_file, mode):
+        """Test that every mode returns the file contents and can restart"""
+        path, data = data_file
+        with open_upload_file(path, mode, buffer_size=4096) as f:
+            assert read_all(f) == data
+            f.seek(0)
+            buffer = bytearray(5000)
+            n = f.readinto(buffer)
+            assert bytes(buffer[:n]) == data[:n]
+
+    def test_unknown_mode(self):
+        """Test that unknown modes are rejected by the client"""
+        with pytest.raises(ValueError):
+            TFLinkClient(page_cache='bypass')
+
+    @pytest.mark.skipif(not hasattr(os, 'posix_fadvise'), reason="needs posix_fadvise")
+    def test_drop_releases_consumed_ranges(self, data_file, monkeypatch):
+        """Test that DONTNEED follows the read position"""
+        path, data = data_file
+        calls = []
+        monkeypatch.setattr(os, 'posix_fadvise', lambda fd, off, length, advice: calls.append(
+            (off, length, advice)))
+        with DropBehindFile(path, drop_every=4096) as f:
+            while f.read(4096):
+                pass
+
+        assert calls[0] == (0, 0, os.POSIX_FADV_SEQUENTIAL)
+        dropped = [(off, length) for off, length, advice in calls[1:-1]]
+        assert dropped == [(0, 4096), (4096, 4096), (8192, 4096)]
+        assert calls[-1] == (0, 0, os.POSIX_FADV_DONTNEED)
+
+    def test_direct_unaligned_seek(self, data_file):
+        """Test that DirectFile seeks to offsets inside a block"""
+        path, data = data_file
+        try:
+            f = DirectFile(path, buffer_size=4096)
+        except OSError:
+            pytest.skip("O_DIRECT is not supported here")
+        with f:
+            f.seek(5000)
+            assert f.read(200) == data[5000:5200]
+
+    def test_direct_falls_back_to_drop(self, data_file, monkeypatch):
+        """Test that filesystems rejecting O_DIRECT get drop-behind reads"""
+        path, data = data_file
+
+        def unsupported(*args, **kwargs):
+            raise OSError(errno.EINVAL, "Invalid argument")
+
+        monkeypatch.setattr(fileio, 'DirectFile', unsupported)
+        with open_upload_file(path, 'direct') as f:
+            assert isinstance(f, DropBehindFile)
+            assert read_all(f) == data
+
+    @pytest.mark.parametrize('mode', ['drop', 'direct'])
+    def test_upload(self, fake_server, data_file, mode):
+        """Test uploads through the local server in each mode"""
+        path, data = data_file
+        with TFLinkClient(base_url=fake_server.url, page_cache=mode, read_ahead=2,
+                          chunk_size=4096) as client:
+            result = client.upload(path, checksums=('sha256',))
+        assert result.size == len(data)
+        assert list(fake_server.files.values()) == [data]
+
+
+class TestReadSmallFile:
+    """Tests for whole-file reads of small files"""
+
+    def test_reads_size_bytes(self, data_file):
+        """Test that exactly size bytes are returned"""
+        path, data = data_file
+        assert read_small_file(path, len(data)) == data
+        assert read_small_file(path, 100) == data[:100]
+
+    def test_shrunk_file(self, data_file):
+        """Test that a file shorter than expected is an error"""
+        path, data = data_file
+        with pytest.raises(OSError, match="shrank"):
+            read_small_file(path, len(data) + 1)
+
+    def test_binary_bytes_unchanged(self, tmp_path):
+        """Test that CRLF and Ctrl-Z bytes are read as they are (no text mode)"""
+        data = b'line one\r\nline two\r\n\x1a after ctrl-z\r\n'
+        path = tmp_path / 'crlf.txt'
+        path.write_bytes(data)
+        assert read_small_file(path, len(data)) == data
+
+
+class TestMappedFile:
+    """Tests for memory-mapped uploads"""
+
+    def test_views_are_slices_of_the_mapping(self, data_file):
+        """Test that view() returns zero-copy memoryviews of the file"""
+        path, data = data_file
+        with MappedFile(path) as f:
+            chunk = f.view(4096, 1000)
+            assert isinstance(chunk, memoryview)
+            assert isinstance(chunk.obj, mmap.mmap)
+            assert bytes(chunk) == data[4096:5096]
+            del chunk
+            assert read_all(f) == data
+
+    def test_length_caps_mapping(self, data_file):
+        """Test that only the announced number of bytes is mapped"""
+        path, data = data_file
+        with MappedFile(path, length=5000) as f:
+            assert f.length == 5000
+            assert len(f.view(4000, 4096)) == 1000
+
+    def test_truncated_file_gives_short_view(self, data_file):
+        """Test that a file truncated after mapping is not read past its end"""
+        path, data = data_file
+        with MappedFile(path) as f:
+            os.truncate(path, 4096)
+            assert bytes(f.view(0, 8192)) == data[:4096]
+            assert len(f.view(8192, 100)) == 0
+
+    def test_empty_file(self, tmp_path):
+        """Test that empty files need no mapping"""
+        path = tmp_path / 'empty.bin'
+        path.write_bytes(b'')
+        with MappedFile(path) as f:
+            assert f.read() == b''
+
+    def test_sent_pages_released(self, data_file, monkeypatch):
+        """Test that MADV_DONTNEED follows the consumed offset"""
+        if not hasattr(mmap, 'MADV_DONTNEED') or not hasattr(mmap.mmap, 'madvise'):
+            pytest.skip("needs mmap.madvise")
+        path, data = data_file
+        calls = []
+        with MappedFile(path, release_every=4096) as f:
+            monkeypatch.setattr(f, '_madvise', lambda advice, start, length: calls.append(
+                (advice, start, length)))
+            for offset in range(0, len(data), 4096):
+                f.view(offset, 4096)
+        assert calls == [(mmap.MADV_DONTNEED, 0, 4096), (mmap.MADV_DONTNEED, 4096, 4096),
+                         (mmap.MADV_DONTNEED, 8192, 4096)]
+
+    def test_requires_keep(self):
+        """Test that memory_map cannot be combined with other page cache modes"""
+        with pytest.raises(ValueError):
+            TFLinkClient(memory_map=True, page_cache='drop')
+
+    def test_upload_with_checksums(self, fake_server, tmp_path):
+        """Test a mapped upload with inline hashing and a restart-safe body"""
+        path = tmp_path / 'big.bin'
+        data = os.urandom(1024 * 1024 + 11)
+        path.write_bytes(data)
+        with TFLinkClient(base_url=fake_server.url, memory_map=True,
+                          chunk_size=64 * 1024) as client:
+            result = client.upload(path, checksums=('sha256', 'md5'))
+        assert result.size == len(data)
+        assert result.checksums['sha256'] == hashlib.sha256(data).hexdigest()
+        assert list(fake_server.files.values()) == [data]
+
+    def test_max_file_size_checked_before_mapping(self, tmp_path, monkeypatch):
+        """Test that oversized files are rejected without being mapped"""
+        path = tmp_path / 'big.bin'
+        path.write_bytes(b'x' * 2048)
+        mapped = []
+        monkeypatch.setattr(fileio, 'MappedFile', lambda *a, **k: mapped.append(a))
+        with TFLinkClient(memory_map=True, max_file_size=1024) as client:
+            with pytest.raises(UploadError, match="File too large"):
+                client.upload(path)
+        assert mapped == []
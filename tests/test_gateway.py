@@ -0,0 +1,160 @@
+"""
+Tests for tflink.gateway
+"""
+
+import os
+import subprocess
+import sys
+import time
+
+import pytest
+
+from tflink import gateway as gateway_module
+from tflink import (
+    GatewayClient,
+    NetworkError,
+    ServerError,
+    TFLinkClient,
+    UploadGateway,
+)
+
+pytestmark = pytest.mark.skipif(not hasattr(os, 'fork'), reason="needs Unix domain sockets")
+
+
+@pytest.fixture
+def sample_file(tmp_path):
+    path = tmp_path / 'report.txt'
+    path.write_bytes(b'gateway payload ' * 100)
+    return path
+
+
+@pytest.fixture
+def gateway(fake_server, tmp_path):
+    with UploadGateway(tmp_path / 'gw.sock', base_url=fake_server.url) as gw:
+        gw.start()
+        yield gw
+
+
+class TestGateway:
+    """Tests for uploads handed to a local gateway"""
+
+    def test_upload_through_gateway(self, gateway, fake_server, sample_file):
+        """Test that a thin client gets the gateway's upload result"""
+        client = TFLinkClient(gateway=gateway.path)
+        result = client.upload(sample_file, filename='renamed.txt', checksums=('sha256',))
+
+        assert result.file_name == 'renamed.txt'
+        assert result.size == sample_file.stat().st_size
+        assert 'sha256' in result.checksums
+        assert fake_server.requests == 1
+        assert list(fake_server.files.values()) == [sample_file.read_bytes()]
+
+    def test_path_mode(self, gateway, fake_server, sample_file):
+        """Test that the gateway can also open the file by path"""
+        client = TFLinkClient(gateway=GatewayClient(gateway.path, pass_fds=False))
+        assert client.upload(sample_file).file_name == 'report.txt'
+        assert fake_server.requests == 1
+
+    def test_dedup_unchanged_file(self, gateway, fake_server, sample_file):
+        """Test that an unchanged file is not uploaded twice"""
+        client = TFLinkClient(gateway=gateway.path)
+        first = client.upload(sample_file)
+        second = client.upload(sample_file)
+        assert second.download_link == first.download_link
+        assert fake_server.requests == 1
+
+        time.sleep(0.01)
+        sample_file.write_bytes(b'changed')
+        client.upload(sample_file)
+        assert fake_server.requests == 2
+        assert gateway.stats()['dedup_hits'] == 1
+
+    def test_error_reported_with_original_type(self, gateway, fake_server, sample_file):
+        """Test that the gateway's exception type reaches the thin client"""
+        fake_server.status = 503
+        client = TFLinkClient(gateway=gateway.path)
+        with pytest.raises(ServerError):
+            client.upload(sample_file)
+        assert GatewayClient(gateway.path).stats()['errors'] == 1
+
+    def test_gateway_not_running(self, tmp_path, sample_file):
+        """Test that a missing gateway is a NetworkError"""
+        client = TFLinkClient(gateway=tmp_path / 'missing.sock')
+        with pytest.raises(NetworkError):
+            client.upload(sample_file)
+
+    def test_many_processes_share_gateway(self, gateway, fake_server, tmp_path):
+        """Test that separate processes upload through one gateway"""
+        script = (
+            "import sys\n"
+            "from tflink import TFLinkClient\n"
+            "client = TFLinkClient(gateway=sys.argv[1])\n"
+            "print(client.upload(sys.argv[2]).size)\n"
+        )
+        procs = []
+        for i in range(4):
+            path = tmp_path / f'file-{i}.bin'
+            path.write_bytes(b'x' * (i + 1))
+            procs.append(subprocess.Popen(
+                [sys.executable, '-c', script, str(gateway.path), str(path)],
+                stdout=subprocess.PIPE,
+            ))
+        sizes = sorted(int(p.communicate(timeout=60)[0]) for p in procs)
+        assert sizes == [1, 2, 3, 4]
+        assert gateway.stats()['uploads'] == 4
+
+    def test_socket_permissions_and_cleanup(self, fake_server, tmp_path):
+        """Test that the socket is private and removed on stop"""
+        path = tmp_path / 'gw.sock'
+        with UploadGateway(path, base_url=fake_server.url):
+            assert oct(path.stat().st_mode & 0o777) == oct(0o600)
+        assert not path.exists()
+
+    def test_gateway_with_credentials_rejected(self, tmp_path):
+        """Test that a thin client does not silently drop its own credentials"""
+        with pytest.raises(ValueError):
+            TFLinkClient(user_id='id', auth_token='token', gateway=tmp_path / 'gw.sock')
+
+    def test_import_without_unix_sockets(self):
+        """Test that tflink imports where AF_UNIX is missing and the gateway says why"""
+        script = (
+            "import socket\n"
+            "del socket.AF_UNIX\n"
+            "from tflink import GatewayClient, TFLinkClient\n"
+            "TFLinkClient()\n"
+            "try:\n"
+            "    TFLinkClient(gateway=True)\n"
+            "except OSError as e:\n"
+            "    print(e.strerror)\n"
+        )
+        output = subprocess.run([sys.executable, '-c', script], capture_output=True, text=True,
+                                check=True).stdout
+        assert 'not supported' in output
+
+    def test_shared_socket_directory_rejected(self, fake_server, tmp_path):
+        """Test that a socket directory others can write to is refused"""
+        shared = tmp_path / 'shared'
+        shared.mkdir()
+        shared.chmod(0o1777)
+        with pytest.raises(OSError, match='mode 0700'):
+            UploadGateway(shared / 'gw.sock', base_url=fake_server.url)
+        assert not (shared / 'gw.sock').exists()
+
+    def test_foreign_gateway_gets_nothing(self, gateway, fake_server, sample_file, monkeypatch):
+        """Test that no descriptor is sent to a gateway run by another user"""
+        monkeypatch.setattr(gateway_module, '_peer_uid', lambda sock: os.getuid() + 1)
+        client = TFLinkClient(gateway=gateway.path)
+        with pytest.raises(NetworkError, match='runs as uid'):
+            client.upload(sample_file)
+        monkeypatch.undo()
+        assert gateway.stats()['requests'] == 0
+        assert fake_server.requests == 0
+
+    def test_path_mode_needs_same_user(self, gateway, fake_server, sample_file):
+        """Test that another user's request by path is refused rather than opened"""
+        reply = gateway._dispatch(
+            {'op': 'upload', 'path': str(sample_file)}, None, os.getuid() + 1
+        )
+        assert reply['error']['type'] == 'AuthenticationError'
+        assert 'file descriptor' in reply['error']['message']
+        assert fake_server.requests == 0
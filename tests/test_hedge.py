@@ -0,0 +1,120 @@
+"""
+Tests for tflink.hedge
+"""
+
+import time
+from concurrent.futures import Future
+
+import pytest
+
+from tflink import HedgePolicy, TFLinkClient, UploadResult
+
+
+@pytest.fixture
+def small_file(tmp_path):
+    path = tmp_path / 'small.txt'
+    path.write_bytes(b'x' * 100)
+    return str(path)
+
+
+class TestHedgePolicy:
+    """Tests for hedge delay and budget accounting"""
+
+    def test_initial_delay_until_enough_samples(self):
+        """Test that the fixed delay is used while latencies are scarce"""
+        policy = HedgePolicy(initial_delay=0.5, min_samples=3)
+        policy.observe(0.01)
+        assert policy.delay() == 0.5
+
+    def test_percentile_delay(self):
+        """Test that the delay follows the configured latency percentile"""
+        policy = HedgePolicy(percentile=90, min_samples=10)
+        for i in range(1, 101):
+            policy.observe(i / 100)
+        assert policy.delay() == pytest.approx(0.91)
+
+    def test_budget_caps_hedges(self):
+        """Test that hedges stop once the budget is spent"""
+        policy = HedgePolicy(budget=0.5, burst=1)
+        policy.start()
+        assert policy.try_hedge()
+        policy.start()
+        assert not policy.try_hedge()
+        policy.start()
+        assert policy.try_hedge()
+        assert policy.stats()['budget_exhausted'] == 1
+
+    def test_invalid_percentile(self):
+        """Test that percentiles outside (0, 100) are rejected"""
+        with pytest.raises(ValueError):
+            HedgePolicy(percentile=100)
+
+
+class TestHedgedUploads:
+    """Tests for hedged uploads against the local stand-in server"""
+
+    def test_hedge_beats_slow_response(self, fake_server, small_file):
+        """Test that a slow first attempt is overtaken and cancelled"""
+        fake_server.delays = [3.0]
+        policy = HedgePolicy(initial_delay=0.1)
+        with TFLinkClient(base_url=fake_server.url, hedge=policy) as client:
+            started = time.monotonic()
+            result = client.upload(small_file)
+            elapsed = time.monotonic() - started
+
+        assert result.size == 100
+        assert elapsed < 2
+        stats = policy.stats()
+        assert stats['hedged'] == 1
+        assert stats['hedge_wins'] == 1
+        assert stats['cancelled'] == 1
+
+    def test_fast_upload_not_hedged(self, fake_server, small_file):
+        """Test that uploads finishing within the delay send one request"""
+        policy = HedgePolicy(initial_delay=5)
+        with TFLinkClient(base_url=fake_server.url, hedge=policy) as client:
+            client.upload(small_file)
+        assert policy.stats()['hedged'] == 0
+        assert fake_server.requests == 1
+
+    def test_queue_wait_not_counted(self, fake_server, small_file):
+        """Test that waiting for a free hedge thread does not trigger a hedge"""
+        policy = HedgePolicy(initial_delay=0.2)
+        with TFLinkClient(base_url=fake_server.url, hedge=policy, pool_size=1) as client:
+            executor = client._hedge_executor()
+            busy = [executor.submit(time.sleep, 0.5) for _ in range(2)]
+            client.upload(small_file)
+            assert all(f.done() for f in busy)
+        assert policy.stats()['hedged'] == 0
+        assert fake_server.requests == 1
+
+    def test_large_upload_not_hedged(self, fake_server, tmp_path):
+        """Test that files above max_size are never hedged"""
+        path = tmp_path / 'large.bin'
+        path.write_bytes(b'x' * 2048)
+        fake_server.delays = [0.3]
+        policy = HedgePolicy(max_size=1024, initial_delay=0.05)
+        with TFLinkClient(base_url=fake_server.url, hedge=policy) as client:
+            client.upload(str(path))
+        assert policy.stats()['eligible'] == 0
+        assert fake_server.requests == 1
+
+    def test_budget_exhausted_waits_for_first_attempt(self, fake_server, small_file):
+        """Test that without budget the upload simply waits for its only attempt"""
+        fake_server.delays = [0.3]
+        policy = HedgePolicy(initial_delay=0.05, budget=0, burst=1)
+        policy.try_hedge()
+        with TFLinkClient(base_url=fake_server.url, hedge=policy) as client:
+            assert client.upload(small_file).size == 100
+        assert fake_server.requests == 1
+        assert policy.stats()['budget_exhausted'] == 1
+
+    def test_completed_loser_recorded_as_duplicate(self, small_file):
+        """Test that a losing attempt that still succeeded is recorded"""
+        policy = HedgePolicy()
+        client = TFLinkClient(hedge=policy)
+        future = Future()
+        future.set_result(UploadResult('a', 'link', 'link', 1, 'text/plain', 'public'))
+        client._record_hedge_loser(future)
+        assert policy.stats()['duplicates'] == 1
+        assert policy.duplicates[0].file_name == 'a'
@@ -0,0 +1,142 @@
+"""
+Tests for tflink.journal
+"""
+
+import pytest
+from unittest.mock import patch
+
+from tflink import TFLinkClient, UploadJournal, UploadResult
+from tflink.exceptions import UploadError
+
+
+@pytest.fixture
+def upload_result(mock_response_data):
+    """UploadResult built from the sample API response"""
+    return UploadResult.from_json(mock_response_data)
+
+
+class TestUploadJournal:
+    """Tests for journal recording and replay"""
+
+    def test_replay_completed_and_in_flight(self, tmp_path, upload_result):
+        """Test that a reopened journal restores completed and in-flight files"""
+        journal_path = tmp_path / 'batch.journal'
+        with UploadJournal(journal_path) as journal:
+            journal.record_start(tmp_path / 'a.txt')
+            journal.record_done(tmp_path / 'a.txt', upload_result)
+            journal.record_start(tmp_path / 'b.txt')
+
+        reopened = UploadJournal(journal_path)
+        assert reopened.is_completed(tmp_path / 'a.txt')
+        assert reopened.get_result(tmp_path / 'a.txt') == upload_result
+        assert reopened.in_flight() == [UploadJournal.key_for(tmp_path / 'b.txt')]
+        reopened.close()
+
+    def test_failed_uploads_are_not_completed(self, tmp_path):
+        """Test that a failure record clears the in-flight state"""
+        journal_path = tmp_path / 'batch.journal'
+        with UploadJournal(journal_path) as journal:
+            journal.record_start(tmp_path / 'a.txt')
+            journal.record_failed(tmp_path / 'a.txt', UploadError("boom"))
+
+        with UploadJournal(journal_path) as reopened:
+            assert not reopened.is_completed(tmp_path / 'a.txt')
+            assert reopened.in_flight() == []
+
+    def test_torn_last_line_is_ignored(self, tmp_path, upload_result):
+        """Test that a partially written record does not break replay"""
+        journal_path = tmp_path / 'batch.journal'
+        with UploadJournal(journal_path) as journal:
+            journal.record_done(tmp_path / 'a.txt', upload_result)
+        with open(journal_path, 'a') as f:
+            f.write('{"op": "done", "key": "/tmp/b.t')
+
+        with UploadJournal(journal_path) as reopened:
+            assert len(reopened.completed()) == 1
+            reopened.record_done(tmp_path / 'c.txt', upload_result)
+
+        with UploadJournal(journal_path) as reopened:
+            assert reopened.is_completed(tmp_path / 'c.txt')
+            assert len(reopened.completed()) == 2
+
+    def test_done_record_without_result_is_skipped(self, tmp_path, upload_result):
+        """Test that a malformed completion record does not abort replay"""
+        journal_path = tmp_path / 'batch.journal'
+        with open(journal_path, 'w') as f:
+            f.write('{"op": "done", "key": "/tmp/b.txt"}\n')
+            f.write('{"op": "done", "key": "/tmp/c.txt", "result": {"fileName": "c"}}\n')
+        with UploadJournal(journal_path) as journal:
+            journal.record_done(tmp_path / 'a.txt', upload_result)
+
+        with UploadJournal(journal_path) as reopened:
+            assert list(reopened.completed()) == [UploadJournal.key_for(tmp_path / 'a.txt')]
+
+    def test_batch_policy_buffers_writes(self, tmp_path):
+        """Test that batch mode writes only every sync_every records"""
+        journal_path = tmp_path / 'batch.journal'
+        with patch('tflink.journal.os.fsync') as mock_fsync:
+            journal = UploadJournal(journal_path, sync='batch', sync_every=3, sync_interval=60)
+            journal.record_start(tmp_path / 'a.txt')
+            journal.record_start(tmp_path / 'b.txt')
+            assert journal_path.read_text() == ''
+            journal.record_start(tmp_path / 'c.txt')
+            assert len(journal_path.read_text().splitlines()) == 3
+            assert mock_fsync.call_count == 1
+            journal.close()
+
+    def test_always_policy_fsyncs_every_record(self, tmp_path):
+        """Test that always mode fsyncs after each record"""
+        with patch('tflink.journal.os.fsync') as mock_fsync:
+            journal = UploadJournal(tmp_path / 'batch.journal', sync='always')
+            journal.record_start(tmp_path / 'a.txt')
+            journal.record_start(tmp_path / 'b.txt')
+            assert mock_fsync.call_count == 2
+            journal.close()
+
+    def test_invalid_sync_policy(self, tmp_path):
+        """Test that an unknown sync policy raises ValueError"""
+        with pytest.raises(ValueError):
+            UploadJournal(tmp_path / 'batch.journal', sync='sometimes')
+
+
+class TestUploadBatchJournal:
+    """Tests for upload_batch with a journal"""
+
+    def test_restart_skips_completed_files(self, tmp_path, upload_result):
+        """Test that a restarted batch only uploads unfinished files"""
+        journal_path = tmp_path / 'batch.journal'
+        paths = [str(tmp_path / name) for name in ('a.txt', 'b.txt', 'c.txt')]
+
+        with UploadJournal(journal_path) as journal:
+            journal.record_start(paths[0])
+            journal.record_done(paths[0], upload_result)
+            journal.record_start(paths[1])
+
+        client = TFLinkClient()
+        with patch.object(client, 'upload', return_value=upload_result) as mock_upload:
+            results = client.upload_batch(paths, journal=journal_path)
+
+        uploaded = sorted(call.args[0] for call in mock_upload.call_args_list)
+        assert uploaded == paths[1:]
+        assert [r.skipped for r in results] == [True, False, False]
+        assert all(r.ok for r in results)
+
+        with UploadJournal(journal_path) as reopened:
+            assert len(reopened.completed()) == 3
+            assert reopened.in_flight() == []
+
+    def test_batch_collects_errors(self, tmp_path, upload_result):
+        """Test that one failing file does not abort the batch"""
+        paths = [str(tmp_path / 'ok.txt'), str(tmp_path / 'bad.txt')]
+
+        def fake_upload(path, filename=None):
+            if path.endswith('bad.txt'):
+                raise UploadError("Server error (500). Please try again later.")
+            return upload_result
+
+        client = TFLinkClient()
+        with patch.object(client, 'upload', side_effect=fake_upload):
+            results = client.upload_batch(paths, journal=tmp_path / 'batch.journal')
+
+        assert results[0].ok
+        assert isinstance(results[1].error, UploadError)
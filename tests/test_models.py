@@ -67,3 +67,13 @@ def test_upload_result_attributes():
     assert result.size == 2048
     assert result.file_type == "application/pdf"
     assert result.uploaded_to == "user: test_user"
+
+
+def test_upload_result_json_round_trip(mock_response_data):
+    """Test that to_json() is accepted by from_json(), including checksums"""
+    result = UploadResult.from_json(mock_response_data)
+    assert result.checksums == {}
+    assert 'checksums' not in result.to_json()
+
+    result.checksums = {'sha256': 'abc123'}
+    assert UploadResult.from_json(result.to_json()) == result
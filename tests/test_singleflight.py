@@ -0,0 +1,173 @@
+"""
+Tests for tflink.singleflight
+"""
+
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from tflink import TFLinkClient
+from tflink.exceptions import ServerError, UploadError
+from tflink.singleflight import SingleFlight
+
+
+class TestSingleFlight:
+    """Tests for sharing one call between concurrent callers"""
+
+    def test_waiters_share_result(self):
+        """Test that callers arriving during a call get its result without running fn"""
+        flights = SingleFlight()
+        started = threading.Event()
+        release = threading.Event()
+        runs = []
+
+        def fn():
+            runs.append(1)
+            started.set()
+            release.wait(5)
+            return object()
+
+        with ThreadPoolExecutor(4) as pool:
+            leader = pool.submit(flights.do, 'key', fn)
+            assert started.wait(5)
+            joiners = [pool.submit(flights.do, 'key', fn) for _ in range(3)]
+            while flights.stats()['coalesced'] < 3:
+                threading.Event().wait(0.001)
+            release.set()
+            results = [leader.result()] + [f.result() for f in joiners]
+
+        assert len(runs) == 1
+        assert all(r is results[0] for r in results)
+        assert flights.stats() == {'calls': 1, 'coalesced': 3, 'in_flight': 0}
+
+    def test_waiters_get_copy_of_exception(self):
+        """Test that waiters raise their own copy of the leader's exception"""
+        flights = SingleFlight()
+        started = threading.Event()
+        release = threading.Event()
+        error = ServerError("boom")
+
+        def fn():
+            started.set()
+            release.wait(5)
+            raise error
+
+        with ThreadPoolExecutor(2) as pool:
+            leader = pool.submit(flights.do, 'key', fn)
+            assert started.wait(5)
+            joiner = pool.submit(flights.do, 'key', fn)
+            while flights.stats()['coalesced'] < 1:
+                threading.Event().wait(0.001)
+            release.set()
+            assert leader.exception() is error
+            copied = joiner.exception()
+        assert type(copied) is ServerError
+        assert copied is not error
+        assert copied.args == error.args
+        assert copied.__cause__ is error
+        assert copied.__traceback__ is not error.__traceback__
+
+    def test_interrupt_reaches_waiters_as_upload_error(self):
+        """Test that a KeyboardInterrupt stays with the leader"""
+        flights = SingleFlight()
+        started = threading.Event()
+        release = threading.Event()
+
+        def fn():
+            started.set()
+            release.wait(5)
+            raise KeyboardInterrupt
+
+        joiner_error = []
+        leader = threading.Thread(target=lambda: pytest.raises(KeyboardInterrupt, flights.do,
+                                                               'key', fn))
+        leader.start()
+        assert started.wait(5)
+
+        def join():
+            try:
+                flights.do('key', fn)
+            except BaseException as e:
+                joiner_error.append(e)
+
+        joiner = threading.Thread(target=join)
+        joiner.start()
+        while flights.stats()['coalesced'] < 1:
+            threading.Event().wait(0.001)
+        release.set()
+        leader.join(5)
+        joiner.join(5)
+        assert isinstance(joiner_error[0], UploadError)
+
+    def test_not_a_cache(self):
+        """Test that sequential calls run fn again"""
+        flights = SingleFlight()
+        assert flights.do('key', lambda: 1) == 1
+        assert flights.do('key', lambda: 2) == 2
+        assert flights.stats()['calls'] == 2
+
+
+class TestClientCoalesce:
+    """Tests for TFLinkClient(coalesce=True)"""
+
+    def upload_concurrently(self, client, fake_server, calls):
+        """Start the calls while the server holds the first upload"""
+        fake_server.delay = 0.3
+        with ThreadPoolExecutor(len(calls)) as pool:
+            futures = [pool.submit(client.upload, *args) for args in calls]
+            return [f.result() for f in futures]
+
+    def test_identical_uploads_share_request(self, fake_server, tmp_path):
+        """Test that concurrent uploads of one file send it once"""
+        path = tmp_path / 'shared.pdf'
+        path.write_bytes(os.urandom(10000))
+        with TFLinkClient(base_url=fake_server.url, coalesce=True) as client:
+            results = self.upload_concurrently(client, fake_server, [(path,)] * 5)
+        assert fake_server.requests == 1
+        assert all(r is results[0] for r in results)
+        assert client._flights.stats()['coalesced'] == 4
+
+    def test_different_filename_not_coalesced(self, fake_server, tmp_path):
+        """Test that a different upload filename is a different upload"""
+        path = tmp_path / 'shared.pdf'
+        path.write_bytes(b'data')
+        with TFLinkClient(base_url=fake_server.url, coalesce=True) as client:
+            a, b = self.upload_concurrently(client, fake_server, [(path, 'a.pdf'), (path, 'b.pdf')])
+        assert fake_server.requests == 2
+        assert (a.file_name, b.file_name) == ('a.pdf', 'b.pdf')
+
+    def test_modified_file_not_coalesced(self, fake_server, tmp_path):
+        """Test that a rewrite during the upload starts a new upload"""
+        path = tmp_path / 'shared.pdf'
+        path.write_bytes(b'first')
+        fake_server.delay = 0.3
+        with TFLinkClient(base_url=fake_server.url, coalesce=True) as client:
+            with ThreadPoolExecutor(2) as pool:
+                first = pool.submit(client.upload, path)
+                while client._flights.in_flight() < 1:
+                    threading.Event().wait(0.001)
+                path.write_bytes(b'second version')
+                second = pool.submit(client.upload, path)
+                assert first.result().size == 5
+                assert second.result().size == 14
+        assert fake_server.requests == 2
+
+    def test_failure_shared(self, fake_server, tmp_path):
+        """Test that every coalesced caller sees the one failure"""
+        path = tmp_path / 'shared.pdf'
+        path.write_bytes(b'data')
+        fake_server.status = 500
+        with TFLinkClient(base_url=fake_server.url, coalesce=True) as client:
+            with pytest.raises(ServerError):
+                self.upload_concurrently(client, fake_server, [(path,)] * 3)
+        assert fake_server.requests == 1
+
+    def test_off_by_default(self, fake_server, tmp_path):
+        """Test that without coalesce every call uploads"""
+        path = tmp_path / 'shared.pdf'
+        path.write_bytes(b'data')
+        with TFLinkClient(base_url=fake_server.url) as client:
+            self.upload_concurrently(client, fake_server, [(path,)] * 3)
+        assert fake_server.requests == 3
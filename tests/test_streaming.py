@@ -0,0 +1,250 @@
+"""
+Tests for tflink.streaming
+"""
+
+import io
+import os
+import socket
+import ssl
+import threading
+import time
+
+import hashlib
+
+import pytest
+from unittest.mock import Mock
+
+from tflink import TFLinkClient
+from tflink.exceptions import AuthenticationError, ServerError
+from tflink.streaming import MultipartBody, MultipartTemplate, ReadAhead
+
+
+class SlowFile(io.BytesIO):
+    """BytesIO whose readinto returns at most 1000 bytes per call"""
+
+    def readinto(self, buffer):
+        view = memoryview(buffer)[:1000]
+        return super().readinto(view)
+
+
+def body_bytes(body):
+    return b''.join(bytes(chunk) for chunk in body)
+
+
+class TestReadAhead:
+    """Tests for the background read-ahead ring"""
+
+    def test_reads_whole_file_in_order(self):
+        """Test that chunks come back in file order despite short reads"""
+        data = bytes(range(256)) * 1000
+        chunks = [bytes(c) for c in ReadAhead(SlowFile(data), len(data), depth=3, buffer_size=4096)]
+        assert b''.join(chunks) == data
+        assert all(len(c) == 4096 for c in chunks[:-1])
+
+    def test_buffers_are_reused(self):
+        """Test that no buffer is allocated per chunk"""
+        data = b'x' * 100000
+        reader = ReadAhead(io.BytesIO(data), len(data), depth=2, buffer_size=1000)
+        buffers = {id(chunk.obj) for chunk in reader}
+        assert buffers <= {id(b) for b in reader.buffers}
+
+    def test_stops_at_size(self):
+        """Test that reading stops after size bytes"""
+        reader = ReadAhead(io.BytesIO(b'a' * 5000), 3000, depth=2, buffer_size=1024)
+        assert sum(len(c) for c in reader) == 3000
+
+    def test_reader_error_raised(self):
+        """Test that a read error reaches the consumer"""
+        class Broken(io.BytesIO):
+            def readinto(self, buffer):
+                raise OSError("disk gone")
+
+        with pytest.raises(OSError, match="disk gone"):
+            list(ReadAhead(Broken(b'x' * 10), 10, depth=2, buffer_size=4))
+
+    def test_early_close_stops_reader(self):
+        """Test that abandoning iteration ends the reader thread"""
+        reader = iter(ReadAhead(io.BytesIO(b'x' * 100000), 100000, depth=2, buffer_size=100))
+        next(reader)
+        reader.close()
+        assert not any(t.name == 'tflink-readahead' for t in threading.enumerate())
+
+
+class TestMultipartBodyReadAhead:
+    """Tests for MultipartBody with read-ahead enabled"""
+
+    def test_same_body_with_and_without_read_ahead(self):
+        """Test that read-ahead does not change the bytes or checksums"""
+        data = b'0123456789' * 10000
+        plain = MultipartBody(io.BytesIO(data), 'f.bin', len(data), chunk_size=4096,
+                              checksums=('sha256',))
+        ahead = MultipartBody(io.BytesIO(data), 'f.bin', len(data), chunk_size=4096,
+                              checksums=('sha256',), read_ahead=4)
+        ahead.boundary = plain.boundary
+        ahead.preamble, ahead.epilogue = plain.preamble, plain.epilogue
+
+        assert body_bytes(ahead) == body_bytes(plain)
+        assert ahead.hexdigests() == plain.hexdigests()
+        assert ahead.bytes_sent == len(data)
+
+    def test_shrunk_file_detected(self):
+        """Test that a file shorter than announced fails the upload"""
+        body = MultipartBody(io.BytesIO(b'x' * 5000), 'f.bin', 9000, chunk_size=1000, read_ahead=2)
+        with pytest.raises(OSError, match="shrank"):
+            body_bytes(body)
+
+    def test_upload_with_read_ahead(self, fake_server, tmp_path):
+        """Test an upload through the local server with read-ahead"""
+        path = tmp_path / 'big.bin'
+        data = bytes(range(256)) * 4096
+        path.write_bytes(data)
+        with TFLinkClient(base_url=fake_server.url, chunk_size=64 * 1024, read_ahead=3) as client:
+            result = client.upload(path, checksums=('sha256',))
+        assert result.size == len(data)
+        assert list(fake_server.files.values()) == [data]
+
+
+@pytest.mark.skipif(not hasattr(os, 'sendfile'), reason="needs os.sendfile()")
+class TestSendfile:
+    """Tests for zero-copy uploads with os.sendfile()"""
+
+    @pytest.fixture
+    def big_file(self, tmp_path):
+        path = tmp_path / 'big.bin'
+        path.write_bytes(os.urandom(1024 * 1024 + 7))
+        return path
+
+    @pytest.fixture
+    def sendfile_calls(self, monkeypatch):
+        calls = []
+        original = socket.socket.sendfile
+
+        def spy(sock, file, offset=0, count=None):
+            calls.append(count)
+            return original(sock, file, offset, count)
+
+        monkeypatch.setattr(socket.socket, 'sendfile', spy)
+        return calls
+
+    def test_plain_http_uses_sendfile(self, fake_server, big_file, sendfile_calls):
+        """Test that file data goes through sendfile() in chunk-sized pieces"""
+        with TFLinkClient(base_url=fake_server.url, sendfile=True, stall_timeout=30) as client:
+            result = client.upload(big_file)
+        assert result.size == big_file.stat().st_size
+        assert list(fake_server.files.values()) == [big_file.read_bytes()]
+        assert len(sendfile_calls) == 5
+
+    def test_checksums_disable_sendfile(self, fake_server, big_file, sendfile_calls):
+        """Test that uploads computing checksums read the file in Python"""
+        with TFLinkClient(base_url=fake_server.url, sendfile=True) as client:
+            result = client.upload(big_file, checksums=('sha256',))
+        assert 'sha256' in result.checksums
+        assert sendfile_calls == []
+
+    def test_tls_socket_streams(self, big_file):
+        """Test that TLS sockets never get sendfile(), which would copy anyway"""
+        with open(big_file, 'rb') as f:
+            body = MultipartBody(f, 'big.bin', big_file.stat().st_size, sendfile=True)
+            body.use_socket(Mock(spec=ssl.SSLSocket))
+            assert body._zero_copy_socket() is None
+
+    def test_sendfile_honours_bandwidth_limit(self, fake_server, big_file):
+        """Test that sendfile() pieces are still charged to the rate limit"""
+        with TFLinkClient(base_url=fake_server.url, sendfile=True,
+                          bandwidth_limit=2 * 1024 * 1024) as client:
+            started = time.monotonic()
+            client.upload(big_file)
+            elapsed = time.monotonic() - started
+        assert elapsed >= 0.2
+
+
+class TestTinyFiles:
+    """Tests for the in-memory fast path for small files"""
+
+    @pytest.fixture
+    def sendall_calls(self, monkeypatch, fake_server):
+        """Sizes of sendall() calls made by clients of the local server"""
+        calls = []
+        original = socket.socket.sendall
+        port = int(fake_server.url.rsplit(':', 1)[1])
+
+        def spy(sock, data, *args):
+            if sock.getpeername()[1] == port:
+                calls.append(len(data))
+            return original(sock, data, *args)
+
+        monkeypatch.setattr(socket.socket, 'sendall', spy)
+        return calls
+
+    def test_template_matches_streamed_body(self):
+        """Test that the prepared envelope equals the streamed one"""
+        template = MultipartTemplate()
+        content_type, body = template.render('a "b".txt', b'hello')
+        streamed = MultipartBody(io.BytesIO(b'hello'), 'a "b".txt', 5)
+        assert content_type == template.content_type
+        assert body == body_bytes(streamed).replace(
+            streamed.boundary.encode(), template.boundary.encode()
+        )
+
+    def test_template_avoids_boundary_in_data(self):
+        """Test that data containing the boundary gets a one-off boundary"""
+        template = MultipartTemplate()
+        data = b'--' + template.boundary.encode()
+        content_type, body = template.render('f.bin', data)
+        assert content_type != template.content_type
+        assert body.count(template.boundary.encode()) == 1
+
+    def test_tiny_upload_in_one_send(self, fake_server, tmp_path, sendall_calls):
+        """Test that a small file goes out as one send() with the headers"""
+        path = tmp_path / 'note.txt'
+        data = os.urandom(10000)
+        path.write_bytes(data)
+        with TFLinkClient(base_url=fake_server.url, user_id='u1', auth_token='t') as client:
+            client.upload(path)
+            sendall_calls.clear()
+            result = client.upload(path, filename='renamed.txt', checksums=('sha256',))
+        assert len(sendall_calls) == 1 and sendall_calls[0] > len(data)
+        assert result.file_name == 'renamed.txt'
+        assert result.checksums['sha256'] == hashlib.sha256(data).hexdigest()
+        assert result.uploaded_to == 'user: u1'
+        assert list(fake_server.files.values())[-1] == data
+
+    def test_threshold(self, fake_server, tmp_path, sendall_calls):
+        """Test that larger files, or every file with tiny_file_size=0, are streamed"""
+        path = tmp_path / 'note.txt'
+        path.write_bytes(b'x' * 100)
+        with TFLinkClient(base_url=fake_server.url, tiny_file_size=0) as client:
+            assert client.upload(path).size == 100
+        assert len(sendall_calls) > 1
+        with pytest.raises(ValueError):
+            TFLinkClient(tiny_file_size=-1)
+
+    @pytest.mark.parametrize('status, error', [(403, AuthenticationError), (503, ServerError)])
+    def test_error_response_frees_connection(self, fake_server, tmp_path, status, error):
+        """Test that a rejected small upload gives its connection back to the pool"""
+        fake_server.status = status
+        path = tmp_path / 'note.txt'
+        path.write_bytes(b'x' * 100)
+        with TFLinkClient(base_url=fake_server.url, pool_size=2) as client:
+            for _ in range(3):
+                with pytest.raises(error):
+                    client.upload(path)
+            pools = client._adapter.poolmanager.pools
+            assert [pools[key].pool.qsize() for key in pools.keys()] == [2]
+
+    def test_empty_file(self, fake_server, tmp_path):
+        """Test that an empty file uploads through the fast path"""
+        path = tmp_path / 'empty.txt'
+        path.write_bytes(b'')
+        with TFLinkClient(base_url=fake_server.url) as client:
+            assert client.upload(path).size == 0
+        assert list(fake_server.files.values()) == [b'']
+
+    def test_crlf_and_ctrl_z_sent_unchanged(self, fake_server, tmp_path):
+        """Test that the fast path uploads text-looking files byte for byte"""
+        data = b'a\r\nb\r\n\x1a\r\ntrailer' * 50
+        path = tmp_path / 'dos.txt'
+        path.write_bytes(data)
+        with TFLinkClient(base_url=fake_server.url) as client:
+            assert client.upload(path).size == len(data)
+        assert list(fake_server.files.values()) == [data]
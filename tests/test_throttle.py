@@ -0,0 +1,102 @@
+"""
+Tests for tflink.throttle
+"""
+
+import threading
+import time
+
+import pytest
+from unittest.mock import patch
+
+from tflink import TFLinkClient
+from tflink.throttle import TokenBucket, throttle
+
+
+class TestTokenBucket:
+    """Tests for the token bucket"""
+
+    def test_unlimited_never_waits(self):
+        """Test that a bucket without a rate never asks for a wait"""
+        bucket = TokenBucket(None)
+        assert bucket.reserve(10 ** 9) == 0.0
+
+    def test_burst_then_delay(self):
+        """Test that exceeding the burst returns the time needed to repay the debt"""
+        bucket = TokenBucket(1000, burst=1000)
+        assert bucket.reserve(1000) == 0.0
+        assert bucket.reserve(500) == pytest.approx(0.5, abs=0.05)
+
+    def test_short_waits_are_carried_as_debt(self):
+        """Test that waits below min_sleep are skipped but still accounted for"""
+        bucket = TokenBucket(1000, burst=0, min_sleep=0.05)
+        assert bucket.reserve(10) == 0.0
+        assert bucket.reserve(10) == 0.0
+        assert bucket.reserve(100) == pytest.approx(0.12, abs=0.02)
+
+    def test_set_rate_at_runtime(self):
+        """Test that changing the rate affects the next reservation"""
+        bucket = TokenBucket(1000, burst=0)
+        bucket.set_rate(None)
+        assert bucket.reserve(10 ** 6) == 0.0
+        bucket.set_rate(2000)
+        assert bucket.reserve(1000) == pytest.approx(0.5, abs=0.05)
+
+    def test_invalid_rate(self):
+        """Test that non-positive rates raise ValueError"""
+        with pytest.raises(ValueError):
+            TokenBucket(0)
+
+    def test_throttle_sleeps_once_for_longest_wait(self):
+        """Test that several buckets produce a single sleep"""
+        fast = TokenBucket(10000, burst=0)
+        slow = TokenBucket(1000, burst=0)
+        with patch('tflink.throttle.time.sleep') as mock_sleep:
+            throttle([fast, None, slow], 500)
+        mock_sleep.assert_called_once()
+        assert mock_sleep.call_args[0][0] == pytest.approx(0.5, abs=0.05)
+
+
+class TestClientBandwidthLimit:
+    """Tests for bandwidth limits on TFLinkClient"""
+
+    def test_bandwidth_limit_property(self):
+        """Test that the client-wide limit can be changed at runtime"""
+        client = TFLinkClient(bandwidth_limit=1024)
+        assert client.bandwidth_limit == 1024
+        client.bandwidth_limit = None
+        assert client.bandwidth_limit is None
+
+    def test_per_upload_limit(self, tmp_path, fake_server):
+        """Test that a per-upload limit slows the transfer down"""
+        path = tmp_path / 'data.bin'
+        path.write_bytes(b'x' * 300 * 1024)
+
+        client = TFLinkClient(base_url=fake_server.url)
+        started = time.monotonic()
+        result = client.upload(path, bandwidth_limit=1024 * 1024)
+        elapsed = time.monotonic() - started
+
+        assert result.size == 300 * 1024
+        # 256KB burst allowance, the remaining 44KB at 1MB/s
+        assert elapsed >= 0.03
+
+    def test_global_limit_is_shared(self, tmp_path, fake_server):
+        """Test that concurrent uploads share the client-wide limit"""
+        paths = []
+        for i in range(3):
+            path = tmp_path / f'data{i}.bin'
+            path.write_bytes(b'x' * 256 * 1024)
+            paths.append(path)
+
+        # 768KB total at 2MB/s with a 512KB burst needs at least ~0.12s
+        client = TFLinkClient(base_url=fake_server.url, bandwidth_limit=2 * 1024 * 1024)
+        started = time.monotonic()
+        threads = [threading.Thread(target=client.upload, args=(p,)) for p in paths]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.monotonic() - started
+
+        assert fake_server.uploads == 3
+        assert elapsed >= 0.1
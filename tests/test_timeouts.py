@@ -0,0 +1,223 @@
+"""
+Tests for tflink.timeouts
+"""
+
+import threading
+import time
+
+import pytest
+
+from tflink import CancelToken, TFLinkClient, UploadEngine, UploadTimeoutError
+from tflink.exceptions import NetworkError, UploadCancelledError
+from tflink.timeouts import UploadDeadline, Watchdog
+
+
+@pytest.fixture
+def large_file(tmp_path):
+    """File larger than the loopback socket buffers"""
+    path = tmp_path / 'large.bin'
+    with open(path, 'wb') as f:
+        f.truncate(64 * 1024 * 1024)
+    return str(path)
+
+
+class TestUploadDeadline:
+    """Tests for deadline bookkeeping and the watchdog"""
+
+    def test_deadline_from_size(self):
+        """Test that the total deadline grows with file size"""
+        client = TFLinkClient(connect_timeout=5, read_timeout=10, min_throughput=1024 * 1024)
+        assert client.upload_deadline(0) == 15
+        assert client.upload_deadline(100 * 1024 * 1024) == 115
+
+    def test_no_deadline_without_min_throughput(self):
+        """Test that uploads have no total deadline by default"""
+        assert TFLinkClient().upload_deadline(10 ** 9) is None
+
+    def test_separate_timeouts(self):
+        """Test that connect and read timeouts are passed separately"""
+        assert TFLinkClient(timeout=60)._request_timeout() == 60
+        assert TFLinkClient(timeout=60, connect_timeout=3)._request_timeout() == (3, 60)
+        assert TFLinkClient(timeout=60, read_timeout=20)._request_timeout() == (60, 20)
+
+    def test_invalid_min_throughput(self):
+        """Test that a non-positive minimum throughput is rejected"""
+        with pytest.raises(ValueError):
+            TFLinkClient(min_throughput=0)
+
+    def test_stall_ignored_before_body_and_after_it(self):
+        """Test that only time spent sending the body can count as a stall"""
+        deadline = UploadDeadline(None, stall_timeout=1, body_size=10)
+        now = time.monotonic()
+        assert deadline.check(now + 5) is None
+
+        deadline.progress(0)
+        assert 'stalled' in deadline.check(time.monotonic() + 5)
+
+        deadline.progress(10)
+        assert deadline.check(time.monotonic() + 5) is None
+
+    def test_watchdog_aborts_expired(self):
+        """Test that the watchdog marks an expired deadline"""
+        watchdog = Watchdog()
+        deadline = UploadDeadline(0.1, None, body_size=10)
+        watchdog.watch(deadline)
+        try:
+            end = time.monotonic() + 5
+            while deadline.reason is None and time.monotonic() < end:
+                time.sleep(0.01)
+        finally:
+            watchdog.close()
+        assert 'deadline' in deadline.reason
+
+
+class TestTimeoutsLocalServer:
+    """Tests for aborting uploads against the local stand-in server"""
+
+    def test_stall_aborts_upload(self, fake_server, large_file):
+        """Test that an upload whose peer stops reading fails fast"""
+        fake_server.stall_after = 1024 * 1024
+        with TFLinkClient(base_url=fake_server.url, stall_timeout=0.5) as client:
+            started = time.monotonic()
+            with pytest.raises(UploadTimeoutError, match='stalled'):
+                client.upload(large_file)
+        assert time.monotonic() - started < 10
+
+    def test_deadline_aborts_upload(self, fake_server, tmp_path):
+        """Test that an upload slower than min_throughput is aborted at its deadline"""
+        path = tmp_path / 'slow.bin'
+        path.write_bytes(b'x' * 4 * 1024 * 1024)
+        client = TFLinkClient(
+            base_url=fake_server.url, connect_timeout=0.5, read_timeout=0.5,
+            min_throughput=16 * 1024 * 1024, bandwidth_limit=2 * 1024 * 1024,
+        )
+        with client:
+            started = time.monotonic()
+            with pytest.raises(UploadTimeoutError, match='deadline'):
+                client.upload(str(path))
+        assert time.monotonic() - started < 1.9
+
+    def test_send_timeout_uses_read_timeout(self, fake_server, large_file):
+        """Test that a stalled send fails after the read timeout, not the connect timeout"""
+        fake_server.stall_after = 1024 * 1024
+        with TFLinkClient(base_url=fake_server.url, connect_timeout=0.1, read_timeout=1) as client:
+            started = time.monotonic()
+            with pytest.raises(UploadTimeoutError):
+                client.upload(large_file)
+        assert time.monotonic() - started >= 1
+
+    def test_read_timeout(self, fake_server, tmp_path):
+        """Test that a slow response is bounded by read_timeout"""
+        fake_server.delay = 2
+        path = tmp_path / 'a.txt'
+        path.write_bytes(b'x')
+        with TFLinkClient(base_url=fake_server.url, read_timeout=0.3) as client:
+            with pytest.raises(UploadTimeoutError) as exc_info:
+                client.upload(str(path))
+        assert isinstance(exc_info.value, NetworkError)
+
+    def test_deadline_allows_normal_upload(self, fake_server, tmp_path):
+        """Test that uploads within their deadline succeed"""
+        path = tmp_path / 'a.txt'
+        path.write_bytes(b'x' * 1000)
+        with TFLinkClient(base_url=fake_server.url, min_throughput=1024, stall_timeout=5) as client:
+            assert client.upload(str(path)).size == 1000
+
+
+class TestCancellation:
+    """Tests for cancelling uploads through a CancelToken or Event"""
+
+    @pytest.fixture
+    def slow_file(self, tmp_path):
+        """File that takes 4 seconds at the client's bandwidth limit"""
+        path = tmp_path / 'slow.bin'
+        path.write_bytes(b'x' * 4 * 1024 * 1024)
+        return str(path)
+
+    def cancel_after(self, cancel, seconds):
+        timer = threading.Timer(seconds, cancel.set)
+        timer.start()
+        return timer
+
+    def free_slots(self, client):
+        """Connections the pool could hand out without opening new ones"""
+        pools = client._adapter.poolmanager.pools
+        return [pools[key].pool.qsize() for key in pools.keys()]
+
+    @pytest.mark.parametrize('make', [CancelToken, threading.Event])
+    def test_cancel_mid_stream(self, fake_server, slow_file, make):
+        """Test that a cancelled upload stops within a chunk and frees its connection"""
+        cancel = make()
+        with TFLinkClient(base_url=fake_server.url, bandwidth_limit=1024 * 1024,
+                          chunk_size=64 * 1024, pool_size=2) as client:
+            self.cancel_after(cancel, 0.3)
+            started = time.monotonic()
+            with pytest.raises(UploadCancelledError):
+                client.upload(slow_file, cancel=cancel)
+            assert time.monotonic() - started < 1
+            assert self.free_slots(client) == [2]
+        assert fake_server.uploads == 0
+
+    @pytest.mark.parametrize('make, limit', [(CancelToken, 0.5), (threading.Event, 1.5)])
+    def test_cancel_while_waiting_for_response(self, fake_server, tmp_path, make, limit):
+        """Test that cancelling after the body was sent does not wait for the server"""
+        fake_server.delay = 5
+        path = tmp_path / 'a.txt'
+        path.write_bytes(b'x')
+        cancel = make()
+        with TFLinkClient(base_url=fake_server.url) as client:
+            self.cancel_after(cancel, 0.2)
+            started = time.monotonic()
+            with pytest.raises(UploadCancelledError):
+                client.upload(str(path), cancel=cancel)
+            assert time.monotonic() - started < limit
+
+    def test_cancelled_before_start(self, fake_server, tmp_path):
+        """Test that an upload is not sent once its token was cancelled"""
+        path = tmp_path / 'a.txt'
+        path.write_bytes(b'x')
+        token = CancelToken()
+        token.cancel("Job 17 cancelled")
+        with TFLinkClient(base_url=fake_server.url) as client:
+            with pytest.raises(UploadCancelledError, match='Job 17'):
+                client.upload(str(path), cancel=token)
+            assert fake_server.requests == 0
+
+            token.clear()
+            assert client.upload(str(path), cancel=token).size == 1
+
+    def test_engine_drops_cancelled_uploads(self, fake_server, tmp_path):
+        """Test that queued uploads of a cancelled token fail without being sent"""
+        fake_server.delay = 5
+        paths = []
+        for i in range(3):
+            path = tmp_path / f'{i}.txt'
+            path.write_bytes(b'x')
+            paths.append(str(path))
+        token = CancelToken()
+        with TFLinkClient(base_url=fake_server.url) as client:
+            with UploadEngine(client, max_workers=1) as engine:
+                futures = [engine.submit(path, cancel=token) for path in paths]
+                while fake_server.requests < 1:
+                    time.sleep(0.01)
+                token.cancel()
+                for future in futures:
+                    assert isinstance(future.exception(timeout=5), UploadCancelledError)
+                assert engine.stats()['cancelled'] == 3
+        assert fake_server.requests == 1
+
+    def test_batch_cancel(self, fake_server, tmp_path):
+        """Test that a cancelled batch reports UploadCancelledError per file"""
+        fake_server.delay = 5
+        paths = []
+        for i in range(4):
+            path = tmp_path / f'{i}.txt'
+            path.write_bytes(b'x')
+            paths.append(str(path))
+        token = CancelToken()
+        with TFLinkClient(base_url=fake_server.url) as client:
+            self.cancel_after(token, 0.3)
+            started = time.monotonic()
+            results = client.upload_batch(paths, max_workers=2, cancel=token)
+        assert time.monotonic() - started < 2
+        assert all(isinstance(r.error, UploadCancelledError) for r in results)
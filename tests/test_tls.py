@@ -0,0 +1,161 @@
+"""
+Tests for tflink.tls
+"""
+
+import base64
+import gc
+import json
+import os
+import stat
+from pathlib import Path
+
+import pytest
+
+from tflink import TFLinkClient, TLSSessionCache
+from tflink import tls
+from tflink.tls import _binding
+from tests.fake_server import FakeServer
+
+CERTS = Path(__file__).parent / 'certs'
+CERT = str(CERTS / 'localhost.crt')
+KEY = str(CERTS / 'localhost.key')
+
+requires_export = pytest.mark.skipif(
+    _binding() is None, reason="TLS session export is not available in this interpreter"
+)
+
+
+@pytest.fixture
+def tls_server(monkeypatch):
+    """HTTPS stand-in server with a self-signed certificate the client trusts"""
+    monkeypatch.setenv('REQUESTS_CA_BUNDLE', CERT)
+    with FakeServer(tls=(CERT, KEY)) as server:
+        yield server
+
+
+@pytest.fixture
+def sample_file(tmp_path):
+    path = tmp_path / 'a.txt'
+    path.write_bytes(b'x' * 1000)
+    return str(path)
+
+
+def upload_once(server, cache_path, sample_file):
+    """Upload with a fresh client and cache, as a new process would"""
+    cache = TLSSessionCache(cache_path, export_sessions=True)
+    with TFLinkClient(base_url=server.url, tls_session_cache=cache) as client:
+        result = client.upload(sample_file)
+    assert result.size == 1000
+    return cache
+
+
+@requires_export
+class TestTLSSessionCache:
+    """Tests for resuming TLS sessions across client instances"""
+
+    def test_session_persisted(self, tls_server, tmp_path, sample_file):
+        """Test that the first connection stores its session in the file"""
+        cache_path = tmp_path / 'sessions.json'
+        upload_once(tls_server, cache_path, sample_file)
+
+        assert tls_server.tls_resumed == 0
+        data = json.loads(cache_path.read_text())
+        assert len(data['sessions']) == 1
+        assert stat.S_IMODE(os.stat(cache_path).st_mode) == 0o600
+
+    def test_new_client_resumes(self, tls_server, tmp_path, sample_file):
+        """Test that a client built from the saved file skips the full handshake"""
+        cache_path = tmp_path / 'sessions.json'
+        upload_once(tls_server, cache_path, sample_file)
+        cache = upload_once(tls_server, cache_path, sample_file)
+
+        assert tls_server.tls_resumed == 1
+        assert cache.stats()['offered'] == 1
+        assert cache.stats()['resumed'] == 1
+
+    def test_rejected_session_replaced(self, tls_server, tmp_path, sample_file):
+        """Test that a session the server no longer accepts falls back to a full handshake"""
+        cache_path = tmp_path / 'sessions.json'
+        upload_once(tls_server, cache_path, sample_file)
+        old = json.loads(cache_path.read_text())['sessions']
+
+        # New ticket keys invalidate every session issued so far
+        tls_server.tls_context = FakeServer.new_tls_context(CERT, KEY)
+        cache = upload_once(tls_server, cache_path, sample_file)
+
+        assert tls_server.tls_resumed == 0
+        assert cache.stats()['resumed'] == 0
+        assert json.loads(cache_path.read_text())['sessions'] != old
+
+    def test_corrupt_file_ignored(self, tls_server, tmp_path, sample_file):
+        """Test that an unreadable cache file only costs a full handshake"""
+        cache_path = tmp_path / 'sessions.json'
+        cache_path.write_text('{not json')
+        upload_once(tls_server, cache_path, sample_file)
+        assert len(json.loads(cache_path.read_text())['sessions']) == 1
+
+    def test_invalid_session_discarded(self, tls_server, tmp_path, sample_file):
+        """Test that an entry that does not decode as a session is dropped"""
+        cache_path = tmp_path / 'sessions.json'
+        upload_once(tls_server, cache_path, sample_file)
+        data = json.loads(cache_path.read_text())
+        for entry in data['sessions'].values():
+            entry['session'] = base64.b64encode(b'garbage').decode('ascii')
+            entry['id'] = ''
+        cache_path.write_text(json.dumps(data))
+
+        cache = upload_once(tls_server, cache_path, sample_file)
+        assert cache.stats()['offered'] == 0
+        assert tls_server.tls_resumed == 0
+
+    def test_expired_entries_dropped(self, tmp_path):
+        """Test that expired sessions are not loaded"""
+        cache_path = tmp_path / 'sessions.json'
+        cache_path.write_text(json.dumps({'version': 1, 'sessions': {
+            'example.test:443#x': {'session': 'AA==', 'id': '', 'expires': 1},
+        }}))
+        assert len(TLSSessionCache(cache_path, export_sessions=True)) == 0
+
+    @pytest.mark.filterwarnings('ignore::urllib3.exceptions.InsecureRequestWarning')
+    def test_unverified_connections_not_cached(self, tls_server, tmp_path, sample_file, monkeypatch):
+        """Test that sessions are only kept for verified connections"""
+        monkeypatch.delenv('REQUESTS_CA_BUNDLE')
+        monkeypatch.delenv('CURL_CA_BUNDLE', raising=False)
+        cache_path = tmp_path / 'sessions.json'
+        cache = TLSSessionCache(cache_path, export_sessions=True)
+        with TFLinkClient(base_url=tls_server.url, tls_session_cache=cache) as client:
+            client._session.verify = False
+            client.upload(sample_file)
+        assert not cache_path.exists()
+
+
+class TestInProcessSessions:
+    """Tests for session reuse through the ssl module, without export"""
+
+    def test_resumed_without_export(self, tls_server, tmp_path, sample_file):
+        """Test that clients sharing a cache resume sessions and write no file"""
+        cache_path = tmp_path / 'sessions.json'
+        cache = TLSSessionCache(cache_path)
+        for _ in range(2):
+            with TFLinkClient(base_url=tls_server.url, tls_session_cache=cache) as client:
+                client.upload(sample_file)
+
+        assert not cache.enabled
+        assert tls_server.tls_resumed == 1
+        assert cache.stats()['resumed'] == 1
+        assert not cache_path.exists()
+
+    def test_untested_interpreter_not_bound(self, monkeypatch):
+        """Test that the ctypes binding refuses interpreters outside the allowlist"""
+        monkeypatch.setattr(tls, '_TESTED_PYTHONS', ())
+        assert 'not tested' in tls._unsupported_reason()
+        with pytest.raises(OSError):
+            tls._OpenSSL()
+
+    def test_caches_not_kept_alive(self, tmp_path):
+        """Test that the exit hook does not hold on to caches"""
+        cache = TLSSessionCache(tmp_path / 'sessions.json')
+        assert cache in tls._caches
+        del cache
+        gc.collect()
+        assert all(c.path != tmp_path / 'sessions.json' for c in tls._caches)
@@ -0,0 +1,75 @@
+"""
+Tests for tflink.verify
+"""
+
+import pytest
+
+from tflink import LinkVerifier, TFLinkClient
+
+
+@pytest.fixture
+def uploaded(tmp_path, fake_server):
+    """Client and results for three files uploaded to the stand-in server"""
+    client = TFLinkClient(base_url=fake_server.url)
+    results = []
+    for i in range(3):
+        path = tmp_path / f'file{i}.txt'
+        path.write_bytes(b'x' * (100 + i))
+        results.append(client.upload(path))
+    return client, results
+
+
+def stored_path(result):
+    """Key of an upload in FakeServer.files"""
+    return result.download_link.split('/d/', 1)[1]
+
+
+def test_verify_links_all_ok(uploaded):
+    """Test that intact links pass and are reported in input order"""
+    client, results = uploaded
+    checks = client.verify_links(results)
+    assert [c.ok for c in checks] == [True, True, True]
+    assert [c.content_length for c in checks] == [100, 101, 102]
+    assert [c.result for c in checks] == results
+
+
+def test_size_mismatch_fails_without_retry(uploaded, fake_server):
+    """Test that a wrong Content-Length is reported immediately"""
+    client, results = uploaded
+    fake_server.files[stored_path(results[0])] = b'short'
+    check = client.verify_links(results[:1], retries=3)[0]
+    assert not check.ok
+    assert check.attempts == 1
+    assert "does not match" in check.error
+
+
+def test_missing_link_is_retried(uploaded, fake_server):
+    """Test that a 404 is retried before being reported"""
+    client, results = uploaded
+    del fake_server.files[stored_path(results[1])]
+    with LinkVerifier(client, retries=2, backoff=0) as verifier:
+        check = verifier.verify(results[1])
+    assert not check.ok
+    assert check.status_code == 404
+    assert check.attempts == 3
+
+
+def test_get_fallback_when_head_not_allowed(uploaded, fake_server):
+    """Test that servers rejecting HEAD are checked with GET"""
+    client, results = uploaded
+    fake_server.allow_head = False
+    assert all(c.ok for c in client.verify_links(results))
+
+
+def test_upload_batch_verifies_links(tmp_path, fake_server):
+    """Test that upload_batch attaches link checks when requested"""
+    paths = []
+    for i in range(3):
+        path = tmp_path / f'batch{i}.txt'
+        path.write_text('hello')
+        paths.append(path)
+
+    client = TFLinkClient(base_url=fake_server.url)
+    results = client.upload_batch(paths, verify_links=True)
+    assert all(r.link_check is not None and r.link_check.ok for r in results)
+    assert client.upload_batch(paths)[0].link_check is None
@@ -0,0 +1,404 @@
+"""
+Tests for tflink.engine and tflink.watch
+"""
+
+import queue
+import sys
+import threading
+import time
+
+import pytest
+from unittest.mock import Mock
+
+from tflink import UploadResult
+from tflink.engine import UploadEngine
+from tflink.exceptions import DeadlineExceededError, UploadError
+from tflink.journal import UploadJournal
+from tflink.watch import SpoolWatcher
+
+
+@pytest.fixture
+def fake_client(mock_response_data):
+    """Client stand-in whose upload() returns the sample result"""
+    client = Mock()
+    client.upload.return_value = UploadResult.from_json(mock_response_data)
+    return client
+
+
+def wait_for(condition, timeout=5.0):
+    """Poll until condition() is true or the timeout expires"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+class TestUploadEngine:
+    """Tests for the bounded upload engine"""
+
+    def test_submit_returns_result(self, fake_client):
+        """Test that submitted uploads resolve to the client's result"""
+        with UploadEngine(fake_client, max_workers=2) as engine:
+            future = engine.submit('/tmp/test.txt')
+            assert future.result(timeout=5).file_name == "test.txt"
+        fake_client.upload.assert_called_once_with('/tmp/test.txt', filename=None)
+
+    def test_submit_propagates_errors(self, fake_client):
+        """Test that upload exceptions are raised from the future"""
+        fake_client.upload.side_effect = UploadError("boom")
+        with UploadEngine(fake_client, max_workers=1) as engine:
+            future = engine.submit('/tmp/test.txt')
+            with pytest.raises(UploadError):
+                future.result(timeout=5)
+
+    def test_full_queue_applies_backpressure(self, fake_client):
+        """Test that submit fails fast on a full queue when not blocking"""
+        release = threading.Event()
+        fake_client.upload.side_effect = lambda *args, **kwargs: release.wait()
+
+        engine = UploadEngine(fake_client, max_workers=1, max_queue=1)
+        engine.submit('/tmp/running.txt')
+        assert wait_for(lambda: engine.qsize() == 0)
+        engine.submit('/tmp/queued.txt')
+        with pytest.raises(queue.Full):
+            engine.submit('/tmp/rejected.txt', block=False)
+
+        release.set()
+        engine.shutdown()
+
+    def test_submit_after_shutdown_raises(self, fake_client):
+        """Test that a shut down engine rejects new uploads"""
+        engine = UploadEngine(fake_client)
+        engine.shutdown()
+        with pytest.raises(RuntimeError):
+            engine.submit('/tmp/test.txt')
+
+
+class TestUploadEngineScheduling:
+    """Tests for priorities, deadlines and reserved workers"""
+
+    @pytest.fixture
+    def gated_client(self, fake_client):
+        """fake_client whose uploads of 'blocker' wait for gate; records call order"""
+        gate = threading.Event()
+        calls = []
+        result = fake_client.upload.return_value
+
+        def upload(path, filename=None):
+            calls.append(path)
+            if path.startswith('blocker'):
+                gate.wait(5)
+            return result
+
+        fake_client.upload.side_effect = upload
+        return fake_client, gate, calls
+
+    def test_priority_then_earliest_deadline(self, gated_client):
+        """Test that HIGH runs first and equal priorities run by deadline"""
+        client, gate, calls = gated_client
+        with UploadEngine(client, max_workers=1, max_queue=10) as engine:
+            engine.submit('blocker')
+            assert wait_for(lambda: calls == ['blocker'])
+            engine.submit('low', priority=UploadEngine.LOW)
+            engine.submit('normal-late', deadline=60)
+            engine.submit('normal-none')
+            engine.submit('normal-soon', deadline=30)
+            engine.submit('high', priority=UploadEngine.HIGH)
+            gate.set()
+        assert calls == ['blocker', 'high', 'normal-soon', 'normal-late', 'normal-none', 'low']
+
+    def test_expired_upload_is_dropped(self, gated_client):
+        """Test that an upload whose deadline passed in the queue never starts"""
+        client, gate, calls = gated_client
+        now = [0.0]
+        with UploadEngine(client, max_workers=1, clock=lambda: now[0]) as engine:
+            engine.submit('blocker')
+            assert wait_for(lambda: calls == ['blocker'])
+            late = engine.submit('late', deadline=5)
+            on_time = engine.submit('on-time', deadline=20)
+            now[0] = 10.0
+            gate.set()
+            with pytest.raises(DeadlineExceededError):
+                late.result(timeout=5)
+            assert on_time.result(timeout=5)
+        assert calls == ['blocker', 'on-time']
+
+    def test_reserved_worker_serves_high_only(self, gated_client):
+        """Test that a backlog cannot occupy the workers kept for HIGH uploads"""
+        client, gate, calls = gated_client
+        engine = UploadEngine(client, max_workers=2, reserved_workers=1)
+        engine.submit('blocker-bulk', priority=UploadEngine.LOW)
+        engine.submit('bulk', priority=UploadEngine.LOW)
+        assert wait_for(lambda: calls == ['blocker-bulk'])
+        time.sleep(0.05)
+        assert engine.qsize() == 1
+
+        urgent = engine.submit('urgent', priority=UploadEngine.HIGH)
+        assert urgent.result(timeout=5)
+        assert 'bulk' not in calls
+
+        gate.set()
+        engine.shutdown()
+        assert calls == ['blocker-bulk', 'urgent', 'bulk']
+
+    def test_reserved_workers_validated(self, fake_client):
+        """Test that at least one worker stays available to every class"""
+        with pytest.raises(ValueError):
+            UploadEngine(fake_client, max_workers=2, reserved_workers=2)
+
+    def test_tenants_share_the_workers(self, gated_client):
+        """Test that a tenant's backlog does not hold back another tenant"""
+        client, gate, calls = gated_client
+        with UploadEngine(client, max_workers=1, max_queue=100) as engine:
+            engine.submit('blocker')
+            assert wait_for(lambda: calls == ['blocker'])
+            for i in range(20):
+                engine.submit(f'bulk{i}', tenant='bulk')
+            engine.submit('user0', tenant='user')
+            engine.submit('user1', tenant='user')
+            gate.set()
+        assert calls.index('user1') <= 5
+
+    def test_tenant_queue_limit_and_stats(self, gated_client):
+        """Test per-tenant queue limits and counters"""
+        client, gate, calls = gated_client
+        engine = UploadEngine(client, max_workers=1, max_queue=10, tenant_max_queue=2)
+        engine.submit('blocker', tenant='a')
+        assert wait_for(lambda: calls == ['blocker'])
+        engine.submit('a1', tenant='a')
+        engine.submit('a2', tenant='a')
+        with pytest.raises(queue.Full):
+            engine.submit('a3', tenant='a', block=False)
+        engine.submit('b1', tenant='b', block=False)
+
+        stats = engine.stats()
+        assert stats['queued'] == 3 and stats['running'] == 1
+        assert stats['tenants']['a']['queued'] == 2
+        assert stats['tenants']['a']['running'] == 1
+
+        gate.set()
+        engine.shutdown()
+        stats = engine.stats()
+        assert stats['tenants'] == {}
+        assert stats['submitted'] == stats['completed'] == 4
+        assert (stats['failed'], stats['expired'], stats['cancelled'], stats['bytes']) == (0,) * 4
+
+    def test_batch_on_shared_engine(self, fake_server, tmp_path):
+        """Test upload_batch with a shared engine, a priority and a deadline"""
+        from tflink import TFLinkClient
+
+        paths = []
+        for i in range(3):
+            path = tmp_path / f'file{i}.txt'
+            path.write_text(f'content {i}')
+            paths.append(path)
+
+        client = TFLinkClient(base_url=fake_server.url)
+        with UploadEngine(client, max_workers=2) as engine:
+            results = client.upload_batch(paths, engine=engine, priority=UploadEngine.LOW)
+            assert all(r.ok for r in results)
+            expired = client.upload_batch(paths, engine=engine, deadline=-1)
+            assert all(isinstance(r.error, DeadlineExceededError) for r in expired)
+            assert engine.submit(paths[0]).result(timeout=5)
+
+
+class TestSpoolWatcher:
+    """Tests for the spool-directory watcher"""
+
+    def test_polling_uploads_and_deletes(self, tmp_path, fake_client):
+        """Test that polling mode uploads settled files and deletes them"""
+        events = []
+        spool = tmp_path / 'spool'
+        spool.mkdir()
+        (spool / 'a.txt').write_text('hello')
+
+        watcher = SpoolWatcher(
+            fake_client, spool, use_inotify=False, settle_time=0.05,
+            poll_interval=0.02, on_complete=events.append
+        )
+        with watcher:
+            assert wait_for(lambda: len(events) == 1)
+
+        assert events[0].ok
+        assert not (spool / 'a.txt').exists()
+        assert watcher.stats()['uploaded'] == 1
+        assert watcher.stats()['latency_max'] is not None
+
+    def test_move_to_done_dir(self, tmp_path, fake_client):
+        """Test that uploaded files are moved when on_success='move'"""
+        spool = tmp_path / 'spool'
+        done = tmp_path / 'done'
+        spool.mkdir()
+        (spool / 'a.txt').write_text('hello')
+
+        watcher = SpoolWatcher(
+            fake_client, spool, on_success='move', done_dir=done,
+            use_inotify=False, settle_time=0.05, poll_interval=0.02
+        )
+        with watcher:
+            assert wait_for(lambda: (done / 'a.txt').exists())
+        assert not (spool / 'a.txt').exists()
+
+    def test_record_uploads_each_file_once(self, tmp_path, fake_client):
+        """Test that recorded files stay in place and are not uploaded again"""
+        spool = tmp_path / 'spool'
+        spool.mkdir()
+        (spool / 'a.txt').write_text('hello')
+        journal_path = tmp_path / 'spool.journal'
+
+        watcher = SpoolWatcher(
+            fake_client, spool, on_success='record', journal=journal_path,
+            use_inotify=False, settle_time=0.05, poll_interval=0.02
+        )
+        with watcher:
+            assert wait_for(lambda: watcher.stats()['uploaded'] == 1)
+            time.sleep(0.2)
+
+        restarted = SpoolWatcher(
+            fake_client, spool, on_success='record', journal=journal_path,
+            use_inotify=False, settle_time=0.05, poll_interval=0.02
+        )
+        with restarted:
+            time.sleep(0.2)
+
+        assert (spool / 'a.txt').exists()
+        assert fake_client.upload.call_count == 1
+
+    def test_stop_without_wait_keeps_journal_until_drained(self, tmp_path, fake_client,
+                                                           mock_response_data):
+        """Test that uploads still running after stop(wait=False) are journaled"""
+        started = threading.Event()
+        release = threading.Event()
+
+        def upload(path, **kwargs):
+            started.set()
+            release.wait(5)
+            return UploadResult.from_json(mock_response_data)
+
+        fake_client.upload.side_effect = upload
+        spool = tmp_path / 'spool'
+        spool.mkdir()
+        (spool / 'a.txt').write_text('hello')
+        journal_path = tmp_path / 'spool.journal'
+
+        watcher = SpoolWatcher(
+            fake_client, spool, on_success='record', journal=journal_path,
+            use_inotify=False, settle_time=0.05, poll_interval=0.02
+        )
+        watcher.start()
+        assert started.wait(5)
+        watcher.stop(wait=False)
+        assert not watcher._journal._file.closed
+
+        release.set()
+        assert wait_for(lambda: watcher._journal._file.closed)
+        assert watcher.stats()['uploaded'] == 1
+        assert UploadJournal(journal_path).is_completed(spool / 'a.txt')
+
+    def test_removed_files_forgotten(self, tmp_path, fake_client):
+        """Test that recorded files are forgotten once they leave the directory"""
+        spool = tmp_path / 'spool'
+        spool.mkdir()
+        (spool / 'a.txt').write_text('hello')
+
+        watcher = SpoolWatcher(
+            fake_client, spool, on_success='record', journal=tmp_path / 'spool.journal',
+            use_inotify=False, settle_time=0.05, poll_interval=0.02
+        )
+        with watcher:
+            assert wait_for(lambda: watcher.stats()['uploaded'] == 1)
+            assert 'a.txt' in watcher._submitted
+            (spool / 'a.txt').unlink()
+            assert wait_for(lambda: not watcher._submitted)
+
+    def test_failed_upload_is_retried(self, tmp_path, fake_client, mock_response_data):
+        """Test that a failed file is picked up again by a later scan"""
+        fake_client.upload.side_effect = [
+            UploadError("Server error (500). Please try again later."),
+            UploadResult.from_json(mock_response_data),
+        ]
+        spool = tmp_path / 'spool'
+        spool.mkdir()
+        (spool / 'a.txt').write_text('hello')
+
+        watcher = SpoolWatcher(
+            fake_client, spool, use_inotify=False, settle_time=0.05, poll_interval=0.02
+        )
+        with watcher:
+            assert wait_for(lambda: watcher.stats()['uploaded'] == 1)
+        assert watcher.stats()['failed'] == 1
+
+    @pytest.mark.skipif(not sys.platform.startswith('linux'), reason="inotify is Linux only")
+    def test_inotify_close_write(self, tmp_path, fake_client):
+        """Test that inotify mode uploads a file as soon as it is closed"""
+        events = []
+        spool = tmp_path / 'spool'
+        spool.mkdir()
+
+        # A long settle time proves the upload was triggered by the close event
+        watcher = SpoolWatcher(
+            fake_client, spool, use_inotify=True, settle_time=60,
+            poll_interval=0.05, on_complete=events.append
+        )
+        with watcher:
+            assert watcher.use_inotify
+            (spool / 'a.txt').write_text('hello')
+            assert wait_for(lambda: len(events) == 1)
+
+        assert events[0].latency < 5
+
+    @pytest.mark.skipif(not sys.platform.startswith('linux'), reason="inotify is Linux only")
+    def test_growing_preexisting_file_waits(self, tmp_path, fake_client, mock_response_data):
+        """Test that a file present at start-up is not uploaded while it still grows"""
+        sizes = []
+
+        def upload(path, **kwargs):
+            sizes.append(path.stat().st_size)
+            return UploadResult.from_json(mock_response_data)
+
+        fake_client.upload.side_effect = upload
+        spool = tmp_path / 'spool'
+        spool.mkdir()
+        with open(spool / 'a.txt', 'w') as f:
+            f.write('x' * 100)
+            f.flush()
+            watcher = SpoolWatcher(
+                fake_client, spool, use_inotify=True, settle_time=0.3,
+                poll_interval=0.05, rescan_interval=60
+            )
+            with watcher:
+                for _ in range(12):
+                    time.sleep(0.1)
+                    f.write('x' * 100)
+                    f.flush()
+                assert sizes == []
+                f.close()
+                assert wait_for(lambda: watcher.stats()['uploaded'] == 1)
+        assert sizes == [1300]
+
+    def test_reused_name_uploaded_again(self, tmp_path, fake_client):
+        """Test that a new file under an uploaded file's name is not skipped"""
+        spool = tmp_path / 'spool'
+        spool.mkdir()
+        (spool / 'report.csv').write_text('first')
+
+        watcher = SpoolWatcher(
+            fake_client, spool, journal=tmp_path / 'spool.journal',
+            use_inotify=False, settle_time=0.05, poll_interval=0.02
+        )
+        with watcher:
+            assert wait_for(lambda: watcher.stats()['uploaded'] == 1)
+            assert wait_for(lambda: not (spool / 'report.csv').exists())
+            (spool / 'report.csv').write_text('second version')
+            assert wait_for(lambda: watcher.stats()['uploaded'] == 2)
+        assert not (spool / 'report.csv').exists()
+        assert fake_client.upload.call_count == 2
+
+    def test_invalid_on_success(self, tmp_path, fake_client):
+        """Test that unknown dispositions raise ValueError"""
+        with pytest.raises(ValueError):
+            SpoolWatcher(fake_client, tmp_path, on_success='archive')
+        with pytest.raises(ValueError):
+            SpoolWatcher(fake_client, tmp_path, on_success='move')
@@ -23,19 +23,69 @@ __author__ = 'tfLink'
 __license__ = 'MIT'
 
 from tflink.client import TFLinkClient
-from tflink.models import UploadResult
+from tflink.models import UploadResult, BatchResult
+from tflink.journal import UploadJournal
+from tflink.engine import UploadEngine
+from tflink.adaptive import AdaptiveConcurrency
+from tflink.watch import SpoolWatcher, SpoolEvent
+from tflink.executor import ProcessUploadExecutor
+from tflink.verify import LinkVerifier, LinkCheck
+from tflink.credentials import Credential, CredentialPool
+from tflink.endpoints import Endpoint, EndpointPool
+from tflink.connections import DNSCache
+from tflink.tls import TLSSessionCache
+from tflink.hedge import HedgePolicy
+from tflink.timeouts import CancelToken
+from tflink.breaker import CircuitBreaker
+from tflink.gateway import UploadGateway, GatewayClient
 from tflink.exceptions import (
     TFLinkError,
     UploadError,
+    ServerError,
+    RateLimitError,
     AuthenticationError,
     FileNotFoundError,
+    NetworkError,
+    UploadTimeoutError,
+    DeadlineExceededError,
+    CircuitOpenError,
+    UploadCancelledError,
+    ChecksumMismatchError,
 )
 
 __all__ = [
     'TFLinkClient',
     'UploadResult',
+    'BatchResult',
+    'UploadJournal',
+    'UploadEngine',
+    'AdaptiveConcurrency',
+    'SpoolWatcher',
+    'SpoolEvent',
+    'ProcessUploadExecutor',
+    'LinkVerifier',
+    'LinkCheck',
+    'Credential',
+    'CredentialPool',
+    'Endpoint',
+    'EndpointPool',
+    'DNSCache',
+    'TLSSessionCache',
+    'HedgePolicy',
+    'CancelToken',
+    'CircuitBreaker',
+    'UploadGateway',
+    'GatewayClient',
     'TFLinkError',
     'UploadError',
+    'ServerError',
+    'RateLimitError',
     'AuthenticationError',
     'FileNotFoundError',
+    'NetworkError',
+    'UploadTimeoutError',
+    'DeadlineExceededError',
+    'CircuitOpenError',
+    'UploadCancelledError',
+    'ChecksumMismatchError',
 ]
@@ -0,0 +1,254 @@
+"""
+Adaptive concurrency: finding how many uploads to run at once
+"""
+
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from tflink.exceptions import CircuitOpenError, NetworkError, RateLimitError, ServerError
+
+
+class AdaptiveConcurrency:
+    """
+    Grows and shrinks the number of in-flight uploads from what they measure
+
+    Completed uploads are grouped into rounds of ``limit`` uploads, like
+    round trips in TCP. For each upload the latency per byte is computed
+    (elapsed time over size plus ``request_cost``), and the lowest per-byte
+    latency seen serves as the uncongested baseline. As in TCP Vegas,
+    ``limit * (1 - baseline / mean latency)`` then estimates how many of the
+    in-flight uploads are only waiting in a queue (the link, the server):
+    below ``alpha`` the limit grows by one, above ``beta`` it shrinks by one.
+    Until the first decrease the limit doubles every round instead (slow
+    start). A round whose goodput (bytes per second) fell by more than
+    ``goodput_drop`` after an increase undoes that increase.
+
+    Every ``probe_every`` rounds the limit is halved for one round of uploads
+    started after the drop, and the baseline is re-measured from those alone
+    (like BBR's PROBE_RTT), so a baseline taken from a faster path does not
+    shrink the limit forever and one taken under load does not let it creep
+    upwards.
+
+    Overload errors (429, 5xx, network errors and timeouts) cut the limit
+    multiplicatively by ``backoff``, at most once per round (a round then
+    ends after ``limit`` more uploads, failed or not); other errors
+    (missing files, authentication) say nothing about load and are ignored.
+
+    Args:
+        min_limit: Lowest number of concurrent uploads (default: 1)
+        max_limit: Highest number of concurrent uploads (default: 64)
+        initial_limit: Starting number of concurrent uploads (default: 2)
+        alpha: Queued uploads below which the limit grows (default: 1.0)
+        beta: Queued uploads above which the limit shrinks (default: 3.0)
+        backoff: Factor applied to the limit on overload errors (default: 0.5)
+        goodput_drop: Relative goodput loss that undoes an increase
+            (default: 0.1)
+        request_cost: Bytes added to each upload's size when normalising its
+            latency, accounting for per-request overhead (default: 64KB)
+        probe_every: Rounds between two baseline probes; 0 disables them
+            (default: 20)
+        clock: Monotonic time source, also the one elapsed times come from
+
+    Example:
+        with UploadEngine(client, max_workers=32,
+                          concurrency=AdaptiveConcurrency(max_limit=32)) as engine:
+            ...
+    """
+
+    def __init__(
+        self,
+        min_limit: int = 1,
+        max_limit: int = 64,
+        initial_limit: int = 2,
+        alpha: float = 1.0,
+        beta: float = 3.0,
+        backoff: float = 0.5,
+        goodput_drop: float = 0.1,
+        request_cost: int = 64 * 1024,
+        probe_every: int = 20,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        """Start at initial_limit in slow start"""
+        if not 1 <= min_limit <= max_limit:
+            raise ValueError("limits must satisfy 1 <= min_limit <= max_limit")
+        if not 0 <= alpha < beta:
+            raise ValueError("alpha must be at least 0 and below beta")
+        if not 0 < backoff < 1:
+            raise ValueError("backoff must be between 0 and 1")
+
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.alpha = alpha
+        self.beta = beta
+        self.backoff = backoff
+        self.goodput_drop = goodput_drop
+        self.request_cost = request_cost
+        self.probe_every = probe_every
+        self.clock = clock
+        self._limit = max(min_limit, min(initial_limit, max_limit))
+        self._slow_start = True
+        self._lock = threading.Lock()
+
+        self._completed = 0
+        self._backed_off = False
+        self._samples: List[float] = []
+        self._bytes = 0
+        self._round_started = clock()
+        self._increased = False
+        self._previous_goodput: Optional[float] = None
+        # Limit to return to after a probe, while one is running
+        self._probe_limit: Optional[int] = None
+        self._probe_started = 0.0
+
+        self.rounds = 0
+        self.increases = 0
+        self.decreases = 0
+        self.overloads = 0
+        self.probes = 0
+        self.goodput = 0.0
+        self.latency = 0.0
+        self.base_latency = 0.0
+        self.queue_estimate = 0.0
+
+    @property
+    def limit(self) -> int:
+        """Number of uploads that may currently run at once"""
+        return self._limit
+
+    @staticmethod
+    def is_overload(error: BaseException) -> bool:
+        """True if error suggests too much concurrency rather than a bad request"""
+        if isinstance(error, CircuitOpenError):
+            # Raised without contacting the server
+            return False
+        return isinstance(error, (RateLimitError, ServerError, NetworkError))
+
+    def record(self, elapsed: float, size: int, error: Optional[BaseException] = None) -> None:
+        """
+        Account for a finished upload and adjust the limit at the end of a round
+
+        Args:
+            elapsed: Seconds the upload took
+            size: File size in bytes
+            error: Exception the upload raised, if any
+        """
+        with self._lock:
+            if error is not None and not self.is_overload(error):
+                return
+            if self._probe_limit is not None:
+                self._record_probe(elapsed, size, error)
+                return
+
+            if error is not None:
+                self.overloads += 1
+                if not self._backed_off:
+                    self._backed_off = True
+                    self._set_limit(int(self._limit * self.backoff), decrease=True)
+            else:
+                self._samples.append(elapsed / (size + self.request_cost))
+                self._bytes += size
+            self._completed += 1
+            if self._completed >= self._limit:
+                self._end_round()
+
+    def _record_probe(self, elapsed: float, size: int, error: Optional[BaseException]) -> None:
+        limit, self._probe_limit = self._probe_limit, None
+        if error is not None:
+            # Overloaded even while draining: back off from where we were
+            self.overloads += 1
+            self._limit = limit
+            self._set_limit(int(limit * self.backoff), decrease=True)
+            self._backed_off = True
+            self._start_round()
+            return
+        if self.clock() - elapsed < self._probe_started:
+            # Started before the probe, alongside the uploads it drained
+            self._probe_limit = limit
+            return
+        self._samples.append(elapsed / (size + self.request_cost))
+        if len(self._samples) < max(2, self._limit):
+            self._probe_limit = limit
+            return
+        self.base_latency = min(self._samples)
+        self._limit = limit
+        self._previous_goodput = None
+        self._start_round()
+
+    def _end_round(self) -> None:
+        if self._backed_off or not self._samples:
+            # The limit already reacted to errors during this round
+            self._increased = False
+            self._previous_goodput = None
+            self._start_round()
+            return
+
+        now = self.clock()
+        self.rounds += 1
+        round_minimum = min(self._samples)
+        self.base_latency = min(self.base_latency, round_minimum) if self.base_latency else round_minimum
+        self.latency = sum(self._samples) / len(self._samples)
+        self.goodput = self._bytes / max(now - self._round_started, 1e-9)
+        # Vegas: in-flight uploads beyond what the uncongested path would carry
+        self.queue_estimate = self._limit * (1 - self.base_latency / self.latency)
+
+        previous, self._previous_goodput = self._previous_goodput, self.goodput
+        increased, self._increased = self._increased, False
+        if increased and previous and self.goodput < previous * (1 - self.goodput_drop):
+            # More uploads in flight made things worse
+            self._set_limit(self._limit - 1, decrease=True)
+        elif self.queue_estimate > self.beta:
+            self._set_limit(self._limit - 1, decrease=True)
+        elif self.queue_estimate < self.alpha:
+            self._set_limit(self._limit * 2 if self._slow_start else self._limit + 1)
+        self._start_round()
+
+        if (self.probe_every and not self._slow_start and self.rounds % self.probe_every == 0
+                and self._limit > self.min_limit):
+            self.probes += 1
+            self._probe_limit = self._limit
+            self._probe_started = now
+            self._limit = max(self.min_limit, self._limit // 2)
+
+    def _set_limit(self, limit: int, decrease: bool = False) -> None:
+        limit = max(self.min_limit, min(limit, self.max_limit))
+        if decrease:
+            self._slow_start = False
+            if limit < self._limit:
+                self.decreases += 1
+        elif limit > self._limit:
+            self.increases += 1
+            self._increased = True
+        self._limit = limit
+
+    def _start_round(self) -> None:
+        self._completed = 0
+        self._backed_off = False
+        self._samples = []
+        self._bytes = 0
+        self._round_started = self.clock()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return the current limit and the measurements behind it"""
+        with self._lock:
+            return {
+                'limit': self._limit,
+                'slow_start': self._slow_start,
+                'probing': self._probe_limit is not None,
+                'rounds': self.rounds,
+                'increases': self.increases,
+                'decreases': self.decreases,
+                'overloads': self.overloads,
+                'probes': self.probes,
+                'goodput': self.goodput,
+                'latency': self.latency,
+                'base_latency': self.base_latency,
+                'queue_estimate': self.queue_estimate,
+            }
+
+    def __repr__(self) -> str:
+        """String representation of the controller"""
+        return (
+            f"AdaptiveConcurrency(limit={self._limit}, min_limit={self.min_limit}, "
+            f"max_limit={self.max_limit})"
+        )
@@ -0,0 +1,253 @@
+"""
+Circuit breaker that fails uploads fast while the service is down
+"""
+
+import threading
+import time
+from collections import deque
+from typing import Callable, Deque, Optional, Tuple
+
+from tflink.exceptions import CircuitOpenError, NetworkError, ServerError
+
+
+class CircuitBreaker:
+    """
+    Stops sending uploads to a failing service for a while
+
+    States:
+        - "closed": uploads go through; outcomes are recorded over a sliding
+          time window
+        - "open": uploads fail immediately with CircuitOpenError; entered when
+          the window holds at least ``min_calls`` uploads and the failure rate
+          (or the slow-call rate) reaches its threshold
+        - "half_open": after ``open_duration`` seconds, up to
+          ``half_open_calls`` trial uploads are let through; if they all
+          succeed the breaker closes, if one fails it opens again
+
+    Connection errors, timeouts and 5xx responses count as failures. Other
+    errors (authentication, 4xx, missing files) say nothing about the
+    service's health and are ignored. An upload counts as slow when it takes
+    longer than ``slow_call_duration`` seconds (per MB for files over 1MB).
+
+    One breaker can be shared by several clients; all state is guarded by a
+    lock so every thread sees the same state.
+
+    Args:
+        failure_rate: Failure fraction that opens the breaker (default: 0.5)
+        min_calls: Uploads needed in the window before the rates are trusted
+            (default: 10)
+        window: Length of the sliding window in seconds (default: 60)
+        open_duration: Seconds to fail fast before trying again (default: 30)
+        half_open_calls: Trial uploads allowed in the half-open state (default: 1)
+        slow_call_duration: Seconds (per MB) after which an upload counts as
+            slow (default: latency is not considered)
+        slow_call_rate: Slow fraction that opens the breaker (default: 0.8)
+        clock: Monotonic time source, for tests
+
+    Example:
+        breaker = CircuitBreaker(failure_rate=0.5, open_duration=15)
+        client = TFLinkClient(circuit_breaker=breaker)
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(
+        self,
+        failure_rate: float = 0.5,
+        min_calls: int = 10,
+        window: float = 60.0,
+        open_duration: float = 30.0,
+        half_open_calls: int = 1,
+        slow_call_duration: Optional[float] = None,
+        slow_call_rate: float = 0.8,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        """Create a closed breaker"""
+        if not 0 < failure_rate <= 1 or not 0 < slow_call_rate <= 1:
+            raise ValueError("failure_rate and slow_call_rate must be in (0, 1]")
+        if min_calls < 1 or half_open_calls < 1:
+            raise ValueError("min_calls and half_open_calls must be at least 1")
+
+        self.failure_rate = failure_rate
+        self.min_calls = min_calls
+        self.window = window
+        self.open_duration = open_duration
+        self.half_open_calls = half_open_calls
+        self.slow_call_duration = slow_call_duration
+        self.slow_call_rate = slow_call_rate
+        self._clock = clock
+        self._lock = threading.Lock()
+
+        self._state = self.CLOSED
+        self._opened_at = 0.0
+        # (time, failed, slow) for every counted upload in the window
+        self._outcomes: Deque[Tuple[float, bool, bool]] = deque()
+        self._failures = 0
+        self._slow = 0
+        self._probes_in_flight = 0
+        self._probe_successes = 0
+
+        self.rejected = 0
+        self.opened = 0
+
+    @property
+    def state(self) -> str:
+        """Current state: "closed", "open" or "half_open" """
+        with self._lock:
+            self._refresh(self._clock())
+            return self._state
+
+    def _refresh(self, now: float) -> None:
+        """Move from open to half-open once open_duration has passed (lock held)"""
+        if self._state == self.OPEN and now - self._opened_at >= self.open_duration:
+            self._state = self.HALF_OPEN
+            self._probes_in_flight = 0
+            self._probe_successes = 0
+
+    def _trim(self, now: float) -> None:
+        """Drop outcomes older than the window (lock held)"""
+        while self._outcomes and now - self._outcomes[0][0] > self.window:
+            _, failed, slow = self._outcomes.popleft()
+            self._failures -= failed
+            self._slow -= slow
+
+    def _open(self, now: float) -> None:
+        """Trip the breaker (lock held)"""
+        self._state = self.OPEN
+        self._opened_at = now
+        self._outcomes.clear()
+        self._failures = 0
+        self._slow = 0
+        self.opened += 1
+
+    def acquire(self) -> bool:
+        """
+        Ask to start an upload
+
+        Returns:
+            True if the upload is a half-open trial; pass it to release()
+
+        Raises:
+            CircuitOpenError: If the breaker is open, or half-open with all
+                trial slots taken
+        """
+        with self._lock:
+            now = self._clock()
+            self._refresh(now)
+            if self._state == self.CLOSED:
+                return False
+            if self._state == self.HALF_OPEN and self._probes_in_flight < self.half_open_calls:
+                self._probes_in_flight += 1
+                return True
+
+            self.rejected += 1
+            if self._state == self.OPEN:
+                remaining = self.open_duration - (now - self._opened_at)
+                raise CircuitOpenError(
+                    f"Circuit breaker is open after repeated upload failures; "
+                    f"failing fast for another {remaining:.1f}s"
+                )
+            raise CircuitOpenError(
+                "Circuit breaker is half-open and its trial uploads are in flight"
+            )
+
+    def is_failure(self, error: Optional[BaseException]) -> bool:
+        """True if error indicates that the service is unhealthy"""
+        return (
+            isinstance(error, (NetworkError, ServerError))
+            and not isinstance(error, CircuitOpenError)
+        )
+
+    def release(
+        self,
+        probe: bool,
+        error: Optional[BaseException] = None,
+        elapsed: float = 0.0,
+        size: int = 0
+    ) -> None:
+        """
+        Record the outcome of an upload started with acquire()
+
+        Args:
+            probe: Value returned by acquire()
+            error: Exception raised by the upload, None on success
+            elapsed: Seconds the upload took
+            size: Uploaded bytes; durations of files over 1MB are taken per MB
+        """
+        if error is not None and not self.is_failure(error):
+            # Neither a success nor a failure of the service
+            if probe:
+                with self._lock:
+                    self._probes_in_flight = max(0, self._probes_in_flight - 1)
+            return
+
+        failed = error is not None
+        slow = (
+            self.slow_call_duration is not None
+            and elapsed / max(1.0, size / (1024 * 1024)) > self.slow_call_duration
+        )
+
+        with self._lock:
+            now = self._clock()
+            if probe:
+                self._probes_in_flight = max(0, self._probes_in_flight - 1)
+                if self._state != self.HALF_OPEN:
+                    return
+                if failed or slow:
+                    self._open(now)
+                    return
+                self._probe_successes += 1
+                if self._probe_successes >= self.half_open_calls:
+                    self._state = self.CLOSED
+                return
+
+            if self._state != self.CLOSED:
+                return
+            self._outcomes.append((now, failed, slow))
+            self._failures += failed
+            self._slow += slow
+            self._trim(now)
+
+            calls = len(self._outcomes)
+            if calls >= self.min_calls and (
+                self._failures / calls >= self.failure_rate
+                or (self.slow_call_duration is not None
+                    and self._slow / calls >= self.slow_call_rate)
+            ):
+                self._open(now)
+
+    def reset(self) -> None:
+        """Close the breaker and forget all recorded outcomes"""
+        with self._lock:
+            self._state = self.CLOSED
+            self._outcomes.clear()
+            self._failures = 0
+            self._slow = 0
+            self._probes_in_flight = 0
+
+    def stats(self) -> dict:
+        """Return the state and the counters over the current window"""
+        with self._lock:
+            now = self._clock()
+            self._refresh(now)
+            self._trim(now)
+            calls = len(self._outcomes)
+            retry_after = None
+            if self._state == self.OPEN:
+                retry_after = max(0.0, self.open_duration - (now - self._opened_at))
+            return {
+                'state': self._state,
+                'calls': calls,
+                'failures': self._failures,
+                'slow_calls': self._slow,
+                'failure_rate': self._failures / calls if calls else 0.0,
+                'rejected': self.rejected,
+                'opened': self.opened,
+                'retry_after': retry_after,
+            }
+
+    def __repr__(self) -> str:
+        """String representation of the breaker"""
+        return f"CircuitBreaker(state='{self.state}')"
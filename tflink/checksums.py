@@ -0,0 +1,93 @@
+"""
+Streaming checksum helpers
+"""
+
+import hashlib
+from typing import Callable, Dict, Iterable, List, Sequence, Tuple
+
+try:
+    import xxhash
+except ImportError:  # pragma: no cover - optional dependency
+    xxhash = None
+
+
+# Algorithms provided by hashlib on every supported Python version
+_HASHLIB_ALGORITHMS = ('md5', 'sha1', 'sha256', 'sha512', 'blake2b', 'blake2s')
+
+# Algorithms provided by the optional xxhash package
+_XXHASH_ALGORITHMS = ('xxh32', 'xxh64', 'xxh3_64', 'xxh3_128', 'xxh128')
+
+
+def available_algorithms() -> List[str]:
+    """Return the checksum algorithms usable in this environment"""
+    names = list(_HASHLIB_ALGORITHMS)
+    if xxhash is not None:
+        names.extend(name for name in _XXHASH_ALGORITHMS if hasattr(xxhash, name))
+    return names
+
+
+def _constructor(name: str) -> Callable:
+    """Return a zero-argument factory for the named hash"""
+    if name in _HASHLIB_ALGORITHMS:
+        return getattr(hashlib, name)
+    if name in _XXHASH_ALGORITHMS:
+        if xxhash is None:
+            raise ValueError(
+                f"Checksum algorithm {name!r} requires the xxhash package "
+                f"(pip install tflink[xxhash])"
+            )
+        return getattr(xxhash, name)
+    raise ValueError(
+        f"Unknown checksum algorithm {name!r}. "
+        f"Available: {', '.join(available_algorithms())}"
+    )
+
+
+def validate_algorithms(names: Iterable[str]) -> Tuple[str, ...]:
+    """
+    Check that every algorithm is available
+
+    Returns:
+        The algorithm names as a tuple
+
+    Raises:
+        ValueError: If an algorithm is unknown or its package is not installed
+    """
+    names = tuple(names)
+    for name in names:
+        _constructor(name)
+    return names
+
+
+class Checksummer:
+    """
+    Computes several digests over data fed to it chunk by chunk
+
+    Chunks are handed to every hash object as-is (bytes or memoryview), so no
+    copy is made regardless of how many algorithms are configured.
+
+    Args:
+        algorithms: Names of the digests to compute, e.g. ("sha256", "blake2b")
+
+    Example:
+        summer = Checksummer(['sha256'])
+        summer.update(b'data')
+        print(summer.hexdigests()['sha256'])
+    """
+
+    def __init__(self, algorithms: Sequence[str]):
+        """Create fresh hash objects"""
+        self.algorithms = tuple(algorithms)
+        self._hashers = [(name, _constructor(name)()) for name in self.algorithms]
+
+    def update(self, chunk) -> None:
+        """Feed a chunk of data to every hash"""
+        for _, hasher in self._hashers:
+            hasher.update(chunk)
+
+    def hexdigests(self) -> Dict[str, str]:
+        """Return a mapping of algorithm name to hex digest"""
+        return {name: hasher.hexdigest() for name, hasher in self._hashers}
+
+    def __bool__(self) -> bool:
+        return bool(self._hashers)
@@ -0,0 +1,91 @@
+"""
+Command line interface: ``tflink gateway``
+"""
+
+import argparse
+import os
+import signal
+import sys
+from typing import List, Optional
+
+from tflink.gateway import UploadGateway
+from tflink.tls import TLSSessionCache
+
+
+def _build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog='tflink', description="tmpfile.link client tools")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    gateway = commands.add_parser(
+        'gateway',
+        help="Serve uploads for local processes over a Unix socket",
+        description=(
+            "Accept uploads from local processes over a Unix domain socket and send "
+            "them through one shared connection pool. Credentials are read from "
+            "TFLINK_USER_ID and TFLINK_AUTH_TOKEN."
+        ),
+    )
+    gateway.add_argument('--socket',
+                         help="Socket path (default: $XDG_RUNTIME_DIR/tflink/gateway.sock, "
+                              "else tflink-UID/gateway.sock in the temporary directory)")
+    gateway.add_argument('--base-url', action='append', dest='base_urls', metavar='URL',
+                         help="API base URL; repeat for several endpoints")
+    gateway.add_argument('--pool-size', type=int, default=32,
+                         help="Keep-alive connections per endpoint (default: %(default)s)")
+    gateway.add_argument('--bandwidth-limit', type=float, metavar='BYTES_PER_SEC',
+                         help="Upload rate limit shared by all uploads")
+    gateway.add_argument('--dns-cache', action='store_true', help="Cache DNS lookups in-process")
+    gateway.add_argument('--tls-session-cache', metavar='PATH',
+                         help="File in which TLS sessions are persisted")
+    gateway.add_argument('--no-export-tls-sessions', dest='export_tls_sessions',
+                         action='store_false',
+                         help="Keep TLS sessions in memory only, without reading them out "
+                              "of OpenSSL through ctypes")
+    gateway.add_argument('--warm-connections', type=int, default=0,
+                         help="Connections opened to each endpoint at start-up")
+    gateway.add_argument('--dedup-ttl', type=float, default=3600.0, metavar='SECONDS',
+                         help="Reuse results for unchanged files this long; 0 disables "
+                              "(default: %(default)s)")
+    return parser
+
+
+def _run_gateway(args: argparse.Namespace) -> int:
+    client_kwargs = {
+        'pool_size': args.pool_size,
+        'bandwidth_limit': args.bandwidth_limit,
+        'dns_cache': args.dns_cache or None,
+        'tls_session_cache': TLSSessionCache(
+            args.tls_session_cache, export_sessions=args.export_tls_sessions
+        ) if args.tls_session_cache else None,
+        'warm_connections': args.warm_connections,
+    }
+    if args.base_urls:
+        client_kwargs['base_url'] = args.base_urls
+    user_id = os.environ.get('TFLINK_USER_ID')
+    auth_token = os.environ.get('TFLINK_AUTH_TOKEN')
+    if user_id or auth_token:
+        client_kwargs.update(user_id=user_id, auth_token=auth_token)
+
+    def terminate(signum, frame):
+        raise KeyboardInterrupt
+
+    signal.signal(signal.SIGTERM, terminate)
+    with UploadGateway(args.socket, dedup_ttl=args.dedup_ttl, **client_kwargs) as gateway:
+        print(f"tflink gateway listening on {gateway.path}", file=sys.stderr)
+        try:
+            gateway.serve_forever()
+        except KeyboardInterrupt:
+            pass
+    return 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Entry point of the ``tflink`` command"""
+    args = _build_parser().parse_args(argv)
+    if args.command == 'gateway':
+        return _run_gateway(args)
+    return 2
+
+
+if __name__ == '__main__':
+    sys.exit(main())
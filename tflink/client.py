@@ -2,20 +2,76 @@
 Main client for tflink file upload service
 """
 
+import errno
 import os
+import socket
+import threading
+import time
+import weakref
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from functools import partial
 from pathlib import Path
-from typing import Optional, Union
+from stat import S_ISREG
+from typing import TYPE_CHECKING, Dict, Hashable, Iterable, List, Optional, Sequence, Tuple, Union
 
 import requests
 
-from tflink.models import UploadResult
+from tflink.adaptive import AdaptiveConcurrency
+from tflink.breaker import CircuitBreaker
+from tflink.checksums import Checksummer, validate_algorithms
+from tflink.connections import DNSCache, PooledHTTPAdapter, default_dns_cache
+from tflink.credentials import CredentialPool
+from tflink.endpoints import Endpoint, EndpointPool
+from tflink.fileio import open_upload_file, read_small_file, validate_page_cache_mode
+from tflink.hedge import HedgePolicy
+from tflink.engine import UploadEngine
+from tflink.journal import UploadJournal
+from tflink.models import BatchResult, UploadResult
+from tflink.singleflight import SingleFlight
+from tflink.streaming import MultipartBody, MultipartTemplate
+from tflink.timeouts import AbortHandle, CancelToken, UploadDeadline, Watchdog, cancel_reason
+from tflink.tls import TLSSessionCache
+from tflink.throttle import TokenBucket, throttle
+from tflink.verify import LinkCheck, LinkVerifier
 from tflink.exceptions import (
     UploadError,
     AuthenticationError,
+    ChecksumMismatchError,
     FileNotFoundError,
     NetworkError,
+    ServerError,
+    RateLimitError,
+    UploadCancelledError,
+    UploadTimeoutError,
 )
 
+if TYPE_CHECKING:
+    from tflink.gateway import GatewayClient
+
+
+# stat() errors that mean there is no file at the path (as for Path.exists())
+_MISSING_ERRNOS = (errno.ENOENT, errno.ENOTDIR, errno.EBADF, errno.ELOOP)
+
+
+def _is_send_timeout(error: BaseException) -> bool:
+    """True if a requests error wraps a socket timeout hit while sending"""
+    reason = error.args[0] if isinstance(error, requests.exceptions.ConnectionError) and error.args else None
+    return any(isinstance(arg, socket.timeout) for arg in getattr(reason, 'args', ()))
+
+
+# Clients alive in this process; their connection state is rebuilt in the
+# child after os.fork()
+_clients: 'weakref.WeakSet[TFLinkClient]' = weakref.WeakSet()
+
+
+def _after_fork_in_child() -> None:
+    for client in list(_clients):
+        client._reset_after_fork(reinit_locks=True)
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_after_fork_in_child)
+
 
 class TFLinkClient:
     """
@@ -24,9 +80,87 @@ class TFLinkClient:
     Args:
         user_id: Optional user ID for authenticated uploads
         auth_token: Optional authentication token for authenticated uploads
-        base_url: API base URL (default: https://tmpfile.link)
+        base_url: API base URL (default: https://tmpfile.link), or a list of base
+            URLs (or an EndpointPool) to route each upload to the fastest healthy
+            endpoint with failover
         timeout: Request timeout in seconds (default: 300)
+        connect_timeout: Timeout for establishing a connection (default: same as
+            timeout, or 5 seconds when several endpoints are configured so a dead
+            endpoint is skipped quickly)
+        read_timeout: Longest wait for the server's response once the file has
+            been sent (default: same as timeout)
+        min_throughput: Slowest acceptable upload rate in bytes per second. Each
+            upload gets a total deadline of connect_timeout + read_timeout +
+            size / min_throughput (default: no total deadline)
+        stall_timeout: Abort an upload when no data could be sent for this many
+            seconds; waits imposed by bandwidth limits do not count (default: off)
+        hedge: HedgePolicy (or True for the default one) under which slow small
+            uploads get a second attempt and the first success wins
+            (default: no hedging)
+        circuit_breaker: CircuitBreaker (or True for the default one) that
+            makes uploads fail fast with CircuitOpenError while the service
+            keeps failing; may be shared by several clients (default: off)
+        gateway: Hand uploads to a local UploadGateway (``tflink gateway``) at
+            this socket path, or at the default path when True; the gateway's
+            connection pool, rate limit and credentials are used instead of
+            this client's (default: upload directly)
+        dns_cache: Resolve host names through an in-process DNSCache; True uses
+            the cache shared by the whole process (default: system resolver)
+        warm_connections: Number of pooled connections to open to each endpoint
+            at construction, so the first uploads skip DNS, TCP and TLS setup
+            (default: 0; see warm())
+        tls_session_cache: TLSSessionCache (or its file) keeping TLS sessions so
+            later connections resume them instead of performing a full
+            handshake; a path keeps them in memory only, see
+            TLSSessionCache(export_sessions=True) (default: no cache)
         max_file_size: Maximum file size in bytes (default: 100MB)
+        bandwidth_limit: Maximum upload rate in bytes per second shared by all
+            uploads of this client, including concurrent ones (default: unlimited)
+        pool_size: Maximum number of keep-alive connections kept open to the
+            server (default: 10)
+        checksums: Digest algorithms computed while each file streams out and
+            attached to UploadResult.checksums, e.g. ("sha256",) (default: none)
+        credentials: CredentialPool (or list of (user_id, auth_token) tuples)
+            to spread uploads over several accounts instead of user_id/auth_token
+        chunk_size: Bytes read from the file and handed to the socket at a
+            time (default: 256KB)
+        read_ahead: Number of chunks a background thread reads ahead into
+            reusable buffers while earlier chunks are sent, so slow disks and
+            the network overlap; 0 reads each chunk just before sending it
+            (default: 0)
+        page_cache: How uploads use the page cache on Linux: "keep" (normal
+            reads), "drop" (sequential readahead, and pages are evicted with
+            posix_fadvise once sent) or "direct" (O_DIRECT reads that bypass
+            the cache, falling back to "drop" where unsupported)
+            (default: "keep")
+        sendfile: Send file contents with os.sendfile() directly from the file
+            to the socket, skipping Python buffers, on plain-HTTP connections.
+            Uploads over https, or that compute checksums or use a page_cache
+            mode other than "keep", are streamed as usual (default: False)
+        memory_map: Back each upload with a read-only mmap of the file:
+            chunks are memoryview slices of the mapping rather than read()
+            copies, the kernel handles readahead, and concurrent uploads of
+            one file share its pages. Only with page_cache="keep"; the file
+            must not be truncated while it uploads (default: False)
+        coalesce: Let concurrent upload() calls for the same file (same
+            resolved path, size, mtime and inode, with the same filename,
+            checksums and shard_key) share one request: the first call
+            uploads, the others wait for it and receive the same
+            UploadResult or a copy of its exception. A joining call's own
+            bandwidth_limit is not applied (default: False)
+        tiny_file_size: Files up to this many bytes are read with one
+            read() call and sent as a single in-memory body written together
+            with the headers, using a multipart envelope and request template
+            prepared once per client; 0 streams every file
+            (default: 16KB; only with page_cache="keep")
+
+    Thread and process safety:
+        One client can be shared by any number of threads; upload() holds no
+        client-wide lock, and the connection pool, rate limits and routing
+        state each guard their own short critical sections. A client inherited
+        through fork() (gunicorn, celery and multiprocessing workers) notices
+        the new process ID and opens its own connections, watchdog and hedge
+        threads instead of using the parent's sockets.
 
     Example:
         # Anonymous upload
@@ -43,30 +177,202 @@ class TFLinkClient:
     # Default maximum file size: 100MB
     DEFAULT_MAX_FILE_SIZE = 100 * 1024 * 1024
 
+    # Largest file sent through the in-memory fast path by default: 16KB
+    TINY_FILE_SIZE = 16 * 1024
+
+    # Connect timeout used with several endpoints, so failover is quick
+    DEFAULT_FAILOVER_CONNECT_TIMEOUT = 5.0
+
     def __init__(
         self,
         user_id: Optional[str] = None,
         auth_token: Optional[str] = None,
-        base_url: str = "https://tmpfile.link",
+        base_url: Union[str, Sequence[str], EndpointPool] = "https://tmpfile.link",
         timeout: int = 300,
-        max_file_size: Optional[int] = None
+        max_file_size: Optional[int] = None,
+        bandwidth_limit: Optional[float] = None,
+        pool_size: int = 10,
+        checksums: Sequence[str] = (),
+        credentials: Optional[Union[CredentialPool, Iterable[Tuple[str, str]]]] = None,
+        connect_timeout: Optional[float] = None,
+        dns_cache: Optional[Union[bool, DNSCache]] = None,
+        warm_connections: int = 0,
+        tls_session_cache: Optional[Union[str, os.PathLike, TLSSessionCache]] = None,
+        read_timeout: Optional[float] = None,
+        min_throughput: Optional[float] = None,
+        stall_timeout: Optional[float] = None,
+        hedge: Optional[Union[bool, HedgePolicy]] = None,
+        circuit_breaker: Optional[Union[bool, CircuitBreaker]] = None,
+        gateway: Optional[Union[bool, str, os.PathLike, 'GatewayClient']] = None,
+        chunk_size: int = MultipartBody.DEFAULT_CHUNK_SIZE,
+        read_ahead: int = 0,
+        page_cache: str = 'keep',
+        sendfile: bool = False,
+        memory_map: bool = False,
+        coalesce: bool = False,
+        tiny_file_size: int = TINY_FILE_SIZE
     ):
         """Initialize the TFLink client"""
         self.user_id = user_id
         self.auth_token = auth_token
-        self.base_url = base_url.rstrip('/')
+        if isinstance(base_url, str):
+            base_url = [base_url]
+        if not isinstance(base_url, EndpointPool):
+            base_url = EndpointPool(base_url)
+        self.endpoints = base_url if len(base_url) > 1 else None
+        self.base_url = base_url.endpoints[0].base_url
         self.timeout = timeout
+        if connect_timeout is None and self.endpoints is not None:
+            connect_timeout = self.DEFAULT_FAILOVER_CONNECT_TIMEOUT
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        if min_throughput is not None and min_throughput <= 0:
+            raise ValueError("min_throughput must be positive")
+        self.min_throughput = min_throughput
+        self.stall_timeout = stall_timeout
+        self._watchdog = Watchdog()
+        if hedge is True:
+            hedge = HedgePolicy()
+        self.hedge = hedge or None
+        self._hedge_pool: Optional[ThreadPoolExecutor] = None
+        self._hedge_lock = threading.Lock()
+        if circuit_breaker is True:
+            circuit_breaker = CircuitBreaker()
+        self.circuit_breaker = circuit_breaker or None
         self.max_file_size = max_file_size if max_file_size is not None else self.DEFAULT_MAX_FILE_SIZE
         self.upload_url = f"{self.base_url}/api/upload"
+        self._bandwidth = TokenBucket(bandwidth_limit)
+        if chunk_size < 1 or read_ahead < 0:
+            raise ValueError("chunk_size must be positive and read_ahead must not be negative")
+        self.chunk_size = chunk_size
+        self.read_ahead = read_ahead
+        self.page_cache = validate_page_cache_mode(page_cache)
+        self.sendfile = sendfile
+        if memory_map and self.page_cache != 'keep':
+            raise ValueError("memory_map requires page_cache='keep'")
+        self.memory_map = memory_map
+        if tiny_file_size < 0:
+            raise ValueError("tiny_file_size must not be negative")
+        self.tiny_file_size = tiny_file_size
+        self._multipart = MultipartTemplate()
+        self._flights = SingleFlight() if coalesce else None
+        self.checksums = validate_algorithms(checksums)
 
         # Validate authentication parameters
         if (user_id and not auth_token) or (auth_token and not user_id):
             raise ValueError("Both user_id and auth_token must be provided for authenticated uploads")
 
+        if credentials is not None and user_id:
+            raise ValueError("Pass either user_id/auth_token or credentials, not both")
+        if credentials is not None and not isinstance(credentials, CredentialPool):
+            credentials = CredentialPool(credentials)
+        self.credentials = credentials
+
+        if gateway and (user_id or credentials is not None):
+            raise ValueError("Uploads through a gateway use the gateway's credentials")
+        if gateway:
+            from tflink.gateway import GatewayClient
+
+            if gateway is True:
+                gateway = GatewayClient()
+            elif not isinstance(gateway, GatewayClient):
+                gateway = GatewayClient(gateway)
+        self.gateway = gateway or None
+
+        # Connections are kept alive and reused across uploads
+        self.pool_size = pool_size
+        if dns_cache is True:
+            dns_cache = default_dns_cache
+        self.dns_cache = dns_cache or None
+        if tls_session_cache is not None and not isinstance(tls_session_cache, TLSSessionCache):
+            tls_session_cache = TLSSessionCache(tls_session_cache)
+        self.tls_sessions = tls_session_cache
+        self._http, self._adapter = self._new_session()
+        # Upload URL -> (prepared request, environment settings), see _send_bytes()
+        self._request_templates: Dict[str, Tuple[requests.PreparedRequest, dict]] = {}
+        self._pid = os.getpid()
+        self._fork_lock = threading.Lock()
+        _clients.add(self)
+
+        if warm_connections:
+            self.warm(warm_connections)
+
+    def _new_session(self) -> Tuple[requests.Session, PooledHTTPAdapter]:
+        """Create the HTTP session and its connection pool"""
+        session = requests.Session()
+        adapter = PooledHTTPAdapter(
+            dns_cache=self.dns_cache, tls_sessions=self.tls_sessions,
+            pool_maxsize=self.pool_size
+        )
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        return session, adapter
+
+    @property
+    def _session(self) -> requests.Session:
+        """HTTP session owned by the current process"""
+        self._check_fork()
+        return self._http
+
+    def _check_fork(self) -> None:
+        """Rebuild per-process state if the client was inherited through fork()"""
+        if self._pid != os.getpid():
+            with self._fork_lock:
+                if self._pid != os.getpid():
+                    self._reset_after_fork()
+
+    def _reset_after_fork(self, reinit_locks: bool = False) -> None:
+        """
+        Replace state that must not be shared with the parent process
+
+        The parent's pooled sockets are dropped without being shut down, so the
+        parent can keep using them. Worker threads do not survive fork(), so a
+        new watchdog and hedge pool start on demand. With reinit_locks (only
+        safe while the child is still single-threaded, i.e. in the at-fork
+        hook) locks that another parent thread may have held at the moment of
+        the fork are replaced too.
+        """
+        if reinit_locks:
+            self._fork_lock = threading.Lock()
+            shared = [
+                self._bandwidth, self.credentials, self.endpoints, self.hedge,
+                self.circuit_breaker, self.dns_cache, self.tls_sessions,
+            ]
+            if self.credentials is not None:
+                for cred in self.credentials.credentials:
+                    shared.extend((cred.bandwidth, cred.requests))
+            for obj in shared:
+                if obj is not None:
+                    obj._lock = threading.Lock()
+
+        if self._flights is not None:
+            # Calls in flight belong to parent threads that do not exist here
+            self._flights._reset()
+        self._http, self._adapter = self._new_session()
+        self._request_templates = {}
+        self._watchdog = Watchdog()
+        self._hedge_pool = None
+        self._hedge_lock = threading.Lock()
+        self._pid = os.getpid()
+
+    @property
+    def bandwidth_limit(self) -> Optional[float]:
+        """Client-wide upload rate limit in bytes per second (None for unlimited)"""
+        return self._bandwidth.rate
+
+    @bandwidth_limit.setter
+    def bandwidth_limit(self, rate: Optional[float]) -> None:
+        """Change the client-wide limit; uploads in progress pick it up immediately"""
+        self._bandwidth.set_rate(rate)
+
     def upload(
         self,
         file_path: Union[str, Path],
-        filename: Optional[str] = None
+        filename: Optional[str] = None,
+        bandwidth_limit: Optional[float] = None,
+        checksums: Optional[Sequence[str]] = None,
+        shard_key: Optional[str] = None,
+        cancel: Optional[threading.Event] = None
     ) -> UploadResult:
         """
         Upload a file to tmpfile.link
@@ -74,6 +380,16 @@ class TFLinkClient:
         Args:
             file_path: Path to the file to upload
             filename: Optional custom filename (default: use original filename)
+            bandwidth_limit: Optional rate limit in bytes per second for this upload,
+                applied on top of the client-wide limit
+            checksums: Digest algorithms for this upload, overriding the client's
+                checksums setting
+            shard_key: Key used by a CredentialPool with the "hash" policy to keep
+                related files on the same account (default: the file path)
+            cancel: CancelToken (or threading.Event) that cancels the upload
+                from another thread: the request is aborted within one chunk
+                and the call raises UploadCancelledError. Through a gateway,
+                only uploads that have not started yet are cancelled
 
         Returns:
             UploadResult object containing download link and metadata
@@ -83,6 +399,8 @@ class TFLinkClient:
             UploadError: If the upload fails
             AuthenticationError: If authentication fails
             NetworkError: If network request fails
+            CircuitOpenError: If the circuit breaker is open (nothing was sent)
+            UploadCancelledError: If cancel was set before or during the upload
 
         Example:
             result = client.upload('/path/to/file.pdf')
@@ -92,15 +410,19 @@ class TFLinkClient:
         # Convert to Path object
         file_path = Path(file_path)
 
-        # Check if file exists
-        if not file_path.exists():
+        # One stat() call tells whether the file exists, is a file, and its size
+        try:
+            stat = file_path.stat()
+        except OSError as e:
+            if e.errno not in _MISSING_ERRNOS:
+                raise
             raise FileNotFoundError(f"File not found: {file_path}")
 
-        if not file_path.is_file():
+        if not S_ISREG(stat.st_mode):
             raise FileNotFoundError(f"Path is not a file: {file_path}")
 
         # Check file size
-        file_size = file_path.stat().st_size
+        file_size = stat.st_size
         if file_size > self.max_file_size:
             size_mb = file_size / 1024 / 1024
             max_mb = self.max_file_size / 1024 / 1024
@@ -118,21 +440,338 @@ class TFLinkClient:
             headers['X-User-Id'] = self.user_id
             headers['X-Auth-Token'] = self.auth_token
 
-        # Prepare file for upload
+        if checksums is None:
+            checksums = self.checksums
+        else:
+            checksums = validate_algorithms(checksums)
+
+        if cancel is not None and cancel.is_set():
+            raise UploadCancelledError(cancel_reason(cancel))
+
+        if self._flights is None or cancel is not None:
+            # A cancellable upload is not shared: cancelling it must not
+            # fail other callers
+            return self._upload_file(
+                file_path, upload_filename, file_size, headers, bandwidth_limit, checksums,
+                shard_key, cancel
+            )
+
+        # Identical uploads running concurrently share one request; a change
+        # to the file's size, mtime or inode makes it a different upload
+        key = (
+            str(file_path.resolve()), stat.st_size, stat.st_mtime_ns, stat.st_ino,
+            upload_filename, tuple(checksums), shard_key,
+        )
+        return self._flights.do(key, lambda: self._upload_file(
+            file_path, upload_filename, file_size, headers, bandwidth_limit, checksums, shard_key
+        ))
+
+    def _upload_file(
+        self,
+        file_path: Path,
+        upload_filename: str,
+        file_size: int,
+        headers: Dict[str, str],
+        bandwidth_limit: Optional[float],
+        checksums: Sequence[str],
+        shard_key: Optional[str],
+        cancel: Optional[threading.Event] = None
+    ) -> UploadResult:
+        """Route one validated upload through the gateway or a credential and send it"""
+        if self.gateway is not None:
+            return self.gateway.upload(
+                file_path, upload_filename, bandwidth_limit=bandwidth_limit, checksums=checksums
+            )
+
+        buckets = [self._bandwidth]
+        if bandwidth_limit is not None:
+            buckets.append(TokenBucket(bandwidth_limit))
+        # One deadline for the whole upload: failover and hedged attempts
+        # share it rather than each starting a fresh one
+        total = self.upload_deadline(file_size)
+        expires = time.monotonic() + total if total is not None else None
+
+        if self.credentials is None:
+            return self._send_file(
+                file_path, upload_filename, file_size, headers, buckets, checksums, cancel,
+                expires
+            )
+
+        # Spread over the pool; an identity rejected with 401/403 is taken out
+        # of rotation and the upload moves on to the next one
+        key = shard_key if shard_key is not None else str(file_path)
+        tried = []
+        last_error: Optional[AuthenticationError] = None
+        while True:
+            try:
+                cred = self.credentials.acquire(key, exclude=tried)
+            except AuthenticationError:
+                if last_error is not None:
+                    raise last_error
+                raise
+
+            try:
+                result = self._send_file(
+                    file_path, upload_filename, file_size,
+                    dict(headers, **cred.headers), buckets + [cred.bandwidth], checksums,
+                    cancel, expires
+                )
+            except AuthenticationError as e:
+                self.credentials.release(cred, e)
+                tried.append(cred)
+                last_error = e
+            except BaseException as e:
+                self.credentials.release(cred, e)
+                raise
+            else:
+                self.credentials.release(cred)
+                return result
+
+    def _send_file(
+        self,
+        file_path: Path,
+        upload_filename: str,
+        file_size: int,
+        headers: Dict[str, str],
+        buckets: List[TokenBucket],
+        checksums: Sequence[str],
+        cancel: Optional[threading.Event] = None,
+        expires: Optional[float] = None
+    ) -> UploadResult:
+        """
+        Send one file, hedging small uploads when a HedgePolicy is set
+
+        With a circuit breaker, the upload fails with CircuitOpenError before
+        anything is sent while the breaker is open, and its outcome is
+        recorded otherwise.
+        """
+        args = (
+            file_path, upload_filename, file_size, headers, buckets, checksums, cancel, expires
+        )
+        breaker = self.circuit_breaker
+        if breaker is None:
+            return self._send(args, file_size)
+
+        probe = breaker.acquire()
+        started = time.monotonic()
         try:
-            with open(file_path, 'rb') as f:
-                files = {'file': (upload_filename, f)}
+            result = self._send(args, file_size)
+        except BaseException as e:
+            breaker.release(probe, e, time.monotonic() - started, file_size)
+            raise
+        breaker.release(probe, None, time.monotonic() - started, file_size)
+        return result
 
-                # Make the upload request
-                response = requests.post(
-                    self.upload_url,
-                    headers=headers,
-                    files=files,
-                    timeout=self.timeout
+    def _send(self, args: tuple, file_size: int) -> UploadResult:
+        if self.hedge is not None and self.hedge.applies_to(file_size):
+            return self._send_hedged(args, file_size)
+        return self._route(args, file_size)
+
+    def _route(self, args: tuple, file_size: int, abort: Optional[AbortHandle] = None) -> UploadResult:
+        """
+        Send one file, failing over between endpoints when several are configured
+
+        Connection errors, timeouts and 5xx responses move the upload to the
+        next best endpoint; any other error is raised immediately, as is any
+        error once the upload's deadline has run out.
+        """
+        if self.endpoints is None:
+            return self._post_file(self.upload_url, *args, abort=abort)
+
+        expires = args[-1]
+        tried: List[Endpoint] = []
+        while True:
+            endpoint = self.endpoints.choose(exclude=tried)
+            started = time.monotonic()
+            try:
+                result = self._post_file(endpoint.upload_url, *args, abort=abort)
+            except (NetworkError, ServerError):
+                if abort is not None and abort.aborted:
+                    # Aborted on purpose: says nothing about the endpoint
+                    self.endpoints.release(endpoint)
+                    raise
+                if expires is not None and time.monotonic() >= expires:
+                    # Out of time: neither a verdict on the endpoint nor
+                    # worth another attempt
+                    self.endpoints.release(endpoint)
+                    raise
+                self.endpoints.record_failure(endpoint)
+                tried.append(endpoint)
+                if len(tried) >= len(self.endpoints):
+                    raise
+            except BaseException:
+                self.endpoints.release(endpoint)
+                raise
+            else:
+                self.endpoints.record_success(endpoint, time.monotonic() - started, file_size)
+                return result
+
+    def _hedge_executor(self) -> ThreadPoolExecutor:
+        """Threads running hedged attempts, created on first use"""
+        self._check_fork()
+        with self._hedge_lock:
+            if self._hedge_pool is None:
+                self._hedge_pool = ThreadPoolExecutor(
+                    max_workers=2 * self.pool_size, thread_name_prefix="tflink-hedge"
                 )
+            return self._hedge_pool
+
+    def _send_hedged(self, args: tuple, file_size: int) -> UploadResult:
+        """
+        Send one file, starting a second attempt if the first one is slow
+
+        The first attempt to succeed wins and the other is aborted. An upload
+        only fails if every attempt fails; the first attempt's error is raised.
+        """
+        policy = self.hedge
+        policy.start()
+        executor = self._hedge_executor()
+
+        running = threading.Event()
+
+        def attempt(abort: AbortHandle) -> UploadResult:
+            running.set()
+            started = time.monotonic()
+            result = self._route(args, file_size, abort)
+            policy.observe(time.monotonic() - started)
+            return result
+
+        handles = [AbortHandle()]
+        futures = [executor.submit(attempt, handles[0])]
+        # The delay counts from when the first attempt starts sending: time
+        # spent queued behind other uploads is not latency a hedge can cut
+        futures[0].add_done_callback(lambda f: running.set())
+        running.wait()
+        done, _ = wait(futures, timeout=policy.delay())
+        if not done and policy.try_hedge():
+            handles.append(AbortHandle())
+            futures.append(executor.submit(attempt, handles[1]))
+
+        winner: Optional[Future] = None
+        pending = set(futures)
+        while pending and winner is None:
+            _, pending = wait(pending, return_when=FIRST_COMPLETED)
+            # Prefer the first attempt when both finished together
+            winner = next(
+                (f for f in futures if f.done() and f.exception() is None), None
+            )
+
+        if len(futures) > 1 and winner is not None:
+            loser_cancelled = False
+            for future, handle in zip(futures, handles):
+                if future is winner:
+                    continue
+                if not future.done():
+                    handle.abort("Upload cancelled: the hedged attempt finished first")
+                    loser_cancelled = True
+                future.add_done_callback(self._record_hedge_loser)
+            policy.record_outcome(winner is futures[1], loser_cancelled)
+
+        if winner is None:
+            return futures[0].result()
+        return winner.result()
+
+    def _record_hedge_loser(self, future: Future) -> None:
+        """Record a losing hedged attempt that still created a file"""
+        if not future.cancelled() and future.exception() is None:
+            self.hedge.record_duplicate(future.result())
+
+    def _request_timeout(self) -> Union[float, Tuple[float, float]]:
+        """Timeout argument for requests: a single value, or (connect, read)"""
+        if self.connect_timeout is None and self.read_timeout is None:
+            return self.timeout
+        return (
+            self.connect_timeout if self.connect_timeout is not None else self.timeout,
+            self.read_timeout if self.read_timeout is not None else self.timeout,
+        )
+
+    def upload_deadline(self, file_size: int) -> Optional[float]:
+        """
+        Total seconds an upload of file_size bytes may take
+
+        Returns:
+            connect timeout + read timeout + file_size / min_throughput, or None
+            when min_throughput is not set
+        """
+        if self.min_throughput is None:
+            return None
+        timeout = self._request_timeout()
+        connect, read = timeout if isinstance(timeout, tuple) else (timeout, timeout)
+        return connect + read + file_size / self.min_throughput
+
+    def _post_file(
+        self,
+        upload_url: str,
+        file_path: Path,
+        upload_filename: str,
+        file_size: int,
+        headers: Dict[str, str],
+        buckets: List[TokenBucket],
+        checksums: Sequence[str],
+        cancel: Optional[threading.Event] = None,
+        expires: Optional[float] = None,
+        abort: Optional[AbortHandle] = None
+    ) -> UploadResult:
+        """
+        Send one file to an upload endpoint
+
+        Files up to tiny_file_size are read whole and sent as one bytes body;
+        larger ones are streamed from disk in chunks.
+
+        Args:
+            upload_url: Upload API URL
+            file_path: Validated path of the file
+            upload_filename: File name sent to the server
+            file_size: Size of the file in bytes
+            headers: Request headers (authentication included)
+            buckets: Token buckets charged for every chunk
+            checksums: Digest algorithms computed while streaming
+            cancel: Event with which the caller cancels the upload
+            expires: Monotonic time at which the upload's deadline runs out
+            abort: Handle through which another thread can abort the request
+
+        Returns:
+            UploadResult object
+        """
+        headers = dict(headers)
+        self._check_fork()
+        timeout = self._request_timeout()
 
+        try:
+            if file_size <= self.tiny_file_size and self.page_cache == 'keep':
+                # Read in one call and sent as one bytes body with the headers
+                data = read_small_file(file_path, file_size)
+                content_type, body = self._multipart.render(upload_filename, data)
+                headers['Content-Type'] = content_type
+                digests = None
+                if checksums:
+                    summer = Checksummer(checksums)
+                    summer.update(data)
+                    digests = summer.hexdigests()
+                throttle(buckets, file_size)
+                if cancel is not None and cancel.is_set():
+                    raise UploadCancelledError(cancel_reason(cancel))
+                response = self._send_request(upload_url, body, headers, file_size, timeout,
+                                              cancel, expires, abort)
+            else:
+                with open_upload_file(file_path, self.page_cache, self.chunk_size,
+                                      memory_map=self.memory_map, length=file_size) as f:
+                    body = MultipartBody(
+                        f, upload_filename, file_size, chunk_size=self.chunk_size,
+                        buckets=buckets, checksums=checksums, read_ahead=self.read_ahead,
+                        sendfile=self.sendfile and self.page_cache == 'keep', cancel=cancel
+                    )
+                    headers['Content-Type'] = body.content_type
+                    response = self._send_request(upload_url, body, headers, file_size, timeout,
+                                                  cancel, expires, abort)
+                digests = body.hexdigests() if checksums else None
+
+        except requests.exceptions.ConnectTimeout:
+            connect = timeout[0] if isinstance(timeout, tuple) else timeout
+            raise UploadTimeoutError(f"Upload timeout: no connection within {connect} seconds")
         except requests.exceptions.Timeout:
-            raise NetworkError(f"Upload timeout after {self.timeout} seconds")
+            send_timeout = timeout[1] if isinstance(timeout, tuple) else timeout
+            raise UploadTimeoutError(f"Upload timeout after {send_timeout} seconds")
         except requests.exceptions.ConnectionError as e:
             raise NetworkError(f"Connection error: {str(e)}")
         except requests.exceptions.RequestException as e:
@@ -141,7 +780,320 @@ class TFLinkClient:
             raise FileNotFoundError(f"Failed to read file: {str(e)}")
 
         # Handle response
-        return self._handle_response(response)
+        try:
+            result = self._handle_response(response)
+        finally:
+            # Error branches never read the body; closing returns the connection
+            response.close()
+        if checksums:
+            result.checksums = digests
+        return result
+
+    def _send_request(
+        self,
+        upload_url: str,
+        body: Union[MultipartBody, bytes],
+        headers: Dict[str, str],
+        file_size: int,
+        timeout: Union[float, Tuple[float, float]],
+        cancel: Optional[threading.Event],
+        expires: Optional[float],
+        abort: Optional[AbortHandle]
+    ) -> requests.Response:
+        """
+        POST a streamed or in-memory body under the upload's deadline
+
+        Raises UploadCancelledError or UploadTimeoutError when the request was
+        aborted on purpose, and the requests exception otherwise.
+        """
+        deadline = UploadDeadline(
+            self.upload_deadline(file_size),
+            self.stall_timeout,
+            len(body),
+            send_timeout=timeout[1] if isinstance(timeout, tuple) else timeout,
+            cancel=cancel,
+            expires=expires,
+        )
+        reason = deadline.check(time.monotonic())
+        if reason is not None:
+            if cancel is not None and cancel.is_set():
+                raise UploadCancelledError(reason)
+            raise UploadTimeoutError(reason)
+        if deadline.watched:
+            if isinstance(body, MultipartBody):
+                body.progress = deadline.progress
+            self._watchdog.watch(deadline)
+        if abort is not None:
+            abort.bind(deadline)
+        if isinstance(cancel, CancelToken):
+            cancel.subscribe(deadline.abort)
+
+        try:
+            with deadline:
+                if isinstance(body, bytes):
+                    return self._send_bytes(upload_url, body, headers, timeout)
+                # The body is streamed from the file
+                return self._session.post(
+                    upload_url,
+                    headers=headers,
+                    data=body,
+                    timeout=timeout
+                )
+        except (requests.exceptions.RequestException, OSError) as e:
+            if cancel is not None and cancel.is_set():
+                raise UploadCancelledError(cancel_reason(cancel))
+            # The watchdog shut the socket down: report why
+            if deadline.reason is not None:
+                raise UploadTimeoutError(deadline.reason)
+            if _is_send_timeout(e):
+                raise UploadTimeoutError(
+                    f"Upload timeout: no data could be sent for {deadline.send_timeout} seconds"
+                )
+            raise
+        finally:
+            if deadline.watched:
+                self._watchdog.unwatch(deadline)
+            if isinstance(cancel, CancelToken):
+                cancel.unsubscribe(deadline.abort)
+
+    def _send_bytes(
+        self,
+        upload_url: str,
+        body: bytes,
+        headers: Dict[str, str],
+        timeout: Union[float, Tuple[float, float]]
+    ) -> requests.Response:
+        """
+        POST a small in-memory body straight through the connection adapter
+
+        Session.request() merges proxy, certificate and cookie settings from
+        the environment and prepares the request anew on every call. For an
+        upload URL that work is done once and kept as a template; each upload
+        then only copies its headers.
+        """
+        template = self._request_templates.get(upload_url)
+        if template is None:
+            session = self._session
+            prepared = session.prepare_request(requests.Request('POST', upload_url))
+            settings = session.merge_environment_settings(prepared.url, {}, None, None, None)
+            template = self._request_templates[upload_url] = (prepared, settings)
+        prepared, settings = template
+
+        request = requests.PreparedRequest()
+        request.method = prepared.method
+        request.url = prepared.url
+        request.headers = prepared.headers.copy()
+        request.headers.update(headers)
+        request.headers['Content-Length'] = str(len(body))
+        request.body = body
+        request.hooks = prepared.hooks
+        response = self._adapter.send(
+            request, timeout=timeout, verify=settings['verify'], cert=settings['cert'],
+            proxies=settings['proxies']
+        )
+        # Read the body now, as Session.send() does, so the connection goes
+        # back to the pool still open
+        response.content
+        return response
+
+    def verify_download(self, result: UploadResult, chunk_size: int = 256 * 1024) -> None:
+        """
+        Download an uploaded file and compare it with its recorded checksums
+
+        Args:
+            result: UploadResult with checksums (upload with checksums enabled)
+            chunk_size: Bytes read per chunk while hashing the download
+
+        Raises:
+            ValueError: If the result has no checksums
+            ChecksumMismatchError: If the size or a digest does not match
+            NetworkError: If the download fails
+        """
+        if not result.checksums:
+            raise ValueError("UploadResult has no checksums to verify against")
+
+        summer = Checksummer(list(result.checksums))
+        received = 0
+        try:
+            with self._session.get(
+                result.download_link, stream=True, timeout=self.timeout
+            ) as response:
+                if not response.ok:
+                    raise NetworkError(
+                        f"Download failed with status {response.status_code}"
+                    )
+                for chunk in response.iter_content(chunk_size):
+                    summer.update(chunk)
+                    received += len(chunk)
+        except requests.exceptions.RequestException as e:
+            raise NetworkError(f"Download failed: {str(e)}")
+
+        if received != result.size:
+            raise ChecksumMismatchError(
+                f"Size mismatch for {result.file_name}: "
+                f"expected {result.size} bytes, downloaded {received}"
+            )
+
+        for name, digest in summer.hexdigests().items():
+            if digest != result.checksums[name]:
+                raise ChecksumMismatchError(
+                    f"{name} mismatch for {result.file_name}: "
+                    f"expected {result.checksums[name]}, got {digest}"
+                )
+
+    def upload_batch(
+        self,
+        file_paths: Iterable[Union[str, Path]],
+        max_workers: int = 4,
+        journal: Optional[Union[str, Path, UploadJournal]] = None,
+        verify_links: bool = False,
+        engine: Optional[UploadEngine] = None,
+        priority: int = UploadEngine.NORMAL,
+        deadline: Optional[float] = None,
+        tenant: Hashable = None,
+        concurrency: Union[bool, AdaptiveConcurrency, None] = None,
+        cancel: Optional[threading.Event] = None
+    ) -> List[BatchResult]:
+        """
+        Upload many files concurrently
+
+        Errors are collected per file instead of aborting the batch.
+
+        Args:
+            file_paths: Paths of the files to upload
+            max_workers: Number of concurrent uploads (default: 4)
+            journal: Optional UploadJournal (or path to one) used to skip files
+                completed by a previous run and to record progress of this one
+            verify_links: Check each download link as soon as its upload
+                finishes and store the outcome in BatchResult.link_check
+            engine: Shared UploadEngine to queue the files on, so the batch
+                is scheduled alongside other work by priority; max_workers is
+                then ignored (default: a private engine for this batch)
+            priority: Priority class of the batch's uploads (default: NORMAL)
+            deadline: Seconds from now by which each upload must have
+                started; files still queued then fail with
+                DeadlineExceededError (default: none)
+            tenant: Tenant key the batch is queued under, for fair sharing of
+                the engine between tenants (default: None)
+            concurrency: Let an AdaptiveConcurrency controller (True for the
+                default one) pick how many uploads run at once, up to
+                max_workers; ignored with a shared engine (default: None)
+            cancel: CancelToken (or threading.Event) that cancels the batch:
+                running uploads are aborted, the rest are not started, and
+                their BatchResult.error is an UploadCancelledError
+                (default: none)
+
+        Returns:
+            List of BatchResult objects in the same order as file_paths
+
+        Example:
+            results = client.upload_batch(paths, journal='backfill.journal')
+            failed = [r.file_path for r in results if not r.ok]
+        """
+        if max_workers < 1:
+            raise ValueError("max_workers must be at least 1")
+
+        owns_journal = journal is not None and not isinstance(journal, UploadJournal)
+        if owns_journal:
+            journal = UploadJournal(journal)
+
+        verifier = LinkVerifier(self) if verify_links else None
+        checks: List[Tuple[BatchResult, Future]] = []
+
+        try:
+            results = [BatchResult(file_path=str(path)) for path in file_paths]
+            pending = []
+            for item in results:
+                previous = journal.get_result(item.file_path) if journal else None
+                if previous is not None:
+                    item.result = previous
+                    item.skipped = True
+                    if verifier:
+                        checks.append((item, verifier.submit(previous)))
+                else:
+                    pending.append(item)
+
+            finished = threading.Semaphore(0)
+
+            def finish(item: BatchResult, future: Future) -> None:
+                try:
+                    error = future.exception()
+                    if error is not None:
+                        item.error = error
+                        if journal:
+                            journal.record_failed(item.file_path, error)
+                    else:
+                        item.result = future.result()
+                        if journal:
+                            journal.record_done(item.file_path, item.result)
+                        if verifier:
+                            checks.append((item, verifier.submit(item.result)))
+                finally:
+                    finished.release()
+
+            expires = None if deadline is None else time.monotonic() + deadline
+            owns_engine = engine is None
+            if owns_engine:
+                engine = UploadEngine(self, max_workers=max_workers, concurrency=concurrency)
+            try:
+                for item in pending:
+                    if journal:
+                        journal.record_start(item.file_path)
+                    future = engine.submit(
+                        item.file_path, priority=priority, tenant=tenant,
+                        deadline=None if expires is None else expires - time.monotonic(),
+                        cancel=cancel
+                    )
+                    future.add_done_callback(partial(finish, item))
+            finally:
+                if owns_engine:
+                    engine.shutdown(wait=True)
+            # A shared engine keeps running; wait for this batch's uploads
+            for _ in pending:
+                finished.acquire()
+
+            for item, check in checks:
+                item.link_check = check.result()
+
+            return results
+        finally:
+            if verifier:
+                verifier.shutdown(wait=False)
+            if owns_journal:
+                journal.close()
+            elif journal is not None:
+                journal.flush()
+
+    def verify_links(
+        self,
+        results: Iterable[UploadResult],
+        max_workers: int = 8,
+        timeout: Union[float, Tuple[float, float]] = (5, 15),
+        retries: int = 2
+    ) -> List[LinkCheck]:
+        """
+        Check many download links concurrently
+
+        Each link must resolve with a 2xx status and a Content-Length equal to
+        UploadResult.size. Requests reuse this client's connection pool.
+
+        Args:
+            results: UploadResults whose download links should be checked
+            max_workers: Number of concurrent checks (default: 8)
+            timeout: Per-request timeout, or a (connect, read) tuple (default: (5, 15))
+            retries: Additional attempts for failed checks (default: 2)
+
+        Returns:
+            List of LinkCheck objects in the same order as results
+
+        Example:
+            checks = client.verify_links(results)
+            broken = [c.result.download_link for c in checks if not c.ok]
+        """
+        with LinkVerifier(
+            self, max_workers=max_workers, timeout=timeout, retries=retries
+        ) as verifier:
+            return verifier.verify_many(results)
 
     def _handle_response(self, response: requests.Response) -> UploadResult:
         """
@@ -155,6 +1107,7 @@ class TFLinkClient:
 
         Raises:
             AuthenticationError: If authentication fails (401)
+            RateLimitError: If the server rejects the upload with 429
             UploadError: If upload fails
         """
         # Check for authentication errors
@@ -174,8 +1127,13 @@ class TFLinkClient:
                 "File too large. Please check the file size limits."
             )
 
+        if response.status_code == 429:
+            raise RateLimitError(
+                "Too many requests (429). Reduce the number of concurrent uploads."
+            )
+
         if response.status_code >= 500:
-            raise UploadError(
+            raise ServerError(
                 f"Server error ({response.status_code}). Please try again later."
             )
 
@@ -211,9 +1169,63 @@ class TFLinkClient:
         except Exception as e:
             raise UploadError(f"Failed to create UploadResult: {str(e)}")
 
+    def warm(self, connections: Optional[int] = None) -> int:
+        """
+        Pre-resolve and pre-connect pooled connections to every endpoint
+
+        Warming is best effort: endpoints that cannot be reached are skipped
+        and uploads will connect to them on demand as usual.
+
+        Args:
+            connections: Connections to open per endpoint (default: pool_size)
+
+        Returns:
+            Number of connections that were established
+
+        Example:
+            client = TFLinkClient()
+            client.warm(4)
+        """
+        if connections is None:
+            connections = self.pool_size
+        if self.endpoints is not None:
+            urls = [endpoint.upload_url for endpoint in self.endpoints.endpoints]
+        else:
+            urls = [self.upload_url]
+
+        timeout = self.connect_timeout if self.connect_timeout is not None else self.timeout
+        session = self._session
+        warmed = 0
+        for url in urls:
+            try:
+                warmed += self._adapter.warm(session, url, connections, timeout=timeout)
+            except Exception:
+                continue
+        return warmed
+
+    def close(self) -> None:
+        """Close pooled connections and save TLS sessions"""
+        self._check_fork()
+        self._http.close()
+        self._watchdog.close()
+        if self._hedge_pool is not None:
+            self._hedge_pool.shutdown(wait=False)
+            self._hedge_pool = None
+        if self.tls_sessions is not None:
+            try:
+                self.tls_sessions.save()
+            except OSError:
+                pass
+
+    def __enter__(self) -> 'TFLinkClient':
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
+
     def is_authenticated(self) -> bool:
         """Check if the client is configured for authenticated uploads"""
-        return bool(self.user_id and self.auth_token)
+        return bool(self.user_id and self.auth_token) or self.credentials is not None
 
     def __repr__(self) -> str:
         """String representation of the client"""
@@ -0,0 +1,434 @@
+"""
+Connection pooling: DNS cache, TLS session resumption and pre-warming
+"""
+
+import hashlib
+import ipaddress
+import socket
+import ssl
+import threading
+import time
+from typing import Dict, List, Optional, Tuple, Type
+
+import requests
+from urllib3.connection import HTTPSConnection
+from urllib3.poolmanager import PoolManager
+from urllib3.util.ssl_ import create_urllib3_context, resolve_cert_reqs, resolve_ssl_version
+
+from tflink.timeouts import current_deadline
+from tflink.tls import TLSSessionCache
+
+try:
+    import dns.resolver as _dns_resolver
+except ImportError:  # pragma: no cover - optional dependency
+    _dns_resolver = None
+
+
+class DNSCache:
+    """
+    Thread-safe cache of host name resolutions
+
+    When the optional ``dnspython`` package is installed, A/AAAA lookups go
+    through it and each entry expires after the TTL of its DNS answer (clamped
+    to ``min_ttl``/``max_ttl``). Without it, the system resolver is used and
+    entries expire after ``default_ttl`` seconds.
+
+    Args:
+        default_ttl: Lifetime of entries when the record TTL is unknown (default: 60)
+        min_ttl: Shortest lifetime for an entry (default: 1)
+        max_ttl: Longest lifetime for an entry (default: 3600)
+
+    Example:
+        cache = DNSCache()
+        client = TFLinkClient(dns_cache=cache)
+    """
+
+    def __init__(self, default_ttl: float = 60.0, min_ttl: float = 1.0, max_ttl: float = 3600.0):
+        """Create an empty cache"""
+        self.default_ttl = default_ttl
+        self.min_ttl = min_ttl
+        self.max_ttl = max_ttl
+        self._lock = threading.Lock()
+        # host -> (addresses, expiry on the monotonic clock)
+        self._entries: Dict[str, Tuple[List[str], float]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _is_ip(host: str) -> bool:
+        try:
+            ipaddress.ip_address(host)
+        except ValueError:
+            return False
+        return True
+
+    def _lookup(self, host: str, port: int) -> Tuple[List[str], float]:
+        """Resolve host without the cache; returns (addresses, ttl)"""
+        if _dns_resolver is not None:
+            addresses: List[str] = []
+            ttl: Optional[float] = None
+            for rdtype in ('A', 'AAAA'):
+                try:
+                    answer = _dns_resolver.resolve(host, rdtype)
+                except Exception:
+                    continue
+                addresses.extend(record.to_text() for record in answer)
+                ttl = answer.rrset.ttl if ttl is None else min(ttl, answer.rrset.ttl)
+            if addresses:
+                return addresses, ttl if ttl is not None else self.default_ttl
+
+        infos = socket.getaddrinfo(host, port, type=socket.SOCK_STREAM)
+        addresses = []
+        for info in infos:
+            address = info[4][0]
+            if address not in addresses:
+                addresses.append(address)
+        return addresses, self.default_ttl
+
+    def resolve(self, host: str, port: int = 443) -> List[str]:
+        """
+        Return the addresses for host, resolving it if not cached or expired
+
+        Raises:
+            socket.gaierror: If the name cannot be resolved
+        """
+        if self._is_ip(host):
+            return [host]
+
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(host)
+            if entry is not None and entry[1] > now:
+                self.hits += 1
+                return list(entry[0])
+            self.misses += 1
+
+        addresses, ttl = self._lookup(host, port)
+        ttl = min(self.max_ttl, max(self.min_ttl, ttl))
+        with self._lock:
+            self._entries[host] = (addresses, time.monotonic() + ttl)
+        return list(addresses)
+
+    def invalidate(self, host: Optional[str] = None) -> None:
+        """Drop one host (or every host) from the cache"""
+        with self._lock:
+            if host is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(host, None)
+
+    def stats(self) -> dict:
+        """Return hit/miss counters and the number of cached hosts"""
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'entries': len(self._entries)}
+
+    def __repr__(self) -> str:
+        """String representation of the cache"""
+        return f"DNSCache(entries={len(self._entries)})"
+
+
+# Cache shared by every client created with dns_cache=True
+default_dns_cache = DNSCache()
+
+
+def _tls_session_key(conn) -> Optional[str]:
+    """Cache key for conn's TLS sessions, or None if they must not be reused"""
+    if (getattr(conn, '_tunnel_host', None) or getattr(conn, 'cert_file', None)
+            or resolve_cert_reqs(conn.cert_reqs) != ssl.CERT_REQUIRED):
+        return None
+    trust = repr((conn.ca_certs, conn.ca_cert_dir, getattr(conn, 'ca_cert_data', None)))
+    return f"{conn.host}:{conn.port}#{hashlib.sha256(trust.encode('utf-8')).hexdigest()[:16]}"
+
+
+def _verified_context(conn) -> ssl.SSLContext:
+    """Build the SSLContext urllib3 would for a verified connection"""
+    context = create_urllib3_context(
+        ssl_version=resolve_ssl_version(getattr(conn, 'ssl_version', None)),
+        ssl_minimum_version=getattr(conn, 'ssl_minimum_version', None),
+        ssl_maximum_version=getattr(conn, 'ssl_maximum_version', None),
+        cert_reqs=ssl.CERT_REQUIRED,
+    )
+    if not (conn.ca_certs or conn.ca_cert_dir or getattr(conn, 'ca_cert_data', None)):
+        context.load_default_certs()
+    return context
+
+
+class _ResumingContext:
+    """
+    One connection attempt's view of a shared SSLContext
+
+    Sessions kept by the ssl module only resume on sockets of the context
+    that created them, so every connection to a host shares one context from
+    the TLSSessionCache. urllib3 configures and calls the context it is given;
+    this forwards all of that to the shared context and only replaces
+    wrap_socket(), to offer a stored session before the handshake.
+    """
+
+    def __init__(self, context: ssl.SSLContext, tls_sessions: TLSSessionCache, key: str,
+                 offer: bool, offered: list):
+        object.__setattr__(self, '_context', context)
+        object.__setattr__(self, '_attempt', (tls_sessions, key, offer, offered))
+
+    def __getattr__(self, name):
+        return getattr(self._context, name)
+
+    def __setattr__(self, name, value):
+        setattr(self._context, name, value)
+
+    def wrap_socket(self, sock, server_hostname=None, **kwargs):
+        tls_sessions, key, offer, offered = self._attempt
+        kwargs['do_handshake_on_connect'] = False
+        ssl_sock = self._context.wrap_socket(sock, server_hostname=server_hostname, **kwargs)
+        if offer and tls_sessions.offer(key, ssl_sock):
+            offered.append(True)
+        ssl_sock.do_handshake()
+        if offered:
+            tls_sessions.record_handshake(ssl_sock.session_reused)
+        return ssl_sock
+
+
+def _resuming_context(
+    conn,
+    tls_sessions: TLSSessionCache,
+    key: str,
+    offer: bool,
+    offered: list
+):
+    """Return the host's shared SSLContext, with a wrap_socket that offers a session"""
+    context = tls_sessions.context(key, lambda: _verified_context(conn))
+    return _ResumingContext(context, tls_sessions, key, offer, offered)
+
+
+# Largest request body that is copied behind the headers to be sent with them
+SINGLE_SEND_LIMIT = 64 * 1024
+
+
+def _connection_class(
+    base: Type,
+    dns_cache: Optional[DNSCache],
+    tls_sessions: Optional[TLSSessionCache]
+) -> Type:
+    """Build a subclass of a urllib3 connection class using the given caches"""
+
+    def request(self, method, url, body=None, headers=None, **kwargs):
+        deadline = current_deadline()
+        if deadline is not None:
+            if deadline.send_timeout is not None:
+                # Connect under the connect timeout, then send under the
+                # read timeout instead of keeping the connect timeout
+                if self.sock is None:
+                    self.connect()
+                self.timeout = deadline.send_timeout
+                self.sock.settimeout(deadline.send_timeout)
+            # Let the watchdog of the upload on this thread reach the socket
+            deadline.attach(self)
+        if getattr(body, 'sendfile', False):
+            # The body writes file data to the socket itself
+            if self.sock is None:
+                self.connect()
+            body.use_socket(self.sock)
+        elif (
+            isinstance(body, bytes) and len(body) <= SINGLE_SEND_LIMIT
+            and not kwargs.get('chunked')
+        ):
+            # Hand the body to send() along with the headers, so the whole
+            # request goes out in one send() call and, usually, one segment
+            headers = dict(headers or {})
+            if not any(name.lower() == 'content-length' for name in headers):
+                headers['Content-Length'] = str(len(body))
+            self._pending_body = body
+            try:
+                return base.request(self, method, url, body=None, headers=headers, **kwargs)
+            finally:
+                self._pending_body = None
+        return base.request(self, method, url, body=body, headers=headers, **kwargs)
+
+    def send(self, data):
+        body = self._pending_body
+        if body is not None:
+            self._pending_body = None
+            data = data + body
+        return base.send(self, data)
+
+    namespace = {'request': request, 'send': send, '_pending_body': None}
+
+    if dns_cache is not None:
+        def _new_conn(self):
+            # TLS (SNI and certificate checks) keeps using self.host; only
+            # the address the socket connects to comes from the cache
+            host = self._dns_host
+            addresses = dns_cache.resolve(host, self.port)
+            try:
+                for i, address in enumerate(addresses):
+                    self._dns_host = address
+                    try:
+                        return base._new_conn(self)
+                    except Exception:
+                        if i == len(addresses) - 1:
+                            # Every cached address failed: resolve afresh next time
+                            dns_cache.invalidate(host)
+                            raise
+            finally:
+                self._dns_host = host
+
+        namespace['_new_conn'] = _new_conn
+
+    if tls_sessions is not None and issubclass(base, HTTPSConnection):
+        def connect(self):
+            # A caller-supplied context may be shared between connections,
+            # so sessions are only offered on contexts built here, for
+            # connections that verify the server
+            session_key = _tls_session_key(self) if self.ssl_context is None else None
+            self._tls_session_key = session_key
+            if session_key is None:
+                return base.connect(self)
+
+            offered: list = []
+            self.ssl_context = _resuming_context(self, tls_sessions, session_key, True, offered)
+            try:
+                base.connect(self)
+            except ssl.SSLError:
+                if not offered:
+                    raise
+                # The stored session broke the handshake: forget it and
+                # connect again with a full handshake
+                tls_sessions.discard(session_key)
+                self.close()
+                self.ssl_context = _resuming_context(self, tls_sessions, session_key, False, [])
+                base.connect(self)
+            finally:
+                self.ssl_context = None
+
+        def getresponse(self, *args, **kwargs):
+            response = base.getresponse(self, *args, **kwargs)
+            # TLS 1.3 tickets arrive after the handshake, so the session is
+            # captured once a response has been read
+            if self._tls_session_key is not None and self.sock is not None:
+                tls_sessions.capture(self._tls_session_key, self.sock)
+            return response
+
+        namespace.update(connect=connect, getresponse=getresponse, _tls_session_key=None)
+
+    return type(f"Pooled{base.__name__}", (base,), namespace)
+
+
+class _PooledPoolManager(PoolManager):
+    """PoolManager whose pools use the client's caches and upload deadlines"""
+
+    def __init__(
+        self,
+        *args,
+        dns_cache: Optional[DNSCache] = None,
+        tls_sessions: Optional[TLSSessionCache] = None,
+        **kwargs
+    ):
+        self.dns_cache = dns_cache
+        self.tls_sessions = tls_sessions
+        # urllib3 connection class -> subclass bound to this manager's caches;
+        # kept here so both go away with the manager
+        self._connection_classes: Dict[type, type] = {}
+        super().__init__(*args, **kwargs)
+
+    def _new_pool(self, scheme, host, port, request_context=None):
+        # Called with self.pools.lock held
+        pool = super()._new_pool(scheme, host, port, request_context=request_context)
+        cls = self._connection_classes.get(pool.ConnectionCls)
+        if cls is None:
+            cls = self._connection_classes[pool.ConnectionCls] = _connection_class(
+                pool.ConnectionCls, self.dns_cache, self.tls_sessions
+            )
+        pool.ConnectionCls = cls
+        return pool
+
+
+class PooledHTTPAdapter(requests.adapters.HTTPAdapter):
+    """
+    HTTPAdapter with optional DNS and TLS session caches and pre-warming
+
+    Args:
+        dns_cache: DNSCache used when opening new connections (default: none)
+        tls_sessions: TLSSessionCache used to resume TLS sessions (default: none)
+        **kwargs: Passed to requests.adapters.HTTPAdapter
+    """
+
+    dns_cache: Optional[DNSCache] = None
+    tls_sessions: Optional[TLSSessionCache] = None
+
+    def __init__(
+        self,
+        dns_cache: Optional[DNSCache] = None,
+        tls_sessions: Optional[TLSSessionCache] = None,
+        **kwargs
+    ):
+        self.dns_cache = dns_cache
+        self.tls_sessions = tls_sessions
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, connections, maxsize, block=False, **pool_kwargs):
+        self._pool_connections = connections
+        self._pool_maxsize = maxsize
+        self._pool_block = block
+        self.poolmanager = _PooledPoolManager(
+            num_pools=connections,
+            maxsize=maxsize,
+            block=block,
+            dns_cache=self.dns_cache,
+            tls_sessions=self.tls_sessions,
+            **pool_kwargs,
+        )
+
+    def pool_for(self, session: requests.Session, url: str):
+        """Return the urllib3 connection pool requests would use for url"""
+        settings = session.merge_environment_settings(url, {}, None, None, None)
+        if hasattr(self, 'get_connection_with_tls_context'):
+            request = requests.Request('POST', url).prepare()
+            return self.get_connection_with_tls_context(
+                request, settings['verify'], settings['proxies'], settings['cert']
+            )
+        return self.get_connection(url, settings['proxies'])  # requests < 2.32
+
+    def warm(
+        self,
+        session: requests.Session,
+        url: str,
+        connections: int,
+        timeout: Optional[float] = None
+    ) -> int:
+        """
+        Open up to connections keep-alive connections to url's host in parallel
+
+        DNS resolution, TCP connect and (for https) the TLS handshake all happen
+        here, so the first requests find ready connections in the pool.
+
+        Returns:
+            Number of connections established and returned to the pool
+        """
+        pool = self.pool_for(session, url)
+        connections = min(connections, self._pool_maxsize)
+        conns = [pool._get_conn() for _ in range(connections)]
+
+        def connect(conn) -> bool:
+            try:
+                if getattr(conn, 'sock', None) is None:
+                    if timeout is not None:
+                        conn.timeout = timeout
+                    conn.connect()
+                return True
+            except Exception:
+                conn.close()
+                return False
+
+        threads = []
+        outcomes: List[bool] = [False] * len(conns)
+        for i, conn in enumerate(conns):
+            thread = threading.Thread(
+                target=lambda i=i, conn=conn: outcomes.__setitem__(i, connect(conn))
+            )
+            thread.start()
+            threads.append(thread)
+        for thread in threads:
+            thread.join()
+
+        for conn in conns:
+            pool._put_conn(conn)
+        return sum(outcomes)
@@ -0,0 +1,259 @@
+"""
+Pools of upload credentials for spreading uploads over several accounts
+"""
+
+import hashlib
+import itertools
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+from tflink.exceptions import AuthenticationError
+from tflink.throttle import TokenBucket, throttle
+
+
+class Credential:
+    """
+    One authenticated identity with its own limits and health state
+
+    Args:
+        user_id: User ID sent as X-User-Id
+        auth_token: Token sent as X-Auth-Token
+        rate_limit: Maximum uploads started per second (default: unlimited)
+        bandwidth_limit: Maximum bytes per second across this identity's uploads
+            (default: unlimited)
+        max_concurrent: Maximum simultaneous uploads; least_loaded and
+            round_robin skip identities at this limit (default: unlimited)
+
+    Attributes:
+        in_flight: Uploads currently using this identity
+        successes: Completed uploads
+        failures: Failed uploads (any error)
+        auth_failures: Consecutive 401/403 responses
+        healthy: False once the identity has been taken out of rotation
+    """
+
+    def __init__(
+        self,
+        user_id: str,
+        auth_token: str,
+        rate_limit: Optional[float] = None,
+        bandwidth_limit: Optional[float] = None,
+        max_concurrent: Optional[int] = None
+    ):
+        """Create a credential"""
+        if not user_id or not auth_token:
+            raise ValueError("Both user_id and auth_token must be provided for a credential")
+
+        self.user_id = user_id
+        self.auth_token = auth_token
+        self.max_concurrent = max_concurrent
+        self.requests = TokenBucket(rate_limit, burst=1, min_sleep=0) if rate_limit else None
+        self.bandwidth = TokenBucket(bandwidth_limit)
+
+        self.in_flight = 0
+        self.successes = 0
+        self.failures = 0
+        self.auth_failures = 0
+        self.healthy = True
+        self.disabled_at: Optional[float] = None
+
+    @property
+    def headers(self) -> Dict[str, str]:
+        """Authentication headers for this identity"""
+        return {'X-User-Id': self.user_id, 'X-Auth-Token': self.auth_token}
+
+    def __repr__(self) -> str:
+        """String representation without the token"""
+        state = "healthy" if self.healthy else "disabled"
+        return f"Credential(user_id='{self.user_id}', {state}, in_flight={self.in_flight})"
+
+
+class CredentialPool:
+    """
+    Spreads uploads across several authenticated identities
+
+    Policies:
+        - "round_robin": rotate through healthy identities
+        - "least_loaded": pick the identity with the fewest uploads in flight
+        - "hash": rendezvous-hash a caller-supplied key, so uploads sharing a
+          key land on the same identity and removing one identity only moves
+          its own keys
+
+    An identity that returns ``auth_failure_threshold`` consecutive 401/403
+    responses is taken out of rotation. It comes back after ``reinstate_after``
+    seconds (when set) or through ``enable()``.
+
+    Args:
+        credentials: Credential objects or (user_id, auth_token) tuples
+        policy: Selection policy (default: "round_robin")
+        auth_failure_threshold: Consecutive auth failures that disable an
+            identity (default: 1)
+        reinstate_after: Seconds before a disabled identity is tried again
+            (default: never)
+
+    Example:
+        pool = CredentialPool([('user1', 'token1'), ('user2', 'token2')], policy='hash')
+        client = TFLinkClient(credentials=pool)
+        client.upload('a.pdf', shard_key='customer-42')
+    """
+
+    POLICIES = ('round_robin', 'least_loaded', 'hash')
+
+    def __init__(
+        self,
+        credentials: Iterable[Union[Credential, Tuple[str, str]]],
+        policy: str = 'round_robin',
+        auth_failure_threshold: int = 1,
+        reinstate_after: Optional[float] = None
+    ):
+        """Create the pool"""
+        if policy not in self.POLICIES:
+            raise ValueError(
+                f"policy must be one of {', '.join(self.POLICIES)}, got {policy!r}"
+            )
+        if auth_failure_threshold < 1:
+            raise ValueError("auth_failure_threshold must be at least 1")
+
+        self.credentials: List[Credential] = [
+            c if isinstance(c, Credential) else Credential(*c) for c in credentials
+        ]
+        if not self.credentials:
+            raise ValueError("CredentialPool needs at least one credential")
+        if len({c.user_id for c in self.credentials}) != len(self.credentials):
+            raise ValueError("Duplicate user_id in CredentialPool")
+
+        self.policy = policy
+        self.auth_failure_threshold = auth_failure_threshold
+        self.reinstate_after = reinstate_after
+        self._lock = threading.Lock()
+        self._cursor = itertools.count()
+
+    def _reinstate_expired(self, now: float) -> None:
+        """Bring back disabled identities whose cool-down has passed (lock held)"""
+        if self.reinstate_after is None:
+            return
+        for cred in self.credentials:
+            if not cred.healthy and now - cred.disabled_at >= self.reinstate_after:
+                cred.healthy = True
+                cred.auth_failures = 0
+                cred.disabled_at = None
+
+    @staticmethod
+    def _score(key: str, cred: Credential) -> int:
+        """Rendezvous hash weight of key on cred"""
+        digest = hashlib.blake2b(f"{cred.user_id}\0{key}".encode('utf-8'), digest_size=8)
+        return int.from_bytes(digest.digest(), 'big')
+
+    def acquire(
+        self,
+        key: Optional[str] = None,
+        exclude: Iterable[Credential] = ()
+    ) -> Credential:
+        """
+        Select an identity for one upload and count it as in flight
+
+        Args:
+            key: Sharding key used by the "hash" policy
+            exclude: Identities not to use (e.g. ones that just failed)
+
+        Returns:
+            The selected Credential; call release() when the upload finishes
+
+        Raises:
+            AuthenticationError: If no healthy identity is available
+        """
+        exclude = set(id(c) for c in exclude)
+        with self._lock:
+            self._reinstate_expired(time.monotonic())
+            healthy = [
+                c for c in self.credentials if c.healthy and id(c) not in exclude
+            ]
+            if not healthy:
+                raise AuthenticationError(
+                    "No healthy credentials available: every identity in the pool "
+                    "has been taken out of rotation after authentication failures"
+                )
+
+            if self.policy == 'hash' and key is not None:
+                chosen = max(healthy, key=lambda c: self._score(key, c))
+            else:
+                available = [
+                    c for c in healthy
+                    if c.max_concurrent is None or c.in_flight < c.max_concurrent
+                ] or healthy
+                if self.policy == 'least_loaded':
+                    start = next(self._cursor)
+                    chosen = min(
+                        enumerate(available),
+                        key=lambda pair: (pair[1].in_flight, (pair[0] - start) % len(available))
+                    )[1]
+                else:
+                    chosen = available[next(self._cursor) % len(available)]
+
+            chosen.in_flight += 1
+
+        if chosen.requests is not None:
+            throttle([chosen.requests], 1)
+        return chosen
+
+    def release(self, cred: Credential, error: Optional[BaseException] = None) -> None:
+        """
+        Record the outcome of an upload that used cred
+
+        Args:
+            cred: Credential returned by acquire()
+            error: Exception raised by the upload, None on success
+        """
+        with self._lock:
+            cred.in_flight -= 1
+            if error is None:
+                cred.successes += 1
+                cred.auth_failures = 0
+                return
+
+            cred.failures += 1
+            if isinstance(error, AuthenticationError):
+                cred.auth_failures += 1
+                if cred.auth_failures >= self.auth_failure_threshold and cred.healthy:
+                    cred.healthy = False
+                    cred.disabled_at = time.monotonic()
+
+    def enable(self, user_id: str) -> None:
+        """Put a disabled identity back into rotation"""
+        with self._lock:
+            for cred in self.credentials:
+                if cred.user_id == user_id:
+                    cred.healthy = True
+                    cred.auth_failures = 0
+                    cred.disabled_at = None
+                    return
+        raise KeyError(user_id)
+
+    def healthy_count(self) -> int:
+        """Number of identities currently in rotation"""
+        with self._lock:
+            self._reinstate_expired(time.monotonic())
+            return sum(1 for c in self.credentials if c.healthy)
+
+    def stats(self) -> List[dict]:
+        """Return per-identity counters (tokens are never included)"""
+        with self._lock:
+            return [
+                {
+                    'user_id': c.user_id,
+                    'healthy': c.healthy,
+                    'in_flight': c.in_flight,
+                    'successes': c.successes,
+                    'failures': c.failures,
+                    'auth_failures': c.auth_failures,
+                }
+                for c in self.credentials
+            ]
+
+    def __len__(self) -> int:
+        return len(self.credentials)
+
+    def __repr__(self) -> str:
+        """String representation of the pool"""
+        return f"CredentialPool(policy='{self.policy}', size={len(self.credentials)})"
@@ -0,0 +1,192 @@
+"""
+Latency-aware selection between several upload endpoints
+"""
+
+import threading
+import time
+from typing import Iterable, List, Optional
+
+
+class Endpoint:
+    """
+    One upload endpoint and its observed health
+
+    Attributes:
+        base_url: Endpoint base URL without trailing slash
+        upload_url: Upload API URL on this endpoint
+        latency: Moving average of normalised upload latency in seconds (None
+            until the first success)
+        error_rate: Moving average of the failure rate (0.0 - 1.0)
+        consecutive_failures: Failures since the last success
+        ejected_until: Monotonic time until which the endpoint is skipped, or None
+    """
+
+    def __init__(self, base_url: str):
+        """Create an endpoint with no history"""
+        self.base_url = base_url.rstrip('/')
+        self.upload_url = f"{self.base_url}/api/upload"
+        self.latency: Optional[float] = None
+        self.error_rate = 0.0
+        self.consecutive_failures = 0
+        self.ejected_until: Optional[float] = None
+        self.ejections = 0
+        self.probing = False
+        self.in_flight = 0
+
+    def __repr__(self) -> str:
+        """String representation of the endpoint"""
+        return f"Endpoint('{self.base_url}')"
+
+
+class EndpointPool:
+    """
+    Routes each upload to the best healthy endpoint
+
+    Endpoints are ranked by a moving average of upload latency (normalised per
+    MB for large files) inflated by their moving-average error rate. Endpoints
+    without measurements are tried first so every mirror gets measured.
+
+    An endpoint is ejected for ``eject_duration`` seconds after
+    ``eject_after`` consecutive failures. Once that time has passed a single
+    upload is routed to it as a probe: success puts it back into rotation,
+    failure ejects it again. Callers fail over to the next endpoint within the
+    same upload, so an unhealthy host costs one connect timeout, not a full
+    request timeout.
+
+    Args:
+        urls: Base URLs of the endpoints, in order of preference
+        alpha: Weight of the newest sample in the moving averages (default: 0.3)
+        eject_after: Consecutive failures that eject an endpoint (default: 2)
+        eject_duration: Seconds an ejected endpoint is skipped (default: 30)
+        error_penalty: How strongly the error rate inflates an endpoint's
+            latency score (default: 10)
+
+    Example:
+        client = TFLinkClient(base_url=['https://eu.example.com', 'https://us.example.com'])
+    """
+
+    def __init__(
+        self,
+        urls: Iterable[str],
+        alpha: float = 0.3,
+        eject_after: int = 2,
+        eject_duration: float = 30.0,
+        error_penalty: float = 10.0
+    ):
+        """Create the pool"""
+        self.endpoints: List[Endpoint] = [Endpoint(url) for url in urls]
+        if not self.endpoints:
+            raise ValueError("EndpointPool needs at least one URL")
+        if not 0 < alpha <= 1:
+            raise ValueError("alpha must be in (0, 1]")
+        if eject_after < 1:
+            raise ValueError("eject_after must be at least 1")
+
+        self.alpha = alpha
+        self.eject_after = eject_after
+        self.eject_duration = eject_duration
+        self.error_penalty = error_penalty
+        self._lock = threading.Lock()
+
+    def _score(self, endpoint: Endpoint) -> float:
+        """Lower is better; unmeasured endpoints sort first"""
+        if endpoint.latency is None:
+            return -1.0
+        return endpoint.latency * (1 + self.error_penalty * endpoint.error_rate)
+
+    def choose(self, exclude: Iterable[Endpoint] = ()) -> Endpoint:
+        """
+        Pick the endpoint for the next attempt
+
+        Args:
+            exclude: Endpoints already tried during this upload
+
+        Returns:
+            The chosen Endpoint; report the outcome with record_success() or
+            record_failure()
+        """
+        excluded = set(id(e) for e in exclude)
+        now = time.monotonic()
+
+        with self._lock:
+            candidates = [e for e in self.endpoints if id(e) not in excluded]
+            if not candidates:
+                candidates = list(self.endpoints)
+
+            # An ejected endpoint whose time is up gets exactly one probe
+            for endpoint in candidates:
+                if (endpoint.ejected_until is not None and endpoint.ejected_until <= now
+                        and not endpoint.probing):
+                    endpoint.probing = True
+                    endpoint.in_flight += 1
+                    return endpoint
+
+            healthy = [e for e in candidates if e.ejected_until is None]
+            if healthy:
+                chosen = min(healthy, key=lambda e: (self._score(e), e.in_flight))
+            else:
+                # Everything is ejected: use whichever comes back soonest
+                chosen = min(candidates, key=lambda e: e.ejected_until)
+
+            chosen.in_flight += 1
+            return chosen
+
+    def record_success(self, endpoint: Endpoint, elapsed: float, size: int = 0) -> None:
+        """
+        Record a successful upload
+
+        Args:
+            endpoint: Endpoint returned by choose()
+            elapsed: Seconds from sending the request to receiving the response
+            size: Uploaded bytes; latency of files over 1MB is normalised per MB
+        """
+        sample = elapsed / max(1.0, size / (1024 * 1024))
+        with self._lock:
+            endpoint.in_flight -= 1
+            endpoint.latency = sample if endpoint.latency is None else (
+                self.alpha * sample + (1 - self.alpha) * endpoint.latency
+            )
+            endpoint.error_rate *= (1 - self.alpha)
+            endpoint.consecutive_failures = 0
+            endpoint.ejected_until = None
+            endpoint.probing = False
+
+    def record_failure(self, endpoint: Endpoint) -> None:
+        """Record a failed upload attempt (connection error, timeout or 5xx)"""
+        with self._lock:
+            endpoint.in_flight -= 1
+            endpoint.error_rate = self.alpha + (1 - self.alpha) * endpoint.error_rate
+            endpoint.consecutive_failures += 1
+            if endpoint.probing or endpoint.consecutive_failures >= self.eject_after:
+                endpoint.ejected_until = time.monotonic() + self.eject_duration
+                endpoint.ejections += 1
+            endpoint.probing = False
+
+    def release(self, endpoint: Endpoint) -> None:
+        """Return an endpoint whose attempt ended without a health signal"""
+        with self._lock:
+            endpoint.in_flight -= 1
+            endpoint.probing = False
+
+    def stats(self) -> List[dict]:
+        """Return per-endpoint health figures"""
+        now = time.monotonic()
+        with self._lock:
+            return [
+                {
+                    'base_url': e.base_url,
+                    'latency': e.latency,
+                    'error_rate': e.error_rate,
+                    'ejected': e.ejected_until is not None and e.ejected_until > now,
+                    'ejections': e.ejections,
+                    'in_flight': e.in_flight,
+                }
+                for e in self.endpoints
+            ]
+
+    def __len__(self) -> int:
+        return len(self.endpoints)
+
+    def __repr__(self) -> str:
+        """String representation of the pool"""
+        return f"EndpointPool({[e.base_url for e in self.endpoints]})"
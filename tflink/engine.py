@@ -0,0 +1,393 @@
+"""
+Concurrent upload engine with a bounded, prioritised work queue
+"""
+
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Callable, Dict, Hashable, List, Optional, Tuple, Union
+
+from tflink.adaptive import AdaptiveConcurrency
+from tflink.exceptions import DeadlineExceededError, UploadCancelledError
+from tflink.fairqueue import FairQueue
+from tflink.timeouts import cancel_reason
+
+if TYPE_CHECKING:
+    from tflink.client import TFLinkClient
+
+
+class UploadEngine:
+    """
+    Runs uploads on a fixed pool of worker threads fed by a bounded queue
+
+    ``submit()`` blocks once ``max_queue`` uploads are waiting, so producers that
+    discover files faster than they can be uploaded are slowed down instead of
+    buffering an unbounded backlog in memory.
+
+    Waiting uploads are started in order of priority (``HIGH`` before
+    ``NORMAL`` before ``LOW``; any int works, lower first), then earliest
+    deadline first, then submission order. ``reserved_workers`` of the
+    workers only run ``HIGH`` uploads, so a user-facing upload finds a free
+    worker even while a backfill keeps the others busy. An upload whose
+    deadline passes while it waits is not started; its future raises
+    DeadlineExceededError and it costs no bandwidth. Likewise, an upload
+    submitted with a ``cancel`` token (CancelToken or threading.Event) that
+    is set before a worker takes it fails with UploadCancelledError without
+    being sent, and one already running is aborted within a chunk.
+
+    Uploads can be tagged with a ``tenant`` key. Within a priority, tenants
+    are served by weighted fair queuing (see FairQueue): each tenant's share
+    of upload starts and bytes follows its weight, so one tenant's backlog of
+    thousands of files only delays others by their fair share.
+    ``tenant_max_queue`` bounds how many uploads one tenant may have waiting,
+    and stats() reports per-tenant counters. A tenant's counters are dropped
+    once all its uploads have finished (they stay in the engine totals), so
+    millions of short-lived tenant keys do not pile up.
+
+    With ``concurrency`` set, ``max_workers`` is only the ceiling: an
+    AdaptiveConcurrency controller decides from measured latency, goodput
+    and overload errors (429, 5xx, timeouts) how many of the unreserved
+    workers may upload at once, and stats() reports its current limit.
+
+    Args:
+        client: TFLinkClient used to perform the uploads
+        max_workers: Number of concurrent uploads (default: 4)
+        max_queue: Maximum number of queued uploads waiting for a worker
+            (default: twice max_workers)
+        reserved_workers: Workers kept for HIGH priority uploads; must leave
+            at least one worker for the other classes (default: 0)
+        tenant_weights: Share weight per tenant key; others weigh 1.0
+        tenant_max_queue: Maximum uploads one tenant may have waiting
+            (default: no limit besides max_queue)
+        concurrency: AdaptiveConcurrency controller for the number of
+            uploads in flight; True creates one bounded by the unreserved
+            workers (default: always use every worker)
+        clock: Monotonic time source used for deadlines
+
+    Example:
+        with UploadEngine(client, max_workers=8, reserved_workers=2) as engine:
+            client.upload_batch(backfill, engine=engine, priority=UploadEngine.LOW)
+            future = engine.submit('avatar.png', priority=UploadEngine.HIGH, deadline=10)
+            print(future.result().download_link)
+    """
+
+    HIGH = 0
+    NORMAL = 1
+    LOW = 2
+
+    _OUTCOMES = ('completed', 'failed', 'expired', 'cancelled')
+    _TOTALS = ('submitted',) + _OUTCOMES + ('bytes',)
+
+    def __init__(
+        self,
+        client: 'TFLinkClient',
+        max_workers: int = 4,
+        max_queue: Optional[int] = None,
+        reserved_workers: int = 0,
+        tenant_weights: Optional[Dict[Hashable, float]] = None,
+        tenant_max_queue: Optional[int] = None,
+        concurrency: Union[bool, AdaptiveConcurrency, None] = None,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        """Start the worker threads"""
+        if max_workers < 1:
+            raise ValueError("max_workers must be at least 1")
+        if max_queue is not None and max_queue < 1:
+            raise ValueError("max_queue must be at least 1")
+        if not 0 <= reserved_workers < max_workers:
+            raise ValueError("reserved_workers must be between 0 and max_workers - 1")
+        if tenant_max_queue is not None and tenant_max_queue < 1:
+            raise ValueError("tenant_max_queue must be at least 1")
+
+        self.client = client
+        self.max_workers = max_workers
+        self.max_queue = max_queue if max_queue is not None else max_workers * 2
+        self.reserved_workers = reserved_workers
+        self.tenant_max_queue = tenant_max_queue
+        if concurrency is True:
+            concurrency = AdaptiveConcurrency(max_limit=max_workers - reserved_workers)
+        self.concurrency = concurrency or None
+        self.clock = clock
+
+        # Items: (future, file_path, filename, cost, cancel)
+        self._queue = FairQueue(tenant_weights)
+        self._tenant_stats: Dict[Hashable, Dict[str, int]] = {}
+        self._totals = dict.fromkeys(self._TOTALS, 0)
+        self._lock = threading.Lock()
+        self._not_empty = threading.Condition(self._lock)
+        self._not_full = threading.Condition(self._lock)
+        self._shutdown = False
+        # Uploads running on unreserved workers, bounded by _limit()
+        self._active = 0
+        self._threads: List[threading.Thread] = []
+
+        for i in range(max_workers):
+            thread = threading.Thread(
+                target=self._worker, args=(i < reserved_workers,),
+                name=f"tflink-upload-{i}", daemon=True
+            )
+            thread.start()
+            self._threads.append(thread)
+
+    def submit(
+        self,
+        file_path: Union[str, Path],
+        filename: Optional[str] = None,
+        block: bool = True,
+        timeout: Optional[float] = None,
+        priority: int = NORMAL,
+        deadline: Optional[float] = None,
+        tenant: Hashable = None,
+        cancel: Optional[threading.Event] = None
+    ) -> Future:
+        """
+        Queue a file for upload
+
+        Args:
+            file_path: Path to the file to upload
+            filename: Optional custom filename
+            block: Wait for free queue space instead of failing (default: True)
+            timeout: Maximum seconds to wait for queue space when blocking
+            priority: HIGH, NORMAL or LOW (or any int, lower runs first)
+                (default: NORMAL)
+            deadline: Seconds from now by which the upload must have started;
+                later it is dropped with DeadlineExceededError (default: none)
+            tenant: Key of the tenant the upload is scheduled for (default:
+                None, shared by all untagged uploads)
+            cancel: CancelToken (or threading.Event) that cancels the upload,
+                whether it is still queued or already running; the future
+                then raises UploadCancelledError (default: none)
+
+        Returns:
+            Future resolving to the UploadResult or raising the upload's exception
+
+        Raises:
+            RuntimeError: If the engine has been shut down
+            queue.Full: If the queue (or the tenant's share of it) is full and
+                block is False or timeout expires
+        """
+        try:
+            cost = os.stat(file_path).st_size
+        except (OSError, TypeError, ValueError):
+            # Reported by the upload itself
+            cost = 0
+
+        future: Future = Future()
+        with self._lock:
+            if self._shutdown:
+                raise RuntimeError("Cannot submit uploads after shutdown")
+            if self._full(tenant):
+                if not block:
+                    raise queue.Full
+                end = None if timeout is None else time.monotonic() + timeout
+                while self._full(tenant):
+                    remaining = None if end is None else end - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        raise queue.Full
+                    self._not_full.wait(remaining)
+                    if self._shutdown:
+                        raise RuntimeError("Cannot submit uploads after shutdown")
+
+            expires = float('inf') if deadline is None else self.clock() + deadline
+            self._queue.push(
+                tenant, priority, expires, cost, (future, file_path, filename, cost, cancel)
+            )
+            self._tenant(tenant)['submitted'] += 1
+            self._totals['submitted'] += 1
+            # Reserved workers may not take this entry, so wake everyone
+            self._not_empty.notify_all()
+        return future
+
+    def _full(self, tenant: Hashable) -> bool:
+        return len(self._queue) >= self.max_queue or (
+            self.tenant_max_queue is not None
+            and self._queue.queued(tenant) >= self.tenant_max_queue
+        )
+
+    def _tenant(self, tenant: Hashable) -> Dict[str, int]:
+        counters = self._tenant_stats.get(tenant)
+        if counters is None:
+            counters = self._tenant_stats[tenant] = dict.fromkeys(
+                ('submitted', 'running') + self._OUTCOMES + ('bytes',), 0
+            )
+        return counters
+
+    def _take(self, reserved: bool) -> Optional[Tuple[Hashable, float, Any]]:
+        """Pop the next entry this worker may run; None once shut down and drained"""
+        with self._lock:
+            while True:
+                priority = self._queue.priority()
+                if priority is not None and (
+                    priority <= self.HIGH if reserved else self._active < self._limit()
+                ):
+                    entry = self._queue.pop(self.clock())
+                    if not reserved:
+                        self._active += 1
+                    # Producers may wait on different tenants' limits
+                    self._not_full.notify_all()
+                    if self._shutdown and not self._queue:
+                        self._not_empty.notify_all()
+                    return entry
+                if self._shutdown and not self._queue:
+                    return None
+                self._not_empty.wait()
+
+    def _limit(self) -> int:
+        """Uploads the unreserved workers may run at once"""
+        if self.concurrency is not None:
+            return self.concurrency.limit
+        return self.max_workers - self.reserved_workers
+
+    def _release(self, reserved: bool) -> None:
+        """Give back the slot taken by _take()"""
+        if not reserved:
+            with self._lock:
+                self._active -= 1
+                # The limit may have changed too
+                self._not_empty.notify_all()
+
+    def _finished(self, tenant: Hashable, outcome: str, cost: int = 0, ran: bool = True) -> None:
+        with self._lock:
+            counters = self._tenant_stats[tenant]
+            counters[outcome] += 1
+            self._totals[outcome] += 1
+            if ran:
+                counters['running'] -= 1
+                counters['bytes'] += cost
+                self._totals['bytes'] += cost
+            if counters['submitted'] == sum(counters[o] for o in self._OUTCOMES):
+                # Nothing queued or in flight: forget the tenant
+                del self._tenant_stats[tenant]
+
+    def _worker(self, reserved: bool) -> None:
+        """Run uploads from the queue until it is shut down and empty"""
+        while True:
+            entry = self._take(reserved)
+            if entry is None:
+                return
+
+            tenant, expires, (future, file_path, filename, cost, cancel) = entry
+            if not future.set_running_or_notify_cancel():
+                self._release(reserved)
+                self._finished(tenant, 'cancelled', ran=False)
+                continue
+
+            late = self.clock() - expires
+            if late > 0:
+                self._release(reserved)
+                self._finished(tenant, 'expired', ran=False)
+                future.set_exception(DeadlineExceededError(
+                    f"Upload of {file_path} dropped: its deadline passed "
+                    f"{late:.1f}s before a worker was free"
+                ))
+                continue
+
+            if cancel is not None and cancel.is_set():
+                self._release(reserved)
+                self._finished(tenant, 'cancelled', ran=False)
+                future.set_exception(UploadCancelledError(cancel_reason(cancel)))
+                continue
+
+            with self._lock:
+                self._tenant_stats[tenant]['running'] += 1
+            started = time.monotonic()
+            try:
+                if cancel is None:
+                    result = self.client.upload(file_path, filename=filename)
+                else:
+                    result = self.client.upload(file_path, filename=filename, cancel=cancel)
+            except BaseException as e:
+                self._measured(reserved, started, cost, e)
+                outcome = 'cancelled' if isinstance(e, UploadCancelledError) else 'failed'
+                self._finished(tenant, outcome, cost)
+                future.set_exception(e)
+            else:
+                self._measured(reserved, started, cost)
+                self._finished(tenant, 'completed', cost)
+                future.set_result(result)
+
+    def _measured(
+        self,
+        reserved: bool,
+        started: float,
+        cost: int,
+        error: Optional[BaseException] = None
+    ) -> None:
+        """Feed an upload's outcome to the concurrency controller, then free its slot"""
+        if self.concurrency is not None and not reserved:
+            self.concurrency.record(time.monotonic() - started, cost, error)
+        self._release(reserved)
+
+    def qsize(self) -> int:
+        """Return the approximate number of uploads waiting for a worker"""
+        with self._lock:
+            return len(self._queue)
+
+    def set_tenant_weight(self, tenant: Hashable, weight: float) -> None:
+        """Change a tenant's share weight for uploads started from now on"""
+        with self._lock:
+            self._queue.set_weight(tenant, weight)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Return queue counters, overall and per tenant
+
+        limit is the number of uploads the unreserved workers may run at
+        once (set by the concurrency controller, if any, whose measurements
+        are under concurrency). submitted, completed, failed, expired
+        (dropped at their deadline), cancelled and bytes (size of finished
+        uploads) count every upload since the engine started. The same
+        counters plus queued and running are kept per tenant while it has
+        uploads queued or running.
+        """
+        with self._lock:
+            tenants = {
+                tenant: dict(counters, queued=self._queue.queued(tenant))
+                for tenant, counters in self._tenant_stats.items()
+            }
+            limit = self._limit()
+            totals = dict(self._totals)
+        stats = {
+            'queued': sum(t['queued'] for t in tenants.values()),
+            'running': sum(t['running'] for t in tenants.values()),
+            'limit': limit,
+        }
+        stats.update(totals)
+        stats['tenants'] = tenants
+        if self.concurrency is not None:
+            stats['concurrency'] = self.concurrency.stats()
+        return stats
+
+    def shutdown(self, wait: bool = True) -> None:
+        """
+        Stop accepting uploads and stop the workers once the queue drains
+
+        Args:
+            wait: Block until all queued uploads have finished (default: True)
+        """
+        with self._lock:
+            if self._shutdown:
+                return
+            self._shutdown = True
+            self._not_empty.notify_all()
+            self._not_full.notify_all()
+
+        if wait:
+            for thread in self._threads:
+                thread.join()
+
+    def __enter__(self) -> 'UploadEngine':
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.shutdown(wait=True)
+
+    def __repr__(self) -> str:
+        """String representation of the engine"""
+        return (
+            f"UploadEngine(max_workers={self.max_workers}, max_queue={self.max_queue}, "
+            f"reserved_workers={self.reserved_workers})"
+        )
@@ -13,6 +13,16 @@ class UploadError(TFLinkError):
     pass
 
 
+class ServerError(UploadError):
+    """Raised when the server answers an upload with a 5xx status"""
+    pass
+
+
+class RateLimitError(UploadError):
+    """Raised when the server answers an upload with 429 Too Many Requests"""
+    pass
+
+
 class AuthenticationError(TFLinkError):
     """Raised when authentication fails"""
     pass
@@ -26,3 +36,28 @@ class FileNotFoundError(TFLinkError):
 class NetworkError(TFLinkError):
     """Raised when network request fails"""
     pass
+
+
+class UploadTimeoutError(NetworkError):
+    """Raised when an upload times out, exceeds its deadline or stalls"""
+    pass
+
+
+class DeadlineExceededError(UploadTimeoutError):
+    """Raised instead of starting a queued upload whose deadline has passed"""
+    pass
+
+
+class CircuitOpenError(NetworkError):
+    """Raised without contacting the server while the circuit breaker is open"""
+    pass
+
+
+class UploadCancelledError(TFLinkError):
+    """Raised when an upload is cancelled through its cancel token or Event"""
+    pass
+
+
+class ChecksumMismatchError(TFLinkError):
+    """Raised when downloaded content does not match the recorded checksums"""
+    pass
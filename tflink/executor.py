@@ -0,0 +1,249 @@
+"""
+Multi-process batch uploads
+"""
+
+import multiprocessing
+import os
+import pickle
+import threading
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Union
+
+from tflink.exceptions import TFLinkError, UploadCancelledError
+from tflink.journal import UploadJournal
+from tflink.models import BatchResult
+from tflink.timeouts import CancelToken, cancel_reason
+
+
+# Client owned by the current worker process, created by _init_worker()
+_worker_client = None
+
+# Seconds between checks of a batch's cancel event, in both processes
+_CANCEL_POLL = 0.1
+
+
+def _init_worker(client_kwargs: Dict[str, Any]) -> None:
+    """Build the per-process TFLinkClient (runs once in every worker)"""
+    global _worker_client
+    from tflink.client import TFLinkClient
+
+    _worker_client = TFLinkClient(**client_kwargs)
+
+
+def _portable_error(error: BaseException) -> BaseException:
+    """Return error if it can cross a process boundary, else a TFLinkError copy"""
+    try:
+        pickle.dumps(error)
+    except Exception:
+        return TFLinkError(f"{type(error).__name__}: {error}")
+    return error
+
+
+def _upload_chunk(file_paths: List[str], threads: int, cancel=None) -> List[BatchResult]:
+    """
+    Upload a chunk of paths inside a worker and return compact results
+
+    cancel is a multiprocessing manager Event; once it is set, the chunk's
+    uploads are aborted through a local CancelToken.
+    """
+    if cancel is None:
+        results = _worker_client.upload_batch(file_paths, max_workers=threads)
+    else:
+        token = CancelToken()
+        done = threading.Event()
+
+        def forward() -> None:
+            try:
+                while not done.is_set():
+                    if cancel.wait(_CANCEL_POLL):
+                        token.cancel("Batch cancelled")
+                        return
+            except (OSError, EOFError):
+                # The manager went away with the executor
+                return
+
+        thread = threading.Thread(target=forward, name="tflink-cancel", daemon=True)
+        thread.start()
+        try:
+            results = _worker_client.upload_batch(file_paths, max_workers=threads, cancel=token)
+        finally:
+            done.set()
+            thread.join()
+    for item in results:
+        if item.error is not None:
+            item.error = _portable_error(item.error)
+    return results
+
+
+class ProcessUploadExecutor:
+    """
+    Spreads batch uploads over several processes to use more than one core
+
+    Each worker process builds its own TFLinkClient (and therefore its own
+    connection pool) from ``client_kwargs`` and runs ``threads_per_process``
+    concurrent uploads. Only file paths go to the workers and only BatchResult
+    objects come back; file contents never cross a process boundary.
+
+    Args:
+        processes: Number of worker processes (default: os.cpu_count())
+        threads_per_process: Concurrent uploads inside each worker (default: 4)
+        chunk_size: Number of paths handed to a worker at a time (default: 16)
+        mp_context: multiprocessing start method (default: "spawn", which is
+            safe to use from programs that already run threads)
+        **client_kwargs: Arguments for the TFLinkClient built in each worker
+
+    Example:
+        with ProcessUploadExecutor(processes=4, user_id='id', auth_token='token') as executor:
+            results = executor.upload_batch(paths, journal='backfill.journal')
+    """
+
+    def __init__(
+        self,
+        processes: Optional[int] = None,
+        threads_per_process: int = 4,
+        chunk_size: int = 16,
+        mp_context: str = 'spawn',
+        **client_kwargs: Any
+    ):
+        """Start the worker processes"""
+        if threads_per_process < 1:
+            raise ValueError("threads_per_process must be at least 1")
+        if chunk_size < 1:
+            raise ValueError("chunk_size must be at least 1")
+
+        self.processes = processes or os.cpu_count() or 1
+        self.threads_per_process = threads_per_process
+        self.chunk_size = chunk_size
+        self.client_kwargs = client_kwargs
+
+        self._context = multiprocessing.get_context(mp_context)
+        # Serves the events that carry cancellation to the workers; started
+        # by the first batch given a cancel token
+        self._manager = None
+        self._lock = threading.Lock()
+        self._pool = ProcessPoolExecutor(
+            max_workers=self.processes,
+            mp_context=self._context,
+            initializer=_init_worker,
+            initargs=(client_kwargs,),
+        )
+
+    def _remote_event(self):
+        """Return a new Event that can be passed to the worker processes"""
+        with self._lock:
+            if self._manager is None:
+                self._manager = self._context.Manager()
+            return self._manager.Event()
+
+    def upload_batch(
+        self,
+        file_paths: Iterable[Union[str, Path]],
+        journal: Optional[Union[str, Path, UploadJournal]] = None,
+        cancel: Optional[threading.Event] = None
+    ) -> List[BatchResult]:
+        """
+        Upload many files across the worker processes
+
+        Args:
+            file_paths: Paths of the files to upload
+            journal: Optional UploadJournal (or path to one), kept in this process,
+                used to skip completed files and record progress
+            cancel: CancelToken (or threading.Event) that cancels the batch:
+                chunks not yet handed to a worker are dropped, running uploads
+                are aborted within about 0.1s, and the BatchResult.error of
+                every file not uploaded is an UploadCancelledError
+                (default: none)
+
+        Returns:
+            List of BatchResult objects in the same order as file_paths
+        """
+        owns_journal = journal is not None and not isinstance(journal, UploadJournal)
+        if owns_journal:
+            journal = UploadJournal(journal)
+
+        try:
+            results = [BatchResult(file_path=str(path)) for path in file_paths]
+            pending = []
+            for item in results:
+                previous = journal.get_result(item.file_path) if journal else None
+                if previous is not None:
+                    item.result = previous
+                    item.skipped = True
+                else:
+                    pending.append(item)
+
+            def finish(chunk: List[BatchResult], future: Future) -> None:
+                if future.cancelled():
+                    error: Optional[BaseException] = UploadCancelledError(cancel_reason(cancel))
+                else:
+                    error = future.exception()
+                outcomes = future.result() if error is None else None
+                for i, item in enumerate(chunk):
+                    if outcomes is not None:
+                        item.result = outcomes[i].result
+                        item.error = outcomes[i].error
+                    else:
+                        # The worker itself died (e.g. BrokenProcessPool)
+                        item.error = error
+                    if journal:
+                        if item.result is not None:
+                            journal.record_done(item.file_path, item.result)
+                        else:
+                            journal.record_failed(item.file_path, item.error)
+
+            remote = self._remote_event() if cancel is not None and pending else None
+            chunks = {}
+            for start in range(0, len(pending), self.chunk_size):
+                chunk = pending[start:start + self.chunk_size]
+                if journal:
+                    for item in chunk:
+                        journal.record_start(item.file_path)
+                future = self._pool.submit(
+                    _upload_chunk,
+                    [item.file_path for item in chunk],
+                    self.threads_per_process,
+                    remote,
+                )
+                chunks[future] = chunk
+
+            # Journal writes stay in this thread as results arrive
+            running = set(chunks)
+            poll = _CANCEL_POLL if remote is not None else None
+            while running:
+                done, running = wait(running, timeout=poll, return_when=FIRST_COMPLETED)
+                for future in done:
+                    finish(chunks[future], future)
+                if poll is not None and cancel.is_set():
+                    remote.set()
+                    poll = None
+                    for future in running:
+                        future.cancel()
+
+            return results
+        finally:
+            if owns_journal:
+                journal.close()
+            elif journal is not None:
+                journal.flush()
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Stop the worker processes"""
+        self._pool.shutdown(wait=wait)
+        with self._lock:
+            if self._manager is not None:
+                self._manager.shutdown()
+                self._manager = None
+
+    def __enter__(self) -> 'ProcessUploadExecutor':
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.shutdown(wait=True)
+
+    def __repr__(self) -> str:
+        """String representation of the executor"""
+        return (
+            f"ProcessUploadExecutor(processes={self.processes}, "
+            f"threads_per_process={self.threads_per_process})"
+        )
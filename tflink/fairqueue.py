@@ -0,0 +1,158 @@
+"""
+Weighted fair queuing of uploads across tenants
+"""
+
+import heapq
+import itertools
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+
+
+class _Tenant:
+    """Queued entries and fair-share bookkeeping of one tenant"""
+
+    __slots__ = ('key', 'queues', 'finish', 'queued')
+
+    def __init__(self, key: Hashable):
+        self.key = key
+        # priority -> heap of (expires, sequence, cost, item)
+        self.queues: Dict[int, List[Tuple]] = {}
+        # Virtual time at which the tenant's last started upload "finishes"
+        self.finish = 0.0
+        self.queued = 0
+
+
+class FairQueue:
+    """
+    Priority classes over start-time fair queues of tenants
+
+    Entries are taken strictly by priority (lower first). Within a priority,
+    tenants are served by start-time fair queuing: each upload advances its
+    tenant's virtual finish time by ``(cost + request_cost) / weight``, and
+    the tenant with the smallest virtual start time goes next. A tenant that
+    queues 50,000 files therefore gets its weighted share of starts (and, as
+    cost is the file size, of bytes), not all of them, while a tenant that
+    has been idle starts at the current virtual time rather than with saved
+    up credit. Within a tenant and priority, entries run earliest deadline
+    first, then in submission order. A tenant with nothing queued is
+    forgotten once the virtual time has caught up with its finish time (or
+    the queue runs empty), so the queue only keeps state for tenants that
+    are backlogged or still ahead of their share.
+
+    Every operation is O(log n) in the number of entries and active tenants.
+    Not thread-safe; UploadEngine guards it with its lock.
+
+    Args:
+        weights: Share weight per tenant key; tenants not listed weigh 1.0
+        request_cost: Cost charged per upload on top of its size in bytes,
+            so that tenants sending many tiny files are not free (default: 64KB)
+    """
+
+    REQUEST_COST = 64 * 1024
+
+    def __init__(
+        self,
+        weights: Optional[Dict[Hashable, float]] = None,
+        request_cost: int = REQUEST_COST
+    ):
+        """Create an empty queue"""
+        self.weights: Dict[Hashable, float] = {}
+        for key, weight in (weights or {}).items():
+            self.set_weight(key, weight)
+        self.request_cost = request_cost
+        self._tenants: Dict[Hashable, _Tenant] = {}
+        # priority -> heap of (virtual start, sequence, tenant), one per backlogged tenant
+        self._classes: Dict[int, List[Tuple]] = {}
+        # Heap of (virtual finish, sequence, tenant) for tenants with nothing
+        # queued whose finish is ahead of the virtual time
+        self._idle: List[Tuple] = []
+        self._sequence = itertools.count()
+        self._virtual = 0.0
+        self._size = 0
+
+    def set_weight(self, tenant: Hashable, weight: float) -> None:
+        """Set a tenant's share weight; applies to uploads started from now on"""
+        if weight <= 0:
+            raise ValueError("tenant weights must be positive")
+        self.weights[tenant] = weight
+
+    def push(self, tenant: Hashable, priority: int, expires: float, cost: int, item: Any) -> None:
+        """Queue item for tenant; cost is its size in bytes"""
+        state = self._tenants.get(tenant)
+        if state is None:
+            state = self._tenants[tenant] = _Tenant(tenant)
+        queue = state.queues.get(priority)
+        if queue is None:
+            queue = state.queues[priority] = []
+        heapq.heappush(queue, (expires, next(self._sequence), cost, item))
+        state.queued += 1
+        self._size += 1
+        if len(queue) == 1:
+            active = self._classes.setdefault(priority, [])
+            start = max(self._virtual, state.finish)
+            heapq.heappush(active, (start, next(self._sequence), state))
+
+    def priority(self) -> Optional[int]:
+        """Priority of the entry pop() would return, or None when empty"""
+        return min(self._classes) if self._classes else None
+
+    def pop(self, now: float) -> Tuple[Hashable, float, Any]:
+        """
+        Remove the next entry and return (tenant, expires, item)
+
+        An entry whose expiry time is before now is returned without charging
+        its tenant, since it will not be uploaded.
+        """
+        priority = min(self._classes)
+        active = self._classes[priority]
+        start, _, state = active[0]
+        while state.finish > start:
+            # Charged in another priority class since it was queued here
+            heapq.heapreplace(active, (state.finish, next(self._sequence), state))
+            start, _, state = active[0]
+        heapq.heappop(active)
+
+        queue = state.queues[priority]
+        expires, _, cost, item = heapq.heappop(queue)
+        state.queued -= 1
+        self._size -= 1
+        self._virtual = max(self._virtual, start)
+        if expires >= now:
+            state.finish = start + (cost + self.request_cost) / self.weights.get(state.key, 1.0)
+        if queue:
+            heapq.heappush(active, (max(self._virtual, state.finish), next(self._sequence), state))
+        else:
+            del state.queues[priority]
+        if not active:
+            del self._classes[priority]
+        if not state.queued:
+            if state.finish > self._virtual:
+                heapq.heappush(self._idle, (state.finish, next(self._sequence), state))
+            else:
+                del self._tenants[state.key]
+        if not self._size:
+            # End of a busy period: the virtual time moves past every finish
+            # time, so nothing needs to be remembered
+            self._virtual = max([self._virtual] + [entry[0] for entry in self._idle])
+            self._idle.clear()
+            self._tenants.clear()
+        else:
+            self._forget_idle()
+        return state.key, expires, item
+
+    def _forget_idle(self) -> None:
+        """Drop idle tenants the virtual time has caught up with"""
+        idle = self._idle
+        while idle and idle[0][0] <= self._virtual:
+            _, _, state = heapq.heappop(idle)
+            # Skip tenants that queued again (and maybe went idle with a later finish)
+            if (not state.queued and state.finish <= self._virtual
+                    and self._tenants.get(state.key) is state):
+                del self._tenants[state.key]
+
+    def queued(self, tenant: Hashable) -> int:
+        """Number of entries waiting for tenant"""
+        state = self._tenants.get(tenant)
+        return state.queued if state is not None else 0
+
+    def __len__(self) -> int:
+        return self._size
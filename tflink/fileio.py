@@ -0,0 +1,405 @@
+"""
+Opening files for upload without filling the page cache, or memory-mapped
+"""
+
+import errno
+import mmap
+import os
+from pathlib import Path
+from typing import BinaryIO, Optional, Union
+
+# Values accepted for TFLinkClient(page_cache=...)
+PAGE_CACHE_MODES = ('keep', 'drop', 'direct')
+
+
+def validate_page_cache_mode(mode: str) -> str:
+    """Return mode if it is a known page cache mode, else raise ValueError"""
+    if mode not in PAGE_CACHE_MODES:
+        raise ValueError(
+            f"page_cache must be one of {', '.join(PAGE_CACHE_MODES)}, got {mode!r}"
+        )
+    return mode
+
+
+class DropBehindFile:
+    """
+    Sequential reader that evicts the pages it has consumed
+
+    The kernel is told the file is read sequentially (larger readahead), and
+    every ``drop_every`` bytes the range read so far is released with
+    POSIX_FADV_DONTNEED, so uploading a large file does not push other data
+    (a database's hot pages, say) out of the page cache. Pages of the file that
+    were cached before the upload are released as well.
+
+    Where posix_fadvise is unavailable this is a plain unbuffered reader.
+
+    Args:
+        path: File to read
+        drop_every: Bytes consumed between two DONTNEED calls (default: 8MB)
+    """
+
+    def __init__(self, path: Union[str, Path], drop_every: int = 8 * 1024 * 1024):
+        """Open the file and announce sequential access"""
+        self._file = open(path, 'rb', buffering=0)
+        self.drop_every = drop_every
+        self._fadvise = getattr(os, 'posix_fadvise', None)
+        self._pos = 0
+        self._dropped = 0
+        self._advise(0, 0, getattr(os, 'POSIX_FADV_SEQUENTIAL', 0))
+
+    def _advise(self, offset: int, length: int, advice: int) -> None:
+        if self._fadvise is None:
+            return
+        try:
+            self._fadvise(self._file.fileno(), offset, length, advice)
+        except OSError:
+            # Advice is best effort; some filesystems reject it
+            self._fadvise = None
+
+    def _consumed(self, nbytes: int) -> None:
+        self._pos += nbytes
+        if self._pos - self._dropped >= self.drop_every:
+            self._advise(self._dropped, self._pos - self._dropped, os.POSIX_FADV_DONTNEED)
+            self._dropped = self._pos
+
+    def read(self, size: int = -1) -> bytes:
+        data = self._file.read(size)
+        self._consumed(len(data))
+        return data
+
+    def readinto(self, buffer) -> int:
+        n = self._file.readinto(buffer)
+        self._consumed(n)
+        return n
+
+    def seek(self, offset: int, whence: int = os.SEEK_SET) -> int:
+        self._pos = self._file.seek(offset, whence)
+        self._dropped = min(self._dropped, self._pos)
+        return self._pos
+
+    def tell(self) -> int:
+        return self._pos
+
+    def fileno(self) -> int:
+        return self._file.fileno()
+
+    def close(self) -> None:
+        """Release every cached page of the file, then close it"""
+        if not self._file.closed:
+            if self._fadvise is not None:
+                self._advise(0, 0, os.POSIX_FADV_DONTNEED)
+            self._file.close()
+
+    def __enter__(self) -> 'DropBehindFile':
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
+
+
+class DirectFile:
+    """
+    Reader that bypasses the page cache with O_DIRECT
+
+    O_DIRECT needs the buffer, file offset and length aligned to the device's
+    block size, so reads go through one page-aligned (mmap-allocated) buffer
+    of ``buffer_size`` bytes, rounded up to a multiple of ``ALIGN``, and are
+    copied out from there. Only absolute seeks are supported.
+
+    Args:
+        path: File to read
+        buffer_size: Bytes read from the device at a time (default: 1MB)
+
+    Raises:
+        OSError: If the platform or filesystem does not support O_DIRECT
+            (open_upload_file() falls back to DropBehindFile)
+    """
+
+    ALIGN = 4096
+
+    def __init__(self, path: Union[str, Path], buffer_size: int = 1024 * 1024):
+        """Open the file with O_DIRECT"""
+        flag = getattr(os, 'O_DIRECT', None)
+        if flag is None:
+            raise OSError(errno.EINVAL, "O_DIRECT is not supported on this platform")
+        buffer_size = max(self.ALIGN, -(-buffer_size // self.ALIGN) * self.ALIGN)
+        self._fd = os.open(path, os.O_RDONLY | flag | getattr(os, 'O_CLOEXEC', 0))
+        self._buffer = mmap.mmap(-1, buffer_size)
+        self._view = memoryview(self._buffer)
+        # File offset of the next device read; always aligned
+        self._next = 0
+        self._start = 0
+        self._end = 0
+        self._eof = False
+        self._pos = 0
+        try:
+            self._fill()
+        except OSError:
+            self.close()
+            raise
+
+    def _fill(self) -> None:
+        """Read the next aligned block into the buffer"""
+        n = os.preadv(self._fd, [self._buffer], self._next)
+        self._next += n
+        self._start = 0
+        self._end = n
+        # A short read of a regular file means the end was reached
+        self._eof = n < len(self._buffer)
+
+    def readinto(self, buffer) -> int:
+        out = memoryview(buffer).cast('B')
+        if self._start == self._end:
+            if self._eof:
+                return 0
+            self._fill()
+        n = min(len(out), self._end - self._start)
+        out[:n] = self._view[self._start:self._start + n]
+        self._start += n
+        self._pos += n
+        return n
+
+    def read(self, size: int = -1) -> bytes:
+        if size is None or size < 0:
+            chunks = []
+            while True:
+                chunk = self.read(len(self._buffer))
+                if not chunk:
+                    return b''.join(chunks)
+                chunks.append(chunk)
+        data = bytearray(size)
+        view = memoryview(data)
+        filled = 0
+        while filled < size:
+            n = self.readinto(view[filled:])
+            if not n:
+                break
+            filled += n
+        del view
+        del data[filled:]
+        return bytes(data)
+
+    def seek(self, offset: int, whence: int = os.SEEK_SET) -> int:
+        if whence != os.SEEK_SET:
+            raise OSError(errno.EINVAL, "DirectFile only supports absolute seeks")
+        self._next = offset - offset % self.ALIGN
+        self._fill()
+        self._start = min(offset % self.ALIGN, self._end)
+        self._pos = offset
+        return offset
+
+    def tell(self) -> int:
+        return self._pos
+
+    def fileno(self) -> int:
+        return self._fd
+
+    def close(self) -> None:
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+            self._view.release()
+            self._buffer.close()
+
+    def __enter__(self) -> 'DirectFile':
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
+
+
+class MappedFile:
+    """
+    Read-only memory map of a file that hands out zero-copy chunks
+
+    ``view(offset, length)`` returns a memoryview of the mapping, so sending
+    and hashing a chunk involve no copy into a Python buffer; the kernel reads
+    the file in as pages are touched (readahead is tuned with
+    MADV_SEQUENTIAL), and concurrent uploads of the same file share the page
+    cache pages instead of each holding its own buffers. Pages already sent
+    are unmapped every ``release_every`` bytes with MADV_DONTNEED, which keeps
+    the process's resident size flat; the data stays in the page cache.
+
+    At most ``length`` bytes (the size the upload announced and checked
+    against max_file_size) are mapped. Truncating a mapped file makes reads
+    past the new end fault (SIGBUS), so view() checks the file size first and
+    returns a short view if it shrank; the window between that check and the
+    read remains, so do not map files that may be truncated while uploading.
+
+    Args:
+        path: File to map
+        length: Bytes to map at most (default: the whole file)
+        release_every: Bytes consumed between two MADV_DONTNEED calls
+            (default: 8MB)
+    """
+
+    def __init__(
+        self,
+        path: Union[str, Path],
+        length: Optional[int] = None,
+        release_every: int = 8 * 1024 * 1024
+    ):
+        """Open and map the file"""
+        self._file = open(path, 'rb', buffering=0)
+        try:
+            size = os.fstat(self._file.fileno()).st_size
+            self.length = size if length is None else min(length, size)
+            # mmap() rejects zero-length mappings
+            self._map = (
+                mmap.mmap(self._file.fileno(), self.length, access=mmap.ACCESS_READ)
+                if self.length else None
+            )
+        except (OSError, ValueError):
+            self._file.close()
+            raise
+        self._view = memoryview(self._map) if self._map is not None else memoryview(b'')
+        self.release_every = release_every
+        self._released = 0
+        self._pos = 0
+        self._madvise(getattr(mmap, 'MADV_SEQUENTIAL', None), 0, self.length)
+
+    def _madvise(self, advice: Optional[int], start: int, length: int) -> None:
+        if advice is None or self._map is None or not length or not hasattr(self._map, 'madvise'):
+            return
+        try:
+            self._map.madvise(advice, start, length)
+        except OSError:
+            # Advice is best effort
+            pass
+
+    def view(self, offset: int, length: int) -> memoryview:
+        """Return up to length bytes at offset; shorter at the (current) end of file"""
+        end = min(offset + length, self.length, os.fstat(self._file.fileno()).st_size)
+        consumed = offset - offset % mmap.PAGESIZE
+        if consumed - self._released >= self.release_every:
+            # Chunks before offset have been sent; unmap them
+            self._madvise(getattr(mmap, 'MADV_DONTNEED', None), self._released,
+                          consumed - self._released)
+            self._released = consumed
+        return self._view[offset:max(offset, end)]
+
+    def readinto(self, buffer) -> int:
+        out = memoryview(buffer).cast('B')
+        chunk = self.view(self._pos, len(out))
+        out[:len(chunk)] = chunk
+        self._pos += len(chunk)
+        return len(chunk)
+
+    def read(self, size: int = -1) -> bytes:
+        if size is None or size < 0:
+            size = self.length
+        chunk = self.view(self._pos, size)
+        self._pos += len(chunk)
+        return bytes(chunk)
+
+    def seek(self, offset: int, whence: int = os.SEEK_SET) -> int:
+        if whence == os.SEEK_CUR:
+            offset += self._pos
+        elif whence == os.SEEK_END:
+            offset += self.length
+        self._pos = max(0, offset)
+        self._released = min(self._released, self._pos - self._pos % mmap.PAGESIZE)
+        return self._pos
+
+    def tell(self) -> int:
+        return self._pos
+
+    def fileno(self) -> int:
+        return self._file.fileno()
+
+    def close(self) -> None:
+        """Unmap and close the file"""
+        if self._file.closed:
+            return
+        self._view.release()
+        if self._map is not None:
+            try:
+                self._map.close()
+            except BufferError:
+                # A chunk is still referenced somewhere; the mapping goes
+                # away with the last reference
+                pass
+        self._file.close()
+
+    def __enter__(self) -> 'MappedFile':
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
+
+
+def read_small_file(path: Union[str, Path], size: int) -> bytes:
+    """
+    Read the first size bytes of a file, normally with a single read() call
+
+    Meant for files small enough to send in one piece, where opening a
+    buffered file object would cost more than the read itself. Reads are
+    positional where os.pread() exists, so a path such as /dev/fd/N that
+    shares its offset with another descriptor (macOS, BSD) is still read
+    from the start.
+
+    Raises:
+        OSError: If the file cannot be read or has fewer than size bytes
+    """
+    # O_BINARY: without it Windows translates CRLF and stops at 0x1A
+    flags = os.O_RDONLY | getattr(os, 'O_BINARY', 0) | getattr(os, 'O_CLOEXEC', 0)
+    fd = os.open(path, flags)
+    pread = getattr(os, 'pread', None)
+    try:
+        if pread is not None:
+            data = pread(fd, size, 0)
+        else:
+            data = os.read(fd, size)
+        while len(data) < size:
+            if pread is not None:
+                more = pread(fd, size - len(data), len(data))
+            else:
+                more = os.read(fd, size - len(data))
+            if not more:
+                raise OSError(
+                    f"File shrank during upload: expected {size} bytes, got {len(data)}"
+                )
+            data += more
+    finally:
+        os.close(fd)
+    return data
+
+
+def open_upload_file(
+    path: Union[str, Path],
+    page_cache: str = 'keep',
+    buffer_size: int = 1024 * 1024,
+    memory_map: bool = False,
+    length: Optional[int] = None
+) -> BinaryIO:
+    """
+    Open a file for streaming it to the server
+
+    Args:
+        path: File to open
+        page_cache: "keep" reads through the page cache as usual, "drop"
+            evicts pages once they are sent (DropBehindFile), "direct" reads
+            with O_DIRECT (DirectFile) and falls back to "drop" where
+            O_DIRECT is not supported
+        buffer_size: Read size used by "direct"
+        memory_map: Map the file (MappedFile) instead of reading it; only
+            with page_cache "keep"
+        length: Bytes the upload will send, the most that is mapped
+
+    Returns:
+        Binary file object supporting read(), readinto() and seek(0)
+    """
+    if memory_map:
+        if page_cache != 'keep':
+            raise ValueError("memory_map requires page_cache='keep'")
+        return MappedFile(path, length)
+    if page_cache == 'direct':
+        try:
+            return DirectFile(path, buffer_size)
+        except OSError as e:
+            if e.errno not in (errno.EINVAL, errno.EOPNOTSUPP):
+                raise
+        page_cache = 'drop'
+    if page_cache == 'drop':
+        return DropBehindFile(path)
+    return open(path, 'rb')
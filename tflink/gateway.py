@@ -0,0 +1,531 @@
+"""
+Local upload gateway: one shared client serving many processes over a Unix socket
+"""
+
+import array
+import ctypes
+import ctypes.util
+import errno
+import json
+import os
+import socket
+import socketserver
+import stat
+import struct
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Optional, Sequence, Tuple, Union
+
+from tflink import exceptions
+from tflink.exceptions import NetworkError, TFLinkError
+from tflink.models import UploadResult
+
+if TYPE_CHECKING:
+    from tflink.client import TFLinkClient
+
+
+# Frames are a 4-byte big-endian length followed by a JSON object
+_HEADER = struct.Struct('>I')
+_MAX_FRAME = 1024 * 1024
+
+# socketserver.UnixStreamServer and socket.AF_UNIX are missing on Windows
+# before Python 3.13
+_UNIX_SOCKETS = hasattr(socket, 'AF_UNIX') and hasattr(socketserver, 'UnixStreamServer')
+
+
+def _require_unix_sockets() -> None:
+    if not _UNIX_SOCKETS:
+        raise OSError(errno.EAFNOSUPPORT, "Unix domain sockets are not supported on this platform")
+
+
+def default_socket_path() -> Path:
+    """Per-user socket path: $XDG_RUNTIME_DIR/tflink/gateway.sock, else under /tmp"""
+    runtime_dir = os.environ.get('XDG_RUNTIME_DIR')
+    if runtime_dir:
+        return Path(runtime_dir) / 'tflink' / 'gateway.sock'
+    return Path(tempfile.gettempdir()) / f'tflink-{os.getuid()}' / 'gateway.sock'
+
+
+def _check_private_dir(path: Path) -> None:
+    """Refuse a socket directory that another user could have created or can write to"""
+    st = os.lstat(path)
+    if not stat.S_ISDIR(st.st_mode):
+        raise OSError(f"{path} is not a directory")
+    if st.st_uid != os.getuid() or stat.S_IMODE(st.st_mode) != 0o700:
+        raise OSError(
+            f"{path} must be owned by uid {os.getuid()} with mode 0700 "
+            f"(found uid {st.st_uid}, mode {oct(stat.S_IMODE(st.st_mode))})"
+        )
+
+
+_getpeereid = None
+
+
+def _peer_uid(sock: socket.socket) -> int:
+    """User ID of the process on the other end of a connected Unix socket"""
+    if hasattr(socket, 'SO_PEERCRED'):
+        creds = struct.Struct('3i')
+        _, uid, _ = creds.unpack(sock.getsockopt(socket.SOL_SOCKET, socket.SO_PEERCRED, creds.size))
+        return uid
+
+    # BSD and macOS
+    global _getpeereid
+    if _getpeereid is None:
+        libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+        _getpeereid = libc.getpeereid
+    uid, gid = ctypes.c_uint32(), ctypes.c_uint32()
+    if _getpeereid(sock.fileno(), ctypes.byref(uid), ctypes.byref(gid)) != 0:
+        code = ctypes.get_errno()
+        raise OSError(code, os.strerror(code))
+    return uid.value
+
+
+def _send_frame(sock: socket.socket, message: dict, fd: Optional[int] = None) -> None:
+    """Send one message, with fd attached as SCM_RIGHTS ancillary data"""
+    payload = json.dumps(message).encode('utf-8')
+    data = _HEADER.pack(len(payload)) + payload
+    if fd is None:
+        sock.sendall(data)
+        return
+    ancillary = [(socket.SOL_SOCKET, socket.SCM_RIGHTS, array.array('i', [fd]).tobytes())]
+    sent = sock.sendmsg([data], ancillary)
+    if sent < len(data):
+        sock.sendall(data[sent:])
+
+
+def _recv_exactly(sock: socket.socket, size: int) -> bytes:
+    chunks = []
+    while size:
+        chunk = sock.recv(size)
+        if not chunk:
+            raise ConnectionError("Gateway connection closed mid-message")
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b''.join(chunks)
+
+
+def _recv_frame(sock: socket.socket) -> Tuple[Optional[dict], Optional[int]]:
+    """
+    Receive one message and the file descriptor sent with it
+
+    Returns:
+        (message, fd); message is None when the peer closed the connection
+    """
+    fd_size = array.array('i').itemsize
+    header, ancillary, _, _ = sock.recvmsg(_HEADER.size, socket.CMSG_SPACE(fd_size))
+    fds = []
+    for level, kind, data in ancillary:
+        if level == socket.SOL_SOCKET and kind == socket.SCM_RIGHTS:
+            fds.extend(array.array('i', data[:len(data) - len(data) % fd_size]))
+    if not header:
+        for extra in fds:
+            os.close(extra)
+        return None, None
+    if len(header) < _HEADER.size:
+        header += _recv_exactly(sock, _HEADER.size - len(header))
+
+    # Only one descriptor per message is expected; close any others
+    for extra in fds[1:]:
+        os.close(extra)
+    fd = fds[0] if fds else None
+
+    try:
+        (length,) = _HEADER.unpack(header)
+        if length > _MAX_FRAME:
+            raise ValueError(f"Gateway message too large: {length} bytes")
+        return json.loads(_recv_exactly(sock, length).decode('utf-8')), fd
+    except BaseException:
+        if fd is not None:
+            os.close(fd)
+        raise
+
+
+def _error_from_message(error: dict) -> TFLinkError:
+    """Rebuild a tflink exception reported by the gateway"""
+    cls = getattr(exceptions, str(error.get('type')), None)
+    message = str(error.get('message', 'Gateway upload failed'))
+    if isinstance(cls, type) and issubclass(cls, TFLinkError):
+        return cls(message)
+    return TFLinkError(f"{error.get('type')}: {message}")
+
+
+class GatewayClient:
+    """
+    Thin client that hands uploads to a local UploadGateway
+
+    Usually created through ``TFLinkClient(gateway=...)``. Each upload opens a
+    short connection to the gateway, so the client is safe to share across
+    threads and forked processes. Nothing is sent unless the process listening
+    on the socket runs as the same user (or root).
+
+    Args:
+        path: Gateway socket (default: default_socket_path())
+        pass_fds: Send an open file descriptor instead of the path, so the
+            gateway can read files it could not open itself (default: True)
+        timeout: Seconds to wait for the gateway's answer (default: no limit)
+    """
+
+    def __init__(
+        self,
+        path: Optional[Union[str, os.PathLike]] = None,
+        pass_fds: bool = True,
+        timeout: Optional[float] = None
+    ):
+        """Create the client; nothing is connected until the first upload"""
+        _require_unix_sockets()
+        self.path = Path(path) if path is not None else default_socket_path()
+        self.pass_fds = pass_fds
+        self.timeout = timeout
+
+    def _call(self, message: dict, fd: Optional[int] = None) -> dict:
+        """Send one request and return the gateway's answer"""
+        try:
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+                sock.settimeout(self.timeout)
+                sock.connect(str(self.path))
+                owner = _peer_uid(sock)
+                if owner not in (os.getuid(), 0):
+                    raise NetworkError(
+                        f"Upload gateway at {self.path} runs as uid {owner}, not {os.getuid()}"
+                    )
+                _send_frame(sock, message, fd)
+                reply, extra = _recv_frame(sock)
+        except (OSError, ValueError) as e:
+            raise NetworkError(f"Upload gateway at {self.path} failed: {e}")
+        if extra is not None:
+            os.close(extra)
+        if reply is None:
+            raise NetworkError(f"Upload gateway at {self.path} closed the connection")
+        if 'error' in reply:
+            raise _error_from_message(reply['error'])
+        return reply
+
+    def upload(
+        self,
+        file_path: Union[str, Path],
+        filename: Optional[str] = None,
+        bandwidth_limit: Optional[float] = None,
+        checksums: Optional[Sequence[str]] = None
+    ) -> UploadResult:
+        """
+        Upload a file through the gateway
+
+        Raises:
+            NetworkError: If the gateway cannot be reached
+            TFLinkError: The exception raised by the gateway's upload
+        """
+        file_path = Path(file_path)
+        message = {
+            'op': 'upload',
+            'filename': filename or file_path.name,
+            'bandwidth_limit': bandwidth_limit,
+            'checksums': list(checksums) if checksums is not None else None,
+        }
+        if not self.pass_fds:
+            message['path'] = str(file_path.resolve())
+            return UploadResult.from_json(self._call(message)['result'])
+
+        try:
+            fd = os.open(file_path, os.O_RDONLY | getattr(os, 'O_BINARY', 0))
+        except OSError as e:
+            raise exceptions.FileNotFoundError(f"Cannot open {file_path}: {e}")
+        try:
+            return UploadResult.from_json(self._call(message, fd)['result'])
+        finally:
+            os.close(fd)
+
+    def stats(self) -> dict:
+        """Return the gateway's counters"""
+        return self._call({'op': 'stats'})['stats']
+
+    def __repr__(self) -> str:
+        """String representation of the gateway client"""
+        return f"GatewayClient('{self.path}')"
+
+
+class _Handler(socketserver.BaseRequestHandler):
+    """Serves the requests of one connection until the peer hangs up"""
+
+    server: '_Server'
+
+    def handle(self) -> None:
+        try:
+            peer_uid = _peer_uid(self.request)
+        except OSError:
+            return
+        while True:
+            try:
+                message, fd = _recv_frame(self.request)
+            except (OSError, ValueError):
+                return
+            if message is None:
+                return
+            try:
+                reply = self.server.gateway._dispatch(message, fd, peer_uid)
+            finally:
+                if fd is not None:
+                    os.close(fd)
+            try:
+                _send_frame(self.request, reply)
+            except OSError:
+                return
+
+
+if _UNIX_SOCKETS:
+    class _Server(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+        daemon_threads = True
+
+        def __init__(self, path: str, gateway: 'UploadGateway'):
+            self.gateway = gateway
+            super().__init__(path, _Handler)
+
+        def handle_error(self, request, client_address) -> None:
+            # A client that went away mid-request is not worth a traceback
+            pass
+
+
+class UploadGateway:
+    """
+    Sidecar that uploads files for other processes on the same host
+
+    Short-lived processes hand their uploads to the gateway over a Unix domain
+    socket instead of each building a TFLinkClient, so all uploads share one
+    connection pool (with warm TLS sessions), one bandwidth limit and one
+    dedup cache. File contents never pass through the socket: the thin client
+    sends an open file descriptor (SCM_RIGHTS) or a path, and the gateway
+    streams the file itself.
+
+    The dedup cache returns the earlier result when the same file (same
+    device, inode, size and modification time) is uploaded again under the
+    same name within ``dedup_ttl`` seconds.
+
+    The socket is created with ``mode`` permissions (owner only by default);
+    anyone who can connect can upload with the gateway's credentials. Its
+    directory must belong to the gateway's user with mode 0700, so another
+    user cannot plant a socket there first. A client running as another user
+    must send a file descriptor: requests by path are only accepted from the
+    gateway's own user (or root), since the gateway opens the path with its
+    own permissions. Unix domain sockets are required; on platforms without
+    them the gateway raises OSError.
+
+    On Linux each upload attempt reopens a passed descriptor with its own
+    file offset. On macOS and the BSDs the attempts share the sender's
+    offset: files up to the client's ``tiny_file_size`` are read with pread()
+    and are not affected, but larger files should not be hedged there, since
+    two concurrent attempts would read interleaved chunks.
+
+    Args:
+        path: Socket path (default: default_socket_path())
+        client: TFLinkClient used for the uploads (default: one built from
+            ``**client_kwargs``)
+        dedup_ttl: Seconds a result is reused for an unchanged file; 0
+            disables the cache (default: 3600)
+        dedup_entries: Most results kept in the dedup cache (default: 10000)
+        mode: Permissions of the socket file (default: 0o600)
+        **client_kwargs: Arguments for the TFLinkClient built by the gateway
+
+    Example:
+        with UploadGateway(pool_size=32, dns_cache=True) as gateway:
+            gateway.serve_forever()
+
+        # In every other process
+        client = TFLinkClient(gateway=True)
+    """
+
+    def __init__(
+        self,
+        path: Optional[Union[str, os.PathLike]] = None,
+        client: Optional['TFLinkClient'] = None,
+        dedup_ttl: float = 3600.0,
+        dedup_entries: int = 10000,
+        mode: int = 0o600,
+        **client_kwargs: Any
+    ):
+        """Bind the socket; call serve_forever() or start() to accept uploads"""
+        _require_unix_sockets()
+        if client is not None and client_kwargs:
+            raise ValueError("Pass either client or TFLinkClient arguments, not both")
+        if client is None:
+            from tflink.client import TFLinkClient
+
+            client = TFLinkClient(**client_kwargs)
+            self._owns_client = True
+        else:
+            self._owns_client = False
+        self.client = client
+        self.path = Path(path) if path is not None else default_socket_path()
+        self.dedup_ttl = dedup_ttl
+        self.dedup_entries = dedup_entries
+        self._dedup: 'OrderedDict[tuple, Tuple[float, UploadResult]]' = OrderedDict()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._serving: Optional[threading.Thread] = None
+
+        self.requests = 0
+        self.uploads = 0
+        self.dedup_hits = 0
+        self.errors = 0
+
+        try:
+            self._prepare_path()
+            self._server = _Server(str(self.path), self)
+            os.chmod(self.path, mode)
+        except BaseException:
+            if self._owns_client:
+                client.close()
+            raise
+
+    def _prepare_path(self) -> None:
+        """Create the socket directory and remove a socket left by a dead gateway"""
+        if self.path.parent != Path(tempfile.gettempdir()):
+            self.path.parent.mkdir(mode=0o700, parents=True, exist_ok=True)
+            _check_private_dir(self.path.parent)
+        try:
+            st = os.lstat(self.path)
+        except FileNotFoundError:
+            return
+        if not stat.S_ISSOCK(st.st_mode):
+            raise OSError(f"{self.path} exists and is not a socket")
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe:
+            try:
+                probe.connect(str(self.path))
+            except OSError:
+                os.unlink(self.path)
+                return
+        raise OSError(f"An upload gateway is already listening on {self.path}")
+
+    def _dispatch(self, message: dict, fd: Optional[int], peer_uid: Optional[int] = None) -> dict:
+        """Run one request from the user peer_uid and build the reply"""
+        with self._lock:
+            self.requests += 1
+        op = message.get('op')
+        if op == 'stats':
+            return {'stats': self.stats()}
+        if op != 'upload':
+            return {'error': {'type': 'TFLinkError', 'message': f"Unknown gateway operation: {op!r}"}}
+
+        try:
+            result = self._upload(message, fd, peer_uid)
+        except Exception as e:
+            with self._lock:
+                self.errors += 1
+            return {'error': {'type': type(e).__name__, 'message': str(e)}}
+        return {'result': result.to_json()}
+
+    def _upload(self, message: dict, fd: Optional[int], peer_uid: Optional[int]) -> UploadResult:
+        if fd is not None:
+            # Reopened through /dev/fd so every attempt (failover, hedging)
+            # has its own file offset. Only Linux opens the file anew there;
+            # macOS and the BSDs duplicate the descriptor, sharing one offset
+            # (see the class docstring)
+            path = Path(f'/dev/fd/{fd}')
+            st = os.fstat(fd)
+        elif message.get('path'):
+            # Opening a path uses the gateway's permissions, not the caller's
+            if peer_uid is not None and peer_uid not in (os.getuid(), 0):
+                raise exceptions.AuthenticationError(
+                    f"Uploads by path are only accepted from uid {os.getuid()}; "
+                    f"uid {peer_uid} must pass a file descriptor"
+                )
+            path = Path(message['path'])
+            try:
+                st = os.stat(path)
+            except OSError as e:
+                raise exceptions.FileNotFoundError(f"File not found: {path} ({e})")
+        else:
+            raise TFLinkError("Upload request has neither a path nor a file descriptor")
+
+        filename = message.get('filename') or path.name
+        checksums = message.get('checksums')
+        key = (
+            st.st_dev, st.st_ino, st.st_size, st.st_mtime_ns, filename,
+            tuple(checksums) if checksums is not None else None,
+        )
+        cached = self._cached(key)
+        if cached is not None:
+            return cached
+
+        result = self.client.upload(
+            path,
+            filename=filename,
+            bandwidth_limit=message.get('bandwidth_limit'),
+            checksums=checksums,
+        )
+        with self._lock:
+            self.uploads += 1
+            if self.dedup_ttl > 0 and stat.S_ISREG(st.st_mode):
+                self._dedup[key] = (time.monotonic() + self.dedup_ttl, result)
+                self._dedup.move_to_end(key)
+                while len(self._dedup) > self.dedup_entries:
+                    self._dedup.popitem(last=False)
+        return result
+
+    def _cached(self, key: tuple) -> Optional[UploadResult]:
+        """Return an unexpired result for key and count the hit"""
+        with self._lock:
+            entry = self._dedup.get(key)
+            if entry is None:
+                return None
+            expires, result = entry
+            if expires <= time.monotonic():
+                del self._dedup[key]
+                return None
+            self._dedup.move_to_end(key)
+            self.dedup_hits += 1
+            return result
+
+    def serve_forever(self) -> None:
+        """Accept uploads until stop() is called from another thread"""
+        self._serving = threading.current_thread()
+        try:
+            self._server.serve_forever(poll_interval=0.5)
+        finally:
+            self._serving = None
+
+    def start(self) -> 'UploadGateway':
+        """Serve from a background thread"""
+        self._thread = threading.Thread(
+            target=self.serve_forever, name="tflink-gateway", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Stop accepting uploads, remove the socket and close the client"""
+        serving = self._serving
+        if serving is not None and serving is not threading.current_thread():
+            self._server.shutdown()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self._server.server_close()
+        try:
+            os.unlink(self.path)
+        except OSError:
+            pass
+        if self._owns_client:
+            self.client.close()
+
+    def stats(self) -> dict:
+        """Return request, upload, dedup and error counters"""
+        with self._lock:
+            return {
+                'requests': self.requests,
+                'uploads': self.uploads,
+                'dedup_hits': self.dedup_hits,
+                'dedup_entries': len(self._dedup),
+                'errors': self.errors,
+            }
+
+    def __enter__(self) -> 'UploadGateway':
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.stop()
+
+    def __repr__(self) -> str:
+        """String representation of the gateway"""
+        return f"UploadGateway('{self.path}')"
@@ -0,0 +1,146 @@
+"""
+Hedged uploads: a second attempt for slow small uploads
+"""
+
+import threading
+from collections import deque
+from typing import Deque
+
+from tflink.models import UploadResult
+
+
+class HedgePolicy:
+    """
+    When to send a second copy of a small upload, and how often
+
+    An upload of at most ``max_size`` bytes that has not completed after the
+    ``percentile``-th percentile of recent upload latencies gets a second,
+    identical attempt. Whichever attempt succeeds first wins; the other one is
+    aborted. If the loser had already completed, its upload is a duplicate on
+    the server and is recorded in ``duplicates``.
+
+    Hedges are paid for from a budget: every eligible upload adds ``budget``
+    tokens (up to ``burst``) and each hedge spends one, so hedges never exceed
+    roughly ``budget`` times the number of small uploads even when the server
+    is slow for everyone.
+
+    Args:
+        max_size: Largest file in bytes that may be hedged (default: 1MB)
+        percentile: Latency percentile used as the hedge delay (default: 95)
+        budget: Hedges allowed per eligible upload (default: 0.1)
+        burst: Largest number of hedges that can be saved up (default: 10)
+        initial_delay: Hedge delay until ``min_samples`` latencies have been
+            observed (default: 1.0)
+        min_delay: Shortest hedge delay in seconds (default: 0.01)
+        window: Number of recent latencies kept (default: 200)
+        min_samples: Latencies needed before the percentile is used (default: 20)
+
+    Example:
+        client = TFLinkClient(hedge=HedgePolicy(max_size=256 * 1024, budget=0.05))
+    """
+
+    def __init__(
+        self,
+        max_size: int = 1024 * 1024,
+        percentile: float = 95.0,
+        budget: float = 0.1,
+        burst: float = 10.0,
+        initial_delay: float = 1.0,
+        min_delay: float = 0.01,
+        window: int = 200,
+        min_samples: int = 20
+    ):
+        """Create the policy with a full budget"""
+        if not 0 < percentile < 100:
+            raise ValueError("percentile must be between 0 and 100")
+        if budget < 0 or burst < 1:
+            raise ValueError("budget must not be negative and burst must be at least 1")
+
+        self.max_size = max_size
+        self.percentile = percentile
+        self.budget = budget
+        self.burst = burst
+        self.initial_delay = initial_delay
+        self.min_delay = min_delay
+        self.min_samples = min_samples
+        self._latencies: Deque[float] = deque(maxlen=window)
+        self._tokens = burst
+        self._lock = threading.Lock()
+
+        self.eligible = 0
+        self.hedged = 0
+        self.hedge_wins = 0
+        self.budget_exhausted = 0
+        self.cancelled = 0
+        self.duplicates: Deque[UploadResult] = deque(maxlen=100)
+        self.duplicate_count = 0
+
+    def applies_to(self, size: int) -> bool:
+        """True if an upload of size bytes may be hedged"""
+        return size <= self.max_size
+
+    def delay(self) -> float:
+        """Seconds to wait for the first attempt before hedging"""
+        with self._lock:
+            if len(self._latencies) < self.min_samples:
+                return self.initial_delay
+            ordered = sorted(self._latencies)
+        index = min(len(ordered) - 1, int(len(ordered) * self.percentile / 100))
+        return max(self.min_delay, ordered[index])
+
+    def start(self) -> None:
+        """Count an eligible upload and earn its share of the budget"""
+        with self._lock:
+            self.eligible += 1
+            self._tokens = min(self.burst, self._tokens + self.budget)
+
+    def try_hedge(self) -> bool:
+        """Spend one token on a hedge; False if the budget is exhausted"""
+        with self._lock:
+            if self._tokens < 1:
+                self.budget_exhausted += 1
+                return False
+            self._tokens -= 1
+            self.hedged += 1
+            return True
+
+    def observe(self, latency: float) -> None:
+        """Record the latency of a completed attempt"""
+        with self._lock:
+            self._latencies.append(latency)
+
+    def record_outcome(self, hedge_won: bool, loser_cancelled: bool) -> None:
+        """Record which attempt of a hedged upload won"""
+        with self._lock:
+            if hedge_won:
+                self.hedge_wins += 1
+            if loser_cancelled:
+                self.cancelled += 1
+
+    def record_duplicate(self, result: UploadResult) -> None:
+        """Record a losing attempt that completed anyway"""
+        with self._lock:
+            self.duplicates.append(result)
+            self.duplicate_count += 1
+
+    def stats(self) -> dict:
+        """Return hedging counters and the current hedge delay"""
+        delay = self.delay()
+        with self._lock:
+            return {
+                'eligible': self.eligible,
+                'hedged': self.hedged,
+                'hedge_wins': self.hedge_wins,
+                'cancelled': self.cancelled,
+                'duplicates': self.duplicate_count,
+                'budget_exhausted': self.budget_exhausted,
+                'tokens': self._tokens,
+                'delay': delay,
+            }
+
+    def __repr__(self) -> str:
+        """String representation of the policy"""
+        return (
+            f"HedgePolicy(max_size={self.max_size}, percentile={self.percentile}, "
+            f"budget={self.budget})"
+        )
@@ -0,0 +1,231 @@
+"""
+Write-ahead journal for resumable batch uploads
+"""
+
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+from tflink.models import UploadResult
+
+
+class UploadJournal:
+    """
+    Append-only journal recording the intent and completion of each upload
+
+    Every file in a batch gets a ``start`` record before its upload begins and a
+    ``done`` (or ``fail``) record once it finishes. When a crashed job is restarted
+    with the same journal, files with a ``done`` record are skipped and their
+    UploadResult is restored; everything else, including uploads that were in
+    flight at the time of the crash, is uploaded again.
+
+    Records are buffered in memory and written with a single ``write()`` per
+    flush. Losing unflushed records is safe: a lost ``done`` record only means the
+    file is uploaded once more on restart.
+
+    Args:
+        path: Location of the journal file (created if missing)
+        sync: Durability policy:
+            - "always": write and fsync after every record
+            - "batch": write and fsync every ``sync_every`` records or
+              ``sync_interval`` seconds, whichever comes first (default)
+            - "never": write when the buffer fills, never fsync
+        sync_every: Number of buffered records that triggers a flush (default: 64)
+        sync_interval: Maximum seconds between flushes in "batch" mode (default: 1.0)
+
+    Example:
+        with UploadJournal('batch.journal') as journal:
+            results = client.upload_batch(paths, journal=journal)
+    """
+
+    SYNC_POLICIES = ('always', 'batch', 'never')
+
+    def __init__(
+        self,
+        path: Union[str, Path],
+        sync: str = 'batch',
+        sync_every: int = 64,
+        sync_interval: float = 1.0
+    ):
+        """Open the journal and load any existing records"""
+        if sync not in self.SYNC_POLICIES:
+            raise ValueError(
+                f"sync must be one of {', '.join(self.SYNC_POLICIES)}, got {sync!r}"
+            )
+        if sync_every < 1:
+            raise ValueError("sync_every must be at least 1")
+
+        self.path = Path(path)
+        self.sync = sync
+        self.sync_every = sync_every
+        self.sync_interval = sync_interval
+
+        self._lock = threading.Lock()
+        self._buffer: List[str] = []
+        self._last_flush = time.monotonic()
+        self._completed: Dict[str, UploadResult] = {}
+        # Key -> identity of the file that was uploaded, when recorded
+        self._signatures: Dict[str, Optional[Tuple[int, ...]]] = {}
+        self._in_flight: Dict[str, None] = {}
+
+        self._load()
+        self._file = open(self.path, 'a', encoding='utf-8')
+
+    @staticmethod
+    def key_for(file_path: Union[str, Path]) -> str:
+        """Return the journal key used for a file path"""
+        return str(Path(file_path).resolve())
+
+    def _load(self) -> None:
+        """Replay existing records to rebuild completed and in-flight state"""
+        if not self.path.exists():
+            return
+
+        complete = 0
+        with open(self.path, 'rb') as f:
+            for line in f:
+                if not line.endswith(b'\n'):
+                    # A torn final line from a crash mid-write is expected
+                    break
+                complete += len(line)
+                try:
+                    record = json.loads(line.decode('utf-8'))
+                    op = record['op']
+                    key = record['key']
+                    result = UploadResult.from_json(record['result']) if op == 'done' else None
+                    signature = record.get('signature')
+                    signature = tuple(int(v) for v in signature) if signature else None
+                except (ValueError, KeyError, TypeError):
+                    continue
+
+                if op == 'start':
+                    self._in_flight[key] = None
+                elif op == 'done':
+                    self._in_flight.pop(key, None)
+                    self._completed[key] = result
+                    self._signatures[key] = signature
+                elif op == 'fail':
+                    self._in_flight.pop(key, None)
+
+        if complete < self.path.stat().st_size:
+            # Cut the torn line off, or the next record would be appended to it
+            with open(self.path, 'r+b') as f:
+                f.truncate(complete)
+
+    def completed(self) -> Dict[str, UploadResult]:
+        """Return a mapping of journal key to UploadResult for finished uploads"""
+        with self._lock:
+            return dict(self._completed)
+
+    def in_flight(self) -> List[str]:
+        """Return keys of uploads that were started but never finished"""
+        with self._lock:
+            return list(self._in_flight)
+
+    def is_completed(
+        self,
+        file_path: Union[str, Path],
+        signature: Optional[Sequence[int]] = None
+    ) -> bool:
+        """
+        Check whether a file already has a completion record
+
+        Args:
+            file_path: File to look up
+            signature: Identity of the file now at the path (for example its
+                size, mtime and inode); when given, only a record made with the
+                same signature counts, so a new file under an old name does not
+        """
+        key = self.key_for(file_path)
+        with self._lock:
+            if key not in self._completed:
+                return False
+            return signature is None or self._signatures.get(key) == tuple(signature)
+
+    def get_result(self, file_path: Union[str, Path]) -> Optional[UploadResult]:
+        """Return the recorded UploadResult for a file, if any"""
+        key = self.key_for(file_path)
+        with self._lock:
+            return self._completed.get(key)
+
+    def record_start(self, file_path: Union[str, Path]) -> None:
+        """Record the intent to upload a file"""
+        key = self.key_for(file_path)
+        with self._lock:
+            self._in_flight[key] = None
+            self._append({'op': 'start', 'key': key})
+
+    def record_done(
+        self,
+        file_path: Union[str, Path],
+        result: UploadResult,
+        signature: Optional[Sequence[int]] = None
+    ) -> None:
+        """Record a successful upload, its result and optionally the file's signature"""
+        key = self.key_for(file_path)
+        record = {'op': 'done', 'key': key, 'result': result.to_json()}
+        if signature is not None:
+            record['signature'] = list(signature)
+        with self._lock:
+            self._in_flight.pop(key, None)
+            self._completed[key] = result
+            self._signatures[key] = tuple(signature) if signature is not None else None
+            self._append(record)
+
+    def record_failed(self, file_path: Union[str, Path], error: Exception) -> None:
+        """Record a failed upload so it is retried on the next run"""
+        key = self.key_for(file_path)
+        with self._lock:
+            self._in_flight.pop(key, None)
+            self._append({'op': 'fail', 'key': key, 'error': str(error)})
+
+    def _append(self, record: dict) -> None:
+        """Buffer a record and flush according to the sync policy (lock held)"""
+        self._buffer.append(json.dumps(record, separators=(',', ':')) + '\n')
+
+        if self.sync == 'always':
+            self._flush_locked(fsync=True)
+        elif len(self._buffer) >= self.sync_every:
+            self._flush_locked(fsync=self.sync == 'batch')
+        elif self.sync == 'batch' and time.monotonic() - self._last_flush >= self.sync_interval:
+            self._flush_locked(fsync=True)
+
+    def _flush_locked(self, fsync: bool) -> None:
+        """Write buffered records in one call and optionally fsync (lock held)"""
+        if self._buffer:
+            self._file.write(''.join(self._buffer))
+            self._buffer.clear()
+            self._file.flush()
+            if fsync:
+                os.fsync(self._file.fileno())
+        self._last_flush = time.monotonic()
+
+    def flush(self) -> None:
+        """Write and fsync all buffered records"""
+        with self._lock:
+            if not self._file.closed:
+                self._flush_locked(fsync=self.sync != 'never')
+
+    def close(self) -> None:
+        """Flush buffered records and close the journal file"""
+        with self._lock:
+            if self._file.closed:
+                return
+            self._flush_locked(fsync=self.sync != 'never')
+            self._file.close()
+
+    def __enter__(self) -> 'UploadJournal':
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
+
+    def __repr__(self) -> str:
+        """String representation of the journal"""
+        return (
+            f"UploadJournal(path='{self.path}', sync='{self.sync}', "
+            f"completed={len(self._completed)})"
+        )
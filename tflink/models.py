@@ -2,8 +2,11 @@
 Data models for tflink
 """
 
-from dataclasses import dataclass
-from typing import Optional
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Dict, Optional
+
+if TYPE_CHECKING:
+    from tflink.verify import LinkCheck
 
 
 @dataclass
@@ -22,6 +25,9 @@ class UploadResult:
         size: File size in bytes
         file_type: MIME type of the file
         uploaded_to: Upload destination (e.g., "public" or "user: USER_ID")
+        checksums: Digests of the uploaded bytes computed while streaming,
+            keyed by algorithm name (e.g. {"sha256": "..."}); empty unless
+            checksums were requested
 
     Note:
         Both links point to the same file. The difference is in encoding:
@@ -37,6 +43,7 @@ class UploadResult:
     size: int
     file_type: str
     uploaded_to: str
+    checksums: Dict[str, str] = field(default_factory=dict)
 
     @classmethod
     def from_json(cls, data: dict) -> 'UploadResult':
@@ -55,9 +62,30 @@ class UploadResult:
             download_link_encoded=data['downloadLinkEncoded'],
             size=data['size'],
             file_type=data['type'],
-            uploaded_to=data['uploadedTo']
+            uploaded_to=data['uploadedTo'],
+            checksums=dict(data.get('checksums') or {})
         )
 
+    def to_json(self) -> dict:
+        """
+        Convert UploadResult back into the API's JSON structure
+
+        Returns:
+            Dictionary accepted by from_json(); includes a "checksums" key when
+            checksums were computed
+        """
+        data = {
+            'fileName': self.file_name,
+            'downloadLink': self.download_link,
+            'downloadLinkEncoded': self.download_link_encoded,
+            'size': self.size,
+            'type': self.file_type,
+            'uploadedTo': self.uploaded_to,
+        }
+        if self.checksums:
+            data['checksums'] = dict(self.checksums)
+        return data
+
     def __str__(self) -> str:
         """String representation showing the download link"""
         return f"UploadResult(file_name='{self.file_name}', download_link='{self.download_link}')"
@@ -70,3 +98,27 @@ class UploadResult:
             f"size={self.size}, "
             f"file_type='{self.file_type}')"
         )
+
+
+@dataclass
+class BatchResult:
+    """
+    Represents the outcome of one file in a batch upload
+
+    Attributes:
+        file_path: Path of the file as passed to upload_batch()
+        result: UploadResult if the upload succeeded, otherwise None
+        error: Exception raised by the upload, otherwise None
+        skipped: True if the result was restored from a journal instead of uploaded
+        link_check: Outcome of download link verification, if it was requested
+    """
+    file_path: str
+    result: Optional[UploadResult] = None
+    error: Optional[Exception] = None
+    skipped: bool = False
+    link_check: Optional['LinkCheck'] = None
+
+    @property
+    def ok(self) -> bool:
+        """True if the file has a successful UploadResult"""
+        return self.result is not None
@@ -0,0 +1,114 @@
+"""
+Coalescing concurrent identical calls into one
+"""
+
+import copy
+import threading
+from typing import Any, Callable, Dict, Hashable, Optional
+
+from tflink.exceptions import UploadError
+
+
+class _Call:
+    """One in-flight call and the outcome its waiters receive"""
+
+    __slots__ = ('done', 'result', 'error', 'waiters')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+        self.waiters = 0
+
+
+def _follower_error(error: BaseException) -> BaseException:
+    """A fresh exception like error, for one waiting thread to raise"""
+    try:
+        copied = copy.copy(error)
+    except Exception:
+        copied = None
+    if type(copied) is not type(error):
+        return UploadError(f"Shared upload failed: {error}")
+    return copied
+
+
+class SingleFlight:
+    """
+    Runs at most one call per key at a time and shares its outcome
+
+    The first thread to call ``do(key, fn)`` runs ``fn``; threads calling
+    with the same key while it runs wait for it and get the same return
+    value without running ``fn`` themselves. If ``fn`` raises, each waiter
+    raises a copy of the exception, chained to the original with ``from``:
+    raising one exception object in several threads would mix their
+    tracebacks.
+    Once the call finishes the key is forgotten, so this is not a cache: a
+    later call runs ``fn`` again.
+
+    If the running call is interrupted by an exception that is not an
+    Exception (KeyboardInterrupt, SystemExit), waiters get an UploadError
+    instead, since the interrupt was meant for the calling thread only.
+
+    Example:
+        flights = SingleFlight()
+        result = flights.do(('/data/report.pdf', 1024, 1700000000), lambda: upload(...))
+    """
+
+    def __init__(self):
+        """Create an empty call table"""
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+        self.calls = 0
+        self.coalesced = 0
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        """Run fn, or wait for the call already running under key"""
+        with self._lock:
+            call = self._calls.get(key)
+            if call is None:
+                call = self._calls[key] = _Call()
+                self.calls += 1
+                leader = True
+            else:
+                call.waiters += 1
+                self.coalesced += 1
+                leader = False
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise _follower_error(call.error) from call.error
+            return call.result
+
+        try:
+            call.result = fn()
+        except Exception as e:
+            call.error = e
+            raise
+        except BaseException as e:
+            call.error = UploadError(f"Shared upload was interrupted: {type(e).__name__}")
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result
+
+    def in_flight(self) -> int:
+        """Number of keys with a call running"""
+        with self._lock:
+            return len(self._calls)
+
+    def _reset(self) -> None:
+        """Forget calls of another process (after fork, where their threads do not exist)"""
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def stats(self) -> dict:
+        """Return calls made, calls that joined one in flight, and keys in flight"""
+        with self._lock:
+            return {
+                'calls': self.calls,
+                'coalesced': self.coalesced,
+                'in_flight': len(self._calls),
+            }
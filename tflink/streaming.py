@@ -0,0 +1,356 @@
+"""
+Streaming multipart/form-data request bodies
+"""
+
+import binascii
+import io
+import os
+import queue
+import socket
+import ssl
+import threading
+from typing import BinaryIO, Callable, Dict, Iterator, Optional, Sequence, Tuple, Union
+
+from tflink.checksums import Checksummer
+from tflink.exceptions import UploadCancelledError
+from tflink.throttle import TokenBucket, throttle
+from tflink.timeouts import cancel_reason
+
+
+def choose_boundary() -> str:
+    """Return a random multipart boundary"""
+    return binascii.hexlify(os.urandom(16)).decode()
+
+
+def format_header_param(name: str, value: str) -> str:
+    """
+    Format a Content-Disposition parameter the way browsers and curl do
+
+    Values are UTF-8 and only newline, carriage return and double quote are
+    percent-encoded (WHATWG HTML Standard).
+    """
+    value = value.translate({10: "%0A", 13: "%0D", 34: "%22"})
+    return f'{name}="{value}"'
+
+
+class MultipartTemplate:
+    """
+    Multipart envelope prepared once and reused for in-memory file bodies
+
+    Small files are sent as a single bytes body: the boundary, Content-Type
+    value, the constant parts of the part header and the epilogue are built
+    once (per client), so preparing a request only formats the file name and
+    joins three byte strings. The boundary is checked against the data, and
+    a one-off boundary is used for the rare body that contains it.
+
+    Args:
+        field_name: Form field name (default: "file")
+    """
+
+    def __init__(self, field_name: str = 'file'):
+        """Choose the boundary and build the constant parts"""
+        self.field_name = field_name
+        self.boundary = choose_boundary()
+        self.content_type = f"multipart/form-data; boundary={self.boundary}"
+        self._marker = self.boundary.encode('ascii')
+        self._head = (
+            f"--{self.boundary}\r\n"
+            f"Content-Disposition: form-data; {format_header_param('name', field_name)}; "
+        ).encode('utf-8')
+        self._epilogue = f"\r\n--{self.boundary}--\r\n".encode('ascii')
+
+    def render(self, filename: str, data: bytes) -> Tuple[str, bytes]:
+        """Return (Content-Type value, body) for a file named filename holding data"""
+        if self._marker in data:
+            return MultipartTemplate(self.field_name).render(filename, data)
+        disposition = (format_header_param('filename', filename) + "\r\n\r\n").encode('utf-8')
+        return self.content_type, b''.join((self._head, disposition, data, self._epilogue))
+
+
+class ReadAhead:
+    """
+    Reads a file on a background thread into a ring of reusable buffers
+
+    The reader fills up to ``depth`` preallocated buffers with ``readinto``
+    while the consumer sends earlier ones, so a slow disk (NFS, spinning
+    media) and the network are busy at the same time. Iterating yields
+    memoryview slices of the buffers; a buffer goes back to the reader when
+    the consumer asks for the next chunk, so a chunk must be used (sent,
+    hashed) before advancing.
+
+    Args:
+        fileobj: Binary file object positioned where reading should start
+        size: Number of bytes to read at most
+        depth: Number of buffers in the ring
+        buffer_size: Size of each buffer in bytes
+    """
+
+    def __init__(self, fileobj: BinaryIO, size: int, depth: int, buffer_size: int):
+        """Allocate the buffers; the reader starts when iteration begins"""
+        if depth < 1 or buffer_size < 1:
+            raise ValueError("depth and buffer_size must be at least 1")
+        self.fileobj = fileobj
+        self.size = size
+        self.buffers = [bytearray(buffer_size) for _ in range(depth)]
+        self._free: queue.Queue = queue.Queue()
+        self._filled: queue.Queue = queue.Queue()
+        self._stopped = False
+
+    def _read(self) -> None:
+        """Reader thread: fill free buffers until size bytes or EOF"""
+        readinto = self.fileobj.readinto
+        remaining = self.size
+        try:
+            while remaining > 0:
+                index = self._free.get()
+                if self._stopped:
+                    return
+                view = memoryview(self.buffers[index])[:remaining]
+                filled = 0
+                # readinto may return short counts (pipes, network filesystems)
+                while filled < len(view):
+                    n = readinto(view[filled:])
+                    if not n:
+                        break
+                    filled += n
+                if filled:
+                    self._filled.put((index, filled))
+                    remaining -= filled
+                if filled < len(view):
+                    break
+        except BaseException as e:
+            self._filled.put(e)
+            return
+        self._filled.put(None)
+
+    def __iter__(self) -> Iterator[memoryview]:
+        """Yield chunks in file order; stops the reader when closed early"""
+        self._stopped = False
+        for index in range(len(self.buffers)):
+            self._free.put(index)
+        reader = threading.Thread(target=self._read, name="tflink-readahead", daemon=True)
+        reader.start()
+        try:
+            while True:
+                item = self._filled.get()
+                if item is None:
+                    return
+                if isinstance(item, BaseException):
+                    raise item
+                index, length = item
+                yield memoryview(self.buffers[index])[:length]
+                self._free.put(index)
+        finally:
+            self._stopped = True
+            self._free.put(-1)
+            reader.join()
+
+
+class MultipartBody:
+    """
+    A multipart/form-data body holding a single file field, streamed in chunks
+
+    Unlike ``requests.post(files=...)``, which builds the whole body in memory,
+    the file is read one chunk at a time while the request is being sent. The
+    body length is known up front, so the request carries a Content-Length
+    header rather than using chunked transfer encoding.
+
+    Iterating the body yields the preamble, the file contents and the epilogue.
+    Every file chunk is charged to the given token buckets before it is yielded,
+    which is where bandwidth limits are enforced, and fed to the configured
+    checksums, so digests cost no second read of the file.
+
+    Args:
+        fileobj: Binary file object opened at offset 0
+        filename: File name sent in the Content-Disposition header
+        size: Number of bytes of fileobj to send
+        field_name: Form field name (default: "file")
+        chunk_size: Bytes read per chunk (default: 256KB)
+        read_ahead: Number of chunks read ahead on a background thread while
+            earlier ones are sent; 0 reads each chunk just before sending it
+            (default: 0). Not used when fileobj is a fileio.MappedFile, whose
+            chunks are memoryview slices of the mapping
+        sendfile: Send the file contents with os.sendfile() straight from
+            fileobj to the socket passed to use_socket(), when that socket is
+            plain TCP (not TLS) and no checksums are computed;
+            otherwise the body is streamed as usual (default: False)
+        buckets: Token buckets to charge for each chunk
+        checksums: Names of digests to compute over the file contents
+        progress: Called with the size of each part once it has been sent, and
+            with 0 when a chunk is about to be sent after any throttling wait
+        cancel: Event checked before every chunk; once it is set, iteration
+            raises UploadCancelledError (default: none)
+    """
+
+    DEFAULT_CHUNK_SIZE = 256 * 1024
+
+    def __init__(
+        self,
+        fileobj: BinaryIO,
+        filename: str,
+        size: int,
+        field_name: str = 'file',
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        buckets: Sequence[Optional[TokenBucket]] = (),
+        checksums: Sequence[str] = (),
+        progress: Optional[Callable[[int], None]] = None,
+        read_ahead: int = 0,
+        sendfile: bool = False,
+        cancel: Optional[threading.Event] = None
+    ):
+        """Precompute the multipart envelope"""
+        self.fileobj = fileobj
+        self.filename = filename
+        self.size = size
+        self.chunk_size = chunk_size
+        self.read_ahead = read_ahead
+        self.sendfile = sendfile
+        self._sock: Optional[socket.socket] = None
+        self.buckets = buckets
+        self.checksums = tuple(checksums)
+        self.checksummer = Checksummer(self.checksums)
+        self.progress = progress
+        self.cancel = cancel
+        self.boundary = choose_boundary()
+
+        disposition = (
+            f"form-data; {format_header_param('name', field_name)}; "
+            f"{format_header_param('filename', filename)}"
+        )
+        self.preamble = (
+            f"--{self.boundary}\r\n"
+            f"Content-Disposition: {disposition}\r\n\r\n"
+        ).encode('utf-8')
+        self.epilogue = f"\r\n--{self.boundary}--\r\n".encode('ascii')
+
+        self.bytes_sent = 0
+        self._started = False
+
+    @property
+    def content_type(self) -> str:
+        """Value for the request's Content-Type header"""
+        return f"multipart/form-data; boundary={self.boundary}"
+
+    def use_socket(self, sock: socket.socket) -> None:
+        """Give the body the socket it is about to be written to (for sendfile)"""
+        self._sock = sock
+
+    def _zero_copy_socket(self) -> Optional[socket.socket]:
+        """Return the socket to sendfile() to, or None to stream through Python"""
+        sock, self._sock = self._sock, None
+        if sock is None or not self.sendfile or self.checksums or not hasattr(os, 'sendfile'):
+            return None
+        try:
+            self.fileobj.fileno()
+        except (AttributeError, OSError, ValueError, io.UnsupportedOperation):
+            return None
+        if isinstance(sock, ssl.SSLSocket):
+            # SSLSocket.sendfile() encrypts in userspace: it copies anyway
+            return None
+        return sock
+
+    def _sendfile(self, sock: socket.socket) -> int:
+        """Send the file contents with sendfile(); return the bytes missing at EOF"""
+        progress = self.progress
+        offset = 0
+        remaining = self.size
+        while remaining > 0:
+            count = min(self.chunk_size, remaining)
+            throttle(self.buckets, count)
+            self._check_cancelled()
+            if progress is not None:
+                progress(0)
+            sent = sock.sendfile(self.fileobj, offset, count)
+            if not sent:
+                break
+            offset += sent
+            remaining -= sent
+            self.bytes_sent += sent
+            if progress is not None:
+                progress(sent)
+        return remaining
+
+    def _check_cancelled(self) -> None:
+        cancel = self.cancel
+        if cancel is not None and cancel.is_set():
+            raise UploadCancelledError(cancel_reason(cancel))
+
+    def __len__(self) -> int:
+        """Total body length in bytes"""
+        return len(self.preamble) + self.size + len(self.epilogue)
+
+    def __iter__(self) -> Iterator[bytes]:
+        """Yield the body; restarting iteration resends it from the beginning"""
+        if self._started:
+            self.fileobj.seek(0)
+        self._started = True
+        self.bytes_sent = 0
+        self.checksummer = Checksummer(self.checksums)
+        checksummer = self.checksummer if self.checksummer else None
+        progress = self.progress
+
+        if progress is not None:
+            progress(0)
+        yield self.preamble
+        if progress is not None:
+            progress(len(self.preamble))
+
+        sock = self._zero_copy_socket()
+        if sock is not None:
+            # The preamble is on the wire, so the file can follow it directly
+            remaining = self._sendfile(sock)
+            chunks: Iterator[Union[bytes, memoryview]] = iter(())
+        else:
+            remaining = self.size
+            chunks = self._file_chunks()
+        for chunk in chunks:
+            throttle(self.buckets, len(chunk))
+            self._check_cancelled()
+            if checksummer is not None:
+                checksummer.update(chunk)
+            remaining -= len(chunk)
+            self.bytes_sent += len(chunk)
+            if progress is not None:
+                progress(0)
+            yield chunk
+            if progress is not None:
+                progress(len(chunk))
+        if remaining > 0:
+            raise OSError(
+                f"File shrank during upload: expected {self.size} bytes, "
+                f"got {self.size - remaining}"
+            )
+
+        yield self.epilogue
+        if progress is not None:
+            progress(len(self.epilogue))
+
+    def _file_chunks(self) -> Iterator[Union[bytes, memoryview]]:
+        """Yield the file contents, at most size bytes, stopping early at EOF"""
+        view = getattr(self.fileobj, 'view', None)
+        if view is not None:
+            # Memory-mapped file (fileio.MappedFile): slices, no copies
+            offset = 0
+            while offset < self.size:
+                chunk = view(offset, min(self.chunk_size, self.size - offset))
+                if not chunk:
+                    return
+                offset += len(chunk)
+                yield chunk
+            return
+
+        if self.read_ahead > 0 and self.size > self.chunk_size:
+            yield from ReadAhead(self.fileobj, self.size, self.read_ahead, self.chunk_size)
+            return
+
+        remaining = self.size
+        while remaining > 0:
+            chunk = self.fileobj.read(min(self.chunk_size, remaining))
+            if not chunk:
+                return
+            remaining -= len(chunk)
+            yield chunk
+
+    def hexdigests(self) -> Dict[str, str]:
+        """Return the digests of the file contents sent so far"""
+        return self.checksummer.hexdigests()
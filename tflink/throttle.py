@@ -0,0 +1,125 @@
+"""
+Token-bucket bandwidth limiting for uploads
+"""
+
+import threading
+import time
+from typing import Iterable, Optional
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket measured in bytes
+
+    Senders reserve tokens for a whole chunk *before* sending it and are told how
+    long to wait. The bucket may go into debt, so concurrent senders queue up
+    behind each other and the long-run rate never exceeds ``rate``. Waits shorter
+    than ``min_sleep`` are skipped and carried as debt into the next reservation,
+    which keeps the number of sleeps (and wake-ups) low regardless of chunk size.
+
+    Args:
+        rate: Bytes per second, or None for unlimited
+        burst: Maximum bytes that can be sent back-to-back after an idle
+            period (default: a quarter of a second worth of rate)
+        min_sleep: Shortest wait worth sleeping for, in seconds (default: 0.02)
+
+    Example:
+        bucket = TokenBucket(10 * 1024 * 1024)  # 10 MB/s
+        time.sleep(bucket.reserve(len(chunk)))
+    """
+
+    def __init__(
+        self,
+        rate: Optional[float] = None,
+        burst: Optional[float] = None,
+        min_sleep: float = 0.02
+    ):
+        """Create a bucket that starts full"""
+        self._lock = threading.Lock()
+        self._burst_override = burst
+        self.min_sleep = min_sleep
+        self._rate: Optional[float] = None
+        self._burst = 0.0
+        self._tokens = 0.0
+        self._last = time.monotonic()
+        self.set_rate(rate)
+        self._tokens = self._burst
+
+    @property
+    def rate(self) -> Optional[float]:
+        """Current rate in bytes per second (None means unlimited)"""
+        return self._rate
+
+    def set_rate(self, rate: Optional[float]) -> None:
+        """
+        Change the rate; takes effect for the next reservation of every sender
+
+        Args:
+            rate: Bytes per second, or None to remove the limit
+        """
+        if rate is not None and rate <= 0:
+            raise ValueError("rate must be positive or None")
+
+        with self._lock:
+            self._refill(time.monotonic())
+            self._rate = float(rate) if rate is not None else None
+            if self._rate is None:
+                self._burst = 0.0
+                self._tokens = 0.0
+            else:
+                self._burst = float(
+                    self._burst_override if self._burst_override is not None
+                    else self._rate / 4
+                )
+                self._tokens = min(self._tokens, self._burst)
+
+    def _refill(self, now: float) -> None:
+        """Add tokens for the time elapsed since the last refill (lock held)"""
+        if self._rate is not None:
+            self._tokens = min(self._burst, self._tokens + (now - self._last) * self._rate)
+        self._last = now
+
+    def reserve(self, nbytes: int) -> float:
+        """
+        Take nbytes from the bucket
+
+        Args:
+            nbytes: Number of bytes about to be sent
+
+        Returns:
+            Seconds the caller should sleep before sending (0.0 if none)
+        """
+        if self._rate is None:
+            return 0.0
+
+        with self._lock:
+            rate = self._rate
+            if rate is None:
+                return 0.0
+            self._refill(time.monotonic())
+            self._tokens -= nbytes
+            if self._tokens >= 0:
+                return 0.0
+            delay = -self._tokens / rate
+
+        return delay if delay >= self.min_sleep else 0.0
+
+    def __repr__(self) -> str:
+        """String representation of the bucket"""
+        return f"TokenBucket(rate={self._rate})"
+
+
+def throttle(buckets: Iterable[Optional[TokenBucket]], nbytes: int) -> None:
+    """
+    Reserve nbytes from every bucket and sleep once for the longest wait
+
+    Args:
+        buckets: Token buckets to charge (None entries are ignored)
+        nbytes: Number of bytes about to be sent
+    """
+    delay = 0.0
+    for bucket in buckets:
+        if bucket is not None:
+            delay = max(delay, bucket.reserve(nbytes))
+    if delay:
+        time.sleep(delay)
@@ -0,0 +1,338 @@
+"""
+Per-upload deadlines and stall detection
+"""
+
+import socket
+import threading
+import time
+from typing import Callable, List, Optional, Set
+
+# Deadline of the upload running on the current thread, read by the pooled
+# connection class so the watchdog can reach the socket
+_current = threading.local()
+
+
+def current_deadline() -> Optional['UploadDeadline']:
+    """Return the deadline registered for the calling thread, if any"""
+    return getattr(_current, 'deadline', None)
+
+
+class UploadDeadline:
+    """
+    Time limits for one upload request
+
+    The body counts as stalled when no bytes have been handed to the socket for
+    ``stall_timeout`` seconds while it is being sent. Time spent waiting for a
+    bandwidth limit does not count. Once the body is sent, only the total
+    deadline (and the socket read timeout) apply, so slow server-side
+    processing is not mistaken for a stall.
+
+    Args:
+        total: Seconds the whole request may take (default: no limit)
+        stall_timeout: Seconds without progress while sending the body before
+            the request is aborted (default: no stall detection)
+        body_size: Length of the request body in bytes
+        send_timeout: Socket timeout while sending the body; urllib3 would
+            otherwise keep the connect timeout (default: leave unchanged)
+        cancel: Event that cancels the request once set; a CancelToken
+            aborts it at once, a plain Event is polled by the watchdog
+            (default: not cancellable)
+        expires: Monotonic time at which the total deadline runs out, for a
+            request that is one attempt of an upload whose clock started
+            earlier (default: total seconds from now)
+    """
+
+    def __init__(
+        self,
+        total: Optional[float],
+        stall_timeout: Optional[float],
+        body_size: int,
+        send_timeout: Optional[float] = None,
+        cancel: Optional[threading.Event] = None,
+        expires: Optional[float] = None
+    ):
+        """Start the clock"""
+        now = time.monotonic()
+        self.started = now
+        self.total = total
+        if expires is None and total is not None:
+            expires = now + total
+        self.expires = expires
+        self.stall_timeout = stall_timeout
+        self.body_size = body_size
+        self.send_timeout = send_timeout
+        self.cancel = cancel
+        self.bytes_sent = 0
+        # Set when the body starts streaming; connecting is bounded by the
+        # connect timeout instead
+        self.last_progress: Optional[float] = None
+        self.reason: Optional[str] = None
+        self._conn = None
+        self._lock = threading.Lock()
+
+    def progress(self, nbytes: int) -> None:
+        """Record bytes handed to the socket (0 marks the start of a send)"""
+        self.bytes_sent += nbytes
+        self.last_progress = time.monotonic()
+
+    @property
+    def watched(self) -> bool:
+        """True if the deadline needs the watchdog"""
+        return (
+            self.total is not None
+            or self.stall_timeout is not None
+            or (self.cancel is not None and not isinstance(self.cancel, CancelToken))
+        )
+
+    @property
+    def body_sent(self) -> bool:
+        return self.bytes_sent >= self.body_size
+
+    @property
+    def stall_at(self) -> Optional[float]:
+        """Monotonic time at which the body counts as stalled, if it is streaming"""
+        if self.stall_timeout is None or self.last_progress is None or self.body_sent:
+            return None
+        return self.last_progress + self.stall_timeout
+
+    def attach(self, conn) -> None:
+        """Remember the connection carrying the request"""
+        with self._lock:
+            self._conn = conn
+            aborted = self.reason is not None
+        if aborted:
+            self._shutdown(conn)
+
+    def check(self, now: float) -> Optional[str]:
+        """Return why the request should be aborted at time now, or None"""
+        if self.cancel is not None and self.cancel.is_set():
+            return cancel_reason(self.cancel)
+        if self.expires is not None and now >= self.expires:
+            return f"Upload exceeded its {self.total:.1f}s deadline"
+        stall_at = self.stall_at
+        if stall_at is not None and now >= stall_at:
+            return f"Upload stalled: no data sent for {self.stall_timeout:.1f}s"
+        return None
+
+    def abort(self, reason: str) -> None:
+        """Unblock the request by shutting its socket down"""
+        with self._lock:
+            if self.reason is not None:
+                return
+            self.reason = reason
+            conn = self._conn
+        if conn is not None:
+            self._shutdown(conn)
+
+    @staticmethod
+    def _shutdown(conn) -> None:
+        sock = getattr(conn, 'sock', None)
+        if sock is None:
+            return
+        try:
+            # socket.socket.shutdown bypasses SSLSocket.shutdown, which would
+            # tear down TLS state still in use by the sending thread
+            socket.socket.shutdown(sock, socket.SHUT_RDWR)
+        except OSError:
+            pass
+
+    def __enter__(self) -> 'UploadDeadline':
+        _current.deadline = self
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        _current.deadline = None
+
+
+def cancel_reason(cancel: threading.Event) -> str:
+    """Message for an upload cancelled through cancel"""
+    return getattr(cancel, 'reason', None) or "Upload cancelled"
+
+
+class CancelToken(threading.Event):
+    """
+    Cancels the uploads it is passed to, from any thread
+
+    A CancelToken is a threading.Event, so code that already signals
+    shutdown with an Event can pass that instead; the difference is that
+    cancel() (or set()) aborts the uploads in flight at once, shutting their
+    sockets down mid-chunk or while they wait for the response, whereas a
+    plain Event is noticed before the next chunk and by the client's
+    watchdog within half a second. Uploads that have not started yet fail
+    without being sent. clear() makes the token usable for new uploads.
+
+    Example:
+        token = CancelToken()
+        future = engine.submit('video.mp4', cancel=token)
+        ...
+        token.cancel("Job cancelled by user")
+    """
+
+    def __init__(self):
+        """Create a token that has not been cancelled"""
+        super().__init__()
+        self.reason: Optional[str] = None
+        self._callbacks: List[Callable[[str], None]] = []
+        self._lock = threading.Lock()
+
+    @property
+    def cancelled(self) -> bool:
+        return self.is_set()
+
+    def cancel(self, reason: str = "Upload cancelled") -> None:
+        """Cancel every upload using the token; later calls keep the first reason"""
+        with self._lock:
+            if self.is_set():
+                return
+            self.reason = reason
+            super().set()
+            callbacks = list(self._callbacks)
+        for callback in callbacks:
+            callback(reason)
+
+    def set(self) -> None:
+        self.cancel()
+
+    def clear(self) -> None:
+        """Reset the token so that it can cancel further uploads"""
+        with self._lock:
+            super().clear()
+            self.reason = None
+
+    def subscribe(self, callback: Callable[[str], None]) -> None:
+        """Call callback(reason) on cancel(); at once if already cancelled"""
+        with self._lock:
+            reason = self.reason if self.is_set() else None
+            if reason is None:
+                self._callbacks.append(callback)
+        if reason is not None:
+            callback(reason)
+
+    def unsubscribe(self, callback: Callable[[str], None]) -> None:
+        """Stop calling callback"""
+        with self._lock:
+            try:
+                self._callbacks.remove(callback)
+            except ValueError:
+                pass
+
+
+class Watchdog:
+    """
+    Background thread that aborts uploads past their deadline or stalled
+
+    The thread starts on first use and is shared by all uploads of one client.
+
+    Args:
+        interval: Longest time between checks in seconds (default: 0.5)
+    """
+
+    def __init__(self, interval: float = 0.5):
+        """Create an idle watchdog"""
+        self.interval = interval
+        self._deadlines: Set[UploadDeadline] = set()
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._closed = False
+
+    def watch(self, deadline: UploadDeadline) -> None:
+        """Start monitoring a deadline"""
+        with self._cond:
+            self._deadlines.add(deadline)
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="tflink-watchdog", daemon=True
+                )
+                self._thread.start()
+            self._cond.notify()
+
+    def unwatch(self, deadline: UploadDeadline) -> None:
+        """Stop monitoring a deadline"""
+        with self._cond:
+            self._deadlines.discard(deadline)
+
+    def _next_wait(self, now: float) -> float:
+        """Seconds until the earliest possible expiry (lock held)"""
+        wait = self.interval
+        for deadline in self._deadlines:
+            if deadline.expires is not None:
+                wait = min(wait, deadline.expires - now)
+            stall_at = deadline.stall_at
+            if stall_at is not None:
+                wait = min(wait, stall_at - now)
+        return max(0.01, wait)
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                if self._closed:
+                    return
+                now = time.monotonic()
+                expired = []
+                for deadline in self._deadlines:
+                    reason = deadline.check(now)
+                    if reason is not None:
+                        expired.append((deadline, reason))
+                for deadline, _ in expired:
+                    self._deadlines.discard(deadline)
+
+            for deadline, reason in expired:
+                deadline.abort(reason)
+
+            with self._cond:
+                if self._closed:
+                    return
+                if self._deadlines:
+                    self._cond.wait(self._next_wait(time.monotonic()))
+                else:
+                    self._cond.wait()
+
+    def close(self) -> None:
+        """Stop the watchdog thread; a later watch() starts a new one"""
+        with self._cond:
+            thread = self._thread
+            self._closed = True
+            self._cond.notify()
+        if thread is not None and thread is not threading.current_thread():
+            thread.join()
+        with self._cond:
+            self._thread = None
+            self._closed = False
+
+
+class AbortHandle:
+    """
+    Lets another thread abort an upload attempt at any point
+
+    The attempt binds each request's UploadDeadline to the handle; aborting
+    shuts down the socket of the request in flight, and a request bound after
+    the abort fails as soon as it connects.
+    """
+
+    def __init__(self):
+        """Create a handle that has not been aborted"""
+        self.reason: Optional[str] = None
+        self._deadline: Optional[UploadDeadline] = None
+        self._lock = threading.Lock()
+
+    @property
+    def aborted(self) -> bool:
+        return self.reason is not None
+
+    def bind(self, deadline: UploadDeadline) -> None:
+        """Make deadline the request aborted by abort()"""
+        with self._lock:
+            self._deadline = deadline
+            reason = self.reason
+        if reason is not None:
+            deadline.abort(reason)
+
+    def abort(self, reason: str) -> None:
+        """Abort the bound request, and any request bound later"""
+        with self._lock:
+            if self.reason is not None:
+                return
+            self.reason = reason
+            deadline = self._deadline
+        if deadline is not None:
+            deadline.abort(reason)
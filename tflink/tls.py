@@ -0,0 +1,434 @@
+"""
+Persistent TLS session cache for resuming sessions across processes
+"""
+
+import atexit
+import base64
+import ctypes
+import json
+import os
+import ssl
+import sys
+import sysconfig
+import tempfile
+import threading
+import time
+import weakref
+from pathlib import Path
+from typing import Callable, Dict, Optional, Union
+
+try:
+    import _ssl
+except ImportError:  # pragma: no cover - Python built without ssl
+    _ssl = None
+
+
+# Interpreters whose PySSLSession and PySSLSocket layouts _OpenSSL reads:
+# release builds of CPython with the GIL, linked against OpenSSL 1.1 or 3
+_TESTED_PYTHONS = ((3, 8), (3, 9), (3, 10), (3, 11), (3, 12), (3, 13))
+_TESTED_OPENSSL = ((1, 1), (3, 0), (3, 1), (3, 2), (3, 3), (3, 4), (3, 5))
+
+
+def _unsupported_reason() -> Optional[str]:
+    """Why session export cannot be used in this interpreter, or None if it can"""
+    if sys.implementation.name != 'cpython' or _ssl is None:
+        return "TLS session export needs CPython's _ssl module"
+    if sys.version_info[:2] not in _TESTED_PYTHONS:
+        return f"TLS session export is not tested on Python {sys.version_info[0]}.{sys.version_info[1]}"
+    if hasattr(sys, 'gettotalrefcount') or sysconfig.get_config_var('Py_GIL_DISABLED'):
+        return "TLS session export is not tested on debug or free-threaded builds"
+    if not ssl.OPENSSL_VERSION.startswith('OpenSSL ') or \
+            tuple(ssl.OPENSSL_VERSION_INFO[:2]) not in _TESTED_OPENSSL:
+        return f"TLS session export is not tested with {ssl.OPENSSL_VERSION}"
+    return None
+
+
+class _OpenSSL:
+    """
+    Minimal libssl binding through ctypes for (de)serialising sessions
+
+    The ssl module can reuse a session within one process but cannot export it.
+    This reaches the SSL_SESSION and SSL pointers held by CPython's ssl objects
+    and uses i2d_SSL_SESSION/d2i_SSL_SESSION to move sessions in and out of DER.
+    The pointers are read at fixed offsets, which a different object layout
+    would turn into a crash rather than an exception, so the binding refuses
+    to load outside the interpreters listed in _TESTED_PYTHONS and
+    _TESTED_OPENSSL.
+    """
+
+    def __init__(self):
+        reason = _unsupported_reason()
+        if reason is not None:
+            raise OSError(reason)
+
+        lib = ctypes.CDLL(_ssl.__file__)
+        vp = ctypes.c_void_p
+
+        self.i2d_SSL_SESSION = lib.i2d_SSL_SESSION
+        self.i2d_SSL_SESSION.argtypes = [vp, vp]
+        self.i2d_SSL_SESSION.restype = ctypes.c_int
+        self.d2i_SSL_SESSION = lib.d2i_SSL_SESSION
+        self.d2i_SSL_SESSION.argtypes = [vp, vp, ctypes.c_long]
+        self.d2i_SSL_SESSION.restype = vp
+        self.SSL_SESSION_free = lib.SSL_SESSION_free
+        self.SSL_SESSION_free.argtypes = [vp]
+        self.SSL_SESSION_get_id = lib.SSL_SESSION_get_id
+        self.SSL_SESSION_get_id.argtypes = [vp, ctypes.POINTER(ctypes.c_uint)]
+        self.SSL_SESSION_get_id.restype = vp
+        self.SSL_SESSION_get_time = lib.SSL_SESSION_get_time
+        self.SSL_SESSION_get_time.argtypes = [vp]
+        self.SSL_SESSION_get_time.restype = ctypes.c_long
+        self.SSL_SESSION_get_timeout = lib.SSL_SESSION_get_timeout
+        self.SSL_SESSION_get_timeout.argtypes = [vp]
+        self.SSL_SESSION_get_timeout.restype = ctypes.c_long
+        self.SSL_SESSION_is_resumable = lib.SSL_SESSION_is_resumable
+        self.SSL_SESSION_is_resumable.argtypes = [vp]
+        self.SSL_set_session = lib.SSL_set_session
+        self.SSL_set_session.argtypes = [vp, vp]
+        self.SSL_get_fd = lib.SSL_get_fd
+        self.SSL_get_fd.argtypes = [vp]
+
+        # Both PySSLSession and PySSLSocket start with PyObject_HEAD; the
+        # session keeps SSL_SESSION* next, the socket keeps SSL* after a weakref
+        self._session_offset = object.__basicsize__
+        self._ssl_offset = object.__basicsize__ + ctypes.sizeof(vp)
+
+    def _session_id(self, pointer: int) -> bytes:
+        length = ctypes.c_uint()
+        data = self.SSL_SESSION_get_id(pointer, ctypes.byref(length))
+        return ctypes.string_at(data, length.value) if data else b''
+
+    def export(self, session: ssl.SSLSession) -> Optional[Dict[str, object]]:
+        """Return {'der', 'id', 'expires'} for a resumable session, else None"""
+        pointer = ctypes.c_void_p.from_address(id(session) + self._session_offset).value
+        if not pointer or self._session_id(pointer) != session.id:
+            raise OSError("Unexpected SSLSession layout")
+        if not self.SSL_SESSION_is_resumable(pointer):
+            return None
+
+        length = self.i2d_SSL_SESSION(pointer, None)
+        if length <= 0:
+            return None
+        buffer = ctypes.create_string_buffer(length)
+        cursor = ctypes.c_void_p(ctypes.addressof(buffer))
+        self.i2d_SSL_SESSION(pointer, ctypes.byref(cursor))
+        return {
+            'der': buffer.raw,
+            'id': session.id,
+            'expires': self.SSL_SESSION_get_time(pointer) + self.SSL_SESSION_get_timeout(pointer),
+        }
+
+    def offer(self, sock: ssl.SSLSocket, der: bytes) -> bool:
+        """Attach a serialised session to a socket before its handshake"""
+        ssl_pointer = ctypes.c_void_p.from_address(id(sock._sslobj) + self._ssl_offset).value
+        if not ssl_pointer or self.SSL_get_fd(ssl_pointer) != sock.fileno():
+            raise OSError("Unexpected SSLSocket layout")
+
+        source = ctypes.create_string_buffer(der, len(der))
+        cursor = ctypes.c_void_p(ctypes.addressof(source))
+        session = self.d2i_SSL_SESSION(None, ctypes.byref(cursor), len(der))
+        if not session:
+            return False
+        try:
+            if not self.SSL_SESSION_is_resumable(session):
+                return False
+            return self.SSL_set_session(ssl_pointer, session) == 1
+        finally:
+            # SSL_set_session holds its own reference
+            self.SSL_SESSION_free(session)
+
+
+_openssl: Optional[_OpenSSL] = None
+_openssl_error: Optional[str] = None
+_openssl_lock = threading.Lock()
+
+# Caches alive in this process, saved by one exit hook
+_caches: 'weakref.WeakSet[TLSSessionCache]' = weakref.WeakSet()
+
+
+def _save_all_at_exit() -> None:
+    for cache in list(_caches):
+        cache._save_at_exit()
+
+
+atexit.register(_save_all_at_exit)
+
+
+def _binding() -> Optional[_OpenSSL]:
+    """Load the libssl binding once; None if it is unusable here"""
+    global _openssl, _openssl_error
+    with _openssl_lock:
+        if _openssl is None and _openssl_error is None:
+            try:
+                _openssl = _OpenSSL()
+            except (OSError, AttributeError) as e:
+                _openssl_error = str(e)
+        return _openssl
+
+
+class TLSSessionCache:
+    """
+    TLS sessions kept for resumption, optionally persisted for new processes
+
+    A resumed handshake skips certificate exchange and key agreement, saving a
+    round trip and most of the handshake CPU. Sessions are keyed by host, port
+    and trust settings, and are only stored for connections that verified the
+    server certificate, so a session never lets a connection skip verification
+    it would otherwise perform.
+
+    By default sessions stay in memory and are reused through the ssl module
+    (``SSLSocket.session``) by later connections of this process. With
+    ``export_sessions=True`` they are also written to ``path``, so short-lived
+    CLI and cron runs resume the previous run's session. The ssl module cannot
+    export sessions, so this reads them out of OpenSSL through ctypes; it is
+    only enabled on CPython 3.8-3.13 release builds linked against OpenSSL 1.1
+    or 3, and ``enabled`` is False elsewhere.
+
+    Stale sessions are harmless: expired entries are dropped when loading, a
+    server that no longer accepts a ticket simply performs a full handshake
+    (whose new session replaces the old one), and an entry whose handshake
+    fails is discarded before the connection is retried without it.
+
+    The file holds session secrets and is written with 0600 permissions. It is
+    rewritten atomically, merging entries saved by other processes.
+
+    Args:
+        path: Cache file (created on first save; only used with export_sessions)
+        max_entries: Most sessions kept; the ones expiring first are dropped
+        export_sessions: Persist sessions to path through the ctypes binding
+            (default: False, sessions are only reused within this process)
+
+    Example:
+        cache = TLSSessionCache('~/.cache/tflink/tls-sessions.json', export_sessions=True)
+        client = TFLinkClient(tls_session_cache=cache)
+    """
+
+    VERSION = 1
+
+    def __init__(
+        self,
+        path: Union[str, os.PathLike],
+        max_entries: int = 256,
+        export_sessions: bool = False
+    ):
+        """Load previously saved sessions when exporting them"""
+        self.path = Path(path).expanduser()
+        self.max_entries = max_entries
+        self.export_sessions = export_sessions
+        self._lock = threading.Lock()
+        self._entries: Dict[str, dict] = self._read() if self.enabled else {}
+        # Sessions of this process, reused through the ssl module; a session
+        # only resumes on sockets of the context it was created by
+        self._sessions: Dict[str, ssl.SSLSession] = {}
+        self._contexts: Dict[str, ssl.SSLContext] = {}
+        # Keys whose session was captured by this process
+        self._fresh: set = set()
+        self._dirty = False
+        self.offered = 0
+        self.resumed = 0
+        self.captured = 0
+        _caches.add(self)
+
+    @property
+    def enabled(self) -> bool:
+        """True if sessions are persisted (export_sessions and a supported interpreter)"""
+        return self.export_sessions and _binding() is not None
+
+    def context(self, key: str, build: Callable[[], ssl.SSLContext]) -> ssl.SSLContext:
+        """Return the SSLContext connections for key share, building it once"""
+        with self._lock:
+            context = self._contexts.get(key)
+            if context is None:
+                context = self._contexts[key] = build()
+            return context
+
+    def _read(self) -> Dict[str, dict]:
+        """Read unexpired entries from the cache file, ignoring a corrupt file"""
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        if not isinstance(data, dict) or data.get('version') != self.VERSION:
+            return {}
+
+        now = time.time()
+        entries = {}
+        for key, entry in (data.get('sessions') or {}).items():
+            try:
+                if entry['expires'] > now:
+                    base64.b64decode(entry['session'], validate=True)
+                    entries[key] = entry
+            except (KeyError, TypeError, ValueError):
+                continue
+        return entries
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Return the DER session stored under key, if it has not expired"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry['expires'] <= time.time():
+                del self._entries[key]
+                self._dirty = True
+                return None
+            return base64.b64decode(entry['session'])
+
+    def discard(self, key: str) -> None:
+        """Forget the session stored under key"""
+        with self._lock:
+            self._sessions.pop(key, None)
+            if self._entries.pop(key, None) is not None:
+                self._dirty = True
+                self._fresh.discard(key)
+
+    def _live_session(self, key: str) -> Optional[ssl.SSLSession]:
+        with self._lock:
+            session = self._sessions.get(key)
+            if session is not None and session.time + session.timeout <= time.time():
+                del self._sessions[key]
+                return None
+            return session
+
+    def offer(self, key: str, sock: ssl.SSLSocket) -> bool:
+        """
+        Attach the stored session for key to a socket that has not handshaken
+
+        Returns:
+            True if a session was offered to the server
+        """
+        session = self._live_session(key)
+        if session is not None:
+            try:
+                sock.session = session
+            except (ValueError, ssl.SSLError):
+                # Created by another context, e.g. before a fork
+                session = None
+        if session is not None:
+            offered = True
+        else:
+            der = self.get(key) if self.enabled else None
+            if der is None:
+                return False
+            try:
+                offered = _binding().offer(sock, der)
+            except OSError:
+                return False
+        if not offered:
+            self.discard(key)
+            return False
+        with self._lock:
+            self.offered += 1
+        return True
+
+    def capture(self, key: str, sock: ssl.SSLSocket) -> None:
+        """
+        Store the session of an established connection
+
+        Cheap when nothing changed: the session is only serialised when its ID
+        differs from the stored one. The first session captured for a key in
+        this process is written to disk straight away; later ones are saved by
+        save(), which the client calls on close() and at interpreter exit.
+        """
+        session = getattr(sock, 'session', None)
+        if session is None:
+            return
+        with self._lock:
+            known = self._sessions.get(key)
+            if known is None or known.id != session.id:
+                self._sessions[key] = session
+                if not self.enabled:
+                    self.captured += 1
+            entry = self._entries.get(key)
+            if entry is not None and entry.get('id') == session.id.hex():
+                return
+
+        if not self.enabled:
+            return
+        try:
+            exported = _binding().export(session)
+        except OSError:
+            return
+        if exported is None:
+            return
+
+        with self._lock:
+            first = key not in self._fresh
+            self._entries[key] = {
+                'session': base64.b64encode(exported['der']).decode('ascii'),
+                'id': exported['id'].hex(),
+                'expires': exported['expires'],
+            }
+            self._fresh.add(key)
+            self._dirty = True
+            self.captured += 1
+        if first:
+            self.save()
+
+    def record_handshake(self, resumed: bool) -> None:
+        """Count a handshake that offered a stored session"""
+        if resumed:
+            with self._lock:
+                self.resumed += 1
+
+    def save(self) -> None:
+        """
+        Write the cache file if anything changed
+
+        Entries written meanwhile by other processes are kept unless this
+        process holds a session for the same key that expires later.
+        """
+        with self._lock:
+            if not self._dirty or not self.enabled:
+                return
+            entries = dict(self._entries)
+            self._dirty = False
+
+        merged = self._read()
+        for key, entry in entries.items():
+            current = merged.get(key)
+            if current is None or entry['expires'] >= current['expires']:
+                merged[key] = entry
+        if len(merged) > self.max_entries:
+            keep = sorted(merged, key=lambda k: merged[k]['expires'])[-self.max_entries:]
+            merged = {key: merged[key] for key in keep}
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=str(self.path.parent), prefix='.tls-sessions-')
+        try:
+            # mkstemp creates the file readable by its owner only
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump({'version': self.VERSION, 'sessions': merged}, f)
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            with self._lock:
+                self._dirty = True
+            raise
+
+    def _save_at_exit(self) -> None:
+        try:
+            self.save()
+        except OSError:
+            pass
+
+    def stats(self) -> dict:
+        """Return counters for offered, resumed and captured sessions"""
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'offered': self.offered,
+                'resumed': self.resumed,
+                'captured': self.captured,
+            }
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __repr__(self) -> str:
+        """String representation of the cache"""
+        return f"TLSSessionCache('{self.path}', entries={len(self._entries)})"
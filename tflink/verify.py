@@ -0,0 +1,177 @@
+"""
+Concurrent verification of download links
+"""
+
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Iterable, List, Optional, Sequence, Tuple, Union
+
+import requests
+
+from tflink.models import UploadResult
+
+if TYPE_CHECKING:
+    from tflink.client import TFLinkClient
+
+
+@dataclass
+class LinkCheck:
+    """
+    Outcome of verifying one download link
+
+    Attributes:
+        result: The UploadResult whose link was checked
+        ok: True if the link resolved and its Content-Length matches result.size
+        status_code: Final HTTP status, or None if no response was received
+        content_length: Content-Length reported by the server, if any
+        error: Description of the failure, None on success
+        attempts: Number of requests made
+        elapsed: Seconds spent on all attempts
+    """
+    result: UploadResult
+    ok: bool
+    status_code: Optional[int] = None
+    content_length: Optional[int] = None
+    error: Optional[str] = None
+    attempts: int = 0
+    elapsed: float = 0.0
+
+
+class LinkVerifier:
+    """
+    Checks download links concurrently over the client's connection pool
+
+    Each link gets a HEAD request (falling back to a body-less GET if HEAD is
+    not allowed). A link passes when the final response is 2xx and its
+    Content-Length equals ``UploadResult.size``. Connection errors, timeouts and
+    ``retry_statuses`` are retried with exponential backoff.
+
+    Args:
+        client: TFLinkClient whose connection pool is reused
+        max_workers: Number of concurrent checks (default: 8)
+        timeout: Per-request timeout in seconds, or a (connect, read) tuple
+            (default: (5, 15))
+        retries: Additional attempts after the first one (default: 2)
+        backoff: Delay before the first retry, doubled for each further one
+            (default: 0.5)
+        retry_statuses: Statuses worth retrying; 404 is included because a fresh
+            link may not be visible on every edge yet
+
+    Example:
+        with LinkVerifier(client) as verifier:
+            checks = verifier.verify_many(results)
+            broken = [c.result.download_link for c in checks if not c.ok]
+    """
+
+    DEFAULT_RETRY_STATUSES = (404, 429, 500, 502, 503, 504)
+
+    def __init__(
+        self,
+        client: 'TFLinkClient',
+        max_workers: int = 8,
+        timeout: Union[float, Tuple[float, float]] = (5, 15),
+        retries: int = 2,
+        backoff: float = 0.5,
+        retry_statuses: Sequence[int] = DEFAULT_RETRY_STATUSES
+    ):
+        """Create the verifier's thread pool"""
+        if max_workers < 1:
+            raise ValueError("max_workers must be at least 1")
+        if retries < 0:
+            raise ValueError("retries must not be negative")
+
+        self.client = client
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.retry_statuses = frozenset(retry_statuses)
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="tflink-verify"
+        )
+
+    def _request(self, url: str) -> requests.Response:
+        """Fetch headers for url, using GET when the server rejects HEAD"""
+        session = self.client._session
+        response = session.head(url, allow_redirects=True, timeout=self.timeout)
+        if response.status_code == 405:
+            response = session.get(url, stream=True, allow_redirects=True, timeout=self.timeout)
+            response.close()
+        return response
+
+    def verify(self, result: UploadResult, link: Optional[str] = None) -> LinkCheck:
+        """
+        Verify a single download link (blocking)
+
+        Args:
+            result: UploadResult to check
+            link: URL to check (default: result.download_link)
+        """
+        url = link or result.download_link
+        check = LinkCheck(result=result, ok=False)
+        started = time.monotonic()
+
+        for attempt in range(self.retries + 1):
+            if attempt:
+                time.sleep(self.backoff * (2 ** (attempt - 1)))
+            check.attempts += 1
+
+            try:
+                response = self._request(url)
+            except requests.exceptions.RequestException as e:
+                check.status_code = None
+                check.error = f"Request failed: {e}"
+                continue
+
+            check.status_code = response.status_code
+            length = response.headers.get('Content-Length')
+            check.content_length = int(length) if length and length.isdigit() else None
+
+            if response.status_code in self.retry_statuses:
+                check.error = f"HTTP {response.status_code}"
+                continue
+            if not response.ok:
+                check.error = f"HTTP {response.status_code}"
+                break
+            if check.content_length != result.size:
+                check.error = (
+                    f"Content-Length {check.content_length} does not match "
+                    f"uploaded size {result.size}"
+                )
+                break
+
+            check.ok = True
+            check.error = None
+            break
+
+        check.elapsed = time.monotonic() - started
+        return check
+
+    def submit(self, result: UploadResult, link: Optional[str] = None) -> Future:
+        """Schedule a check and return a Future resolving to its LinkCheck"""
+        return self._executor.submit(self.verify, result, link)
+
+    def verify_many(self, results: Iterable[UploadResult]) -> List[LinkCheck]:
+        """
+        Verify many links concurrently
+
+        Returns:
+            List of LinkCheck objects in the same order as results
+        """
+        futures = [self.submit(result) for result in results]
+        return [future.result() for future in futures]
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Stop the verifier's worker threads"""
+        self._executor.shutdown(wait=wait)
+
+    def __enter__(self) -> 'LinkVerifier':
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.shutdown(wait=True)
+
+    def __repr__(self) -> str:
+        """String representation of the verifier"""
+        return f"LinkVerifier(max_workers={self.max_workers}, retries={self.retries})"
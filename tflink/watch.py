@@ -0,0 +1,501 @@
+"""
+Spool-directory watcher that uploads files as soon as they are complete
+"""
+
+import ctypes
+import ctypes.util
+import fnmatch
+import os
+import select
+import shutil
+import struct
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING, Callable, Deque, Dict, Optional, Tuple, Union
+
+from tflink.engine import UploadEngine
+from tflink.journal import UploadJournal
+from tflink.models import UploadResult
+
+if TYPE_CHECKING:
+    from tflink.client import TFLinkClient
+
+
+# inotify constants from <sys/inotify.h>
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_TO = 0x00000080
+_IN_Q_OVERFLOW = 0x00004000
+_IN_ISDIR = 0x40000000
+_IN_NONBLOCK = 0o4000
+_IN_CLOEXEC = 0o2000000
+_EVENT_HEADER = struct.Struct('iIII')
+
+
+@dataclass
+class SpoolEvent:
+    """
+    Outcome of uploading one file picked up by a SpoolWatcher
+
+    Attributes:
+        file_path: Path of the uploaded file
+        result: UploadResult if the upload succeeded, otherwise None
+        error: Exception raised by the upload, otherwise None
+        latency: Seconds from detecting the completed file to receiving its link
+    """
+    file_path: Path
+    result: Optional[UploadResult]
+    error: Optional[BaseException]
+    latency: float
+
+    @property
+    def ok(self) -> bool:
+        """True if the file was uploaded successfully"""
+        return self.result is not None
+
+
+class _Inotify:
+    """Minimal inotify binding through ctypes (Linux only)"""
+
+    def __init__(self, directory: Path):
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        fd = libc.inotify_init1(_IN_NONBLOCK | _IN_CLOEXEC)
+        if fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+
+        wd = libc.inotify_add_watch(
+            fd, os.fsencode(str(directory)), _IN_CLOSE_WRITE | _IN_MOVED_TO
+        )
+        if wd < 0:
+            errno = ctypes.get_errno()
+            os.close(fd)
+            raise OSError(errno, f"inotify_add_watch failed for {directory}")
+
+        self.fd = fd
+
+    def read(self, timeout: float) -> Tuple[list, bool]:
+        """
+        Wait up to timeout seconds for events
+
+        Returns:
+            Tuple of (file names closed after writing or moved in, overflowed)
+        """
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return [], False
+
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return [], False
+
+        names = []
+        overflowed = False
+        offset = 0
+        while offset + _EVENT_HEADER.size <= len(data):
+            _, mask, _, length = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            name = data[offset:offset + length].rstrip(b'\0')
+            offset += length
+
+            if mask & _IN_Q_OVERFLOW:
+                overflowed = True
+            elif name and not mask & _IN_ISDIR:
+                names.append(os.fsdecode(name))
+
+        return names, overflowed
+
+    def close(self) -> None:
+        """Release the inotify file descriptor"""
+        os.close(self.fd)
+
+
+class SpoolWatcher:
+    """
+    Watches a directory and uploads every completed file that appears in it
+
+    On Linux the watcher uses inotify, so a file is uploaded as soon as the writer
+    closes it (or renames it into the directory). Elsewhere, or when
+    ``use_inotify=False``, the directory is polled and a file counts as complete
+    once its size and mtime have not changed for ``settle_time`` seconds. Files
+    that are already present at start-up always go through the settle check.
+
+    Detected files are submitted to an UploadEngine; when its bounded queue is
+    full the watcher blocks, which applies backpressure instead of growing an
+    unbounded backlog.
+
+    Args:
+        client: TFLinkClient used for the uploads
+        directory: Spool directory to watch
+        on_success: What to do with an uploaded file:
+            - "delete": remove it (default)
+            - "move": move it into ``done_dir``
+            - "record": leave it in place and remember it in ``journal``
+        done_dir: Destination directory for on_success="move"
+        journal: UploadJournal (or path to one) recording uploaded files; required
+            for on_success="record" to survive restarts
+        pattern: Glob pattern of file names to upload (default: "*")
+        max_workers: Number of concurrent uploads (default: 4)
+        max_queue: Maximum uploads waiting for a worker (default: 2 * max_workers)
+        settle_time: Seconds a polled file must stay unchanged (default: 1.0)
+        poll_interval: Seconds between directory scans or wake-ups (default: 0.5)
+        rescan_interval: Seconds between full rescans in inotify mode, which pick up
+            missed events and retry failed files (default: 30.0)
+        use_inotify: Force inotify on or off; None selects it when available
+        on_complete: Optional callback receiving a SpoolEvent for every upload
+
+    Example:
+        with SpoolWatcher(client, '/var/spool/outgoing', on_success='move',
+                          done_dir='/var/spool/sent') as watcher:
+            watcher.wait()
+    """
+
+    ON_SUCCESS_ACTIONS = ('delete', 'move', 'record')
+
+    def __init__(
+        self,
+        client: 'TFLinkClient',
+        directory: Union[str, Path],
+        on_success: str = 'delete',
+        done_dir: Optional[Union[str, Path]] = None,
+        journal: Optional[Union[str, Path, UploadJournal]] = None,
+        pattern: str = '*',
+        max_workers: int = 4,
+        max_queue: Optional[int] = None,
+        settle_time: float = 1.0,
+        poll_interval: float = 0.5,
+        rescan_interval: float = 30.0,
+        use_inotify: Optional[bool] = None,
+        on_complete: Optional[Callable[[SpoolEvent], None]] = None
+    ):
+        """Configure the watcher; call start() to begin watching"""
+        if on_success not in self.ON_SUCCESS_ACTIONS:
+            raise ValueError(
+                f"on_success must be one of {', '.join(self.ON_SUCCESS_ACTIONS)}, "
+                f"got {on_success!r}"
+            )
+        if on_success == 'move' and done_dir is None:
+            raise ValueError("done_dir is required when on_success='move'")
+
+        self.client = client
+        self.directory = Path(directory)
+        if not self.directory.is_dir():
+            raise ValueError(f"Spool directory does not exist: {self.directory}")
+
+        self.on_success = on_success
+        self.done_dir = Path(done_dir) if done_dir is not None else None
+        self.pattern = pattern
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.settle_time = settle_time
+        self.poll_interval = poll_interval
+        self.rescan_interval = rescan_interval
+        self.on_complete = on_complete
+
+        if use_inotify is None:
+            use_inotify = sys.platform.startswith('linux')
+        self.use_inotify = use_inotify
+
+        self._owns_journal = journal is not None and not isinstance(journal, UploadJournal)
+        self._journal = UploadJournal(journal) if self._owns_journal else journal
+
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._engine: Optional[UploadEngine] = None
+        self._inotify: Optional[_Inotify] = None
+
+        # name -> (size, mtime_ns, first time this signature was seen)
+        self._candidates: Dict[str, Tuple[int, int, float]] = {}
+        # name -> (size, mtime_ns) of files handed to the engine
+        self._submitted: Dict[str, Tuple[int, int]] = {}
+        # Uploads submitted but not yet finished; the journal is closed once
+        # this drops to zero after stop()
+        self._pending = 0
+        self._stopping = False
+
+        self._uploaded = 0
+        self._failed = 0
+        self._latencies: Deque[float] = deque(maxlen=1024)
+
+    def start(self) -> 'SpoolWatcher':
+        """Start watching in a background thread"""
+        if self._thread is not None:
+            raise RuntimeError("SpoolWatcher is already running")
+
+        if self.use_inotify:
+            try:
+                self._inotify = _Inotify(self.directory)
+            except (OSError, AttributeError):
+                # No inotify (non-Linux libc, exhausted watches): fall back to polling
+                self._inotify = None
+                self.use_inotify = False
+
+        self._engine = UploadEngine(
+            self.client, max_workers=self.max_workers, max_queue=self.max_queue
+        )
+        self._thread = threading.Thread(target=self._run, name="tflink-spool", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self, wait: bool = True) -> None:
+        """
+        Stop watching
+
+        Queued uploads are finished either way. With wait=False they finish in
+        the background, and the journal is closed (or flushed) once the last
+        one has been recorded.
+
+        Args:
+            wait: Finish the uploads already queued before returning (default: True)
+        """
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if self._engine is not None:
+            self._engine.shutdown(wait=wait)
+            self._engine = None
+        if self._inotify is not None:
+            self._inotify.close()
+            self._inotify = None
+        with self._lock:
+            self._stopping = True
+            drained = self._pending == 0
+        if drained:
+            self._release_journal()
+
+    def _release_journal(self) -> None:
+        """Close the journal if the watcher opened it, else flush it"""
+        if self._journal is not None:
+            if self._owns_journal:
+                self._journal.close()
+            else:
+                self._journal.flush()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Block until stop() is called; returns True if the watcher stopped"""
+        return self._stop.wait(timeout)
+
+    def _run(self) -> None:
+        """Main loop: collect completed files and hand them to the engine"""
+        self._scan()
+        last_scan = time.monotonic()
+
+        while not self._stop.is_set():
+            if self._inotify is not None:
+                names, overflowed = self._inotify.read(self.poll_interval)
+                detected_at = time.monotonic()
+                for name in names:
+                    self._candidates.pop(name, None)
+                    self._dispatch(name, detected_at)
+
+                if overflowed or detected_at - last_scan >= self.rescan_interval:
+                    self._scan()
+                    last_scan = detected_at
+                else:
+                    # Pre-existing files are still waiting for their settle check
+                    self._settle()
+            else:
+                self._stop.wait(self.poll_interval)
+                self._scan()
+
+    def _scan(self) -> None:
+        """Record size and mtime of every matching file and dispatch settled ones"""
+        now = time.monotonic()
+        seen = set()
+        try:
+            entries = list(os.scandir(self.directory))
+        except OSError:
+            return
+
+        for entry in entries:
+            name = entry.name
+            if not fnmatch.fnmatch(name, self.pattern):
+                continue
+            try:
+                if not entry.is_file(follow_symlinks=False):
+                    continue
+                stat = entry.stat(follow_symlinks=False)
+            except OSError:
+                continue
+
+            seen.add(name)
+            signature = (stat.st_size, stat.st_mtime_ns)
+            if self._submitted.get(name) == signature:
+                continue
+
+            previous = self._candidates.get(name)
+            if previous is None or previous[:2] != signature:
+                self._candidates[name] = (signature[0], signature[1], now)
+
+        for name in list(self._candidates):
+            if name not in seen:
+                del self._candidates[name]
+        with self._lock:
+            # Files recorded in place and since removed would otherwise be
+            # remembered for as long as the watcher runs
+            for name in [name for name in self._submitted if name not in seen]:
+                del self._submitted[name]
+
+        self._settle(now)
+
+    def _settle(self, now: Optional[float] = None) -> None:
+        """Dispatch candidates whose size and mtime have stopped changing"""
+        if now is None:
+            now = time.monotonic()
+        for name, (size, mtime_ns, since) in list(self._candidates.items()):
+            if now - since < self.settle_time:
+                continue
+            # Between scans (inotify mode) nothing else notices a file that
+            # is still growing, so look again before uploading it
+            try:
+                stat = os.stat(self.directory / name)
+            except OSError:
+                del self._candidates[name]
+                continue
+            if (stat.st_size, stat.st_mtime_ns) != (size, mtime_ns):
+                self._candidates[name] = (stat.st_size, stat.st_mtime_ns, now)
+                continue
+            del self._candidates[name]
+            self._dispatch(name, now)
+
+    def _dispatch(self, name: str, detected_at: float) -> None:
+        """Submit one completed file to the upload engine"""
+        if not fnmatch.fnmatch(name, self.pattern):
+            return
+
+        path = self.directory / name
+        try:
+            stat = path.stat()
+        except OSError:
+            return
+        signature = (stat.st_size, stat.st_mtime_ns)
+        # Journal records also carry the inode, so a new file that reuses the
+        # name of one uploaded earlier is not mistaken for it
+        file_id = (stat.st_size, stat.st_mtime_ns, stat.st_ino)
+
+        with self._lock:
+            if self._submitted.get(name) == signature:
+                return
+            self._submitted[name] = signature
+
+        if self._journal is not None and self._journal.is_completed(path, file_id):
+            # Uploaded before a restart, possibly without being disposed of
+            try:
+                self._dispose(name, path)
+            except OSError:
+                pass
+            return
+
+        if self._journal is not None:
+            self._journal.record_start(path)
+
+        with self._lock:
+            self._pending += 1
+        # Blocks while the engine queue is full: this is the backpressure point
+        try:
+            future = self._engine.submit(path)
+        except BaseException:
+            with self._lock:
+                self._pending -= 1
+            raise
+        future.add_done_callback(
+            lambda f: self._finish(name, path, file_id, detected_at, f)
+        )
+
+    def _dispose(self, name: str, path: Path) -> None:
+        """Apply on_success to an uploaded file"""
+        if self.on_success == 'delete':
+            path.unlink()
+        elif self.on_success == 'move':
+            self.done_dir.mkdir(parents=True, exist_ok=True)
+            shutil.move(str(path), str(self.done_dir / name))
+
+    def _finish(
+        self,
+        name: str,
+        path: Path,
+        file_id: Tuple[int, int, int],
+        detected_at: float,
+        future: Future
+    ) -> None:
+        """Dispose of an uploaded file and report the outcome"""
+        latency = time.monotonic() - detected_at
+        error = future.exception()
+        result = None if error is not None else future.result()
+
+        if result is not None:
+            if self._journal is not None:
+                self._journal.record_done(path, result, file_id)
+            try:
+                self._dispose(name, path)
+            except OSError as e:
+                error = e
+
+            with self._lock:
+                self._uploaded += 1
+                self._latencies.append(latency)
+                if self.on_success != 'record':
+                    self._submitted.pop(name, None)
+        else:
+            if self._journal is not None:
+                self._journal.record_failed(path, error)
+            with self._lock:
+                self._failed += 1
+                # Forget the file so the next scan retries it
+                if self._submitted.get(name) == file_id[:2]:
+                    del self._submitted[name]
+
+        try:
+            if self.on_complete is not None:
+                self.on_complete(SpoolEvent(path, result, error, latency))
+        finally:
+            with self._lock:
+                self._pending -= 1
+                drained = self._stopping and self._pending == 0
+            if drained:
+                self._release_journal()
+
+    def stats(self) -> dict:
+        """
+        Return counters and close-to-link latency for recent uploads
+
+        Returns:
+            Dictionary with uploaded, failed, queued, latency_avg, latency_p50,
+            latency_p99 and latency_max (latencies in seconds over the last 1024
+            uploads, None before the first upload)
+        """
+        with self._lock:
+            latencies = sorted(self._latencies)
+            stats = {
+                'uploaded': self._uploaded,
+                'failed': self._failed,
+                'queued': self._engine.qsize() if self._engine is not None else 0,
+                'latency_avg': None,
+                'latency_p50': None,
+                'latency_p99': None,
+                'latency_max': None,
+            }
+
+        if latencies:
+            stats['latency_avg'] = sum(latencies) / len(latencies)
+            stats['latency_p50'] = latencies[len(latencies) // 2]
+            stats['latency_p99'] = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+            stats['latency_max'] = latencies[-1]
+        return stats
+
+    def __enter__(self) -> 'SpoolWatcher':
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.stop(wait=True)
+
+    def __repr__(self) -> str:
+        """String representation of the watcher"""
+        mode = "inotify" if self.use_inotify else "polling"
+        return f"SpoolWatcher(directory='{self.directory}', mode='{mode}')"